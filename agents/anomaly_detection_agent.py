@@ -1,12 +1,12 @@
-from autogen_agentchat.agents import AssistantAgent
-
 def create_anomaly_detection_agent(model_client):
     """Creates the Anomaly Detection Agent."""
+    from autogen_agentchat.agents import AssistantAgent
+
     system_message = """
-You are a Security and Performance Anomaly Detector. You will be provided with the complete execution logs from the migration process.
-Your task is to parse these logs and identify any anomalies.
-Look for patterns such as an excessive number of connection errors, unusually long query execution times, repeated failed attempts to dump a specific table, or any security warnings.
-Report any identified anomalies with the corresponding log excerpts for further investigation.
+You are a Security and Performance Anomaly Detector. The migration's execution logs are analysed as they are written, so you do not need the complete logs.
+Call the `get_log_anomaly_digest` tool: it returns counters of connection errors, retries, per-table failures and security warnings (in total and over the recent window), duration percentiles, and the anomalies already flagged, each with a short log excerpt.
+Look for patterns such as an excessive number of connection errors, unusually long query execution times (latency outliers and high p99 values), repeated failed attempts to dump a specific table, or any security warnings.
+Report any identified anomalies with the corresponding log excerpts from the digest for further investigation.
 Conclude your response with the word 'TERMINATE' after generating the report.
 """
     anomaly_detection_agent = AssistantAgent(
@@ -1,10 +1,13 @@
-from autogen_agentchat.agents import AssistantAgent
-import yaml
+from mcp_server.app_config import load_config
 
-def create_data_migration_agent(model_client, code_executor):
-    """Creates the Data Migration Agent."""
-    with open('../config.yaml', 'r') as f:
-        config = yaml.safe_load(f)
+def create_data_migration_agent(model_client, code_executor, databases: list = None):
+    """
+    Creates the Data Migration Agent. With several `databases`, the agent migrates them together
+    as one fleet instead of following the single-database strategies.
+    """
+    from autogen_agentchat.agents import AssistantAgent
+
+    config = load_config()
 
     gcs_threshold = config['migration_strategies']['gcs_import_threshold_gb']
     dms_threshold = config['migration_strategies']['dms_threshold_gb']
@@ -12,18 +15,25 @@ def create_data_migration_agent(model_client, code_executor):
     system_message = f"""
 You are the Data Migration Conductor, a specialist in migrating MySQL databases to GCP. Your process is strict and methodical.
 
-1.  **Assess**: Your first and only first action is to call the `db_metadata` resource to get the database size.
-2.  **Decide**: Based on the database size, you MUST select one of the following strategies:
+1.  **Assess**: Your first and only first action is to call the `plan_migration` tool. It returns the database size, the strategy with the lowest estimated duration, and the thread count, chunk size and table order to use.
+2.  **Decide**: Use the strategy from the plan. You must select one of the three migration strategies below; only if `plan_migration` is unavailable, call the `db_metadata` resource and decide by size:
     - If size < {gcs_threshold} GB: Use the 'GCS Import' strategy.
     - If {gcs_threshold} GB <= size < {dms_threshold} GB: Use the 'GCP DMS' strategy.
     - If size >= {dms_threshold} GB: Use the 'Mydumper/Myloader' strategy.
+    Pass the plan's `threads` and `chunk_size_mb` to the export tools instead of their defaults, and process tables in the plan's `table_order`.
+    For a rehearsal or re-sync into a target that already holds an earlier run's data, call `plan_incremental_migration` with that run's id and then `run_checkpointed_export` with `baseline_run_id` set to it, so only the tables and chunks that changed are migrated and validated.
 3.  **Execute**:
-    - **For GCS Import**: Call the `run_gcs_dump` tool for each table. Then, use the code executor to run `gcloud sql import sql` for each dumped file.
+    - **For GCS Import**: Call the `run_parallel_gcs_dump` tool once; it dumps every table in parallel, largest first, and returns a per-table result. If the source serves production traffic, pass `adaptive: true` so concurrency follows the source's load. Use `run_gcs_dump` only to retry an individual table. Then, use the code executor to run `gcloud sql import sql` for each dumped file. For faster imports, export with `run_delimited_export` instead and load the tab-separated chunks with `run_pipelined_load` (LOAD DATA), rather than replaying INSERT statements.
     - **For GCP DMS**: Use the code executor to run the `run_dms_migration.sh` script with the necessary parameters.
-    - **For Mydumper/Myloader**: Call the `run_mydumper_export` tool. Then, use the code executor to run the `run_myloader.sh` script.
-4.  **Report**: Log every command you execute and every decision you make. Upon completion of your chosen strategy, output a summary of the actions taken and the final status. Conclude your response with the word 'TERMINATE'.
+    - **For Mydumper/Myloader**: Start the export with `start_background_job` (tool `run_mydumper_export`, with `adaptive: true` if the source serves production traffic, passing `gcs_bucket` and `gcs_path` so chunk files are uploaded while the dump runs, `delete_local: true` if local disk is short, and a `run_id`, so that after a failure the same call re-dumps only the unfinished tables) and poll `get_job_status` until the job has succeeded; use `cancel_job` if it must be stopped. Then load the dump with `start_background_job` (tool `run_pipelined_load`, with the same bucket and path, and `defer_indexes: true` when tables carry many secondary indexes), which loads each chunk as it is downloaded; fall back to running the `run_myloader.sh` script with the code executor only if that tool fails. After the load, start `start_background_job` with tool `run_binlog_cdc` and arguments `{"run_id": ..., "metadata_file_path": "<output_path>/metadata"}` so changes made on the source during the dump and load are replicated; poll `get_replication_lag` and report cutover readiness once `lag_seconds` stays near zero.
+4.  **Stage changes**: Call the `notify_stage_change` tool when you start and when you finish executing the chosen strategy so cached catalog results are refreshed.
+5.  **Report**: Log every command you execute and every decision you make. Upon completion of your chosen strategy, output a summary of the actions taken and the final status. Conclude your response with the word 'TERMINATE'.
 
 You will be given the user's encryption preference. If it is 'legacy', you must mention in your final report that Customer-Managed Encryption Keys (CMEK) should be configured on the target Cloud SQL instance.
+"""
+    if databases and len(databases) > 1:
+        system_message += f"""
+**Fleet mode**: this run migrates {len(databases)} source databases: {', '.join(databases)}. Instead of the per-database strategies above, start `start_background_job` with tool `run_fleet_migration` and arguments `{{"fleet_id": ..., "databases": [...], "gcs_bucket": ..., "gcs_path": ...}}`; it migrates every database concurrently, smallest first, under one shared budget of export threads, upload bandwidth and import slots. Poll `get_fleet_progress` and `get_job_status` until the job has finished, and report each database's status, with any failed database's error.
 """
 
     data_migration_agent = AssistantAgent(
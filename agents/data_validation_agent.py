@@ -1,17 +1,25 @@
-from autogen_agentchat.agents import AssistantAgent
+def create_data_validation_agent(model_client, code_executor, tables: list = None, name: str = "Data_Validation_Agent"):
+    """
+    Creates the Data Validation Agent. With `tables`, the agent validates only that group of
+    tables, so several validation agents can run side by side.
+    """
+    from autogen_agentchat.agents import AssistantAgent
 
-def create_data_validation_agent(model_client, code_executor):
-    """Creates the Data Validation Agent."""
     system_message = """
 You are a Data Validation Auditor. Your mission is to ensure perfect data integrity after migration.
 For every table identified by the Schema Agent, you will perform two checks.
-First, use the `get_table_row_count` tool on the source (via MCP) and run a script to get the row count on the target (via code executor) and compare the results.
-Second, use the `run_checksum` tool on the source (via MCP) and run a script to get the checksum on the target (via code executor) and compare the checksums.
+First, call the `get_table_size_estimates` tool once with every table in `exact_count_tables` to get the source row counts, then run a script to get the row counts on the target (via code executor) and compare the results.
+Second, use the `run_chunked_validation` tool, which checksums the table on both source and target in parallel primary-key chunks and returns only the mismatching row ranges. Fall back to the `run_checksum` tool on the source (via MCP) and a script for the checksum on the target (via code executor) only if chunked validation is unavailable.
+For very large tables in a rehearsal run, use the `run_sampling_validation` tool with `escalate` set to true instead: it compares a random sample of key ranges and reports the mismatch rate with a confidence interval, and runs the full chunked validation itself when the sample is not a MATCH. Report the interval alongside the sampled table's status.
 Compile a detailed validation report, clearly marking each table as 'VALIDATED' or 'MISMATCH' with the corresponding values.
 Conclude your response with the word 'TERMINATE' after generating the report.
+"""
+    if tables:
+        system_message += f"""
+Validate only these tables; other validation agents cover the rest: {', '.join(tables)}.
 """
     data_validation_agent = AssistantAgent(
-        name="Data_Validation_Agent",
+        name=name,
         system_message=system_message,
         model_client=model_client,
         code_execution_config={"executor": code_executor},
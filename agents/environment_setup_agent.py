@@ -1,7 +1,7 @@
-from autogen_agentchat.agents import AssistantAgent
-
 def create_environment_setup_agent(model_client, code_executor):
     """Creates the Environment Setup Agent."""
+    from autogen_agentchat.agents import AssistantAgent
+
     system_message = """
 You are an Environment Setup Specialist. Your primary role is to verify the readiness of the GCP environment.
 Execute shell commands to confirm that the target Cloud SQL instance is running, the designated GCS bucket exists, and that you have the necessary permissions to access secrets in Secret Manager.
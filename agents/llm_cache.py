@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from autogen_core.models import ChatCompletionClient, CreateResult, FunctionExecutionResultMessage
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+CACHE_MODES = (OFF, RECORD, REPLAY)
+
+
+def _jsonable(value):
+    """A JSON-ready form of messages, tools and create options, for hashing."""
+    if isinstance(value, type):
+        # A pydantic model class given as json_output.
+        return value.model_json_schema() if hasattr(value, "model_json_schema") else value.__name__
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "schema") and not isinstance(value, dict):
+        return value.schema  # A Tool; its schema is what the model sees.
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(_jsonable(value), sort_keys=True, default=str).encode()).hexdigest()
+
+
+def request_key(model: str, messages, tools=(), json_output=None, extra_create_args=None) -> dict:
+    """
+    Content address of a model request: a hash of the model, the prompt (every message but the
+    tool results), a hash of the tool results, and the tools and options offered to the model.
+    """
+    tool_results = [m for m in messages if isinstance(m, FunctionExecutionResultMessage)]
+    prompt = [m for m in messages if not isinstance(m, FunctionExecutionResultMessage)]
+    parts = {"model": model, "prompt_hash": _digest(prompt), "tool_results_hash": _digest(tool_results),
+             "options_hash": _digest({"tools": list(tools), "json_output": json_output,
+                                      "extra_create_args": dict(extra_create_args or {})})}
+    return dict(parts, key=_digest(parts))
+
+
+class ResponseCacheStore:
+    """
+    Model responses on local disk, one JSON file per request key. When the files exceed max_bytes,
+    the least recently used ones (by modification time, which a hit refreshes) are deleted.
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files = {}  # key -> (last used, bytes)
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(directory, name))
+                self._files[name[:-len(".json")]] = (stat.st_mtime, stat.st_size)
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """Returns the stored entry for a key, or None."""
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        now = time.time()
+        try:
+            os.utime(self._path(key), (now, now))
+        except FileNotFoundError:
+            return entry
+        with self._lock:
+            if key in self._files:
+                self._files[key] = (now, self._files[key][1])
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """Stores an entry atomically, then evicts the least recently used entries beyond max_bytes."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f, default=str)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._files[key] = (time.time(), size)
+            total = sum(s for _, s in self._files.values())
+            for old_key in sorted(self._files, key=lambda k: self._files[k][0]):
+                if total <= self.max_bytes or old_key == key:
+                    break
+                total -= self._files.pop(old_key)[1]
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+                self.evictions += 1
+
+    def size(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._files), "bytes": sum(s for _, s in self._files.values())}
+
+
+class CachingChatCompletionClient(ChatCompletionClient):
+    """
+    Wraps a model client with a content-addressed cache of its responses, so a rehearsal rerun
+    over an unchanged catalog skips the model calls it already made.
+      - record: answer from the cache when the request was seen before; otherwise call the
+        model and store its response.
+      - replay: answer only from the cache and raise LookupError for an unseen request, for
+        tests and offline reruns.
+      - off: always call the model.
+    Cached responses come back with cached=True and add no usage.
+    """
+    def __init__(self, client: ChatCompletionClient, store: ResponseCacheStore, model: str, mode: str = RECORD,
+                 clock=time.monotonic):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Use one of {list(CACHE_MODES)}.")
+        self.client = client
+        self.store = store
+        self.model = model
+        self.mode = mode
+        self._clock = clock
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "seconds_saved": 0.0}
+
+    def _lookup(self, messages, tools, json_output, extra_create_args):
+        request = request_key(self.model, messages, tools, json_output, extra_create_args)
+        entry = self.store.get(request["key"])
+        if entry is not None:
+            self._stats["hits"] += 1
+            self._stats["seconds_saved"] += entry.get("latency_seconds", 0.0)
+            return request, CreateResult.model_validate(dict(entry["result"], cached=True))
+        self._stats["misses"] += 1
+        if self.mode == REPLAY:
+            raise LookupError(f"No recorded model response for request {request['key'][:12]} "
+                              f"(prompt {request['prompt_hash'][:12]}, tool results "
+                              f"{request['tool_results_hash'][:12]}) in replay mode")
+        return request, None
+
+    def _record(self, request: dict, result: CreateResult, latency: float):
+        self.store.put(request["key"], dict(request, result=result.model_dump(mode="json"),
+                                            latency_seconds=round(latency, 3)))
+        self._stats["stored"] += 1
+
+    async def create(self, messages, *, tools=[], json_output=None, extra_create_args={}, cancellation_token=None):
+        if self.mode == OFF:
+            return await self.client.create(messages, tools=tools, json_output=json_output,
+                                            extra_create_args=extra_create_args, cancellation_token=cancellation_token)
+        request, cached = self._lookup(messages, tools, json_output, extra_create_args)
+        if cached is not None:
+            return cached
+        started = self._clock()
+        result = await self.client.create(messages, tools=tools, json_output=json_output,
+                                          extra_create_args=extra_create_args, cancellation_token=cancellation_token)
+        self._record(request, result, self._clock() - started)
+        return result
+
+    async def create_stream(self, messages, *, tools=[], json_output=None, extra_create_args={},
+                            cancellation_token=None):
+        stream = lambda: self.client.create_stream(messages, tools=tools, json_output=json_output,
+                                                   extra_create_args=extra_create_args,
+                                                   cancellation_token=cancellation_token)
+        if self.mode == OFF:
+            async for item in stream():
+                yield item
+            return
+        request, cached = self._lookup(messages, tools, json_output, extra_create_args)
+        if cached is not None:
+            yield cached
+            return
+        started = self._clock()
+        async for item in stream():
+            if isinstance(item, CreateResult):
+                self._record(request, item, self._clock() - started)
+            yield item
+
+    def stats(self) -> dict:
+        """Hit, miss and store counters, model time saved by hits and the size of the store."""
+        return dict(self._stats, seconds_saved=round(self._stats["seconds_saved"], 3), mode=self.mode,
+                    evictions=self.store.evictions, **self.store.size())
+
+    async def close(self):
+        stats = self.stats()
+        logging.info(f"LLM response cache ({self.mode}): {stats['hits']} hits, {stats['misses']} misses, "
+                     f"~{stats['seconds_saved']:.1f}s of model time saved")
+        await self.client.close()
+
+    def actual_usage(self):
+        return self.client.actual_usage()
+
+    def total_usage(self):
+        return self.client.total_usage()
+
+    def count_tokens(self, messages, *, tools=[]):
+        return self.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages, *, tools=[]):
+        return self.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):
+        return self.client.capabilities
+
+    @property
+    def model_info(self):
+        return self.client.model_info
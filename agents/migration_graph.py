@@ -0,0 +1,93 @@
+import time
+
+
+def split_table_groups(tables: list, groups: int) -> list:
+    """
+    Splits planned tables ({'table', 'bytes'} entries, as in a migration plan) into at most
+    `groups` lists of table names with similar total size, largest tables placed first.
+    """
+    bins = [{"bytes": 0, "tables": []} for _ in range(max(1, groups))]
+    for table in sorted(tables, key=lambda t: (-t["bytes"], t["table"])):
+        smallest = min(bins, key=lambda b: b["bytes"])
+        smallest["bytes"] += table["bytes"]
+        smallest["tables"].append(table["table"])
+    return [b["tables"] for b in bins if b["tables"]]
+
+
+def build_migration_graph(env_agent, schema_agent, migration_agent, validation_agents: list,
+                          anomaly_agent, optimization_agent) -> tuple:
+    """
+    Wires the agents into a graph whose independent stages run concurrently:
+
+        environment ─┐                 ┌─ validation (one node per table group) ─┐
+                     ├─ migration ─────┤                                         ├─ optimization
+        schema ──────┘                 └─ anomaly detection ─────────────────────┘
+
+    Every join waits for all of its parents. Returns (graph, participants, parents), where
+    parents maps each node name to the names of the nodes it waits for.
+    """
+    from autogen_agentchat.teams import DiGraphBuilder
+
+    builder = DiGraphBuilder()
+    parents = {}
+    agents = [env_agent, schema_agent, migration_agent, *validation_agents, anomaly_agent, optimization_agent]
+    for agent in agents:
+        builder.add_node(agent)
+        parents[agent.name] = []
+
+    def edge(source, target):
+        builder.add_edge(source, target)
+        parents[target.name].append(source.name)
+
+    edge(env_agent, migration_agent)
+    edge(schema_agent, migration_agent)
+    for validation_agent in validation_agents:
+        edge(migration_agent, validation_agent)
+        edge(validation_agent, optimization_agent)
+    edge(migration_agent, anomaly_agent)
+    edge(anomaly_agent, optimization_agent)
+    return builder.build(), agents, parents
+
+
+class NodeTimer:
+    """
+    Times the nodes of a running graph from the messages the team streams. A node starts when its
+    last parent finishes (GraphFlow starts it then) and finishes with its last message, so the
+    durations and critical path need no hooks into the agents themselves.
+    """
+    def __init__(self, parents: dict, clock=time.monotonic):
+        self.parents = parents
+        self._clock = clock
+        self._started = None
+        self._finished = {}
+
+    def start(self):
+        self._started = self._clock()
+
+    def observe(self, source: str):
+        """Records a message from `source`; messages from outside the graph (e.g. the task) are ignored."""
+        if source in self.parents:
+            self._finished[source] = self._clock()
+
+    def report(self) -> dict:
+        """Per-node start, finish and duration in seconds since start(), and the critical path."""
+        nodes = {}
+        for node, parents in self.parents.items():
+            if node not in self._finished:
+                continue
+            started = max((self._finished[p] for p in parents if p in self._finished), default=self._started)
+            nodes[node] = {"started": round(started - self._started, 3),
+                           "finished": round(self._finished[node] - self._started, 3),
+                           "seconds": round(self._finished[node] - started, 3)}
+        path = []
+        node = max(nodes, key=lambda n: nodes[n]["finished"], default=None)
+        while node is not None:
+            path.insert(0, node)
+            node = max((p for p in self.parents[node] if p in nodes), key=lambda p: nodes[p]["finished"], default=None)
+        return {
+            "wall_seconds": nodes[path[-1]]["finished"] if path else 0.0,
+            "node_seconds_total": round(sum(n["seconds"] for n in nodes.values()), 3),
+            "critical_path": path,
+            "nodes": nodes,
+            "not_run": [n for n in self.parents if n not in nodes],
+        }
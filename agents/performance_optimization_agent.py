@@ -1,11 +1,12 @@
-from autogen_agentchat.agents import AssistantAgent
-
 def create_performance_optimization_agent(model_client, code_executor):
     """Creates the Performance Optimization Agent."""
+    from autogen_agentchat.agents import AssistantAgent
+
     system_message = """
 You are a GCP Cost and Performance Optimization Expert. You will receive the final migration report and logs.
 Based on the total migration time, the resources consumed, and the final configuration of the target Cloud SQL instance, provide a set of actionable recommendations for optimizing the production environment.
 Your suggestions should cover right-sizing the Cloud SQL machine type, evaluating the use of SSD vs. HDD storage, recommending an appropriate automated backup schedule, and proposing a suitable High Availability (HA) configuration based on standard business continuity requirements.
+If the report includes a migration metrics snapshot (from `get_migration_metrics`), use its `bottleneck_stage`, per-table rows/s and bytes/s, retries and connection-pool wait counters to recommend thread counts and chunk sizes for the next run.
 Use the code executor to run `gcloud` commands to get the current configuration of the resources if needed.
 Conclude your response with the word 'TERMINATE' after providing the recommendations.
 """
@@ -1,10 +1,10 @@
-from autogen_agentchat.agents import AssistantAgent
-
 def create_schema_conversion_agent(model_client):
     """Creates the Schema Conversion Agent."""
+    from autogen_agentchat.agents import AssistantAgent
+
     system_message = """
 You are a meticulous Database Schema Analyst. Your task is to connect to the legacy database via the provided MCP tools to retrieve its full schema.
-Use the `db_metadata` resource to list all tables, then iterate through the list, calling `get_table_schema` for each one.
+Call the `get_schema_catalog` tool once to retrieve the columns, indexes, engines, collations and partitioning of every table. Only call `get_table_schema` for an individual table if the catalog is unavailable.
 Analyze the collected schemas for any potential incompatibilities with the target Cloud SQL for MySQL version, such as deprecated storage engines (e.g., MyISAM), unsupported collations, or legacy character sets.
 Generate a comprehensive report of your findings and list any recommended DDL modifications. You are not authorized to make any changes.
 Conclude your response with the word 'TERMINATE' after generating the report.
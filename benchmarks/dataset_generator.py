@@ -0,0 +1,186 @@
+import datetime
+import hashlib
+import logging
+import random
+
+# Each shape exercises a different weakness of the export/load/validation paths:
+#   employees          the baseline employees sample schema (narrow rows, composite PKs)
+#   wide_rows          many columns of mixed types with NULLs, so per-row encoding cost dominates
+#   blobs              large binary values containing NUL, newline, quote and ';' bytes
+#   skewed_pk          sparse/clustered PK values, so row-count estimates and chunk sizes diverge
+#   many_small_tables  hundreds of tiny tables, so per-table overhead dominates
+SHAPES = ("employees", "wide_rows", "blobs", "skewed_pk", "many_small_tables")
+
+FIRST_NAMES = ("Georgi", "Bezalel", "Parto", "Chirstian", "Kyoichi", "Anneke", "Tzvetan", "Saniya", "Sumant", "Duangkaew")
+LAST_NAMES = ("Facello", "Simmel", "Bamford", "Koblick", "Maliniak", "Preusig", "Zielinski", "Kalloufi", "Peac", "Piveteau")
+TITLES = ("Engineer", "Senior Engineer", "Staff", "Senior Staff", "Assistant Engineer", "Technique Leader", "Manager")
+
+
+def _date(rng, start_year: int, end_year: int) -> datetime.date:
+    start = datetime.date(start_year, 1, 1).toordinal()
+    return datetime.date.fromordinal(rng.randint(start, datetime.date(end_year, 12, 31).toordinal()))
+
+
+def _table(name: str, ddl: str, columns: list, rows) -> dict:
+    return {"name": name, "ddl": ddl, "columns": columns, "rows": rows}
+
+
+def _employees(scale: float, rng) -> list:
+    count = max(1, int(10000 * scale))
+    employees = []
+    for emp_no in range(10001, 10001 + count):
+        employees.append((emp_no, _date(rng, 1952, 1965), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                          rng.choice("MF"), _date(rng, 1985, 2000)))
+
+    def salaries():
+        for emp_no, _, _, _, _, hire_date in employees:
+            from_date = hire_date
+            salary = rng.randint(38000, 90000)
+            for _ in range(rng.randint(1, 6)):
+                to_date = from_date + datetime.timedelta(days=365)
+                yield (emp_no, salary, from_date, to_date)
+                from_date, salary = to_date, salary + rng.randint(0, 5000)
+
+    def titles():
+        for emp_no, _, _, _, _, hire_date in employees:
+            yield (emp_no, rng.choice(TITLES), hire_date, None if rng.random() < 0.7 else hire_date + datetime.timedelta(days=900))
+
+    return [
+        _table("employees", """CREATE TABLE employees (
+            emp_no INT NOT NULL, birth_date DATE NOT NULL, first_name VARCHAR(14) NOT NULL,
+            last_name VARCHAR(16) NOT NULL, gender ENUM('M','F') NOT NULL, hire_date DATE NOT NULL,
+            PRIMARY KEY (emp_no), KEY idx_last_name (last_name))""",
+               ["emp_no", "birth_date", "first_name", "last_name", "gender", "hire_date"], iter(employees)),
+        _table("salaries", """CREATE TABLE salaries (
+            emp_no INT NOT NULL, salary INT NOT NULL, from_date DATE NOT NULL, to_date DATE NOT NULL,
+            PRIMARY KEY (emp_no, from_date))""",
+               ["emp_no", "salary", "from_date", "to_date"], salaries()),
+        _table("titles", """CREATE TABLE titles (
+            emp_no INT NOT NULL, title VARCHAR(50) NOT NULL, from_date DATE NOT NULL, to_date DATE NULL,
+            PRIMARY KEY (emp_no, title, from_date))""",
+               ["emp_no", "title", "from_date", "to_date"], titles()),
+    ]
+
+
+def _wide_rows(scale: float, rng) -> list:
+    count = max(1, int(5000 * scale))
+    kinds = ["VARCHAR(64)", "INT", "DECIMAL(12,2)", "DATETIME", "TEXT"]
+    columns = [(f"c{i:02d}", kinds[i % len(kinds)]) for i in range(60)]
+
+    def value(kind):
+        if rng.random() < 0.1:
+            return None
+        if kind == "INT":
+            return rng.randint(-2 ** 31, 2 ** 31 - 1)
+        if kind.startswith("DECIMAL"):
+            return f"{rng.randint(-10 ** 9, 10 ** 9)}.{rng.randint(0, 99):02d}"
+        if kind == "DATETIME":
+            return datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=rng.randint(0, 10 ** 8))
+        length = rng.randint(0, 64 if kind.startswith("VARCHAR") else 400)
+        # Quotes, backslashes, tabs, newlines and non-ASCII exercise every escaping path.
+        return "".join(rng.choice("abcdefghij KLMNOP'\"\\\t\n;é漢") for _ in range(length))
+
+    def rows():
+        for row_id in range(1, count + 1):
+            yield (row_id,) + tuple(value(kind) for _, kind in columns)
+
+    ddl = "CREATE TABLE wide_events (id BIGINT NOT NULL, " + ", ".join(f"{n} {k} NULL" for n, k in columns) + \
+          ", PRIMARY KEY (id)) DEFAULT CHARSET=utf8mb4"
+    return [_table("wide_events", ddl, ["id"] + [n for n, _ in columns], rows())]
+
+
+def _blobs(scale: float, rng) -> list:
+    count = max(1, int(500 * scale))
+
+    def rows():
+        for doc_id in range(1, count + 1):
+            # Mostly a few KiB with a long tail up to 256 KiB.
+            size = min(int(rng.paretovariate(1.2) * 1024), 256 * 1024)
+            body = rng.randbytes(size) + b"\x00\n';\\"
+            yield (doc_id, f"doc-{doc_id}.bin", body, hashlib.md5(body).hexdigest())
+
+    return [_table("documents", """CREATE TABLE documents (
+        id INT NOT NULL, name VARCHAR(64) NOT NULL, body MEDIUMBLOB NOT NULL, md5 CHAR(32) NOT NULL,
+        PRIMARY KEY (id))""", ["id", "name", "body", "md5"], rows())]
+
+
+def _skewed_pk(scale: float, rng) -> list:
+    count = max(10, int(20000 * scale))
+
+    def events():
+        # 90% of the ids are dense, the rest are spread over a 2^40 range.
+        dense = int(count * 0.9)
+        ids = set(range(1, dense + 1))
+        while len(ids) < count:
+            ids.add(rng.randint(dense + 1, 2 ** 40))
+        for event_id in sorted(ids):
+            yield (event_id, rng.randint(1, 50), _date(rng, 2015, 2024), rng.getrandbits(32))
+
+    def orders():
+        # One tenant owns 80% of the rows of a composite-key table.
+        for order_id in range(1, count + 1):
+            tenant = 1 if rng.random() < 0.8 else rng.randint(2, 500)
+            yield (tenant, order_id, f"{rng.randint(1, 10 ** 6)}.{rng.randint(0, 99):02d}")
+
+    return [
+        _table("events", """CREATE TABLE events (
+            id BIGINT UNSIGNED NOT NULL, kind TINYINT NOT NULL, created DATE NOT NULL, payload INT UNSIGNED NOT NULL,
+            PRIMARY KEY (id))""", ["id", "kind", "created", "payload"], events()),
+        _table("tenant_orders", """CREATE TABLE tenant_orders (
+            tenant_id INT NOT NULL, order_id INT NOT NULL, amount DECIMAL(12,2) NOT NULL,
+            PRIMARY KEY (tenant_id, order_id))""", ["tenant_id", "order_id", "amount"], orders()),
+    ]
+
+
+def _many_small_tables(scale: float, rng) -> list:
+    tables = []
+    for index in range(max(1, int(200 * scale))):
+        rows = [(i, rng.choice(LAST_NAMES), rng.randint(0, 1000)) for i in range(1, rng.randint(1, 40) + 1)]
+        tables.append(_table(f"small_{index:04d}", f"""CREATE TABLE small_{index:04d} (
+            id INT NOT NULL, label VARCHAR(32) NOT NULL, amount INT NOT NULL, PRIMARY KEY (id))""",
+                             ["id", "label", "amount"], iter(rows)))
+    return tables
+
+
+GENERATORS = {
+    "employees": _employees,
+    "wide_rows": _wide_rows,
+    "blobs": _blobs,
+    "skewed_pk": _skewed_pk,
+    "many_small_tables": _many_small_tables,
+}
+
+
+def generate_tables(shape: str, scale: float = 1.0, seed: int = 42) -> list:
+    """
+    Returns the tables of a dataset shape as [{'name', 'ddl', 'columns', 'rows'}], where rows is an
+    iterator of tuples. The same shape, scale and seed always produce the same data.
+    """
+    if shape not in GENERATORS:
+        raise ValueError(f"Unknown dataset shape: {shape}. Use one of {SHAPES}.")
+    return GENERATORS[shape](scale, random.Random(f"{shape}:{seed}"))
+
+
+def create_dataset(connection, shape: str, scale: float = 1.0, seed: int = 42, batch_rows: int = 500) -> dict:
+    """Creates the tables of a dataset shape in the connection's database and returns {table: rows}."""
+    counts = {}
+    with connection.cursor() as cursor:
+        for table in generate_tables(shape, scale, seed):
+            cursor.execute(f"DROP TABLE IF EXISTS `{table['name']}`")
+            cursor.execute(table["ddl"])
+            insert = (f"INSERT INTO `{table['name']}` ({', '.join(table['columns'])}) "
+                      f"VALUES ({', '.join(['%s'] * len(table['columns']))})")
+            batch, count = [], 0
+            for row in table["rows"]:
+                batch.append(row)
+                if len(batch) == batch_rows:
+                    cursor.executemany(insert, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(insert, batch)
+                count += len(batch)
+            connection.commit()
+            counts[table["name"]] = count
+    logging.info(f"Generated {shape} dataset: {len(counts)} tables, {sum(counts.values())} rows")
+    return counts
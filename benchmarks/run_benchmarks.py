@@ -0,0 +1,261 @@
+"""
+Migration benchmark harness.
+
+Generates synthetic datasets into a local MySQL stand-in (e.g. `docker run -e MYSQL_ROOT_PASSWORD=password
+-p 3306:3306 mysql:8.0`), then measures the export, upload (to a LocalObjectStore), load and validation
+paths across thread counts and chunk sizes. Results are written as a JSON report; passing --baseline
+compares them with an earlier report and exits non-zero on a throughput regression.
+
+    python benchmarks/run_benchmarks.py --shapes employees,blobs --threads 1,4,8 \
+        --chunk-rows 5000,50000 --output benchmark-report.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import pymysql
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The MCP server modules import each other by bare module name, as they do when server.py runs.
+sys.path.insert(0, os.path.join(ROOT, "mcp_server"))
+sys.path.insert(0, ROOT)
+
+from benchmarks.dataset_generator import SHAPES, create_dataset  # noqa: E402
+from chunk_validator import ChunkedChecksumValidator  # noqa: E402
+from mcp_tools import MySQLTools  # noqa: E402
+from migration_metrics import MigrationMetrics  # noqa: E402
+from object_store import LocalObjectStore  # noqa: E402
+from pipelined_loader import PipelinedLoader  # noqa: E402
+from table_exporter import StreamingTableExporter  # noqa: E402
+
+
+def _admin_connection(args):
+    return pymysql.connect(host=args.host, user=args.user, password=args.password, autocommit=True)
+
+
+def _recreate_database(args, database: str):
+    connection = _admin_connection(args)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+            cursor.execute(f"CREATE DATABASE `{database}` DEFAULT CHARACTER SET utf8mb4")
+    finally:
+        connection.close()
+
+
+def _tools(args, database: str, secret_prefix: str, max_connections: int, metrics=None) -> MySQLTools:
+    """MySQLTools pointed at a benchmark database through the local secret values."""
+    tools = MySQLTools(project_id="benchmark", secret_prefix=secret_prefix,
+                       pool_config={"max_size": max_connections, "checkout_timeout": 300}, metrics=metrics,
+                       local_infile=secret_prefix == "target-db")
+    tools.secret_manager.secrets.update({
+        f"{secret_prefix}-host": args.host,
+        f"{secret_prefix}-user": args.user,
+        f"{secret_prefix}-password": args.password,
+        f"{secret_prefix}-name": database,
+    })
+    return tools
+
+
+def run_case(args, shape: str, tables: dict, threads: int, chunk_rows: int, work_dir: str,
+             output_format: str = "sql") -> dict:
+    """Exports, loads and validates one dataset with one thread count, chunk size and chunk format."""
+    metrics = MigrationMetrics()
+    source = _tools(args, args.source_database, "source-db", threads * 2)
+    target = _tools(args, args.target_database, "target-db", threads * 2)
+    store = LocalObjectStore(os.path.join(work_dir, "store"))
+    prefix = f"{shape}/{output_format}-t{threads}-c{chunk_rows}"
+    wall = {}
+    statuses = {}
+    try:
+        started = time.monotonic()
+        cpu_started = time.process_time()
+        exporter = StreamingTableExporter(source, store, workers=threads, chunk_rows=chunk_rows, metrics=metrics,
+                                          output_format=output_format)
+        for table in tables:
+            exporter.export_table(table, prefix)
+        wall["export"] = time.monotonic() - started
+        export_cpu = time.process_time() - cpu_started
+        if output_format == "parquet":
+            # Parquet chunks are an analytics copy; there is nothing to load into MySQL.
+            return _case_report(shape, output_format, threads, chunk_rows, tables, wall, export_cpu, statuses,
+                                metrics)
+
+        _recreate_database(args, args.target_database)
+        started = time.monotonic()
+        loader = PipelinedLoader(target, store, download_workers=threads, load_workers=threads,
+                                 default_table_concurrency=threads, spool_dir=work_dir, metrics=metrics)
+        loader.load(prefix)
+        wall["load"] = time.monotonic() - started
+
+        started = time.monotonic()
+        validator = ChunkedChecksumValidator(source, target, workers=threads, chunk_rows=chunk_rows, metrics=metrics)
+        statuses = {table: validator.validate_table(table)["status"] for table in tables}
+        wall["validate"] = time.monotonic() - started
+    finally:
+        source.close()
+        target.close()
+        shutil.rmtree(os.path.join(work_dir, "store"), ignore_errors=True)
+
+    return _case_report(shape, output_format, threads, chunk_rows, tables, wall, export_cpu, statuses, metrics)
+
+
+def _case_report(shape, output_format, threads, chunk_rows, tables, wall, export_cpu, statuses, metrics) -> dict:
+    snapshot = metrics.snapshot()
+    rows = sum(tables.values())
+    exported_bytes = snapshot["stages"].get("export", {}).get("bytes", 0)
+    return {
+        "shape": shape,
+        "format": output_format,
+        "threads": threads,
+        "chunk_rows": chunk_rows,
+        "rows": rows,
+        "exported_bytes": exported_bytes,
+        # CPU time of the whole process during the export, so rows per CPU second compares formats per core.
+        "export_cpu_seconds": round(export_cpu, 3),
+        "export_rows_per_cpu_second": round(rows / export_cpu, 1) if export_cpu > 0 else None,
+        "stages": {
+            stage: {
+                "wall_seconds": round(seconds, 3),
+                "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+                "bytes_per_second": round(exported_bytes / seconds, 1) if seconds > 0 else None,
+            }
+            for stage, seconds in wall.items()
+        },
+        "validated": all(status == "VALIDATED" for status in statuses.values()),
+        "mismatched_tables": sorted(t for t, s in statuses.items() if s != "VALIDATED"),
+        "stage_metrics": snapshot["stages"],
+    }
+
+
+def run_mydumper_case(args, shape: str, threads: int, chunk_size_mb: int, work_dir: str) -> dict:
+    """Times MySQLTools.run_mydumper_export, when mydumper is installed."""
+    metrics = MigrationMetrics()
+    source = _tools(args, args.source_database, "source-db", 2, metrics=metrics)
+    output = os.path.join(work_dir, "mydumper")
+    try:
+        started = time.monotonic()
+        message = source.run_mydumper_export(args.source_database, output, threads, chunk_size_mb)
+        seconds = time.monotonic() - started
+    finally:
+        source.close()
+        shutil.rmtree(output, ignore_errors=True)
+    return {"shape": shape, "tool": "mydumper", "threads": threads, "chunk_size_mb": chunk_size_mb,
+            "stages": {"export": {"wall_seconds": round(seconds, 3)}}, "message": message,
+            "stage_metrics": metrics.snapshot()["stages"]}
+
+
+def _case_key(case: dict) -> tuple:
+    return (case["shape"], case.get("tool", "streaming"), case.get("format", "sql"), case["threads"],
+            case.get("chunk_rows", case.get("chunk_size_mb")))
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Returns the cases and stages whose wall time grew by more than `tolerance` relative to the baseline."""
+    previous = {_case_key(c): c for c in baseline.get("cases", [])}
+    regressions = []
+    for case in report.get("cases", []):
+        old = previous.get(_case_key(case))
+        if old is None:
+            continue
+        for stage, result in case["stages"].items():
+            old_seconds = old["stages"].get(stage, {}).get("wall_seconds")
+            new_seconds = result.get("wall_seconds")
+            if old_seconds and new_seconds and new_seconds > old_seconds * (1 + tolerance):
+                regressions.append({"case": list(_case_key(case)), "stage": stage,
+                                    "baseline_seconds": old_seconds, "seconds": new_seconds,
+                                    "slowdown": round(new_seconds / old_seconds - 1, 3)})
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the migration export, load and validation paths.")
+    parser.add_argument("--host", default=os.environ.get("BENCH_MYSQL_HOST", "127.0.0.1"))
+    parser.add_argument("--user", default=os.environ.get("BENCH_MYSQL_USER", "root"))
+    parser.add_argument("--password", default=os.environ.get("BENCH_MYSQL_PASSWORD", "password"))
+    parser.add_argument("--source-database", default="bench_source")
+    parser.add_argument("--target-database", default="bench_target")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="Comma-separated dataset shapes.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Dataset size multiplier.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads", type=_int_list, default=[1, 4, 8])
+    parser.add_argument("--chunk-rows", type=_int_list, default=[10000, 100000])
+    parser.add_argument("--formats", default="sql,tsv",
+                        help="Chunk formats to compare: sql (INSERT statements), tsv (LOAD DATA) and/or "
+                             "parquet (export only; needs pyarrow).")
+    parser.add_argument("--mydumper-chunk-mb", type=_int_list, default=[64],
+                        help="Chunk sizes for the mydumper export case (run only if mydumper is installed).")
+    parser.add_argument("--output", default="benchmark-report.json")
+    parser.add_argument("--baseline", help="Earlier report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing.")
+    args = parser.parse_args(argv)
+
+    shapes = [s for s in args.shapes.split(",") if s]
+    formats = [f for f in args.formats.split(",") if f]
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count(), "git_commit": _git_commit()},
+        "parameters": {"shapes": shapes, "scale": args.scale, "seed": args.seed, "threads": args.threads,
+                       "chunk_rows": args.chunk_rows, "formats": formats},
+        "datasets": {},
+        "cases": [],
+    }
+    work_dir = tempfile.mkdtemp(prefix="migration-bench-")
+    try:
+        for shape in shapes:
+            _recreate_database(args, args.source_database)
+            connection = _admin_connection(args)
+            try:
+                connection.select_db(args.source_database)
+                tables = create_dataset(connection, shape, args.scale, args.seed)
+            finally:
+                connection.close()
+            report["datasets"][shape] = {"tables": len(tables), "rows": sum(tables.values())}
+
+            for threads in args.threads:
+                for chunk_rows in args.chunk_rows:
+                    for output_format in formats:
+                        logging.info(f"Benchmarking {shape} with {threads} threads and {chunk_rows}-row "
+                                     f"{output_format} chunks...")
+                        report["cases"].append(run_case(args, shape, tables, threads, chunk_rows, work_dir,
+                                                        output_format))
+                if shutil.which("mydumper"):
+                    for chunk_mb in args.mydumper_chunk_mb:
+                        report["cases"].append(run_mydumper_case(args, shape, threads, chunk_mb, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    exit_code = 0 if all(c.get("validated", True) for c in report["cases"]) else 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare_reports(report, json.load(f), args.tolerance)
+        if report["regressions"]:
+            logging.error(f"{len(report['regressions'])} stage timings regressed beyond {args.tolerance:.0%}")
+            exit_code = 1
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    logging.info(f"Wrote benchmark report to {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
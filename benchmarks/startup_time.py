@@ -0,0 +1,128 @@
+"""
+Cold-start benchmark for main.py.
+
+Times short main.py invocations, each in a fresh interpreter as planning and validation runs are
+launched, and lists the slowest imports of a --plan-only run (python -X importtime). Results are
+written as a JSON report; passing --baseline compares them with an earlier report and exits
+non-zero when a command got slower.
+
+    python benchmarks/startup_time.py --runs 10 --output startup-report.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_catalog(path: str, tables: int = 50):
+    """Writes a saved catalog for main.py --plan-only --metadata-file, with tables of growing size."""
+    table_stats = {f"table_{i:03d}": {"data_length": (i + 1) * 64 * 1024 * 1024, "index_length": (i + 1) * 8 * 1024 * 1024,
+                                      "row_estimate": (i + 1) * 100000}
+                   for i in range(tables)}
+    size = sum(t["data_length"] + t["index_length"] for t in table_stats.values())
+    with open(path, "w") as f:
+        json.dump({"metadata": {"db_name": "startup_bench", "db_size_gb": round(size / 1024 ** 3, 2)},
+                   "table_stats": table_stats}, f)
+
+
+def startup_commands(catalog_path: str) -> dict:
+    """The interpreter arguments of each timed command."""
+    return {
+        "import_main": ["-c", "import main"],
+        "help": ["main.py", "--help"],
+        "plan_only": ["main.py", "--plan-only", "--metadata-file", catalog_path],
+    }
+
+
+def time_command(args: list, runs: int) -> dict:
+    """Runs `python <args>` from the repository root `runs` times and returns its wall times."""
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        seconds.append(time.perf_counter() - started)
+    return {"runs": runs, "median_seconds": round(statistics.median(seconds), 4),
+            "min_seconds": round(min(seconds), 4), "max_seconds": round(max(seconds), 4)}
+
+
+def parse_import_times(stderr: str) -> list:
+    """Parses python -X importtime output into [{'module', 'self_us', 'cumulative_us'}], in import order."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The column header
+        imports.append({"module": fields[2].strip(), "self_us": int(fields[0]), "cumulative_us": int(fields[1])})
+    return imports
+
+
+def slowest_imports(args: list, top: int = 15) -> list:
+    """The `top` modules with the largest cumulative import time when running `python <args>`."""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=ROOT, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = parse_import_times(result.stderr)
+    return sorted(imports, key=lambda i: -i["cumulative_us"])[:top]
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Returns the commands whose median wall time grew by more than `tolerance` relative to the baseline."""
+    regressions = []
+    for name, result in report.get("commands", {}).items():
+        old_seconds = baseline.get("commands", {}).get(name, {}).get("median_seconds")
+        new_seconds = result.get("median_seconds")
+        if old_seconds and new_seconds and new_seconds > old_seconds * (1 + tolerance):
+            regressions.append({"command": name, "baseline_seconds": old_seconds, "seconds": new_seconds,
+                                "slowdown": round(new_seconds / old_seconds - 1, 3)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs of each command.")
+    parser.add_argument("--tables", type=int, default=50, help="Tables in the catalog given to --plan-only.")
+    parser.add_argument("--top-imports", type=int, default=15)
+    parser.add_argument("--output", default="startup-report.json")
+    parser.add_argument("--baseline", help="Earlier report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as work_dir:
+        catalog_path = os.path.join(work_dir, "catalog.json")
+        write_catalog(catalog_path, args.tables)
+        commands = startup_commands(catalog_path)
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commands": {name: time_command(command, args.runs) for name, command in commands.items()},
+            "slowest_imports": slowest_imports(commands["plan_only"], args.top_imports),
+        }
+
+    for name, result in report["commands"].items():
+        print(f"{name}: median {result['median_seconds']:.3f}s (min {result['min_seconds']:.3f}s, "
+              f"max {result['max_seconds']:.3f}s)")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['command']}: {r['baseline_seconds']:.3f}s -> {r['seconds']:.3f}s "
+                  f"(+{r['slowdown'] * 100:.0f}%)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,76 +1,127 @@
 import asyncio
-import yaml
+import json
+import logging
 import argparse
-from autogen_agentchat.agents import UserProxyAgent, CodeExecutorAgent
-from autogen_agentchat.teams import DiGraphBuilder
-from autogen_agentchat.conditions import MaxMessageTermination
-from autogen_ext.models.openai import OpenAIChatCompletionClient # Using as a placeholder for Gemini client structure
-from google.cloud import secretmanager
-
-# Import agent creation functions
-from agents.environment_setup_agent import create_environment_setup_agent
-from agents.schema_conversion_agent import create_schema_conversion_agent
-from agents.data_migration_agent import create_data_migration_agent
-from agents.data_validation_agent import create_data_validation_agent
-from agents.anomaly_detection_agent import create_anomaly_detection_agent
-from agents.performance_optimization_agent import create_performance_optimization_agent
-
-def get_secret(project_id, secret_id):
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
-    response = client.access_secret_version(request={"name": name})
-    return response.payload.data.decode("UTF-8")
-
-async def main(task, encryption_method):
-    with open('config.yaml', 'r') as f:
-        config = yaml.safe_load(f)
+import os
+import sys
+
+# The MCP server modules import each other by bare module name, as they do when server.py runs
+# from inside mcp_server/; the planner and MySQLTools are imported from here as mcp_server.*.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server"))
+
+# Agent factories import autogen when an agent is created; the model client, code executor and
+# Secret Manager are imported in main(), so --plan-only starts without any of them.
+from agents.environment_setup_agent import create_environment_setup_agent  # noqa: E402
+from agents.schema_conversion_agent import create_schema_conversion_agent  # noqa: E402
+from agents.data_migration_agent import create_data_migration_agent  # noqa: E402
+from agents.data_validation_agent import create_data_validation_agent  # noqa: E402
+from agents.anomaly_detection_agent import create_anomaly_detection_agent  # noqa: E402
+from agents.performance_optimization_agent import create_performance_optimization_agent  # noqa: E402
+from agents.migration_graph import NodeTimer, build_migration_graph, split_table_groups  # noqa: E402
+from mcp_server.app_config import load_config, secret_cache  # noqa: E402
+
+def get_secret(config, secret_id):
+    """Fetches a secret through the process-wide cache, which reuses one Secret Manager client."""
+    return secret_cache(config).get(secret_id)
+
+def build_migration_plan(config, metadata_file=None, database=None):
+    """
+    Builds the deterministic migration plan from a saved catalog file or, if none is given, the live
+    source (its `database`, or the one named in Secret Manager).
+    """
+    from mcp_server.migration_planner import MigrationPlanner
+
+    if metadata_file:
+        # Expected shape: {"metadata": <db_metadata output>, "table_stats": <get_table_size_estimates "tables">}
+        with open(metadata_file, 'r') as f:
+            saved = json.load(f)
+        metadata, table_stats = saved["metadata"], saved["table_stats"]
+    else:
+        from mcp_server.mcp_tools import MySQLTools
+        tools = MySQLTools(project_id=config['gcp_project_id'], database=database)
+        metadata = tools.get_db_metadata()
+        table_stats = tools.get_table_size_estimates()["tables"]
+        tools.close()
+    return MigrationPlanner(config.get('migration_planner')).plan(metadata, table_stats)
+
+def build_fleet_plan(config, databases):
+    """Plans every database of a fleet, in the order a fleet migration starts them (smallest first)."""
+    plans = [{"database": database, "plan": build_migration_plan(config, database=database)} for database in databases]
+    for entry in plans:
+        entry["bytes"] = sum(t["bytes"] for t in entry["plan"]["tables"])
+    return {"databases": sorted(plans, key=lambda p: (p["bytes"], p["database"])),
+            "bytes": sum(p["bytes"] for p in plans)}
+
+def validation_table_groups(config, metadata_file=None):
+    """Splits the planned tables into the configured number of validation groups; one unscoped group if planning fails."""
+    groups = config.get('orchestration', {}).get('validation_groups', 3)
+    try:
+        tables = build_migration_plan(config, metadata_file)["tables"]
+    except Exception as e:
+        logging.warning(f"Could not plan table groups, validating with a single agent: {e}")
+        return [None]
+    return split_table_groups(tables, groups) or [None]
+
+def with_response_cache(model_client, config, mode=None):
+    """Wraps the model client with the response cache configured under llm_cache; `mode` overrides its mode."""
+    from agents.llm_cache import OFF, CachingChatCompletionClient, ResponseCacheStore
+
+    cache_config = config.get('llm_cache', {})
+    mode = mode or cache_config.get('mode', OFF)
+    if mode == OFF:
+        return model_client
+    store = ResponseCacheStore(cache_config.get('directory', '.llm_cache'),
+                               max_bytes=cache_config.get('max_size_mb', 256) * 1024 * 1024)
+    logging.info(f"Using the LLM response cache in {store.directory} in {mode} mode")
+    return CachingChatCompletionClient(model_client, store, config['llm_config']['model'], mode=mode)
+
+async def main(task, encryption_method, metadata_file=None, timings_file=None, llm_cache=None, databases=None):
+    from autogen_agentchat.agents import CodeExecutorAgent
+    from autogen_agentchat.teams import GraphFlow
+    from autogen_agentchat.conditions import MaxMessageTermination
+    from autogen_ext.code_executors.docker import DockerCommandLineCodeExecutor
+    from autogen_ext.models.openai import OpenAIChatCompletionClient # Using as a placeholder for Gemini client structure
+
+    config = load_config()
+    orchestration = config.get('orchestration', {})
 
     # Fetch API key from Secret Manager
-    api_key = get_secret(config['gcp_project_id'], config['llm_config']['api_key_secret_name'])
+    api_key = get_secret(config, config['llm_config']['api_key_secret_name'])
 
     # In a real scenario, you would use a Gemini client. We use OpenAI client structure for compatibility demo.
     model_client = OpenAIChatCompletionClient(model=config['llm_config']['model'], api_key=api_key)
+    # Rehearsal reruns over an unchanged catalog send identical requests; answer those from the cache.
+    model_client = with_response_cache(model_client, config, llm_cache)
     
     # Create a code executor in a docker environment
     code_executor = CodeExecutorAgent(
         "code_executor",
-        code_executor=autogen.coding.DockerCommandLineCodeExecutor(work_dir="coding")
+        code_executor=DockerCommandLineCodeExecutor(work_dir="coding")
     )
 
     # Create Agents
     env_agent = create_environment_setup_agent(model_client, code_executor)
     schema_agent = create_schema_conversion_agent(model_client)
-    migration_agent = create_data_migration_agent(model_client, code_executor)
-    validation_agent = create_data_validation_agent(model_client, code_executor)
+    migration_agent = create_data_migration_agent(model_client, code_executor, databases=databases)
+    # Table groups come from one database's plan; a fleet is validated by a single agent.
+    table_groups = validation_table_groups(config, metadata_file) if not databases or len(databases) == 1 else [None]
+    validation_agents = [
+        create_data_validation_agent(model_client, code_executor, tables=group,
+                                     name="Data_Validation_Agent" if len(table_groups) == 1 else f"Data_Validation_Agent_{i + 1}")
+        for i, group in enumerate(table_groups)
+    ]
     anomaly_agent = create_anomaly_detection_agent(model_client)
     optimization_agent = create_performance_optimization_agent(model_client, code_executor)
 
-    # User Proxy Agent to kick off the process
-    user_proxy = UserProxyAgent(name="User_Proxy")
-
-    # Build the GraphFlow
-    builder = DiGraphBuilder()
-    builder.add_node(user_proxy)
-    builder.add_node(env_agent)
-    builder.add_node(schema_agent)
-    builder.add_node(migration_agent)
-    builder.add_node(validation_agent)
-    builder.add_node(anomaly_agent)
-    builder.add_node(optimization_agent)
-
-    # Define the workflow sequence
-    builder.add_edge(user_proxy, env_agent)
-    builder.add_edge(env_agent, schema_agent)
-    builder.add_edge(schema_agent, migration_agent)
-    builder.add_edge(migration_agent, validation_agent)
-    builder.add_edge(validation_agent, anomaly_agent)
-    builder.add_edge(anomaly_agent, optimization_agent)
-
-    graph = builder.build()
-    team = autogen_agentchat.teams.GraphFlow(
-        participants=graph.nodes,
+    # Environment checks and schema analysis run side by side, as do validation (per table group)
+    # and anomaly detection; the run takes as long as its longest branch.
+    graph, participants, parents = build_migration_graph(env_agent, schema_agent, migration_agent, validation_agents,
+                                                         anomaly_agent, optimization_agent)
+    team = GraphFlow(
+        participants=participants,
         graph=graph,
-        termination_condition=MaxMessageTermination(15)
+        # The graph stops by itself after the optimization node; this only bounds a runaway run.
+        termination_condition=MaxMessageTermination(orchestration.get('max_messages_per_node', 5) * len(participants))
     )
 
     # Formulate the initial task message
@@ -78,18 +129,53 @@ async def main(task, encryption_method):
     Start the MySQL migration process.
     Task: {task}
     Encryption Preference: {encryption_method}
+    Source Databases: {', '.join(databases) if databases else 'the configured source database'}
     Follow the defined workflow precisely.
     """
     
-    # Run the team
-    await user_proxy.run_team(team, task=initial_task)
-    
+    # Run the team, timing each node from the messages it produces
+    timer = NodeTimer(parents)
+    timer.start()
+    async for message in team.run_stream(task=initial_task):
+        source = getattr(message, "source", None)
+        if source is None:
+            continue  # The final TaskResult
+        timer.observe(source)
+        print(f"---------- {source} ----------\n{message.to_text()}")
+
+    timings = timer.report()
+    logging.info(f"Orchestration took {timings['wall_seconds']:.1f}s (nodes summed: {timings['node_seconds_total']:.1f}s); "
+                 f"critical path: {' -> '.join(timings['critical_path'])}")
+    for name, node in timings["nodes"].items():
+        logging.info(f"  {name}: {node['seconds']:.1f}s (from {node['started']:.1f}s to {node['finished']:.1f}s)")
+    if timings_file:
+        with open(timings_file, 'w') as f:
+            json.dump(timings, f, indent=2)
+
     await model_client.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--task", type=str, required=True, help="The migration task description.")
+    parser.add_argument("--task", type=str, help="The migration task description.")
     parser.add_argument("--encryption-method", type=str, choices=['gcp-default', 'legacy'], default='gcp-default', help="Encryption method preference.")
+    parser.add_argument("--plan-only", action="store_true", help="Print the migration plan as JSON and exit without running the agents.")
+    parser.add_argument("--metadata-file", type=str, help="Plan from a saved catalog JSON file instead of the live source.")
+    parser.add_argument("--timings-file", type=str, help="Write per-node timings and the critical path of the agent run as JSON.")
+    parser.add_argument("--databases", type=lambda v: [d for d in v.split(",") if d],
+                        help="Comma-separated source databases to migrate together as a fleet.")
+    parser.add_argument("--llm-cache", choices=['off', 'record', 'replay'], help="LLM response cache mode; overrides llm_cache.mode in config.yaml.")
     args = parser.parse_args()
-    
-    asyncio.run(main(args.task, args.encryption_method))
\ No newline at end of file
+
+    if args.plan_only:
+        config = load_config()
+        if args.databases and len(args.databases) > 1:
+            print(json.dumps(build_fleet_plan(config, args.databases), indent=2))
+        else:
+            database = args.databases[0] if args.databases else None
+            print(json.dumps(build_migration_plan(config, args.metadata_file, database), indent=2))
+    elif not args.task:
+        parser.error("--task is required unless --plan-only is given")
+    else:
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(main(args.task, args.encryption_method, args.metadata_file, args.timings_file, args.llm_cache,
+                         args.databases))
\ No newline at end of file
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from collections import deque
+
+INCREASE = "increase"
+DECREASE = "decrease"
+HOLD = "hold"
+
+
+class SourceHealthSampler:
+    """
+    Samples the load on the source database: Threads_running, replication lag (when the source is
+    itself a replica, which is where exports should run) and the latency of a probe query.
+    """
+    def __init__(self, source_tools, probe_query: str = "SELECT 1", clock=time.monotonic):
+        self.source_tools = source_tools
+        self.probe_query = probe_query
+        self._clock = clock
+
+    @staticmethod
+    def _replica_lag(cursor):
+        for statement, column in (("SHOW REPLICA STATUS;", "Seconds_Behind_Source"),
+                                  ("SHOW SLAVE STATUS;", "Seconds_Behind_Master")):
+            try:
+                cursor.execute(statement)
+            except Exception:
+                continue  # SHOW REPLICA STATUS needs MySQL 8.0.22+.
+            row = cursor.fetchone()
+            if not row:
+                return None
+            lag = row.get(column)
+            return float(lag) if lag is not None else None
+        return None
+
+    def sample(self) -> dict:
+        """Returns {'threads_running', 'replica_lag_seconds', 'probe_latency_ms'}."""
+        with self.source_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                started = self._clock()
+                cursor.execute(self.probe_query)
+                cursor.fetchall()
+                probe_ms = (self._clock() - started) * 1000
+                cursor.execute("SHOW GLOBAL STATUS LIKE 'Threads_running';")
+                row = cursor.fetchone()
+                threads_running = int(row["Value"]) if row else None
+                lag = self._replica_lag(cursor)
+        return {"threads_running": threads_running, "replica_lag_seconds": lag,
+                "probe_latency_ms": round(probe_ms, 3)}
+
+
+class AdaptiveConcurrencyController:
+    """
+    Adjusts export concurrency to the source's health with additive increase, multiplicative
+    decrease. Every interval_seconds the sampler is read and each signal is compared with its SLO
+    bound in `limits` (max_threads_running, max_replica_lag_seconds, max_probe_latency_ms):
+      - any signal above its bound: workers and per-worker rate are multiplied by decrease_factor;
+      - all signals below headroom * bound: one worker and rate_step are added;
+      - otherwise the current settings are held.
+    Workers stay within [min_workers, max_workers] and the rate within [min_rate, max_rate] bytes/s.
+    Changes are applied through apply(workers, per_worker_bytes_per_sec), e.g. a scheduler's
+    set_workers and set_per_worker_rate. Every decision is logged and kept in a bounded history.
+    """
+    def __init__(self, sampler, apply, limits: dict, min_workers: int = 1, max_workers: int = 16,
+                 initial_workers: int = None, min_rate: float = 1024 * 1024, max_rate: float = 64 * 1024 * 1024,
+                 initial_rate: float = None, rate_step: float = None, headroom: float = 0.7,
+                 decrease_factor: float = 0.5, interval_seconds: float = 10.0, metrics=None, history: int = 200):
+        if min_workers < 1 or max_workers < min_workers:
+            raise ValueError("Worker bounds must satisfy 1 <= min_workers <= max_workers.")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1.")
+        self.sampler = sampler
+        self.apply = apply
+        self.limits = {k: v for k, v in (limits or {}).items() if v}
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step or max_rate / 10
+        self.headroom = headroom
+        self.decrease_factor = decrease_factor
+        self.interval_seconds = interval_seconds
+        self.metrics = metrics
+        self.workers = max(min_workers, min(initial_workers or min_workers, max_workers))
+        self.rate = max(min_rate, min(initial_rate or max_rate, max_rate))
+        self.decisions = deque(maxlen=history)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ratios(self, health: dict) -> dict:
+        """Each signal as a fraction of its bound; unavailable signals are left out."""
+        signals = {"max_threads_running": health.get("threads_running"),
+                   "max_replica_lag_seconds": health.get("replica_lag_seconds"),
+                   "max_probe_latency_ms": health.get("probe_latency_ms")}
+        return {name: signals[name] / bound for name, bound in self.limits.items()
+                if signals.get(name) is not None}
+
+    def decide(self, health: dict) -> dict:
+        """Turns one health sample into a decision and applies it. Returns the decision."""
+        ratios = self._ratios(health)
+        workers, rate = self.workers, self.rate
+        breached = sorted(name for name, ratio in ratios.items() if ratio > 1)
+        if breached:
+            action = DECREASE
+            workers = max(self.min_workers, int(workers * self.decrease_factor))
+            rate = max(self.min_rate, rate * self.decrease_factor)
+        elif ratios and all(ratio < self.headroom for ratio in ratios.values()):
+            action = INCREASE
+            workers = min(self.max_workers, workers + 1)
+            rate = min(self.max_rate, rate + self.rate_step)
+        else:
+            action = HOLD
+        changed = (workers, rate) != (self.workers, self.rate)
+        decision = {"time": time.time(), "action": action, "changed": changed, "breached": breached,
+                    "health": dict(health), "workers": workers, "previous_workers": self.workers,
+                    "per_worker_bytes_per_sec": round(rate, 1), "previous_bytes_per_sec": round(self.rate, 1)}
+        self.decisions.append(decision)
+        logging.info(f"Throttle {action}: workers {self.workers} -> {workers}, per-worker rate "
+                     f"{self.rate / 1048576:.1f} -> {rate / 1048576:.1f} MB/s; threads_running="
+                     f"{health.get('threads_running')}, replica_lag={health.get('replica_lag_seconds')}s, "
+                     f"probe={health.get('probe_latency_ms')}ms" + (f"; over bound: {', '.join(breached)}" if breached else ""))
+        self.workers, self.rate = workers, rate
+        if changed:
+            self.apply(workers, rate)
+        if self.metrics:
+            self.metrics.update_progress("throttle", workers=workers, per_worker_bytes_per_sec=round(rate, 1),
+                                         action=action, decreases=sum(d["action"] == DECREASE for d in self.decisions),
+                                         **{k: v for k, v in health.items() if v is not None})
+        return decision
+
+    def step(self) -> dict:
+        """Samples the source once and applies the resulting decision; a failed sample holds."""
+        try:
+            health = self.sampler.sample()
+        except Exception as e:
+            logging.warning(f"Source health sample failed, holding concurrency: {e}")
+            return {"action": HOLD, "changed": False, "error": str(e), "workers": self.workers}
+        return self.decide(health)
+
+    def recommend_workers(self) -> int:
+        """
+        Samples once and returns the worker count to start with, for tools whose concurrency is
+        fixed at start (such as mydumper's --threads).
+        """
+        self.step()
+        return self.workers
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.step()
+
+    def start(self):
+        """Applies the initial settings and adjusts them every interval_seconds in a background thread."""
+        self.apply(self.workers, self.rate)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="adaptive-throttle")
+        self._thread.start()
+
+    def stop(self) -> dict:
+        """Stops adjusting and returns a summary of the decisions."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.summary()
+
+    def summary(self) -> dict:
+        decisions = list(self.decisions)
+        return {
+            "workers": self.workers,
+            "per_worker_bytes_per_sec": round(self.rate, 1),
+            "decisions": len(decisions),
+            "increases": sum(d["action"] == INCREASE for d in decisions),
+            "decreases": sum(d["action"] == DECREASE for d in decisions),
+            "recent": decisions[-10:],
+        }
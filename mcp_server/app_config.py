@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+import time
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Overrides the config file every component reads; config.yaml at the repository root otherwise.
+CONFIG_PATH_ENV = "MIGRATION_CONFIG"
+NUMBER = (int, float)
+SECTION = dict
+
+# key -> (type(s), required) or (SECTION, required, {nested keys}). Unlisted keys are allowed but
+# logged, so a misspelt option does not silently fall back to its default. Optional keys may be null.
+CONFIG_SCHEMA = {
+    "gcp_project_id": (str, True),
+    "gcp_region": (str, False),
+    "gcp_zone": (str, False),
+    "agent_host_vm_name": (str, False),
+    "mcp_bridge_vm_name": (str, False),
+    "target_sql_instance_name": (str, False),
+    "gcs_bucket_name_prefix": (str, False),
+    "llm_config": (SECTION, True, {
+        "model": (str, True),
+        "api_key_secret_name": (str, True),
+    }),
+    "llm_cache": (SECTION, False, {
+        "mode": (str, False),
+        "directory": (str, False),
+        "max_size_mb": (NUMBER, False),
+    }),
+    "secrets": (SECTION, False),
+    "secret_cache": (SECTION, False, {
+        "ttl_seconds": (NUMBER, False),
+    }),
+    "orchestration": (SECTION, False, {
+        "validation_groups": (int, False),
+        "max_messages_per_node": (int, False),
+    }),
+    "migration_strategies": (SECTION, True, {
+        "gcs_import_threshold_gb": (NUMBER, True),
+        "dms_threshold_gb": (NUMBER, True),
+    }),
+    "migration_planner": (SECTION, False),
+    "mcp_server": (SECTION, False, {
+        "manifest_path": (str, False),
+        "tool_workers": (int, False),
+        "job_workers": (int, False),
+        "encode_processes": (int, False),
+        "connection_pool": (SECTION, False),
+        "metadata_pool": (SECTION, False),
+        "cache": (SECTION, False),
+        "result_encoding": (SECTION, False),
+        "object_store": (SECTION, False),
+        "mydumper_upload": (SECTION, False),
+        "throttle": (SECTION, False),
+        "log_analyzer": (SECTION, False),
+        "parquet": (SECTION, False),
+        "fleet": (SECTION, False),
+        "loader": (SECTION, False),
+    }),
+}
+
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def default_config_path() -> str:
+    return os.environ.get(CONFIG_PATH_ENV) or os.path.join(ROOT_DIR, "config.yaml")
+
+
+def _type_name(types) -> str:
+    if types == NUMBER:
+        return "number"
+    return "mapping" if types is SECTION else types.__name__
+
+
+def _check(value: dict, schema: dict, path: str, problems: list):
+    for key, spec in schema.items():
+        types, required = spec[0], spec[1]
+        name = f"{path}{key}"
+        if key not in value or value[key] is None:
+            if required:
+                problems.append(f"{name} is required")
+            continue
+        item = value[key]
+        # bool is an int subclass, but `workers: true` is a mistake rather than 1.
+        if not isinstance(item, types) or (isinstance(item, bool) and bool not in (
+                types if isinstance(types, tuple) else (types,))):
+            problems.append(f"{name} must be a {_type_name(types)}, not {type(item).__name__}")
+        elif len(spec) > 2:
+            _check(item, spec[2], f"{name}.", problems)
+    for key in value:
+        if key not in schema:
+            logging.warning(f"Unknown configuration option {path}{key}")
+
+
+def validate_config(config) -> dict:
+    """Checks a parsed config against CONFIG_SCHEMA and raises ValueError listing every problem."""
+    if not isinstance(config, dict):
+        raise ValueError("The configuration must be a mapping")
+    problems = []
+    _check(config, CONFIG_SCHEMA, "", problems)
+    if problems:
+        raise ValueError("Invalid configuration: " + "; ".join(problems))
+    return config
+
+
+def load_config(path: str = None) -> dict:
+    """
+    Parses and validates the config file once per process; later calls return the same dict, so
+    callers must not modify it. `path` defaults to $MIGRATION_CONFIG or config.yaml at the
+    repository root, whatever the working directory.
+    """
+    path = os.path.abspath(path or default_config_path())
+    with _configs_lock:
+        if path not in _configs:
+            with open(path, 'r') as f:
+                _configs[path] = validate_config(yaml.safe_load(f))
+            logging.info(f"Loaded configuration from {path}")
+        return _configs[path]
+
+
+def clear_config_cache():
+    """Forgets every parsed config, so the next load_config() reads the file again."""
+    with _configs_lock:
+        _configs.clear()
+
+
+class SecretCache:
+    """
+    Secret values fetched from Secret Manager and kept for ttl_seconds, so a rotated secret is
+    picked up on the next fetch after expiry. All lookups share one SecretManagerServiceClient,
+    which is imported and created on the first fetch; `client` replaces it in tests.
+    """
+    def __init__(self, project_id: str, ttl_seconds: float = 300, client=None, clock=time.monotonic):
+        self.project_id = project_id
+        self.ttl_seconds = ttl_seconds
+        self._client = client
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values = {}  # (secret_id, version) -> (value, expires at)
+        self.fetches = 0
+
+    def _secret_client(self):
+        if self._client is None:
+            from google.cloud import secretmanager
+            self._client = secretmanager.SecretManagerServiceClient()
+        return self._client
+
+    def get(self, secret_id: str, version: str = "latest") -> str:
+        """Returns the secret value, from the cache while it has not expired."""
+        key = (secret_id, version)
+        with self._lock:
+            cached = self._values.get(key)
+            if cached and cached[1] > self._clock():
+                return cached[0]
+            # Fetched under the lock so concurrent callers share one request per secret.
+            name = f"projects/{self.project_id}/secrets/{secret_id}/versions/{version}"
+            response = self._secret_client().access_secret_version(request={"name": name})
+            value = response.payload.data.decode("UTF-8")
+            self._values[key] = (value, self._clock() + self.ttl_seconds)
+            self.fetches += 1
+            return value
+
+    def invalidate(self, secret_id: str = None):
+        """Drops one cached secret (all versions), or every secret."""
+        with self._lock:
+            for key in [k for k in self._values if secret_id is None or k[0] == secret_id]:
+                del self._values[key]
+
+
+_secret_caches = {}
+
+
+def secret_cache(config: dict) -> SecretCache:
+    """The process-wide SecretCache of the config's project, with its secret_cache.ttl_seconds."""
+    project_id = config['gcp_project_id']
+    with _configs_lock:
+        if project_id not in _secret_caches:
+            _secret_caches[project_id] = SecretCache(
+                project_id, ttl_seconds=config.get('secret_cache', {}).get('ttl_seconds', 300))
+        return _secret_caches[project_id]
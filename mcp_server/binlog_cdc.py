@@ -0,0 +1,298 @@
+import json
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pymysql
+
+from table_chunks import get_primary_key_columns, quote_identifier
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+class BinlogChangeApplier:
+    """
+    Replicates row changes from the source binlog to the target, starting at the position recorded
+    by the export (e.g. mydumper's metadata file), so the source stays live during the dump and load.
+
+    Row events are buffered per transaction and flushed in batches at transaction boundaries. Within
+    a batch, changes are coalesced per table and primary key (only the last state of a row is
+    applied) and spread over `workers` connections by a hash of the key, so all changes to one row
+    go through the same worker in order. Changes to a table without a primary key are not coalesced;
+    one worker applies them in binlog order, updates as a delete of the old row image and an insert.
+    Rows with a primary key are upserted as a delete by primary key and an insert, so a row that
+    collides with another on a secondary unique key fails instead of overwriting that other row.
+    Batches are applied one after the other, and on tables with a primary key each batch is
+    idempotent, so replaying from the last checkpointed position after a crash is safe. Each worker
+    applies its share in one transaction; if some hit a constraint error (e.g. two rows swapping a
+    unique value across workers), only their changes are replayed, serially in binlog order, after
+    the other workers have committed.
+    """
+    def __init__(self, source_tools, target_tools, workers: int = 4, batch_rows: int = 1000,
+                 batch_seconds: float = 1.0, tables: list = None, server_id: int = 4379,
+                 poll_seconds: float = 1.0, on_checkpoint=None, metrics=None, stream_factory=None,
+                 progress_source: str = "cdc"):
+        self.source_tools = source_tools
+        self.target_tools = target_tools
+        self.workers = workers
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.tables = tables
+        self.server_id = server_id
+        self.poll_seconds = poll_seconds
+        self.on_checkpoint = on_checkpoint
+        self.metrics = metrics
+        self.progress_source = progress_source
+        self._stream_factory = stream_factory or self._open_stream
+        self._pk_columns = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "log_file": None,
+            "log_pos": None,
+            "events_read": 0,
+            "transactions": 0,
+            "rows_read": 0,
+            "rows_applied": 0,
+            "rows_coalesced": 0,
+            "batches": 0,
+            "serial_replays": 0,
+            "lag_seconds": None,
+            "caught_up": False,
+        }
+
+    def _open_stream(self, log_file: str, log_pos: int):
+        """Opens a non-blocking python-mysql-replication stream at a position."""
+        try:
+            from pymysqlreplication import BinLogStreamReader
+            from pymysqlreplication.event import RotateEvent, XidEvent
+            from pymysqlreplication.row_event import DeleteRowsEvent, UpdateRowsEvent, WriteRowsEvent
+        except ImportError:
+            raise RuntimeError("Binlog CDC requires python-mysql-replication (pip install mysql-replication).")
+        db_conf = self.source_tools._get_db_config()
+        return BinLogStreamReader(
+            connection_settings={"host": db_conf['host'], "user": db_conf['user'], "passwd": db_conf['password']},
+            server_id=self.server_id,
+            log_file=log_file,
+            log_pos=log_pos,
+            resume_stream=True,
+            blocking=False,
+            only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent, XidEvent, RotateEvent],
+            only_schemas=[db_conf['database']],
+            only_tables=self.tables,
+        )
+
+    def _primary_key(self, table_name: str) -> list:
+        if table_name not in self._pk_columns:
+            with self.source_tools.connection() as connection:
+                self._pk_columns[table_name] = get_primary_key_columns(connection, table_name)
+        return self._pk_columns[table_name]
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, (set, frozenset)):
+            return ",".join(sorted(value))
+        return value
+
+    def _changes_from_event(self, event, sequence: int) -> list:
+        """Turns one row event into [(table, key, op, row)] in binlog order."""
+        kind = type(event).__name__
+        table = event.table
+        pk_columns = self._primary_key(table)
+        changes = []
+        for i, row in enumerate(event.rows):
+            if kind == "UpdateRowsEvent":
+                before, after = row["before_values"], row["after_values"]
+            elif kind == "WriteRowsEvent":
+                before, after = None, row["values"]
+            else:
+                before, after = row["values"], None
+            if not pk_columns:
+                # Rows without a primary key cannot be coalesced: each change keeps a unique key, and
+                # an update deletes the before-image (by its full row) and inserts the after-image.
+                if before is not None:
+                    changes.append((table, ("#", sequence, i, DELETE), DELETE, before))
+                if after is not None:
+                    changes.append((table, ("#", sequence, i, UPSERT), UPSERT, after))
+                continue
+            key_of = lambda values: tuple(values[c] for c in pk_columns)
+            if before is not None and (after is None or key_of(before) != key_of(after)):
+                changes.append((table, key_of(before), DELETE, before))
+            if after is not None:
+                changes.append((table, key_of(after), UPSERT, after))
+        return changes
+
+    @staticmethod
+    def _keyless(key: tuple) -> bool:
+        return bool(key) and key[0] == "#"
+
+    def _shard(self, table: str, key: tuple) -> int:
+        if self._keyless(key):
+            return zlib.crc32(table.encode()) % self.workers
+        return zlib.crc32(repr((table, key)).encode()) % self.workers
+
+    def _apply_changes(self, connection, changes: list):
+        """Applies changes in the given order on one connection."""
+        with connection.cursor() as cursor:
+            for table, key, op, row in changes:
+                pk_columns = self._primary_key(table)
+                if op == DELETE:
+                    match_columns = pk_columns or list(row)
+                    where = " AND ".join(f"{quote_identifier(c)} <=> %s" for c in match_columns)
+                    cursor.execute(f"DELETE FROM {quote_identifier(table)} WHERE {where} LIMIT 1;",
+                                   [self._value(row[c]) for c in match_columns])
+                else:
+                    if pk_columns:
+                        # Not ON DUPLICATE KEY UPDATE, which would update whichever row a secondary
+                        # unique key collides with. foreign_key_checks is off, so nothing cascades.
+                        where = " AND ".join(f"{quote_identifier(c)} = %s" for c in pk_columns)
+                        cursor.execute(f"DELETE FROM {quote_identifier(table)} WHERE {where};",
+                                       [self._value(row[c]) for c in pk_columns])
+                    columns = list(row)
+                    column_list = ", ".join(quote_identifier(c) for c in columns)
+                    placeholders = ", ".join(["%s"] * len(columns))
+                    cursor.execute(f"INSERT INTO {quote_identifier(table)} ({column_list}) VALUES ({placeholders});",
+                                   [self._value(row[c]) for c in columns])
+
+    def _apply_transaction(self, changes: list):
+        with self.target_tools.connection() as connection:
+            connection.begin()
+            with connection.cursor() as cursor:
+                # Workers apply rows of related tables independently, so parent rows may arrive later.
+                cursor.execute("SET SESSION foreign_key_checks = 0;")
+            try:
+                self._apply_changes(connection, changes)
+                connection.commit()
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET SESSION foreign_key_checks = 1;")
+
+    def apply_batch(self, changes: list) -> int:
+        """Coalesces a batch of changes and applies it on the worker connections. Returns rows applied."""
+        coalesced = {}
+        for table, key, op, row in changes:
+            coalesced[(table, key)] = (table, key, op, row)
+        shards = [[] for _ in range(self.workers)]
+        for change in coalesced.values():
+            shards[self._shard(change[0], change[1])].append(change)
+        for shard in shards:
+            # Deletes first, so a row taking over a unique value freed by a deleted row does not conflict.
+            # Changes to tables without a primary key stay in binlog order (the sort is stable), since
+            # a delete matches whatever row has its image at that point.
+            shard.sort(key=lambda c: c[2] != DELETE and not self._keyless(c[1]))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {i: executor.submit(self._apply_transaction, shard) for i, shard in enumerate(shards) if shard}
+        failed = set()
+        for i, future in futures.items():
+            error = future.exception()
+            if isinstance(error, pymysql.err.IntegrityError):
+                failed.add(i)
+            elif error is not None:
+                raise error
+        if failed:
+            # The failed workers' transactions rolled back and the others committed; replaying only the
+            # failed ones keeps rows of tables without a primary key from being inserted twice.
+            logging.warning(f"{len(failed)} of {len(futures)} workers hit a constraint error; replaying their "
+                            f"changes in binlog order.")
+            self._apply_transaction([c for c in changes if self._shard(c[0], c[1]) in failed])
+            with self._lock:
+                self._stats["serial_replays"] += 1
+        with self._lock:
+            self._stats["rows_applied"] += len(coalesced)
+            self._stats["rows_coalesced"] += len(changes) - len(coalesced)
+            self._stats["batches"] += 1
+        return len(coalesced)
+
+    def _flush(self, batch: list, position: tuple, last_timestamp):
+        if batch:
+            self.apply_batch(batch)
+        with self._lock:
+            self._stats["log_file"], self._stats["log_pos"] = position
+            if last_timestamp is not None:
+                self._stats["lag_seconds"] = round(max(0.0, time.time() - last_timestamp), 3)
+        if self.on_checkpoint:
+            self.on_checkpoint(*position)
+        self._publish()
+
+    def _publish(self):
+        if self.metrics:
+            self.metrics.update_progress(self.progress_source, **self.status())
+
+    def status(self) -> dict:
+        """Returns the applied position, counters and replication lag."""
+        with self._lock:
+            return dict(self._stats)
+
+    def run(self, log_file: str, log_pos: int, stop_event=None, until_caught_up: bool = False,
+            max_seconds: float = None) -> dict:
+        """
+        Streams and applies changes from (log_file, log_pos) until stop_event is set, max_seconds pass,
+        or, with until_caught_up, the end of the binlog is reached.
+        """
+        started = time.monotonic()
+        position = (log_file, int(log_pos))
+        with self._lock:
+            self._stats["log_file"], self._stats["log_pos"] = position
+        logging.info(f"Starting binlog CDC at {log_file}:{log_pos} with {self.workers} workers.")
+        sequence = 0
+        while True:
+            batch, transaction = [], []
+            batch_started, last_timestamp = None, None
+            current_file = position[0]
+            stream = self._stream_factory(*position)
+            try:
+                for event in stream:
+                    kind = type(event).__name__
+                    with self._lock:
+                        self._stats["events_read"] += 1
+                        self._stats["caught_up"] = False
+                    if kind == "RotateEvent":
+                        current_file = event.next_binlog
+                        continue
+                    if kind == "XidEvent":
+                        # Only whole transactions are batched, so checkpoints are always resumable.
+                        batch.extend(transaction)
+                        transaction = []
+                        position = (current_file, event.packet.log_pos)
+                        last_timestamp = event.timestamp
+                        with self._lock:
+                            self._stats["transactions"] += 1
+                        batch_started = batch_started or time.monotonic()
+                        if len(batch) >= self.batch_rows or time.monotonic() - batch_started >= self.batch_seconds:
+                            self._flush(batch, position, last_timestamp)
+                            batch, batch_started = [], None
+                        if stop_event is not None and stop_event.is_set():
+                            break
+                        continue
+                    sequence += 1
+                    changes = self._changes_from_event(event, sequence)
+                    transaction.extend(changes)
+                    with self._lock:
+                        self._stats["rows_read"] += len(event.rows)
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+            # Rows of an unfinished transaction are re-read from the last commit position next time.
+            self._flush(batch, position, last_timestamp)
+            with self._lock:
+                self._stats["caught_up"] = True
+                self._stats["lag_seconds"] = 0.0
+            self._publish()
+            if until_caught_up or (stop_event is not None and stop_event.is_set()):
+                break
+            if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                break
+            if stop_event is not None:
+                if stop_event.wait(self.poll_seconds):
+                    break
+            else:
+                time.sleep(self.poll_seconds)
+        result = self.status()
+        logging.info(f"Binlog CDC stopped at {result['log_file']}:{result['log_pos']} "
+                     f"after applying {result['rows_applied']} rows.")
+        return result
@@ -0,0 +1,191 @@
+import logging
+import os
+
+from migration_manifest import DONE, FAILED, IN_PROGRESS, TABLE_LEVEL
+from table_fingerprints import CHUNKS, SKIP, restore_bounds
+
+
+class CheckpointedMigration:
+    """
+    Runs the export/upload and validation stages of one migration run against a MigrationManifest.
+    Every chunk's progress is recorded as it happens, and resume() redoes only the work that is
+    not recorded as done.
+    With a fingerprinter, each migrated table's fingerprint is recorded, and a run given an
+    incremental plan (TableFingerprinter.plan against an earlier run) skips unchanged tables and
+    re-exports only the changed chunks of the others, as files that replace their key ranges.
+    The binlog position of the first exported table's snapshot is saved as the run's CDC position.
+    """
+    def __init__(self, manifest, run_id: str, exporter=None, validator=None, fingerprinter=None):
+        self.manifest = manifest
+        self.run_id = run_id
+        self.exporter = exporter
+        self.validator = validator
+        self.fingerprinter = fingerprinter
+        self._fingerprints = {}
+
+    def export_table(self, table_name: str, prefix: str, incremental: dict = None) -> dict:
+        """Exports the chunks of a table that are not yet uploaded, reusing the chunk plan of earlier attempts."""
+        boundaries = self.manifest.get_chunk_plan(self.run_id, table_name)
+        changed_only = incremental is not None and incremental["action"] == CHUNKS
+        if boundaries is None and changed_only:
+            # Changed chunks are the baseline's key ranges, so the same boundaries must be reused.
+            boundaries = restore_bounds(incremental["boundaries"])
+        plan = self.exporter.plan_table(table_name, boundaries=boundaries)
+        if self.manifest.get_chunk_plan(self.run_id, table_name) is None:
+            self.manifest.save_chunk_plan(self.run_id, table_name, plan["boundaries"])
+        completed = self.manifest.completed_chunks(self.run_id, table_name, "upload")
+        if changed_only:
+            completed |= set(range(len(plan["boundaries"]))) - set(incremental["chunks"])
+        if incremental is not None and self.fingerprinter is not None:
+            fingerprint = incremental["fingerprint"]
+            if "chunks" not in fingerprint:
+                # Checksummed before the export, so writes made during it show up as changes next time.
+                fingerprint = self.fingerprinter.with_checksums(table_name, fingerprint, plan["boundaries"])
+            self._fingerprints[table_name] = fingerprint
+
+        def on_start(index):
+            self.manifest.mark(self.run_id, table_name, index, "export", IN_PROGRESS)
+
+        def on_chunk(result):
+            self.manifest.mark(self.run_id, table_name, result["chunk"], "export", DONE,
+                               detail=f"{result['rows']} rows")
+            self.manifest.mark(self.run_id, table_name, result["chunk"], "upload", DONE,
+                               size_bytes=result["bytes"], checksum=result.get("md5"), detail=result["key"])
+
+        def on_error(index, error):
+            self.manifest.mark(self.run_id, table_name, index, "export", FAILED, detail=str(error))
+
+        if completed:
+            logging.info(f"Skipping {len(completed)} of {len(plan['boundaries'])} chunks of {table_name} "
+                         f"(already uploaded{' or unchanged' if changed_only else ''}).")
+        # Changed chunks replace their key ranges in the table the earlier run created.
+        extra = {"include_schema": False, "replace_ranges": True} if changed_only else {}
+        result = self.exporter.export_table(table_name, prefix, completed_chunks=completed, on_chunk=on_chunk,
+                                            plan=plan, on_chunk_start=on_start, on_chunk_error=on_error, **extra)
+        position = result.get("binlog_position")
+        if position and self.manifest.get_cdc_position(self.run_id) is None:
+            # The first table's snapshot is the earliest; binlog CDC for the run starts there and
+            # reapplies later tables' already exported changes, which upserts make harmless.
+            self.manifest.save_cdc_position(self.run_id, position["log_file"], position["log_position"])
+        return result
+
+    def validate_table(self, table_name: str, incremental: dict = None) -> dict:
+        """Validates the chunks of a table that have not been validated as matching yet."""
+        completed = self.manifest.completed_chunks(self.run_id, table_name, "validate")
+        extra = {}
+        if incremental is not None and incremental["action"] == CHUNKS:
+            extra["boundaries"] = restore_bounds(incremental["boundaries"])
+            completed |= set(range(len(extra["boundaries"]))) - set(incremental["chunks"])
+
+        def on_chunk(result):
+            state = DONE if result["match"] else FAILED
+            self.manifest.mark(self.run_id, table_name, result["chunk"], "validate", state,
+                               detail=f"source={result['source_rows']} target={result['target_rows']}")
+
+        return self.validator.validate_table(table_name, completed_chunks=completed, on_chunk=on_chunk, **extra)
+
+    def wrap_table_dump(self, dump_fn):
+        """
+        Wraps a whole-table dump function such as MySQLTools.dump_table_to_gcs so its outcome is
+        recorded per table. Tables already uploaded by this run are skipped.
+        """
+        def checkpointed_dump(table_name, *args, **kwargs):
+            if TABLE_LEVEL in self.manifest.completed_chunks(self.run_id, table_name, "upload"):
+                logging.info(f"Skipping {table_name}: already uploaded in run {self.run_id}.")
+                return {"table": table_name, "skipped": True}
+            self.manifest.mark(self.run_id, table_name, TABLE_LEVEL, "upload", IN_PROGRESS)
+            try:
+                result = dump_fn(table_name, *args, **kwargs) or {}
+            except Exception as e:
+                self.manifest.mark(self.run_id, table_name, TABLE_LEVEL, "upload", FAILED, detail=str(e))
+                raise
+            self.manifest.mark(self.run_id, table_name, TABLE_LEVEL, "upload", DONE,
+                               size_bytes=result.get("bytes"), detail=result.get("uri"))
+            return result
+        return checkpointed_dump
+
+    def checkpointed_mydumper_export(self, export_fn, database_name: str, output_path: str, tables: list,
+                                     store=None, prefix: str = "") -> str:
+        """
+        Runs export_fn(tables), a mydumper export such as MySQLTools.run_mydumper_export, for the
+        tables this run has not dumped yet, and records them as exported (and uploaded, with a
+        store) once it succeeds. mydumper cannot resume a table, so the files an interrupted attempt
+        left for those tables are removed first, locally and under `prefix` in the store, where
+        stale extra chunks would otherwise be loaded as well.
+        """
+        pending = [t for t in tables if TABLE_LEVEL not in self.manifest.completed_chunks(self.run_id, t, "export")]
+        if not pending:
+            return f"Every table of run {self.run_id} was already dumped."
+        if len(pending) < len(tables):
+            logging.info(f"Skipping {len(tables) - len(pending)} tables already dumped in run {self.run_id}.")
+        # <db>.<table>.<n>.sql.gz and <db>.<table>-schema.sql.gz, but not <db>.<table>_archive...
+        names = tuple(f"{database_name}.{t}{separator}" for t in pending for separator in (".", "-schema"))
+        if os.path.isdir(output_path):
+            for entry in os.scandir(output_path):
+                # The metadata file is written last, so an old one would make a failed dump look finished.
+                if entry.is_file() and (entry.name.startswith(names) or entry.name == "metadata"):
+                    os.remove(entry.path)
+        if store is not None:
+            for obj in store.list_objects(prefix):
+                if obj["key"].rsplit("/", 1)[-1].startswith(names):
+                    store.delete(obj["key"])
+        for table_name in pending:
+            self.manifest.mark(self.run_id, table_name, TABLE_LEVEL, "export", IN_PROGRESS)
+        result = export_fn(pending)
+        state = DONE if result.startswith("Mydumper export successful") else FAILED
+        for table_name in pending:
+            self.manifest.mark(self.run_id, table_name, TABLE_LEVEL, "export", state, detail=result[:500])
+            if store is not None and state == DONE:
+                self.manifest.mark(self.run_id, table_name, TABLE_LEVEL, "upload", DONE, detail=prefix)
+        return result
+
+    def run(self, tables: list, prefix: str, validate: bool = False, cancel_event=None,
+            incremental: dict = None) -> dict:
+        """
+        Exports (and optionally validates) every table, continuing past failed tables.
+        Setting cancel_event stops the run before the next table; a later resume() picks it up.
+        incremental maps tables to their TableFingerprinter.plan entries.
+        """
+        results = {}
+        incremental = incremental or {}
+        for table_name in tables:
+            if cancel_event is not None and cancel_event.is_set():
+                logging.warning(f"Run {self.run_id} cancelled before {table_name}.")
+                break
+            table_plan = incremental.get(table_name)
+            try:
+                if table_plan is not None and table_plan["action"] == SKIP:
+                    results[table_name] = {"skipped": True, "reasons": table_plan["reasons"]}
+                else:
+                    entry = {"export": self.export_table(table_name, prefix, table_plan)}
+                    if validate:
+                        entry["validation"] = self.validate_table(table_name, table_plan)
+                    results[table_name] = entry
+                if table_plan is not None and self.fingerprinter is not None:
+                    # Saved only once the table is migrated, for later incremental runs to compare against.
+                    self.manifest.save_fingerprint(self.run_id, table_name,
+                                                   self._fingerprints.pop(table_name, table_plan["fingerprint"]))
+            except Exception as e:
+                logging.error(f"Run {self.run_id} failed on {table_name}: {e}")
+                results[table_name] = {"error": str(e)}
+        failed = [t for t, r in results.items() if "error" in r]
+        not_started = [t for t in tables if t not in results]
+        return {
+            "run_id": self.run_id,
+            "status": "FAILED" if failed else "CANCELLED" if not_started else "SUCCESS",
+            "failed_tables": failed,
+            "not_started_tables": not_started,
+            "skipped_tables": [t for t, r in results.items() if r.get("skipped")],
+            "tables": results,
+            "manifest": self.manifest.summary(self.run_id),
+        }
+
+    def resume(self, cancel_event=None) -> dict:
+        """Resumes a run with the parameters it was started with, redoing only failed or in-flight work."""
+        params = self.manifest.get_run(self.run_id)
+        if params is None:
+            raise ValueError(f"Unknown run: {self.run_id}")
+        reset = self.manifest.reset_in_flight(self.run_id)
+        logging.info(f"Resuming run {self.run_id}; {reset} in-flight chunk records reset to pending.")
+        return self.run(params["tables"], params["prefix"], validate=params.get("validate", False),
+                        cancel_event=cancel_event, incremental=params.get("incremental"))
@@ -0,0 +1,158 @@
+import datetime
+import logging
+
+# Bits of each integer type; MEDIUMINT fits 32 bits signed or unsigned.
+INTEGER_BITS = {"tinyint": 8, "smallint": 16, "mediumint": 32, "int": 32, "integer": 32, "bigint": 64}
+LARGE_TEXT_TYPES = {"mediumtext", "longtext"}
+BINARY_TYPES = {"binary", "varbinary", "tinyblob", "blob", "geometry", "point", "linestring", "polygon",
+                "multipoint", "multilinestring", "multipolygon", "geometrycollection", "geomcollection"}
+LARGE_BINARY_TYPES = {"mediumblob", "longblob"}
+TEXT_TYPES = {"char", "varchar", "tinytext", "text", "enum", "set", "json"} | LARGE_TEXT_TYPES
+
+
+def _pyarrow():
+    """Imports pyarrow on first use, so the other export formats work without it."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("The parquet export format requires pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def arrow_type(column: dict):
+    """Maps a get_column_types() column to an Arrow type; unknown types are exported as strings."""
+    pa = _pyarrow()
+    data_type = column["data_type"].lower()
+    if data_type in INTEGER_BITS:
+        unsigned = "unsigned" in (column.get("column_type") or "").lower()
+        return getattr(pa, f"{'u' if unsigned else ''}int{INTEGER_BITS[data_type]}")()
+    if data_type == "year":
+        return pa.int16()
+    if data_type == "bit":
+        return pa.uint64()
+    if data_type == "decimal":
+        precision, scale = int(column["precision"]), int(column["scale"] or 0)
+        # DECIMAL goes up to 65 digits; decimal128 holds 38.
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    if data_type == "float":
+        return pa.float32()
+    if data_type in ("double", "real"):
+        return pa.float64()
+    if data_type == "date":
+        return pa.date32()
+    if data_type in ("datetime", "timestamp"):
+        # PyMySQL returns naive datetimes in the session time zone.
+        return pa.timestamp("us")
+    if data_type == "time":
+        return pa.duration("us")
+    if data_type in LARGE_TEXT_TYPES:
+        return pa.large_string()
+    if data_type in LARGE_BINARY_TYPES:
+        return pa.large_binary()
+    if data_type in BINARY_TYPES:
+        return pa.binary()
+    return pa.string()
+
+
+def _cleaner(data_type: str):
+    """
+    Per-value conversion for a column whose values pyarrow could not convert as a whole:
+    zero or invalid dates (which PyMySQL returns as strings) become NULL, BIT bytes become
+    integers and SET values, which may arrive as Python sets, become comma-separated strings.
+    """
+    if data_type == "date":
+        return lambda v: v if isinstance(v, datetime.date) else None
+    if data_type in ("datetime", "timestamp"):
+        return lambda v: v if isinstance(v, datetime.datetime) else None
+    if data_type == "time":
+        return lambda v: v if isinstance(v, datetime.timedelta) else None
+    if data_type == "bit":
+        return lambda v: int.from_bytes(v, "big") if isinstance(v, (bytes, bytearray)) else int(v)
+    if data_type in TEXT_TYPES:
+        def text(v):
+            if isinstance(v, (set, frozenset)):
+                return ",".join(sorted(v))
+            if isinstance(v, (bytes, bytearray)):
+                return bytes(v).decode("utf-8", "replace")
+            return str(v)
+        return text
+    return lambda v: v
+
+
+class ArrowBatchConverter:
+    """
+    Converts row batches from a cursor into Arrow record batches, one column at a time. Each
+    column is handed to pyarrow whole, so the conversion runs in pyarrow's native loops; only a
+    column pyarrow rejects (e.g. one holding a zero date) is cleaned value by value first.
+    Fields are nullable, since cleaned values may become NULL, and keep their MySQL column type
+    as 'mysql_type' field metadata, which tells JSON apart from other strings.
+    """
+    def __init__(self, columns: list):
+        pa = _pyarrow()
+        self._pa = pa
+        self.columns = columns
+        self.schema = pa.schema([
+            pa.field(c["name"], arrow_type(c), nullable=True,
+                     metadata={"mysql_type": c.get("column_type") or c["data_type"]})
+            for c in columns
+        ])
+        self._cleaners = [_cleaner(c["data_type"].lower()) for c in columns]
+        self.values_nulled = 0
+
+    def _array(self, values, field, cleaner):
+        pa = self._pa
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+            cleaned = [None if v is None else cleaner(v) for v in values]
+            nulled = sum(1 for v, c in zip(values, cleaned) if v is not None and c is None)
+            if nulled:
+                self.values_nulled += nulled
+                logging.warning(f"Exported {nulled} invalid values of column {field.name} as NULL")
+            return pa.array(cleaned, type=field.type)
+
+    def convert(self, rows: list):
+        """Converts a list of row tuples, in column order, into a record batch."""
+        pa = self._pa
+        columns = list(zip(*rows)) if rows else [()] * len(self.columns)
+        arrays = [self._array(list(values), field, cleaner)
+                  for values, field, cleaner in zip(columns, self.schema, self._cleaners)]
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+class ParquetRowGroupWriter:
+    """
+    Writes record batches to a Parquet file in row groups of row_group_rows rows. Batches are
+    buffered until a row group is full, so memory is bounded by one row group.
+    """
+    def __init__(self, path: str, schema, row_group_rows: int = 100000, compression: str = "zstd",
+                 compression_level: int = None):
+        pa = _pyarrow()
+        self._pa = pa
+        self.row_group_rows = row_group_rows
+        self._writer = pa.parquet.ParquetWriter(path, schema, compression=compression,
+                                                compression_level=compression_level, write_statistics=True)
+        self._pending = []
+        self._pending_rows = 0
+        self.row_groups = 0
+
+    def _flush(self, rows: int):
+        table = self._pa.Table.from_batches(self._pending)
+        self._writer.write_table(table.slice(0, rows), row_group_size=rows)
+        rest = table.slice(rows)
+        self._pending = rest.to_batches() if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+        self.row_groups += 1
+
+    def write(self, batch):
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        while self._pending_rows >= self.row_group_rows:
+            self._flush(self.row_group_rows)
+
+    def close(self):
+        """Writes the last, partial row group and the file footer."""
+        if self._pending_rows:
+            self._flush(self._pending_rows)
+        self._writer.close()
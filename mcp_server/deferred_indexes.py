@@ -0,0 +1,150 @@
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from table_chunks import quote_identifier
+
+CREATE_TABLE_RE = re.compile(r"^\s*CREATE TABLE\s+(IF NOT EXISTS\s+)?`(?P<table>(?:[^`]|``)+)`", re.IGNORECASE)
+INDEX_PREFIXES = ("KEY ", "INDEX ", "UNIQUE KEY ", "UNIQUE INDEX ", "UNIQUE ")
+# InnoDB builds only one FULLTEXT or SPATIAL index per ALTER TABLE in place.
+SOLO_INDEX_PREFIXES = ("FULLTEXT ", "SPATIAL ")
+FOREIGN_KEY_RE = re.compile(r"^CONSTRAINT\s+`(?:[^`]|``)+`\s+FOREIGN KEY", re.IGNORECASE)
+INDEX_NAME_RE = re.compile(r"^(?:UNIQUE |FULLTEXT |SPATIAL )?(?:KEY|INDEX)\s+`(?P<name>(?:[^`]|``)+)`", re.IGNORECASE)
+CONSTRAINT_NAME_RE = re.compile(r"^CONSTRAINT\s+`(?P<name>(?:[^`]|``)+)`", re.IGNORECASE)
+FIRST_COLUMN_RE = re.compile(r"\(`(?P<column>(?:[^`]|``)+)`")
+AUTO_INCREMENT_RE = re.compile(r"^`(?P<column>(?:[^`]|``)+)`.*\bAUTO_INCREMENT\b", re.IGNORECASE)
+
+
+def _name(pattern, definition: str) -> str:
+    match = pattern.match(definition)
+    return match.group("name").replace("``", "`") if match else None
+
+
+def split_create_table(statement: str) -> tuple:
+    """
+    Splits a SHOW CREATE TABLE statement into a CREATE TABLE with only the primary key, the
+    secondary index definitions and the foreign key definitions. An index that an AUTO_INCREMENT
+    column needs (because the primary key does not start with it) stays in the table.
+    Returns (create_statement, indexes, foreign_keys); statements that are not a CREATE TABLE
+    are returned unchanged with no deferred definitions.
+    """
+    lines = statement.rstrip().split("\n")
+    close = next((i for i in range(len(lines) - 1, 0, -1) if lines[i].lstrip().startswith(")")), None)
+    if not CREATE_TABLE_RE.match(statement) or close is None:
+        return statement, [], []
+    start = next(i for i, line in enumerate(lines) if line.rstrip().endswith("("))
+    definitions = [line.strip().rstrip(",") for line in lines[start + 1:close]]
+
+    auto_increment = next((m.group("column") for m in map(AUTO_INCREMENT_RE.match, definitions) if m), None)
+    primary = next((d for d in definitions if d.upper().startswith("PRIMARY KEY")), "")
+    primary_first = FIRST_COLUMN_RE.search(primary)
+    needs_auto_increment_key = auto_increment is not None and (
+        primary_first is None or primary_first.group("column") != auto_increment)
+
+    kept, indexes, foreign_keys = [], [], []
+    for definition in definitions:
+        upper = definition.upper()
+        if FOREIGN_KEY_RE.match(definition):
+            foreign_keys.append(definition)
+        elif upper.startswith(INDEX_PREFIXES + SOLO_INDEX_PREFIXES):
+            first = FIRST_COLUMN_RE.search(definition)
+            if needs_auto_increment_key and first and first.group("column") == auto_increment:
+                kept.append(definition)
+                needs_auto_increment_key = False
+            else:
+                indexes.append(definition)
+        else:
+            kept.append(definition)
+    if not indexes and not foreign_keys:
+        return statement, [], []
+    body = ",\n".join(f"  {d}" for d in kept)
+    rebuilt = "\n".join(lines[:start + 1]) + "\n" + body + "\n" + "\n".join(lines[close:])
+    if statement.endswith("\n"):
+        rebuilt += "\n"
+    return rebuilt, indexes, foreign_keys
+
+
+class DeferredIndexBuilder:
+    """
+    Builds the secondary indexes and foreign keys that were left out of the tables during a bulk load.
+    Each table's indexes are added with one ALTER TABLE (so InnoDB sorts the data once per index
+    instead of maintaining every B-tree on every insert), on `workers` connections in parallel,
+    largest tables first so the longest builds do not start last. Foreign keys are added after all
+    indexes exist, without re-checking rows that were consistent on the source. Indexes and
+    constraints that already exist on the target are skipped, so a build can be rerun after a failure.
+    """
+    def __init__(self, target_tools, workers: int = 4, metrics=None):
+        self.target_tools = target_tools
+        self.workers = workers
+        self.metrics = metrics
+
+    def _existing(self, cursor, table: str) -> set:
+        cursor.execute("SELECT DISTINCT INDEX_NAME AS name FROM information_schema.STATISTICS "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+                       "UNION SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s;", (table, table))
+        return {row["name"] for row in cursor.fetchall()}
+
+    def _alter(self, table: str, definitions: list, name_pattern, foreign_keys: bool = False) -> dict:
+        started = time.monotonic()
+        with self.target_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                existing = self._existing(cursor, table)
+                pending = [d for d in definitions if _name(name_pattern, d) not in existing]
+                if foreign_keys:
+                    batches = [pending] if pending else []
+                else:
+                    regular = [d for d in pending if not d.upper().startswith(SOLO_INDEX_PREFIXES)]
+                    batches = ([regular] if regular else []) + \
+                              [[d] for d in pending if d.upper().startswith(SOLO_INDEX_PREFIXES)]
+                if foreign_keys:
+                    cursor.execute("SET SESSION foreign_key_checks = 0;")
+                try:
+                    for batch in batches:
+                        adds = ", ".join(f"ADD {d}" for d in batch)
+                        cursor.execute(f"ALTER TABLE {quote_identifier(table)} {adds};")
+                finally:
+                    if foreign_keys:
+                        cursor.execute("SET SESSION foreign_key_checks = 1;")
+        seconds = time.monotonic() - started
+        logging.info(f"Added {len(pending)} {'foreign keys' if foreign_keys else 'indexes'} to {table} "
+                     f"in {seconds:.1f}s ({len(definitions) - len(pending)} already present).")
+        return {"added": len(pending), "skipped": len(definitions) - len(pending), "seconds": round(seconds, 3)}
+
+    def build(self, deferred: dict, table_bytes: dict = None) -> dict:
+        """
+        Adds the deferred definitions to the target tables.
+        Args:
+            deferred: {table: {"indexes": [...], "foreign_keys": [...]}} as split from the CREATE TABLEs.
+            table_bytes: Size of each table's data, used to start the largest index builds first.
+        """
+        table_bytes = table_bytes or {}
+        order = sorted(deferred, key=lambda t: (-table_bytes.get(t, 0), t))
+        report = {"tables": {t: {} for t in order}}
+
+        def run_phase(phase, key, pattern, foreign_keys):
+            started = time.monotonic()
+            tables = [t for t in order if deferred[t].get(key)]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {t: executor.submit(self._alter, t, deferred[t][key], pattern, foreign_keys) for t in tables}
+            errors = []
+            for table, future in futures.items():
+                try:
+                    report["tables"][table][phase] = future.result()
+                except Exception as e:
+                    logging.error(f"Adding {phase} to {table} failed: {e}")
+                    report["tables"][table][phase] = {"error": str(e)}
+                    errors.append(f"{table}: {e}")
+            report[f"{phase}_seconds"] = round(time.monotonic() - started, 3)
+            if self.metrics:
+                self.metrics.update_progress("deferred_indexes", **{f"{phase}_seconds": report[f"{phase}_seconds"],
+                                                                    f"{phase}_tables": len(tables)})
+            if errors:
+                raise RuntimeError(f"Adding {phase} failed for {len(errors)} tables: {errors[0]}")
+
+        logging.info(f"Building deferred indexes of {len(order)} tables with {self.workers} workers.")
+        run_phase("indexes", "indexes", INDEX_NAME_RE, False)
+        # Foreign keys need the referencing and referenced indexes, so they go last.
+        run_phase("foreign_keys", "foreign_keys", CONSTRAINT_NAME_RE, True)
+        return report
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ByteRateLimiter:
+    """
+    A thread-safe token bucket limiting throughput to bytes_per_second.
+    A rate of None or 0 means unlimited. The bucket holds at most one second of tokens.
+    """
+    def __init__(self, bytes_per_second: float = None, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.bytes_per_second = bytes_per_second or None
+        self._tokens = self.bytes_per_second or 0
+        self._last = clock()
+
+    def set_rate(self, bytes_per_second: float):
+        """Changes the rate limit; takes effect for subsequent consume() calls."""
+        with self._lock:
+            self.bytes_per_second = bytes_per_second or None
+            self._tokens = min(self._tokens, self.bytes_per_second or 0)
+
+    def consume(self, n: int):
+        """Blocks until n bytes may be sent."""
+        while True:
+            with self._lock:
+                rate = self.bytes_per_second
+                if not rate:
+                    return
+                now = self._clock()
+                self._tokens = min(rate, self._tokens + (now - self._last) * rate)
+                self._last = now
+                # Let requests larger than the bucket through once it is full, then pay the debt.
+                # The small tolerance keeps float rounding from turning into endless tiny sleeps.
+                if self._tokens + 1e-6 >= min(n, rate):
+                    self._tokens -= n
+                    return
+                wait = (min(n, rate) - self._tokens) / rate
+            self._sleep(wait)
+
+
+class RateLimiterChain:
+    """Applies several rate limiters, e.g. a per-worker and a global one, to the same byte stream."""
+    def __init__(self, *limiters):
+        self.limiters = [l for l in limiters if l is not None]
+
+    def consume(self, n: int):
+        for limiter in self.limiters:
+            limiter.consume(n)
+
+
+class AdjustableLimit:
+    """A counting semaphore whose limit can be raised or lowered while it is in use."""
+    def __init__(self, limit: int):
+        self._condition = threading.Condition()
+        self.limit = max(1, int(limit))
+        self.in_use = 0
+
+    def set_limit(self, limit: int):
+        """Changes the limit; holders above a lowered limit finish normally, new acquires wait."""
+        with self._condition:
+            self.limit = max(1, int(limit))
+            self._condition.notify_all()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_use >= self.limit:
+                self._condition.wait()
+            self.in_use += 1
+
+    def release(self):
+        with self._condition:
+            self.in_use -= 1
+            self._condition.notify_all()
+
+
+class ParallelDumpScheduler:
+    """
+    Runs table dumps on up to `workers` workers, largest tables first, so the run does not end
+    on a single long straggler. Failed dumps are retried with exponential backoff.
+    dump_fn(table_name, rate_limiter) performs one dump and raises on failure.
+    The worker count (up to max_workers) and per-worker rate can be changed while a run is in
+    progress with set_workers and set_per_worker_rate, e.g. by an AdaptiveConcurrencyController.
+    """
+    def __init__(self, dump_fn, workers: int = 4, per_worker_bytes_per_sec: float = None,
+                 global_bytes_per_sec: float = None, max_retries: int = 3, backoff_seconds: float = 5,
+                 sleep=time.sleep, metrics=None, max_workers: int = None):
+        self.dump_fn = dump_fn
+        self.workers = workers
+        self.max_workers = max(max_workers or workers, workers)
+        self.per_worker_bytes_per_sec = per_worker_bytes_per_sec
+        self.global_limiter = ByteRateLimiter(global_bytes_per_sec)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._sleep = sleep
+        self.metrics = metrics
+        self._local = threading.local()
+        self._slots = AdjustableLimit(workers)
+        self._worker_limiters = []
+        self._limiters_lock = threading.Lock()
+
+    def _worker_limiter(self) -> RateLimiterChain:
+        if not hasattr(self._local, 'limiter'):
+            worker_limiter = ByteRateLimiter(self.per_worker_bytes_per_sec)
+            with self._limiters_lock:
+                self._worker_limiters.append(worker_limiter)
+            self._local.limiter = RateLimiterChain(worker_limiter, self.global_limiter)
+        return self._local.limiter
+
+    def set_workers(self, workers: int):
+        """Changes how many dumps run at once, between 1 and max_workers. Running dumps are not interrupted."""
+        self.workers = max(1, min(int(workers), self.max_workers))
+        self._slots.set_limit(self.workers)
+
+    def set_per_worker_rate(self, bytes_per_second: float):
+        """Changes the byte-rate limit of every worker, including dumps already running."""
+        self.per_worker_bytes_per_sec = bytes_per_second
+        with self._limiters_lock:
+            for limiter in self._worker_limiters:
+                limiter.set_rate(bytes_per_second)
+
+    def _run_table(self, table: dict, cancel_event=None) -> dict:
+        name = table["table"]
+        started = time.monotonic()
+        for attempt in range(1, self.max_retries + 2):
+            if cancel_event is not None and cancel_event.is_set():
+                return {"table": name, "status": "CANCELLED", "attempts": attempt - 1,
+                        "estimated_bytes": table.get("bytes", 0), "seconds": 0.0}
+            try:
+                result = self.dump_fn(name, self._worker_limiter()) or {}
+                return {
+                    "table": name,
+                    "status": "SUCCESS",
+                    "attempts": attempt,
+                    "estimated_bytes": table.get("bytes", 0),
+                    "bytes": result.get("bytes"),
+                    "seconds": round(time.monotonic() - started, 3),
+                }
+            except Exception as e:
+                if attempt > self.max_retries:
+                    logging.error(f"Giving up on {name} after {attempt} attempts: {e}")
+                    return {
+                        "table": name,
+                        "status": "FAILED",
+                        "attempts": attempt,
+                        "estimated_bytes": table.get("bytes", 0),
+                        "error": str(e),
+                        "seconds": round(time.monotonic() - started, 3),
+                    }
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                logging.warning(f"Dump of {name} failed (attempt {attempt}), retrying in {delay}s: {e}")
+                if self.metrics:
+                    self.metrics.record_retry(name, "export")
+                self._sleep(delay)
+
+    def run(self, tables: list, cancel_event=None) -> dict:
+        """
+        Dumps every table and returns one structured result.
+        Args:
+            tables: [{'table': name, 'bytes': estimated size}, ...] e.g. from information_schema.
+            cancel_event: Optional threading.Event; once set, tables not yet started are skipped.
+        """
+        started = time.monotonic()
+        ordered = sorted(tables, key=lambda t: t.get("bytes", 0), reverse=True)
+        logging.info(f"Scheduling {len(ordered)} table dumps on {self.workers} workers, largest first.")
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Tables are handed out one free slot at a time, so a changed worker limit applies to the next table.
+            for table in ordered:
+                self._slots.acquire()
+                future = executor.submit(self._run_table, table, cancel_event)
+                future.add_done_callback(lambda f: self._slots.release())
+                futures.append(future)
+        results = [f.result() for f in futures]
+
+        wall = time.monotonic() - started
+        total_bytes = sum(r.get("bytes") or r["estimated_bytes"] for r in results if r["status"] == "SUCCESS")
+        failed = [r["table"] for r in results if r["status"] == "FAILED"]
+        cancelled = [r["table"] for r in results if r["status"] == "CANCELLED"]
+        return {
+            "status": "FAILED" if failed else "CANCELLED" if cancelled else "SUCCESS",
+            "tables": results,
+            "succeeded": len(results) - len(failed) - len(cancelled),
+            "failed": failed,
+            "cancelled": cancelled,
+            "total_bytes": total_bytes,
+            "wall_seconds": round(wall, 3),
+            "throughput_bytes_per_sec": round(total_bytes / wall, 1) if wall > 0 else None,
+        }
@@ -0,0 +1,226 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from object_store import file_md5
+
+METADATA_FILE = "metadata"
+
+
+class DumpDirectoryUploader:
+    """
+    Uploads the files of a dump directory to an object store while the dump is still being written.
+    mydumper reports each file it has closed through its --exec hook (see exec_command), which
+    hard-links the file into closed_path, a directory next to the dump; the closed directory is
+    polled every poll_seconds and each new file is uploaded on one of `workers` threads. A file
+    counts as finished only once mydumper has closed it, however long its chunk query stalls and
+    however many of a table's chunks are written at the same time. Every upload is verified against
+    the local file's size and MD5, and a file that changed during its upload is uploaded again.
+    With delete_local, verified files (and their links) are removed, so local disk use stays bounded
+    by the files still being written or uploaded. Once the dump has exited, finish() uploads what is
+    left, including files the hook does not report; the metadata file is uploaded last and always
+    kept locally.
+    """
+    def __init__(self, store, output_path: str, prefix: str, workers: int = 8, poll_seconds: float = 1.0,
+                 delete_local: bool = False, max_attempts: int = 3, metrics=None, clock=time.monotonic):
+        self.store = store
+        self.output_path = output_path
+        self.closed_path = os.path.normpath(output_path) + ".closed"
+        self.prefix = prefix.strip('/')
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.delete_local = delete_local
+        self.max_attempts = max_attempts
+        self.metrics = metrics
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._uploaded = {}  # name -> (size, mtime) that was uploaded and verified
+        self._in_flight = set()
+        self._failed = {}  # name -> error
+        self._attempts = {}
+        self._executor = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self._stats = {
+            "files_uploaded": 0,
+            "bytes_uploaded": 0,
+            "reuploads": 0,
+            "verify_failures": 0,
+            "files_deleted": 0,
+            "upload_seconds": 0.0,
+            "peak_local_bytes": 0,
+        }
+
+    @property
+    def exec_command(self) -> str:
+        """The mydumper --exec command reporting each closed file: mydumper substitutes FILENAME."""
+        return f"/bin/ln -f FILENAME {self.closed_path}/"
+
+    def key_for(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    @staticmethod
+    def _table_of(name: str) -> str:
+        # mydumper names files <db>.<table>[.<n>].sql[.gz] or <db>.<table>-schema.sql[.gz].
+        parts = name.split(".")
+        return parts[1].split("-schema")[0] if len(parts) > 2 else name
+
+    def _path(self, name: str) -> str:
+        """A file's closed link if mydumper reported it, else the file in the dump directory."""
+        link = os.path.join(self.closed_path, name)
+        return link if os.path.exists(link) else os.path.join(self.output_path, name)
+
+    def _state(self, name: str):
+        try:
+            stat = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _upload(self, name: str, state: tuple) -> dict:
+        """Uploads one file and verifies the stored object's size and MD5 against the local file."""
+        path = self._path(name)
+        key = self.key_for(name)
+        started = self._clock()
+        local_md5 = file_md5(path)
+        stored = self.store.put_file(path, key)
+        if stored.get("md5") is None:
+            # Objects assembled from parallel parts carry no MD5; ask the store for what it has.
+            stored = dict(stored, **(self.store.stat(key) or {}))
+        if stored.get("bytes") != state[0]:
+            raise IOError(f"Size mismatch for {key}: local {state[0]} bytes, stored {stored.get('bytes')}")
+        if stored.get("md5") is not None and stored["md5"] != local_md5:
+            raise IOError(f"Checksum mismatch for {key}: local {local_md5}, stored {stored['md5']}")
+        seconds = self._clock() - started
+        if self.metrics:
+            self.metrics.record_stage(self._table_of(name), "upload", seconds, size_bytes=state[0], started_at=started)
+        return {"key": key, "bytes": state[0], "md5": local_md5, "seconds": seconds}
+
+    def _upload_and_confirm(self, name: str, state: tuple):
+        try:
+            result = self._upload(name, state)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.discard(name)
+                self._stats["verify_failures"] += isinstance(e, IOError)
+                self._attempts[name] = self._attempts.get(name, 0) + 1
+                if self._attempts[name] >= self.max_attempts:
+                    self._failed[name] = str(e)
+            logging.warning(f"Upload of {name} failed (attempt {self._attempts[name]}): {e}")
+            if self.metrics:
+                self.metrics.record_error(self._table_of(name), "upload")
+            return
+        # A file that changed while it was uploading was not finished; it is picked up again later.
+        changed = self._state(name) != state
+        with self._lock:
+            self._in_flight.discard(name)
+            if changed:
+                self._stats["reuploads"] += 1
+                return
+            self._uploaded[name] = state
+            self._stats["files_uploaded"] += 1
+            self._stats["bytes_uploaded"] += result["bytes"]
+            self._stats["upload_seconds"] += result["seconds"]
+        if self.delete_local and name != METADATA_FILE:
+            self._delete_local(name)
+
+    def _delete_local(self, name: str):
+        for path in (os.path.join(self.output_path, name), os.path.join(self.closed_path, name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._stats["files_deleted"] += 1
+
+    def scan(self, final: bool = False) -> int:
+        """
+        Submits the closed files of the dump for upload and returns how many were submitted.
+        With final, the dump has ended and every remaining file, including metadata, is finished.
+        """
+        submitted = 0
+        local_bytes = 0
+        names = [entry.name for entry in os.scandir(self.output_path) if entry.is_file()]
+        for name in names:
+            state = self._state(name)
+            local_bytes += state[0] if state else 0
+        closed = set(os.listdir(self.closed_path)) if os.path.isdir(self.closed_path) else set()
+        for name in sorted(set(names) | closed if final else closed):
+            state = self._state(name)
+            if state is None or (name == METADATA_FILE and not final):
+                continue
+            with self._lock:
+                if name in self._in_flight or name in self._failed or self._uploaded.get(name) == state:
+                    continue
+                self._in_flight.add(name)
+            self._executor.submit(self._upload_and_confirm, name, state)
+            submitted += 1
+        with self._lock:
+            self._stats["peak_local_bytes"] = max(self._stats["peak_local_bytes"], local_bytes)
+        return submitted
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.scan()
+            except Exception as e:
+                logging.warning(f"Scanning {self.output_path} for finished dump files failed: {e}")
+
+    def start(self):
+        """Starts watching the directory in a background thread; call it before the dump starts."""
+        os.makedirs(self.output_path, exist_ok=True)
+        # Links left by an earlier attempt point at files that may since have been removed or rewritten.
+        shutil.rmtree(self.closed_path, ignore_errors=True)
+        os.makedirs(self.closed_path)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dump-upload")
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        logging.info(f"Uploading finished files from {self.output_path} to {self.prefix} with {self.workers} workers.")
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._in_flight:
+                    return
+            time.sleep(0.05)
+
+    def finish(self) -> dict:
+        """
+        Uploads everything that is left once the dump has finished and waits for all uploads.
+        Raises RuntimeError if any file could not be uploaded and verified.
+        """
+        self._stop.set()
+        self._watcher.join()
+        try:
+            # Files retried after a failed or superseded upload need further passes.
+            while self.scan(final=True):
+                self._drain()
+        finally:
+            self._executor.shutdown(wait=True)
+        shutil.rmtree(self.closed_path, ignore_errors=True)
+        summary = self.summary()
+        if self._failed:
+            name, error = next(iter(self._failed.items()))
+            raise RuntimeError(f"{len(self._failed)} dump files failed to upload, e.g. {name}: {error}")
+        logging.info(f"Uploaded {summary['files_uploaded']} dump files ({summary['bytes_uploaded']} bytes) "
+                     f"to {self.prefix}.")
+        return summary
+
+    def abort(self):
+        """Stops watching and waits for uploads already in flight, e.g. when the dump is cancelled."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        shutil.rmtree(self.closed_path, ignore_errors=True)
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = dict(self._stats, prefix=self.prefix, failed=dict(self._failed))
+        summary["upload_seconds"] = round(summary["upload_seconds"], 3)
+        return summary
@@ -0,0 +1,280 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from dump_scheduler import ByteRateLimiter
+from object_store import RateLimitedObjectStore
+from pipelined_loader import PipelinedLoader
+from table_exporter import StreamingTableExporter
+
+PENDING = "PENDING"
+EXPORTING = "EXPORTING"
+LOADING = "LOADING"
+DONE = "DONE"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+# Per-database fields mirrored into MigrationMetrics progress.
+PROGRESS_FIELDS = ("status", "tables", "tables_exported", "bytes_exported", "bytes_loaded")
+
+
+class PrioritySlots:
+    """
+    A counting semaphore that gives a free slot to the waiter with the lowest priority value,
+    first come first served among equals. The limit can be changed while slots are in use.
+    """
+    def __init__(self, limit: int):
+        self._condition = threading.Condition()
+        self.limit = max(1, int(limit))
+        self.in_use = 0
+        self._waiting = []
+        self._tickets = itertools.count()
+
+    def set_limit(self, limit: int):
+        with self._condition:
+            self.limit = max(1, int(limit))
+            self._condition.notify_all()
+
+    def acquire(self, priority: int = 0, count: int = 1):
+        """Takes `count` slots at once; more than the limit are granted only when no slot is in use."""
+        with self._condition:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            while self.in_use + count > max(self.limit, count) or self._waiting[0] != ticket:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self.in_use += count
+            # The next waiter may fit as well.
+            self._condition.notify_all()
+
+    def release(self, count: int = 1):
+        with self._condition:
+            self.in_use -= count
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"limit": self.limit, "in_use": self.in_use, "waiting": len(self._waiting)}
+
+
+class SlotConnections(list):
+    """Connections checked out together by SlotLimitedTools; release() hands slots back before the checkout ends."""
+    def __init__(self, slots: PrioritySlots, held: int):
+        super().__init__()
+        self.slots = slots
+        self.held = held
+
+    def release(self, count: int = 1):
+        """Returns `count` slots, e.g. a snapshot coordinator's, whose connections stay idle until the checkout ends."""
+        count = min(count, self.held)
+        self.held -= count
+        self.slots.release(count)
+
+
+class SlotLimitedTools:
+    """
+    Stands in for MySQLTools, taking a slot of a shared PrioritySlots for as long as each
+    connection is checked out. Every other attribute is the wrapped tools' own.
+    """
+    def __init__(self, tools, slots: PrioritySlots, priority: int = 0):
+        self.tools = tools
+        self.slots = slots
+        self.priority = priority
+
+    @contextmanager
+    def connection(self):
+        self.slots.acquire(self.priority)
+        try:
+            with self.tools.connection() as connection:
+                yield connection
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def connections(self, count: int):
+        # All slots are taken together: exports holding some while waiting for more could deadlock.
+        self.slots.acquire(self.priority, count)
+        held = SlotConnections(self.slots, count)
+        try:
+            with self.tools.connections(count) as connections:
+                held.extend(connections)
+                yield held
+        finally:
+            held.release(held.held)
+
+    def __getattr__(self, name):
+        return getattr(self.tools, name)
+
+
+class FleetBudget:
+    """
+    Resources shared by all databases of a fleet migration: source connections exporting chunks
+    (export_threads), upload bandwidth to the object store, and target connections loading
+    chunks (import_slots). Slots go to the database with the lowest priority value first.
+    """
+    def __init__(self, export_threads: int = 16, upload_bytes_per_sec: float = None, import_slots: int = 8,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.export_slots = PrioritySlots(export_threads)
+        self.upload_limiter = ByteRateLimiter(upload_bytes_per_sec, clock=clock, sleep=sleep)
+        self.import_slots = PrioritySlots(import_slots)
+
+    def stats(self) -> dict:
+        return {"export_threads": self.export_slots.stats(), "import_slots": self.import_slots.stats(),
+                "upload_bytes_per_sec": self.upload_limiter.bytes_per_second}
+
+
+class FleetMigration:
+    """
+    Migrates many databases of one source server to the target at once. Each database is
+    exported with a StreamingTableExporter (tab-separated chunks under <prefix>/<database>) and
+    then loaded with a PipelinedLoader, while other databases export and load alongside it, so
+    the fleet is bounded by the shared FleetBudget rather than by the sum of serial runs.
+
+    Databases start smallest first, up to database_concurrency at a time, and the smaller of
+    two running databases gets the next free export or import slot, so small databases finish
+    early instead of queueing behind the largest. source_factory(database) and
+    target_factory(database) return MySQLTools for one database. Every export encodes its chunks
+    on encoder_pool, if given (see StreamingTableExporter).
+    """
+    def __init__(self, source_factory, target_factory, store, budget: FleetBudget, prefix: str,
+                 database_concurrency: int = 4, table_workers: int = 8, chunk_rows: int = 100000,
+                 loader_options: dict = None, encoder_pool=None, metrics=None, clock=time.monotonic):
+        self.source_factory = source_factory
+        self.target_factory = target_factory
+        self.store = store
+        self.budget = budget
+        self.prefix = prefix.strip('/')
+        self.database_concurrency = database_concurrency
+        self.table_workers = table_workers
+        self.chunk_rows = chunk_rows
+        self.loader_options = loader_options or {}
+        self.encoder_pool = encoder_pool
+        self.metrics = metrics
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started = None
+        self._databases = {}
+
+    def _update(self, database: str, **fields):
+        with self._lock:
+            self._databases[database].update(fields)
+            progress = dict(self._databases[database])
+        if self.metrics:
+            self.metrics.update_progress(f"fleet:{database}", **{k: progress[k] for k in PROGRESS_FIELDS
+                                                                  if k in progress})
+
+    def plan(self, databases: list) -> list:
+        """Sizes each database on the source and returns [{'database', 'bytes', 'tables'}], smallest first."""
+        sized = []
+        for database in databases:
+            tools = self.source_factory(database)
+            try:
+                tables = tools.get_table_size_estimates()["tables"]
+            finally:
+                tools.close()
+            sized.append({"database": database, "tables": tables,
+                          "bytes": sum(t["data_length"] + t["index_length"] for t in tables.values())})
+        return sorted(sized, key=lambda d: (d["bytes"], d["database"]))
+
+    def _export(self, entry: dict, source, prefix: str, priority: int) -> dict:
+        exporter = StreamingTableExporter(SlotLimitedTools(source, self.budget.export_slots, priority),
+                                          RateLimitedObjectStore(self.store, self.budget.upload_limiter),
+                                          workers=self.table_workers, chunk_rows=self.chunk_rows,
+                                          metrics=self.metrics, output_format="tsv", encoder_pool=self.encoder_pool)
+        database = entry["database"]
+        exported = {"rows": 0, "bytes": 0}
+        tables = sorted(entry["tables"], key=lambda t: (-(entry["tables"][t]["data_length"] +
+                                                         entry["tables"][t]["index_length"]), t))
+        for count, table in enumerate(tables, start=1):
+            result = exporter.export_table(table, prefix)
+            exported["rows"] += result["rows"]
+            exported["bytes"] += result["bytes"]
+            self._update(database, tables_exported=count, bytes_exported=exported["bytes"])
+        return exported
+
+    def _load(self, target, prefix: str, priority: int) -> dict:
+        loader = PipelinedLoader(SlotLimitedTools(target, self.budget.import_slots, priority), self.store,
+                                 load_workers=self.table_workers, metrics=self.metrics, **self.loader_options)
+        return loader.load(prefix)
+
+    def _migrate_database(self, entry: dict, priority: int) -> dict:
+        database = entry["database"]
+        prefix = f"{self.prefix}/{database}"
+        source, target = self.source_factory(database), self.target_factory(database)
+        try:
+            self._update(database, status=EXPORTING, started=round(self._clock() - self._started, 3))
+            exported = self._export(entry, source, prefix, priority)
+            self._update(database, status=LOADING)
+            target.create_database_if_missing()
+            loaded = self._load(target, prefix, priority)
+            self._update(database, bytes_loaded=loaded["bytes"])
+            return {"rows": exported["rows"], "bytes": exported["bytes"]}
+        finally:
+            source.close()
+            target.close()
+
+    def _run_database(self, entry: dict, priority: int, cancel_event) -> dict:
+        database = entry["database"]
+        if cancel_event is not None and cancel_event.is_set():
+            self._update(database, status=CANCELLED)
+            return self.progress()["databases"][database]
+        started = self._clock()
+        try:
+            result = self._migrate_database(entry, priority)
+            self._update(database, status=DONE, rows=result["rows"], seconds=round(self._clock() - started, 3),
+                         finished=round(self._clock() - self._started, 3))
+            logging.info(f"Fleet migration of {database} finished in {self._clock() - started:.1f}s")
+        except Exception as e:
+            logging.error(f"Fleet migration of {database} failed: {e}")
+            self._update(database, status=FAILED, error=str(e), seconds=round(self._clock() - started, 3),
+                         finished=round(self._clock() - self._started, 3))
+            if self.metrics:
+                self.metrics.record_error(database, "fleet")
+        return self.progress()["databases"][database]
+
+    def run(self, databases: list, cancel_event=None) -> dict:
+        """
+        Migrates the databases and returns per-database results and the fleet totals. A failed
+        database does not stop the others. `databases` are names, or entries from plan().
+        """
+        planned = databases if databases and isinstance(databases[0], dict) else self.plan(databases)
+        self._started = self._clock()
+        with self._lock:
+            self._databases = {
+                d["database"]: {"status": PENDING, "priority": i, "estimated_bytes": d["bytes"],
+                                "tables": len(d["tables"]), "tables_exported": 0, "bytes_exported": 0}
+                for i, d in enumerate(planned)
+            }
+        logging.info(f"Migrating {len(planned)} databases, smallest first, {self.database_concurrency} at a time")
+        with ThreadPoolExecutor(max_workers=self.database_concurrency, thread_name_prefix="fleet") as executor:
+            futures = [executor.submit(self._run_database, entry, i, cancel_event) for i, entry in enumerate(planned)]
+            for future in futures:
+                future.result()
+        progress = self.progress()
+        failed = [d for d, p in progress["databases"].items() if p["status"] != DONE]
+        return dict(progress, status="SUCCESS" if not failed else "PARTIAL", failed_databases=failed)
+
+    def progress(self) -> dict:
+        """Fleet-wide progress: per-database status and bytes, totals, and the budget in use."""
+        with self._lock:
+            databases = {d: dict(p) for d, p in self._databases.items()}
+        elapsed = self._clock() - self._started if self._started is not None else 0.0
+        estimated = sum(p["estimated_bytes"] for p in databases.values())
+        exported = sum(p["bytes_exported"] for p in databases.values())
+        counts = {}
+        for p in databases.values():
+            counts[p["status"]] = counts.get(p["status"], 0) + 1
+        return {
+            "databases": databases,
+            "status_counts": counts,
+            "estimated_bytes": estimated,
+            "bytes_exported": exported,
+            "tables": sum(p["tables"] for p in databases.values()),
+            "tables_exported": sum(p["tables_exported"] for p in databases.values()),
+            "elapsed_seconds": round(elapsed, 3),
+            "bytes_per_second": round(exported / elapsed, 1) if elapsed > 0 else None,
+            "budget": self.budget.stats(),
+        }
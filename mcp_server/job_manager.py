@@ -0,0 +1,108 @@
+import inspect
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobManager:
+    """
+    Runs long operations (exports, dumps, validations) as background jobs on a bounded thread pool
+    so a multi-hour export never blocks other tool calls. Jobs whose function accepts a
+    `cancel_event` argument receive a threading.Event that is set when the job is cancelled.
+    """
+    def __init__(self, max_workers: int = 4, max_history: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.max_history = max_history
+
+    def submit(self, kind: str, fn, *args, **kwargs) -> str:
+        """Queues fn(*args, **kwargs) and returns its job id."""
+        job_id = uuid.uuid4().hex[:12]
+        cancel_event = threading.Event()
+        if "cancel_event" in inspect.signature(fn).parameters:
+            kwargs["cancel_event"] = cancel_event
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "state": QUEUED,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "_cancel_event": cancel_event,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+            job["_future"] = self._executor.submit(self._run, job, fn, args, kwargs)
+        logging.info(f"Submitted {kind} job {job_id}")
+        return job_id
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job["state"] == CANCELLED:
+                return
+            job["state"] = RUNNING
+            job["started_at"] = time.time()
+        try:
+            result = fn(*args, **kwargs)
+            state = CANCELLED if job["_cancel_event"].is_set() else SUCCEEDED
+            with self._lock:
+                job.update(state=state, result=result, finished_at=time.time())
+        except Exception as e:
+            logging.error(f"Job {job['job_id']} ({job['kind']}) failed: {e}")
+            with self._lock:
+                job.update(state=FAILED, error=str(e), finished_at=time.time())
+
+    def _prune(self):
+        """Forgets the oldest finished jobs beyond max_history. Caller holds the lock."""
+        finished = [j for j in self._jobs.values() if j["state"] in (SUCCEEDED, FAILED, CANCELLED)]
+        for job in sorted(finished, key=lambda j: j["submitted_at"])[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job["job_id"]]
+
+    @staticmethod
+    def _public(job) -> dict:
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def status(self, job_id: str) -> dict:
+        """Returns the state, timings and (once finished) result or error of a job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise ValueError(f"Unknown job: {job_id}")
+            return self._public(job)
+
+    def list_jobs(self) -> list:
+        """Lists all known jobs without their results."""
+        with self._lock:
+            return [{k: v for k, v in self._public(j).items() if k != "result"} for j in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> dict:
+        """Cancels a queued job, or asks a running job to stop at its next cancellation point."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise ValueError(f"Unknown job: {job_id}")
+            job["_cancel_event"].set()
+            if job["state"] == QUEUED:
+                job["_future"].cancel()
+                job.update(state=CANCELLED, finished_at=time.time())
+            return self._public(job)
+
+    def shutdown(self):
+        """Cancels all jobs and waits for running ones to stop."""
+        with self._lock:
+            jobs = list(self._jobs)
+        for job_id in jobs:
+            self.cancel(job_id)
+        self._executor.shutdown(wait=True)
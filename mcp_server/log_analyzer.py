@@ -0,0 +1,311 @@
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+# Categories counted per line: (category, hints, patterns). The patterns are only searched when the
+# lowercased line contains one of the hints, which keeps uninteresting lines cheap; the first
+# matching pattern counts the line once. Named groups 'table' or 'file' attribute it to a table.
+LINE_PATTERNS = (
+    ("connection_error", ("connect", "gone away"), (re.compile(
+        r"Database connection failed|Lost connection to MySQL|Can't connect to MySQL|MySQL server has gone away|"
+        r"Too many connections|Connection refused|timed out waiting for a connection", re.IGNORECASE),)),
+    ("retry", ("attempt", "replaying"), (
+        re.compile(r"Dump of (?P<table>\S+) failed \(attempt \d+\), retrying"),
+        re.compile(r"Upload of (?P<file>\S+) failed \(attempt \d+\)"),
+        re.compile(r"constraint error .*replaying the batch"),
+    )),
+    ("table_failure", ("failed", "giving up", "exception during", "differs"), (
+        re.compile(r"Giving up on (?P<table>\S+) after"),
+        re.compile(r"Export of chunk \d+ of (?P<table>\S+) failed"),
+        re.compile(r"Exception during GCS dump for (?P<table>\S+):"),
+        re.compile(r"Run \S+ failed on (?P<table>\S+):"),
+        re.compile(r"Adding \w+ to (?P<table>\S+) failed"),
+        re.compile(r"(?:Load|Download) of (?P<file>\S+) failed"),
+        re.compile(r"Chunk \d+ of (?P<table>\S+) differs"),
+    )),
+    ("tool_error", ("mydumper", "myloader", "error "), (re.compile(
+        r"\((?:mydumper|myloader):\d+\): (?:CRITICAL|ERROR)|Mydumper export failed|\bERROR \d{4}\b"),)),
+    ("tool_warning", ("warning",), (re.compile(r"\((?:mydumper|myloader):\d+\): WARNING"),)),
+    ("security", ("denied", "password", "ssl", "certificate", "forbidden", "unauthenticated"), (re.compile(
+        r"Access denied|password on the command line|SSL connection error|certificate verify failed|"
+        r"PERMISSION_DENIED|Permission denied|\b403\b.*Forbidden|Unauthenticated", re.IGNORECASE),)),
+)
+# Durations logged by the migration tools: (metric, hint, pattern with 'table' and 'seconds' or 'ms').
+LATENCY_PATTERNS = (
+    ("table_export_seconds", "exported", re.compile(r"Exported \d+ rows of (?P<table>\S+) \(.*\) in (?P<seconds>[\d.]+)s")),
+    ("index_build_seconds", "already present",
+     re.compile(r"to (?P<table>\S+) in (?P<seconds>[\d.]+)s \(\d+ already present\)")),
+    ("probe_latency_seconds", "probe=", re.compile(r"probe=(?P<ms>[\d.]+)ms")),
+)
+# mydumper and myloader --verbose=3 announce each job a thread starts; the gap until that thread's
+# next job is the duration of the chunk.
+THREAD_JOB_RE = re.compile(r"Thread (\d+):? (?:dumping data|restoring)[^`]*`[^`]+`\.`(?P<table>[^`]+)`")
+LOG_TIMESTAMP_RE = re.compile(r"^(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})(?:[,.](\d{1,6}))?")
+
+
+def _table_of_file(name: str) -> str:
+    # Chunk files follow mydumper's <db>.<table>.<n>.<ext> naming.
+    parts = os.path.basename(name).split(".")
+    return parts[1].split("-schema")[0] if len(parts) > 2 else name
+
+
+class RollingStats:
+    """
+    Streaming statistics of one measurement: count, mean and variance (Welford's method) over
+    everything seen, and percentiles over the most recent `sample_size` values.
+    """
+    def __init__(self, sample_size: int = 2048):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = None
+        self.recent = deque(maxlen=sample_size)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.max = value if self.max is None else max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the recent values."""
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))] if ordered else None
+
+    def summary(self) -> dict:
+        return {"count": self.count, "mean": round(self.mean, 3), "p50": self.percentile(50),
+                "p95": self.percentile(95), "p99": self.percentile(99), "max": self.max}
+
+
+class LogAnomalyAnalyzer:
+    """
+    Parses migration logs line by line as they are produced, so the anomaly agent receives a
+    compact digest instead of the complete logs. For every line it:
+      - counts connection errors, retries, per-table failures, tool errors and security warnings,
+        in total and over a sliding window of window_seconds;
+      - records durations (table exports, index builds, probe latency and the per-chunk times of
+        mydumper/myloader threads) with their mean, variance and percentiles;
+    and flags anomalies as they happen: a duration more than z_threshold standard deviations above
+    the mean of earlier values of the same measurement (after min_samples of them, and by at least
+    min_outlier_seconds so that jitter in sub-second timings is not reported), a category
+    whose windowed count reaches its burst threshold, a table failing failure_threshold times, and
+    every security warning. Each anomaly keeps the line and the context_lines lines before it.
+    """
+    def __init__(self, window_seconds: float = 300.0, burst_thresholds: dict = None, z_threshold: float = 3.0,
+                 min_samples: int = 10, min_outlier_seconds: float = 1.0, failure_threshold: int = 3,
+                 context_lines: int = 2, max_anomalies: int = 200, clock=time.time):
+        self.window_seconds = window_seconds
+        self.burst_thresholds = {"connection_error": 5, "retry": 10, "tool_error": 5, "table_failure": 5,
+                                 **(burst_thresholds or {})}
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.min_outlier_seconds = min_outlier_seconds
+        self.failure_threshold = failure_threshold
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._lines = 0
+        self._sources = Counter()
+        self._totals = Counter()
+        self._windows = {category: deque() for category, _, _ in LINE_PATTERNS}
+        self._bursting = set()
+        self._latency = {}
+        self._table_failures = Counter()
+        self._threads = {}  # (source, thread) -> (table, started)
+        self._context = deque(maxlen=context_lines)
+        self._anomalies = deque(maxlen=max_anomalies)
+        self._anomaly_counts = Counter()
+
+    def _timestamp(self, line: str) -> float:
+        match = LOG_TIMESTAMP_RE.match(line)
+        if match:
+            try:
+                parsed = datetime.fromisoformat(match.group(1).replace("T", " "))
+                return parsed.timestamp() + float(f"0.{match.group(2) or 0}")
+            except ValueError:
+                pass
+        return self._clock()
+
+    def _flag(self, kind: str, line: str, source: str, at: float, **details) -> dict:
+        anomaly = dict(kind=kind, source=source, line_number=self._lines, at=round(at, 3),
+                       excerpt=[l[:300] for l in self._context] + [line[:300]], **details)
+        self._anomalies.append(anomaly)
+        self._anomaly_counts[kind] += 1
+        return anomaly
+
+    def _measure(self, metric: str, value: float, table: str, line: str, source: str, at: float) -> list:
+        stats = self._latency.setdefault(metric, RollingStats())
+        flagged = []
+        # Compared with the values before this one, so an outlier does not raise its own bar.
+        if stats.count >= self.min_samples and stats.stddev > 0:
+            z = (value - stats.mean) / stats.stddev
+            if z > self.z_threshold and value - stats.mean >= self.min_outlier_seconds:
+                flagged.append(self._flag("latency_outlier", line, source, at, metric=metric, table=table,
+                                          value=round(value, 3), mean=round(stats.mean, 3), z_score=round(z, 1)))
+        stats.add(value)
+        return flagged
+
+    def _count(self, category: str, table: str, line: str, source: str, at: float) -> list:
+        flagged = []
+        self._totals[category] += 1
+        window = self._windows[category]
+        window.append(at)
+        while window and window[0] < at - self.window_seconds:
+            window.popleft()
+        threshold = self.burst_thresholds.get(category)
+        if threshold and len(window) >= threshold:
+            if category not in self._bursting:
+                # Flagged once per burst; a new burst needs the window to drop below the threshold first.
+                self._bursting.add(category)
+                flagged.append(self._flag("burst", line, source, at, category=category, count=len(window),
+                                          window_seconds=self.window_seconds))
+        else:
+            self._bursting.discard(category)
+        if category == "table_failure" and table:
+            self._table_failures[table] += 1
+            if self._table_failures[table] == self.failure_threshold:
+                flagged.append(self._flag("repeated_table_failure", line, source, at, table=table,
+                                          failures=self._table_failures[table]))
+        elif category == "security":
+            flagged.append(self._flag("security", line, source, at))
+        return flagged
+
+    def feed(self, line: str, source: str = "log", timestamp: float = None) -> list:
+        """Parses one log line and returns the anomalies it raised."""
+        line = line.rstrip("\n")
+        with self._lock:
+            self._lines += 1
+            self._sources[source] += 1
+            at = timestamp if timestamp is not None else self._timestamp(line)
+            lowered = line.lower()
+            flagged = []
+            for category, hints, patterns in LINE_PATTERNS:
+                if not any(hint in lowered for hint in hints):
+                    continue
+                match = next(filter(None, (pattern.search(line) for pattern in patterns)), None)
+                if match:
+                    groups = match.groupdict()
+                    table = groups.get("table") or (groups.get("file") and _table_of_file(groups["file"]))
+                    flagged.extend(self._count(category, table, line, source, at))
+            for metric, hint, pattern in LATENCY_PATTERNS:
+                match = hint in lowered and pattern.search(line)
+                if match:
+                    groups = match.groupdict()
+                    value = float(groups["seconds"]) if groups.get("seconds") else float(groups["ms"]) / 1000
+                    flagged.extend(self._measure(metric, value, groups.get("table"), line, source, at))
+            job = "thread" in lowered and THREAD_JOB_RE.search(line)
+            if job:
+                key = (source, job.group(1))
+                previous = self._threads.get(key)
+                if previous is not None:
+                    flagged.extend(self._measure("chunk_seconds", at - previous[1], previous[0], line, source, at))
+                self._threads[key] = (job.group("table"), at)
+            self._context.append(line)
+        return flagged
+
+    def digest(self, max_excerpts: int = 20) -> dict:
+        """
+        A compact summary for the anomaly agent: counters (total and within the window), duration
+        percentiles, the tables failing most, and the most recent anomalies with their log excerpts.
+        """
+        with self._lock:
+            now = max([w[-1] for w in self._windows.values() if w] + [self._clock()])
+            counters = {category: {"total": self._totals[category],
+                                   "recent": sum(1 for at in self._windows[category] if at >= now - self.window_seconds)}
+                        for category, _, _ in LINE_PATTERNS}
+            anomalies = list(self._anomalies)
+            return {
+                "lines": self._lines,
+                "sources": dict(self._sources),
+                "window_seconds": self.window_seconds,
+                "counters": counters,
+                "latency": {metric: stats.summary() for metric, stats in sorted(self._latency.items())},
+                "table_failures": dict(self._table_failures.most_common(10)),
+                "anomalies": {"total": sum(self._anomaly_counts.values()), "by_kind": dict(self._anomaly_counts)},
+                "excerpts": anomalies[-max_excerpts:] if max_excerpts else [],
+            }
+
+
+class LogTailer:
+    """
+    Feeds the lines appended to log files (e.g. the output of the migration shell scripts) into
+    an analyzer. Each poll() reads only what was written since the last one; a file that shrank
+    or was replaced is read again from its start. start() polls every poll_seconds in a
+    background thread, so anomalies are flagged while the scripts run.
+    """
+    def __init__(self, analyzer: LogAnomalyAnalyzer, paths: list, poll_seconds: float = 5.0):
+        self.analyzer = analyzer
+        self.paths = list(paths or [])
+        self.poll_seconds = poll_seconds
+        self._positions = {}  # path -> (inode, offset)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self) -> int:
+        """Reads new complete lines from every file and returns how many were fed."""
+        with self._lock:
+            return self._poll()
+
+    def _poll(self) -> int:
+        fed = 0
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            inode, offset = self._positions.get(path, (stat.st_ino, 0))
+            if inode != stat.st_ino or stat.st_size < offset:
+                offset = 0
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # Still being written; read it whole next time.
+                    offset += len(raw)
+                    self.analyzer.feed(raw.decode("utf-8", errors="replace"), source=os.path.basename(path))
+                    fed += 1
+            self._positions[path] = (stat.st_ino, offset)
+        return fed
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                logging.warning(f"Polling the migration logs failed: {e}")
+
+    def start(self):
+        """Polls every poll_seconds in a background thread until stop()."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="log-tailer")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class AnalyzerLogHandler(logging.Handler):
+    """Feeds this process's log records (e.g. from mcp_tools.py) into an analyzer as they are emitted."""
+    def __init__(self, analyzer: LogAnomalyAnalyzer, level=logging.INFO):
+        super().__init__(level)
+        self.analyzer = analyzer
+
+    def emit(self, record):
+        try:
+            self.analyzer.feed(f"{record.levelname} {record.getMessage()}", source=record.name,
+                               timestamp=record.created)
+        except Exception:
+            self.handleError(record)
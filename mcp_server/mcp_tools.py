@@ -2,6 +2,13 @@ import pymysql
 import subprocess
 import logging
 import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from migration_metrics import MydumperProgressParser
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +26,10 @@ class SecretManager:
             "source-db-user": os.environ.get("SOURCE_DB_USER", "root"),
             "source-db-password": os.environ.get("SOURCE_DB_PASSWORD", "password"),
             "source-db-name": os.environ.get("SOURCE_DB_NAME", "employees"),
+            "target-db-host": os.environ.get("TARGET_DB_HOST", "127.0.0.1"),
+            "target-db-user": os.environ.get("TARGET_DB_USER", "root"),
+            "target-db-password": os.environ.get("TARGET_DB_PASSWORD", "password"),
+            "target-db-name": os.environ.get("TARGET_DB_NAME", os.environ.get("SOURCE_DB_NAME", "employees")),
         }
 
     def get_secret(self, secret_id):
@@ -28,30 +39,246 @@ class SecretManager:
         # return response.payload.data.decode("UTF-8")
         return self.secrets.get(secret_id, "")
 
+class ConnectionPool:
+    """A bounded, thread-safe pool of pymysql connections."""
+    def __init__(self, connect_kwargs: dict, max_size: int = 8, max_idle_seconds: float = 300,
+                 max_lifetime_seconds: float = 3600, checkout_timeout: float = 30):
+        self.connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.checkout_timeout = checkout_timeout
+        self._idle = []  # (connection, created_at, last_used_at), most recently used last
+        self._created_at = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "creates": 0,
+            "health_check_failures": 0,
+            "evictions": 0,
+        }
+
+    def _discard(self, connection):
+        """Closes a connection without raising and releases its slot. Caller holds the lock."""
+        self._created_at.pop(id(connection), None)
+        self._size -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _evict_expired(self, now):
+        """Drops idle connections that exceeded max idle time or max lifetime. Caller holds the lock."""
+        keep = []
+        for connection, created_at, last_used_at in self._idle:
+            if now - last_used_at > self.max_idle_seconds or now - created_at > self.max_lifetime_seconds:
+                self._stats["evictions"] += 1
+                self._discard(connection)
+            else:
+                keep.append((connection, created_at, last_used_at))
+        self._idle = keep
+
+    def _is_healthy(self, connection) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Checks out a healthy connection, creating one if the pool has room."""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = time.monotonic()
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._evict_expired(time.monotonic())
+                if self._idle:
+                    connection, _, _ = self._idle.pop()
+                    create = False
+                elif self._size < self.max_size:
+                    self._size += 1
+                    connection, create = None, True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Timed out after {self.checkout_timeout}s waiting for a database connection")
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    connection = pymysql.connect(**self.connect_kwargs)
+                except Exception as e:
+                    logging.error(f"Database connection failed: {e}")
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created_at[id(connection)] = time.monotonic()
+                    self._stats["creates"] += 1
+            elif not self._is_healthy(connection):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                    self._discard(connection)
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["wait_seconds"] += time.monotonic() - wait_started
+            return connection
+
+    def release(self, connection, broken: bool = False):
+        """Returns a connection to the pool, or discards it if it is broken or expired."""
+        with self._cond:
+            now = time.monotonic()
+            created_at = self._created_at.get(id(connection), now)
+            if broken or self._closed or now - created_at > self.max_lifetime_seconds:
+                if not broken and not self._closed:
+                    self._stats["evictions"] += 1
+                self._discard(connection)
+            else:
+                self._idle.append((connection, created_at, now))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and returns it to the pool afterwards."""
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            # Leave no half-read result set or open transaction behind for the next borrower.
+            broken = False
+            try:
+                connection.rollback()
+            except Exception:
+                broken = True
+            self.release(connection, broken=broken)
+            raise
+        else:
+            self.release(connection)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the pool metrics."""
+        with self._cond:
+            return dict(self._stats, size=self._size, idle=len(self._idle), max_size=self.max_size)
+
+    def close(self):
+        """Closes all idle connections; checked-out connections are closed when released."""
+        with self._cond:
+            self._closed = True
+            for connection, _, _ in self._idle:
+                self._discard(connection)
+            self._idle = []
+            self._cond.notify_all()
+
+def connection_pool_config(mcp_config: dict) -> dict:
+    """
+    The mcp_server.connection_pool settings, with max_size defaulting to one connection per tool
+    thread plus, per background job, throttle.max_workers chunk workers and a snapshot coordinator.
+    """
+    pool_config = dict(mcp_config.get('connection_pool') or {})
+    if pool_config.get('max_size') is None:
+        job_connections = mcp_config.get('throttle', {}).get('max_workers', 16) + 1
+        pool_config['max_size'] = mcp_config.get('tool_workers', 16) + mcp_config.get('job_workers', 4) * job_connections
+    return pool_config
+
 class MySQLTools:
-    def __init__(self, project_id):
+    """
+    Tools for one MySQL database, whose connection settings come from the <secret_prefix>-host,
+    -user, -password and -name secrets. `database` selects another database on the same server
+    instead of the one named by the -name secret, e.g. one database of a fleet. local_infile lets
+    the connections run LOAD DATA LOCAL INFILE, which only target tools loading chunks need.
+    """
+    def __init__(self, project_id, pool_config: dict = None, secret_prefix: str = "source-db", metrics=None,
+                 database: str = None, local_infile: bool = False):
         self.secret_manager = SecretManager(project_id)
+        self.secret_prefix = secret_prefix
+        self.database = database
+        self.local_infile = local_infile
+        self.metrics = metrics
         self.db_config = None
+        self.pool_config = pool_config or {}
+        self._pool = None
+        self._pool_lock = threading.Lock()
 
-    def _get_db_connection(self):
+    def _database_name(self) -> str:
+        return self.database or self.secret_manager.get_secret(f"{self.secret_prefix}-name")
+
+    def _get_db_config(self) -> dict:
         if not self.db_config:
             self.db_config = {
-                'host': self.secret_manager.get_secret("source-db-host"),
-                'user': self.secret_manager.get_secret("source-db-user"),
-                'password': self.secret_manager.get_secret("source-db-password"),
-                'database': self.secret_manager.get_secret("source-db-name"),
-                'cursorclass': pymysql.cursors.DictCursor
+                'host': self.secret_manager.get_secret(f"{self.secret_prefix}-host"),
+                'user': self.secret_manager.get_secret(f"{self.secret_prefix}-user"),
+                'password': self.secret_manager.get_secret(f"{self.secret_prefix}-password"),
+                'database': self._database_name(),
+                'cursorclass': pymysql.cursors.DictCursor,
+                # Pooled connections are reused across tool calls, so never keep a
+                # stale REPEATABLE READ snapshot open between them.
+                'autocommit': True,
+                # Tab-separated chunks are loaded with LOAD DATA LOCAL INFILE.
+                'local_infile': self.local_infile
             }
+        return self.db_config
+
+    def _get_pool(self) -> ConnectionPool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ConnectionPool(self._get_db_config(), **self.pool_config)
+            return self._pool
+
+    def _get_db_connection(self):
+        """Checks out a pooled connection; use as a context manager."""
+        return self._get_pool().connection()
+
+    def connection(self):
+        """Checks out a pooled connection for use by other migration components."""
+        return self._get_db_connection()
+
+    @contextmanager
+    def connections(self, count: int):
+        """Checks out `count` pooled connections held together, e.g. for workers sharing one snapshot."""
+        with ExitStack() as stack:
+            yield [stack.enter_context(self._get_db_connection()) for _ in range(count)]
+
+    def create_database_if_missing(self):
+        """Creates this tools' database on the server if it does not exist, e.g. on a fresh target instance."""
+        db_conf = dict(self._get_db_config())
+        database = db_conf.pop('database')
+        connection = pymysql.connect(**db_conf)
         try:
-            connection = pymysql.connect(**self.db_config)
-            return connection
-        except pymysql.MySQLError as e:
-            logging.error(f"Database connection failed: {e}")
-            raise
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database.replace('`', '``')}`;")
+        finally:
+            connection.close()
+
+    def get_pool_stats(self) -> dict:
+        """Returns checkout, wait and create counters for the connection pool."""
+        return self._get_pool().stats()
+
+    def close(self):
+        """Closes the connection pool."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
 
     def get_db_metadata(self) -> dict:
         """Retrieves metadata about the source database."""
-        db_name = self.secret_manager.get_secret("source-db-name")
+        db_name = self._database_name()
         query = f"""
             SELECT table_schema AS 'database_name',
             SUM(data_length + index_length) / 1024 / 1024 / 1024 AS 'db_size_gb'
@@ -102,6 +329,112 @@ class MySQLTools:
                 result = cursor.fetchone()
                 return result['count'] if result else 0
 
+    def _fetch_table_stats(self, cursor, db_name: str) -> dict:
+        """Reads per-table engine, collation and size estimates from information_schema.TABLES."""
+        cursor.execute("""
+            SELECT TABLE_NAME AS table_name, ENGINE AS engine, TABLE_COLLATION AS collation,
+                   TABLE_ROWS AS row_estimate, DATA_LENGTH AS data_length, INDEX_LENGTH AS index_length,
+                   AUTO_INCREMENT AS auto_increment, CREATE_OPTIONS AS create_options, UPDATE_TIME AS update_time
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_NAME;
+        """, (db_name,))
+        tables = {}
+        for row in cursor.fetchall():
+            name = row.pop('table_name')
+            for key in ('row_estimate', 'data_length', 'index_length'):
+                row[key] = int(row[key] or 0)
+            tables[name] = row
+        return tables
+
+    def _add_exact_counts(self, cursor, tables: dict, exact_count_tables: list):
+        """Runs COUNT(*) only for the tables the caller asked for."""
+        for table_name in exact_count_tables or []:
+            if table_name not in tables:
+                raise ValueError(f"Unknown table: {table_name}")
+            cursor.execute(f"SELECT COUNT(*) AS count FROM `{table_name.replace('`', '``')}`;")
+            tables[table_name]['exact_row_count'] = cursor.fetchone()['count']
+
+    def get_table_size_estimates(self, exact_count_tables: list = None) -> dict:
+        """Gets row and byte estimates for every table in one query, with exact counts only where requested."""
+        db_name = self._database_name()
+        with self._get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                tables = self._fetch_table_stats(cursor, db_name)
+                self._add_exact_counts(cursor, tables, exact_count_tables)
+        return {"db_name": db_name, "tables": tables}
+
+    def get_schema_catalog(self, exact_count_tables: list = None) -> dict:
+        """
+        Gets columns, indexes, engine, collation, partitioning and size estimates for
+        every table using one pass over information_schema instead of one DESCRIBE per table.
+        """
+        db_name = self._database_name()
+        with self._get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                # MySQL 8 caches information_schema.TABLES statistics, UPDATE_TIME included, for a day by
+                # default; incremental plans skip tables whose UPDATE_TIME is unchanged, so read them fresh.
+                try:
+                    cursor.execute("SET SESSION information_schema_stats_expiry = 0;")
+                except pymysql.err.MySQLError:
+                    pass  # MySQL 5.7 reads the statistics live and has no such variable.
+                tables = self._fetch_table_stats(cursor, db_name)
+                for table in tables.values():
+                    table.update({"columns": [], "indexes": [], "partitioning": None})
+
+                cursor.execute("""
+                    SELECT TABLE_NAME AS table_name, COLUMN_NAME AS name, COLUMN_TYPE AS type,
+                           IS_NULLABLE AS nullable, COLUMN_DEFAULT AS `default`, COLUMN_KEY AS `key`,
+                           EXTRA AS extra, CHARACTER_SET_NAME AS charset, COLLATION_NAME AS collation
+                    FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = %s
+                    ORDER BY TABLE_NAME, ORDINAL_POSITION;
+                """, (db_name,))
+                for row in cursor.fetchall():
+                    table = tables.get(row.pop('table_name'))
+                    if table is not None:
+                        table["columns"].append(row)
+
+                cursor.execute("""
+                    SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name, NON_UNIQUE AS non_unique,
+                           INDEX_TYPE AS index_type, COLUMN_NAME AS column_name, SUB_PART AS sub_part
+                    FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = %s
+                    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX;
+                """, (db_name,))
+                for row in cursor.fetchall():
+                    table = tables.get(row['table_name'])
+                    if table is None:
+                        continue
+                    if not table["indexes"] or table["indexes"][-1]["name"] != row['index_name']:
+                        table["indexes"].append({
+                            "name": row['index_name'],
+                            "unique": not row['non_unique'],
+                            "type": row['index_type'],
+                            "columns": [],
+                        })
+                    column = row['column_name'] if row['sub_part'] is None else f"{row['column_name']}({row['sub_part']})"
+                    table["indexes"][-1]["columns"].append(column)
+
+                cursor.execute("""
+                    SELECT TABLE_NAME AS table_name, PARTITION_NAME AS name, PARTITION_METHOD AS method,
+                           PARTITION_EXPRESSION AS expression, TABLE_ROWS AS row_estimate
+                    FROM information_schema.PARTITIONS
+                    WHERE TABLE_SCHEMA = %s AND PARTITION_NAME IS NOT NULL
+                    ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION;
+                """, (db_name,))
+                for row in cursor.fetchall():
+                    table = tables.get(row['table_name'])
+                    if table is None:
+                        continue
+                    if table["partitioning"] is None:
+                        table["partitioning"] = {"method": row['method'], "expression": row['expression'], "partitions": []}
+                    table["partitioning"]["partitions"].append({"name": row['name'], "row_estimate": int(row['row_estimate'] or 0)})
+
+                self._add_exact_counts(cursor, tables, exact_count_tables)
+
+        return {"db_name": db_name, "tables": tables}
+
     def run_checksum(self, table_name: str) -> int:
         """Runs CHECKSUM TABLE on a specific table."""
         if not table_name.isalnum():
@@ -113,14 +446,18 @@ class MySQLTools:
                 result = cursor.fetchone()
                 return result['Checksum'] if result else 0
     
-    def run_gcs_dump(self, database_name: str, table_name: str, gcs_bucket: str, gcs_path: str) -> str:
-        """Dumps a table using mysqldump and streams it to GCS."""
-        if not all(s.isalnum() or s in ['-', '_'] for s in [database_name, table_name, gcs_bucket]):
+    def dump_table_to_gcs(self, database_name: str, table_name: str, gcs_bucket: str, gcs_path: str,
+                          rate_limiter=None) -> dict:
+        """
+        Dumps a table using mysqldump and streams it to GCS, raising RuntimeError on failure.
+        When a rate limiter is given the dump is pumped through this process so its byte rate can be capped.
+        """
+        if not all(s.replace('-', '').replace('_', '').isalnum() for s in [database_name, table_name, gcs_bucket]):
              raise ValueError("Invalid input parameters.")
 
-        db_conf = self._get_db_connection().get_config()
+        db_conf = self._get_db_config()
         gcs_uri = f"gs://{gcs_bucket}/{gcs_path}/{table_name}.sql"
-        
+
         mysqldump_cmd = [
             "mysqldump",
             f"--host={db_conf['host']}",
@@ -131,31 +468,84 @@ class MySQLTools:
         ]
         gsutil_cmd = ["gsutil", "cp", "-", gcs_uri]
 
+        logging.info(f"Dumping {table_name} to {gcs_uri}...")
+        started = time.monotonic()
+        bytes_copied = None
+        # A file rather than a pipe, so mysqldump never blocks on stderr nobody is reading yet.
+        with tempfile.TemporaryFile() as dump_stderr:
+            p1 = subprocess.Popen(mysqldump_cmd, stdout=subprocess.PIPE, stderr=dump_stderr)
+            if rate_limiter is None:
+                p2 = subprocess.Popen(gsutil_cmd, stdin=p1.stdout, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                p1.stdout.close()
+                stdout, stderr = p2.communicate()
+            else:
+                p2 = subprocess.Popen(gsutil_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                bytes_copied = 0
+                try:
+                    for block in iter(lambda: p1.stdout.read(1024 * 1024), b''):
+                        rate_limiter.consume(len(block))
+                        p2.stdin.write(block)
+                        bytes_copied += len(block)
+                except BrokenPipeError:
+                    pass  # gsutil exited early; its stderr is reported below.
+                except BaseException:
+                    p1.kill()
+                    p2.kill()
+                    raise
+                finally:
+                    p1.stdout.close()
+                stdout, stderr = p2.communicate()
+            p1.wait()
+            dump_stderr.seek(0)
+            dump_errors = dump_stderr.read().decode(errors="replace").strip()
+
+        if p1.returncode != 0 or p2.returncode != 0:
+            errors = []
+            if p1.returncode != 0:
+                errors.append(f"mysqldump exited with code {p1.returncode}: {dump_errors}")
+            if p2.returncode != 0:
+                errors.append(f"gsutil exited with code {p2.returncode}: {stderr.decode(errors='replace').strip()}")
+            # gsutil stores whatever it read before mysqldump failed as a complete object.
+            subprocess.run(["gsutil", "-q", "rm", gcs_uri], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            error_msg = f"Failed to dump {table_name} to GCS. Error: {'; '.join(errors)}"
+            logging.error(error_msg)
+            if self.metrics:
+                self.metrics.record_error(table_name, "export")
+            raise RuntimeError(error_msg)
+
+        seconds = time.monotonic() - started
+        if self.metrics:
+            self.metrics.record_stage(table_name, "export", seconds, size_bytes=bytes_copied or 0, started_at=started)
+        logging.info(f"Successfully dumped {table_name} to {gcs_uri}")
+        return {"table": table_name, "uri": gcs_uri, "bytes": bytes_copied, "seconds": round(seconds, 3)}
+
+    def run_gcs_dump(self, database_name: str, table_name: str, gcs_bucket: str, gcs_path: str) -> str:
+        """Dumps a table using mysqldump and streams it to GCS."""
+        if not all(s.replace('-', '').replace('_', '').isalnum() for s in [database_name, table_name, gcs_bucket]):
+             raise ValueError("Invalid input parameters.")
+
         try:
-            logging.info(f"Dumping {table_name} to {gcs_uri}...")
-            p1 = subprocess.Popen(mysqldump_cmd, stdout=subprocess.PIPE)
-            p2 = subprocess.Popen(gsutil_cmd, stdin=p1.stdout, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            p1.stdout.close()
-            stdout, stderr = p2.communicate()
-
-            if p2.returncode!= 0:
-                error_msg = f"Failed to dump {table_name} to GCS. Error: {stderr.decode()}"
-                logging.error(error_msg)
-                return error_msg
-            
-            success_msg = f"Successfully dumped {table_name} to {gcs_uri}"
-            logging.info(success_msg)
-            return success_msg
+            result = self.dump_table_to_gcs(database_name, table_name, gcs_bucket, gcs_path)
+            return f"Successfully dumped {table_name} to {result['uri']}"
+        except RuntimeError as e:
+            return str(e)
         except Exception as e:
             logging.error(f"Exception during GCS dump for {table_name}: {e}")
             return str(e)
 
-    def run_mydumper_export(self, database_name: str, output_path: str, threads: int, chunk_size_mb: int) -> str:
-        """Runs mydumper to export the database."""
-        if not all(s.isalnum() or s in ['-', '_', '/'] for s in [database_name, output_path]):
+    def run_mydumper_export(self, database_name: str, output_path: str, threads: int, chunk_size_mb: int,
+                            cancel_event=None, uploader=None, tables: list = None) -> str:
+        """
+        Runs mydumper to export the database, or only `tables` of it. Setting cancel_event terminates
+        the export. With an uploader (a DumpDirectoryUploader for output_path), mydumper reports every
+        file it closes through --exec, and those files are uploaded while it writes the rest of the dump.
+        """
+        if not all(all(c.isalnum() or c in '-_/.' for c in s) for s in [database_name, output_path]):
              raise ValueError("Invalid input parameters.")
+        if tables is not None and not all(t.replace('_', '').isalnum() for t in tables):
+            raise ValueError("Invalid table name")
 
-        db_conf = self._get_db_connection().get_config()
+        db_conf = self._get_db_config()
         os.makedirs(output_path, exist_ok=True)
         
         mydumper_cmd = [
@@ -171,27 +561,83 @@ class MySQLTools:
             "--trx-consistency-only",
             "--verbose=3"
         ]
+        if tables is not None:
+            mydumper_cmd.append("--tables-list=" + ",".join(f"{database_name}.{t}" for t in tables))
+        if uploader is not None:
+            mydumper_cmd.append(f"--exec={uploader.exec_command}")
 
         try:
             logging.info(f"Starting mydumper export for {database_name}...")
-            result = subprocess.run(mydumper_cmd, capture_output=True, text=True, check=True)
-            logging.info(f"Mydumper stdout: {result.stdout}")
-            logging.info(f"Mydumper stderr: {result.stderr}")
-            
+            started = time.monotonic()
+            if uploader is not None:
+                # Creates the directory the --exec hook links closed files into.
+                uploader.start()
+            # mydumper logs its progress to stderr; merge it into stdout and parse it line by line.
+            process = subprocess.Popen(mydumper_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            parser = MydumperProgressParser(self.metrics, source=f"mydumper:{database_name}")
+            tail = deque(maxlen=50)
+
+            def read_output():
+                for line in process.stdout:
+                    line = line.rstrip()
+                    logging.info(f"Mydumper: {line}")
+                    tail.append(line)
+                    parser.feed(line)
+
+            reader = threading.Thread(target=read_output, daemon=True)
+            reader.start()
+            while True:
+                try:
+                    process.wait(timeout=1)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel_event is not None and cancel_event.is_set():
+                        logging.warning(f"Cancelling mydumper export for {database_name}...")
+                        process.terminate()
+                        process.wait()
+                        reader.join()
+                        if uploader is not None:
+                            uploader.abort()
+                        return f"Mydumper export of {database_name} was cancelled. Partial output at {output_path}."
+            reader.join()
+
+            if process.returncode != 0:
+                if uploader is not None:
+                    uploader.abort()
+                error_msg = f"Mydumper export failed with exit code {process.returncode}. Output: " + "\n".join(tail)
+                logging.error(error_msg)
+                if self.metrics:
+                    self.metrics.record_error(database_name, "export")
+                return error_msg
+
+            if self.metrics:
+                self.metrics.record_stage(database_name, "export", time.monotonic() - started,
+                                          size_bytes=self._directory_bytes(output_path), started_at=started)
+
             metadata_file = os.path.join(output_path, "metadata")
             if os.path.exists(metadata_file):
+                if uploader is not None:
+                    uploaded = uploader.finish()
+                    return (f"Mydumper export successful. Output at {output_path}. Metadata file is present. "
+                            f"Uploaded and verified {uploaded['files_uploaded']} files "
+                            f"({uploaded['bytes_uploaded']} bytes) to {uploaded['prefix']}; "
+                            f"peak local dump size {uploaded['peak_local_bytes']} bytes.")
                 return f"Mydumper export successful. Output at {output_path}. Metadata file is present."
             else:
+                if uploader is not None:
+                    uploader.abort()
                 return f"Mydumper export may have failed. Metadata file not found at {output_path}."
 
-        except subprocess.CalledProcessError as e:
-            error_msg = f"Mydumper export failed with exit code {e.returncode}. Stderr: {e.stderr}"
-            logging.error(error_msg)
-            return error_msg
         except Exception as e:
+            if uploader is not None:
+                uploader.abort()
             logging.error(f"An exception occurred during mydumper export: {e}")
             return str(e)
 
+    @staticmethod
+    def _directory_bytes(path: str) -> int:
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
     def get_binlog_position(self, metadata_file_path: str) -> dict:
         """Parses the mydumper metadata file to get binlog position."""
         try:
@@ -201,11 +647,13 @@ class MySQLTools:
             log_file = ""
             log_pos = ""
 
+            # The first position in the file is the source's own (SHOW MASTER STATUS); a later
+            # SHOW SLAVE STATUS section describes its upstream. mydumper 0.12+ writes "File = "/"Position = ".
             for line in content.splitlines():
-                if "Log: " in line:
-                    log_file = line.split("Log: ").strip()
-                if "Pos: " in line:
-                    log_pos = line.split("Pos: ").strip()
+                if not log_file and ("Log: " in line or line.strip().startswith("File = ")):
+                    log_file = line.split("Log: " if "Log: " in line else "File = ")[1].strip()
+                if not log_pos and ("Pos: " in line or line.strip().startswith("Position = ")):
+                    log_pos = line.split("Pos: " if "Pos: " in line else "Position = ")[1].strip()
             
             if log_file and log_pos:
                 return {"log_file": log_file, "log_position": log_pos}
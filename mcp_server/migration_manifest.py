@@ -0,0 +1,244 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STAGES = ("export", "upload", "load", "validate")
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+# Chunk number used for work tracked per table rather than per chunk (e.g. a mysqldump of a whole table).
+TABLE_LEVEL = -1
+
+
+class MigrationManifest:
+    """
+    A durable SQLite record of every table/chunk and the state of each migration stage,
+    so an interrupted run can be resumed by redoing only failed or in-flight work.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL;")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunk_plan (
+                run_id TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                chunk INTEGER NOT NULL,
+                lower_bound TEXT,
+                upper_bound TEXT,
+                PRIMARY KEY (run_id, table_name, chunk)
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                run_id TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                chunk INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                state TEXT NOT NULL,
+                bytes INTEGER,
+                checksum TEXT,
+                detail TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, table_name, chunk, stage)
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                run_id TEXT NOT NULL,
+                object_key TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                state TEXT NOT NULL,
+                bytes INTEGER,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, object_key, stage)
+            );
+            CREATE TABLE IF NOT EXISTS table_fingerprints (
+                run_id TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, table_name)
+            );
+            CREATE TABLE IF NOT EXISTS cdc_positions (
+                run_id TEXT PRIMARY KEY,
+                log_file TEXT NOT NULL,
+                log_pos INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def start_run(self, run_id: str, params: dict) -> dict:
+        """
+        Registers a run, or returns the parameters of an existing run with the same id. Reusing a
+        run id with different parameters raises ValueError, since its checkpoints belong to the old ones.
+        """
+        encoded = json.dumps(params, default=str)
+        with self._lock:
+            row = self._db.execute("SELECT params FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row:
+                existing, requested = json.loads(row["params"]), json.loads(encoded)
+                changed = sorted(k for k in set(existing) | set(requested) if existing.get(k) != requested.get(k))
+                if changed:
+                    raise ValueError(f"Run {run_id} was started with different {', '.join(changed)}; "
+                                     f"resume it with the same parameters or use a new run_id.")
+                return existing
+            self._db.execute("INSERT INTO runs (run_id, params, created_at) VALUES (?, ?, ?)",
+                             (run_id, encoded, time.time()))
+            return params
+
+    def get_run(self, run_id: str):
+        """Returns the parameters a run was started with, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT params FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row["params"]) if row else None
+
+    def save_chunk_plan(self, run_id: str, table_name: str, boundaries: list):
+        """Persists a table's chunk boundaries so a resumed run reuses exactly the same ranges."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM chunk_plan WHERE run_id = ? AND table_name = ?", (run_id, table_name))
+            self._db.executemany(
+                "INSERT INTO chunk_plan (run_id, table_name, chunk, lower_bound, upper_bound) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, table_name, i, json.dumps(lower, default=str), json.dumps(upper, default=str))
+                 for i, (lower, upper) in enumerate(boundaries)])
+            self._db.execute("COMMIT")
+
+    def get_chunk_plan(self, run_id: str, table_name: str):
+        """Returns the saved [(lower, upper), ...] boundaries of a table, or None if none were saved."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT lower_bound, upper_bound FROM chunk_plan WHERE run_id = ? AND table_name = ? ORDER BY chunk",
+                (run_id, table_name)).fetchall()
+        if not rows:
+            return None
+        to_bound = lambda value: tuple(value) if value is not None else None
+        return [(to_bound(json.loads(r["lower_bound"])), to_bound(json.loads(r["upper_bound"]))) for r in rows]
+
+    def mark(self, run_id: str, table_name: str, chunk: int, stage: str, state: str,
+             size_bytes: int = None, checksum: str = None, detail: str = None):
+        """Records the state of one stage of one chunk."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO chunks (run_id, table_name, chunk, stage, state, bytes, checksum, detail, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (run_id, table_name, chunk, stage) DO UPDATE SET
+                    state = excluded.state,
+                    bytes = COALESCE(excluded.bytes, chunks.bytes),
+                    checksum = COALESCE(excluded.checksum, chunks.checksum),
+                    detail = excluded.detail,
+                    updated_at = excluded.updated_at
+            """, (run_id, table_name, chunk, stage, state, size_bytes, checksum, detail, time.time()))
+
+    def completed_chunks(self, run_id: str, table_name: str, stage: str) -> set:
+        """Returns the chunk numbers of a table whose stage is done."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chunk FROM chunks WHERE run_id = ? AND table_name = ? AND stage = ? AND state = ?",
+                (run_id, table_name, stage, DONE)).fetchall()
+        return {r["chunk"] for r in rows}
+
+    def mark_file(self, run_id: str, object_key: str, table_name: str, stage: str, state: str,
+                  size_bytes: int = None):
+        """Records the state of one stage of one dump file, for dumps whose files are not numbered chunks."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO files (run_id, object_key, table_name, stage, state, bytes, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (run_id, object_key, stage) DO UPDATE SET
+                    state = excluded.state,
+                    bytes = COALESCE(excluded.bytes, files.bytes),
+                    updated_at = excluded.updated_at
+            """, (run_id, object_key, table_name, stage, state, size_bytes, time.time()))
+
+    def completed_files(self, run_id: str, stage: str) -> set:
+        """Returns the object keys of the dump files whose stage is done."""
+        with self._lock:
+            rows = self._db.execute("SELECT object_key FROM files WHERE run_id = ? AND stage = ? AND state = ?",
+                                    (run_id, stage, DONE)).fetchall()
+        return {r["object_key"] for r in rows}
+
+    def get_chunk(self, run_id: str, table_name: str, chunk: int, stage: str):
+        """Returns the record of one stage of one chunk as a dict, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM chunks WHERE run_id = ? AND table_name = ? AND chunk = ? AND stage = ?",
+                (run_id, table_name, chunk, stage)).fetchone()
+        return dict(row) if row else None
+
+    def reset_in_flight(self, run_id: str) -> int:
+        """Marks work left in progress by a crashed run as pending. Returns the number of records reset."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE chunks SET state = ?, updated_at = ? WHERE run_id = ? AND state = ?",
+                (PENDING, time.time(), run_id, IN_PROGRESS))
+        return cursor.rowcount
+
+    def save_fingerprint(self, run_id: str, table_name: str, fingerprint: dict):
+        """Records the source state a table was migrated from in a run, for later incremental runs."""
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO table_fingerprints (run_id, table_name, fingerprint, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (run_id, table_name) DO UPDATE SET
+                    fingerprint = excluded.fingerprint, updated_at = excluded.updated_at
+            """, (run_id, table_name, json.dumps(fingerprint, default=str), time.time()))
+
+    def get_fingerprints(self, run_id: str) -> dict:
+        """Returns {table: fingerprint} of the tables a run migrated."""
+        with self._lock:
+            rows = self._db.execute("SELECT table_name, fingerprint FROM table_fingerprints WHERE run_id = ?",
+                                    (run_id,)).fetchall()
+        return {r["table_name"]: json.loads(r["fingerprint"]) for r in rows}
+
+    def save_cdc_position(self, run_id: str, log_file: str, log_pos: int):
+        """Records the binlog position up to which changes have been applied to the target."""
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO cdc_positions (run_id, log_file, log_pos, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (run_id) DO UPDATE SET
+                    log_file = excluded.log_file, log_pos = excluded.log_pos, updated_at = excluded.updated_at
+            """, (run_id, log_file, int(log_pos), time.time()))
+
+    def get_cdc_position(self, run_id: str):
+        """Returns (log_file, log_pos) last applied by binlog CDC for a run, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT log_file, log_pos FROM cdc_positions WHERE run_id = ?", (run_id,)).fetchone()
+        return (row["log_file"], row["log_pos"]) if row else None
+
+    def summary(self, run_id: str) -> dict:
+        """
+        Returns per-table, per-stage counts of chunks (or dump files) in each state plus the bytes recorded.
+        """
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT table_name, stage, state, COUNT(*) AS chunks, COALESCE(SUM(bytes), 0) AS bytes
+                FROM (SELECT table_name, stage, state, bytes FROM chunks WHERE run_id = ?
+                      UNION ALL
+                      SELECT table_name, stage, state, bytes FROM files WHERE run_id = ?)
+                GROUP BY table_name, stage, state
+                ORDER BY table_name, stage, state
+            """, (run_id, run_id)).fetchall()
+        tables = {}
+        for r in rows:
+            stage = tables.setdefault(r["table_name"], {}).setdefault(r["stage"], {"bytes": 0})
+            stage[r["state"]] = r["chunks"]
+            stage["bytes"] += r["bytes"]
+        return {"run_id": run_id, "tables": tables}
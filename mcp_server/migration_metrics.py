@@ -0,0 +1,250 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from migration_manifest import STAGES
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MigrationMetrics:
+    """
+    Thread-safe per-table, per-stage throughput counters for a migration.
+    Every stage sample adds rows, bytes and busy seconds; the wall-clock span from the first
+    sample's start to the last sample's end gives the table's effective rate, and busy/wall
+    seconds its effective parallelism. Snapshots are available as JSON or Prometheus text.
+    """
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stages = {}  # (table, stage) -> counters
+        self._progress = {}  # source -> live progress fields
+        self._collectors = {}  # name -> callable returning a dict of numbers
+
+    def _entry(self, table: str, stage: str) -> dict:
+        """Returns the counters of a table's stage, creating them. Caller holds the lock."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        return self._stages.setdefault((table, stage), {
+            "operations": 0, "errors": 0, "retries": 0, "rows": 0, "bytes": 0, "busy_seconds": 0.0,
+            "first_started": None, "last_finished": None,
+        })
+
+    def record_stage(self, table: str, stage: str, seconds: float, rows: int = 0, size_bytes: int = 0,
+                     started_at: float = None):
+        """Adds one finished unit of work (a chunk, a table dump, ...) to a table's stage counters."""
+        now = self._clock()
+        started_at = now - seconds if started_at is None else started_at
+        with self._lock:
+            entry = self._entry(table, stage)
+            entry["operations"] += 1
+            entry["rows"] += rows or 0
+            entry["bytes"] += size_bytes or 0
+            entry["busy_seconds"] += seconds
+            if entry["first_started"] is None or started_at < entry["first_started"]:
+                entry["first_started"] = started_at
+            if entry["last_finished"] is None or now > entry["last_finished"]:
+                entry["last_finished"] = now
+
+    def record_error(self, table: str, stage: str):
+        """Counts a failed unit of work."""
+        with self._lock:
+            self._entry(table, stage)["errors"] += 1
+
+    def record_retry(self, table: str, stage: str):
+        """Counts a unit of work that is retried after a failure."""
+        with self._lock:
+            self._entry(table, stage)["retries"] += 1
+
+    @contextmanager
+    def time_stage(self, table: str, stage: str):
+        """
+        Times a block of work as one stage sample. The block may set 'rows' and 'bytes' on the
+        yielded dict; an exception is counted as an error instead.
+        """
+        sample = {"rows": 0, "bytes": 0}
+        started = self._clock()
+        try:
+            yield sample
+        except BaseException:
+            self.record_error(table, stage)
+            raise
+        self.record_stage(table, stage, self._clock() - started, rows=sample["rows"],
+                          size_bytes=sample["bytes"], started_at=started)
+
+    def update_progress(self, source: str, **fields):
+        """Merges live progress fields (e.g. parsed from mydumper output) for a source."""
+        with self._lock:
+            self._progress.setdefault(source, {}).update(fields, updated_at=time.time())
+
+    def add_collector(self, name: str, collect):
+        """Registers a callable whose numeric values are included in every snapshot, e.g. pool stats."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._progress.clear()
+
+    def snapshot(self) -> dict:
+        """Returns all counters with derived rates, per-stage totals and collector values."""
+        with self._lock:
+            stages = {key: dict(value) for key, value in self._stages.items()}
+            progress = {source: dict(fields) for source, fields in self._progress.items()}
+            collectors = dict(self._collectors)
+
+        tables = {}
+        totals = {}
+        for (table, stage), entry in sorted(stages.items()):
+            first, last = entry.pop("first_started"), entry.pop("last_finished")
+            wall = max(last - first, 0.0) if first is not None else 0.0
+            entry.update(
+                busy_seconds=round(entry["busy_seconds"], 3),
+                wall_seconds=round(wall, 3),
+                rows_per_second=round(entry["rows"] / wall, 1) if wall > 0 else None,
+                bytes_per_second=round(entry["bytes"] / wall, 1) if wall > 0 else None,
+            )
+            tables.setdefault(table, {})[stage] = entry
+            total = totals.setdefault(stage, {"operations": 0, "errors": 0, "rows": 0, "bytes": 0,
+                                              "busy_seconds": 0.0, "retries": 0})
+            for key in ("operations", "errors", "rows", "bytes", "busy_seconds", "retries"):
+                total[key] += entry[key]
+        for total in totals.values():
+            total["busy_seconds"] = round(total["busy_seconds"], 3)
+
+        collected = {}
+        for name, collect in collectors.items():
+            try:
+                collected[name] = collect()
+            except Exception as e:
+                collected[name] = {"error": str(e)}
+
+        # The stage with the most busy time is where extra threads help most.
+        bottleneck = max(totals, key=lambda s: totals[s]["busy_seconds"]) if totals else None
+        return {"tables": tables, "stages": totals, "bottleneck_stage": bottleneck,
+                "progress": progress, "collectors": collected}
+
+    def to_prometheus(self, prefix: str = "migration") -> str:
+        """Renders a snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            if not samples:
+                return
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        per_stage = [(t, s, e) for t, stages in snap["tables"].items() for s, e in stages.items()]
+        for key, name, kind, help_text in (
+            ("rows", "rows_total", "counter", "Rows processed per table and stage."),
+            ("bytes", "bytes_total", "counter", "Bytes processed per table and stage."),
+            ("operations", "operations_total", "counter", "Finished units of work (chunks or table dumps)."),
+            ("errors", "errors_total", "counter", "Failed units of work."),
+            ("retries", "retries_total", "counter", "Retried units of work."),
+            ("busy_seconds", "busy_seconds_total", "counter", "Seconds spent by all workers."),
+            ("wall_seconds", "wall_seconds", "gauge", "Seconds from the first start to the last finish."),
+            ("rows_per_second", "rows_per_second", "gauge", "Rows per wall-clock second."),
+            ("bytes_per_second", "bytes_per_second", "gauge", "Bytes per wall-clock second."),
+        ):
+            family(f"stage_{name}", kind, help_text,
+                   [(_labels(table=t, stage=s), e[key]) for t, s, e in per_stage if e[key] is not None])
+
+        progress = []
+        for source, fields in sorted(snap["progress"].items()):
+            for field, value in sorted(fields.items()):
+                if _is_number(value):
+                    progress.append((_labels(source=source, field=field), value))
+                elif isinstance(value, dict):
+                    progress.extend((_labels(source=source, field=field, key=k), v)
+                                    for k, v in sorted(value.items()) if _is_number(v))
+        family("progress", "gauge", "Live progress reported by running tools.", progress)
+
+        collected = [(_labels(collector=name, field=field), value)
+                     for name, values in sorted(snap["collectors"].items())
+                     for field, value in sorted(values.items()) if _is_number(value)]
+        family("collector_value", "gauge", "Values of registered collectors such as connection pool stats.",
+               collected)
+        return "\n".join(lines) + "\n"
+
+
+class MydumperProgressParser:
+    """
+    Turns mydumper --verbose=3 output lines into live progress as they arrive. Understands the
+    message formats of mydumper 0.9 through 0.16; unrecognised lines are ignored.
+    """
+    THREAD_RE = re.compile(r"Thread (\d+):? dumping (data|schema)[^`]*`([^`]+)`\.`([^`]+)`")
+    PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+    TABLES_RE = re.compile(r"(Remaining tables|Tables):?\s*(\d+)\s*/\s*(\d+)")
+    LEVEL_RE = re.compile(r"\((?:mydumper|myloader):\d+\): (WARNING|CRITICAL|ERROR)")
+    FINISHED_RE = re.compile(r"Finished dump at")
+
+    def __init__(self, metrics: MigrationMetrics = None, source: str = "mydumper", clock=time.monotonic):
+        self.metrics = metrics
+        self.source = source
+        self._clock = clock
+        self._started = clock()
+        self.state = {
+            "lines": 0,
+            "tables_seen": 0,
+            "data_jobs_started": 0,
+            "schema_jobs_started": 0,
+            "percent_complete": None,
+            "tables_done": None,
+            "tables_total": None,
+            "warnings": 0,
+            "errors": 0,
+            "finished": 0,
+            "elapsed_seconds": 0.0,
+            "table_jobs": {},
+            "threads": {},
+        }
+
+    def feed(self, line: str) -> dict:
+        """Parses one output line and publishes the updated progress."""
+        state = self.state
+        state["lines"] += 1
+        match = self.THREAD_RE.search(line)
+        if match:
+            thread, kind, _, table = match.groups()
+            if kind == "data":
+                state["data_jobs_started"] += 1
+                if table not in state["table_jobs"]:
+                    state["tables_seen"] += 1
+                state["table_jobs"][table] = state["table_jobs"].get(table, 0) + 1
+                state["threads"][thread] = table
+            else:
+                state["schema_jobs_started"] += 1
+            percent = self.PERCENT_RE.search(line[match.end():])
+            if percent:
+                state["percent_complete"] = float(percent.group(1))
+        tables = self.TABLES_RE.search(line)
+        if tables:
+            label, first, total = tables.group(1), int(tables.group(2)), int(tables.group(3))
+            state["tables_total"] = total
+            state["tables_done"] = total - first if label.startswith("Remaining") else first
+        level = self.LEVEL_RE.search(line)
+        if level:
+            state["warnings" if level.group(1) == "WARNING" else "errors"] += 1
+        if self.FINISHED_RE.search(line):
+            state["finished"] = 1
+            state["percent_complete"] = 100.0
+        state["elapsed_seconds"] = round(self._clock() - self._started, 3)
+        if self.metrics:
+            self.metrics.update_progress(self.source, **{k: (dict(v) if isinstance(v, dict) else v)
+                                                         for k, v in state.items()})
+        return state
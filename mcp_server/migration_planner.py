@@ -0,0 +1,124 @@
+import math
+
+GCS_IMPORT = "GCS_IMPORT"
+GCP_DMS = "GCP_DMS"
+MYDUMPER_MYLOADER = "MYDUMPER_MYLOADER"
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+DEFAULT_MODEL = {
+    "network_mb_per_sec": 200,
+    "export_mb_per_sec_per_thread": 25,
+    "load_mb_per_sec_per_thread": 15,
+    "gcs_import_mb_per_sec": 40,
+    "dms_mb_per_sec": 60,
+    "dms_setup_minutes": 20,
+    "mydumper_setup_minutes": 30,
+    "source_cpu_cores": 8,
+    "max_threads": 16,
+    "compression_ratio": 0.3,
+    "min_chunk_mb": 16,
+    "max_chunk_mb": 256,
+    "chunks_per_thread": 8,
+}
+
+
+def select_strategy_by_threshold(db_size_gb: float, gcs_threshold_gb: float = 100, dms_threshold_gb: float = 500) -> str:
+    """The size-threshold rule from config.yaml, used when no throughput model is configured."""
+    if db_size_gb < gcs_threshold_gb:
+        return GCS_IMPORT
+    if db_size_gb < dms_threshold_gb:
+        return GCP_DMS
+    return MYDUMPER_MYLOADER
+
+
+class MigrationPlanner:
+    """
+    Estimates the duration of each migration strategy from a bandwidth/CPU/thread model and
+    turns the cheapest one into a concrete plan: strategy, threads, chunk sizes and table order.
+    The same inputs always produce the same plan.
+    """
+    def __init__(self, model_config: dict = None):
+        self.model = dict(DEFAULT_MODEL, **(model_config or {}))
+
+    def _threads(self, table_count: int) -> int:
+        # Beyond twice the source's cores extra dump threads only queue on CPU.
+        return max(1, min(self.model["max_threads"], 2 * self.model["source_cpu_cores"], max(table_count, 1)))
+
+    def _export_rate(self, threads: int) -> float:
+        return min(threads * self.model["export_mb_per_sec_per_thread"], self.model["network_mb_per_sec"]) * MB
+
+    def estimate_gcs_import(self, tables: list) -> dict:
+        """mysqldump per table on parallel workers, then a serial `gcloud sql import sql` per file."""
+        total = sum(t["bytes"] for t in tables)
+        threads = self._threads(len(tables))
+        largest = max((t["bytes"] for t in tables), default=0)
+        # One table cannot be split across workers, so the largest table bounds the export stage.
+        export = max(total / self._export_rate(threads), largest / (self.model["export_mb_per_sec_per_thread"] * MB))
+        load = total / (self.model["gcs_import_mb_per_sec"] * MB)
+        return {"seconds": export + load, "threads": threads, "stages": {"export": export, "load": load}}
+
+    def estimate_dms(self, tables: list) -> dict:
+        total = sum(t["bytes"] for t in tables)
+        setup = self.model["dms_setup_minutes"] * 60
+        copy = total / (self.model["dms_mb_per_sec"] * MB)
+        return {"seconds": setup + copy, "threads": None, "stages": {"setup": setup, "copy": copy}}
+
+    def estimate_mydumper(self, tables: list) -> dict:
+        """mydumper splits tables into chunks, so all threads stay busy until the end."""
+        total = sum(t["bytes"] for t in tables)
+        threads = max(1, min(self.model["max_threads"], 2 * self.model["source_cpu_cores"]))
+        setup = self.model["mydumper_setup_minutes"] * 60
+        export = total / self._export_rate(threads)
+        upload = total * self.model["compression_ratio"] / (self.model["network_mb_per_sec"] * MB)
+        load = total / (threads * self.model["load_mb_per_sec_per_thread"] * MB)
+        return {"seconds": setup + export + upload + load, "threads": threads,
+                "stages": {"setup": setup, "export": export, "upload": upload, "load": load}}
+
+    def _chunk_size_mb(self, total_bytes: int, threads: int) -> int:
+        """Sizes chunks so every thread gets several of them, within the configured bounds."""
+        target = total_bytes / MB / max(threads * self.model["chunks_per_thread"], 1)
+        return int(min(self.model["max_chunk_mb"], max(self.model["min_chunk_mb"], math.ceil(target))))
+
+    def plan(self, metadata: dict, table_stats: dict) -> dict:
+        """
+        Builds a migration plan.
+        Args:
+            metadata: Output of the db_metadata resource (db_name, db_size_gb, ...).
+            table_stats: {table: {'data_length', 'index_length', 'row_estimate'}} as returned by
+                get_table_size_estimates.
+        """
+        tables = []
+        for name, stats in table_stats.items():
+            size = int(stats.get("data_length", 0)) + int(stats.get("index_length", 0))
+            tables.append({"table": name, "bytes": size, "rows": int(stats.get("row_estimate", 0))})
+        # Largest first, ties broken by name, so the order is reproducible.
+        tables.sort(key=lambda t: (-t["bytes"], t["table"]))
+
+        estimates = {
+            GCS_IMPORT: self.estimate_gcs_import(tables),
+            GCP_DMS: self.estimate_dms(tables),
+            MYDUMPER_MYLOADER: self.estimate_mydumper(tables),
+        }
+        strategy = min(estimates, key=lambda s: (estimates[s]["seconds"], s))
+        threads = estimates[strategy]["threads"]
+        total_bytes = sum(t["bytes"] for t in tables)
+        chunk_size_mb = self._chunk_size_mb(total_bytes, threads or 1)
+
+        for t in tables:
+            avg_row_bytes = t["bytes"] / t["rows"] if t["rows"] else None
+            t["chunk_rows"] = max(1000, int(chunk_size_mb * MB / avg_row_bytes)) if avg_row_bytes else None
+
+        return {
+            "db_name": metadata.get("db_name"),
+            "db_size_gb": round(total_bytes / GB, 3) if tables else metadata.get("db_size_gb", 0.0),
+            "strategy": strategy,
+            "threads": threads,
+            "chunk_size_mb": chunk_size_mb,
+            "table_order": [t["table"] for t in tables],
+            "tables": tables,
+            "estimated_seconds": {s: round(e["seconds"], 1) for s, e in estimates.items()},
+            "estimated_stage_seconds": {s: {k: round(v, 1) for k, v in e["stages"].items()} for s, e in estimates.items()},
+            "model": self.model,
+        }
@@ -0,0 +1,214 @@
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+def file_md5(path: str) -> str:
+    """Returns the hex MD5 of a local file, read in fixed-size blocks."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ObjectStore(ABC):
+    """
+    Interface for the bucket that dump chunks are staged in.
+    Files at or above multipart_threshold are uploaded as parts of part_size bytes on upload_workers threads.
+    """
+    def __init__(self, part_size: int = 64 * 1024 * 1024, multipart_threshold: int = 128 * 1024 * 1024,
+                 upload_workers: int = 8):
+        self.part_size = part_size
+        self.multipart_threshold = multipart_threshold
+        self.upload_workers = upload_workers
+
+    @abstractmethod
+    def put_file(self, local_path: str, key: str) -> dict:
+        """Uploads a local file and returns {'key', 'bytes', 'md5'} of the stored object."""
+
+    @abstractmethod
+    def get_file(self, key: str, local_path: str) -> dict:
+        """Downloads an object to a local file and returns {'key', 'bytes'}."""
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "") -> list:
+        """Lists objects under a prefix as [{'key', 'bytes'}], sorted by key."""
+
+    @abstractmethod
+    def stat(self, key: str):
+        """Returns {'key', 'bytes', 'md5'} for an object, or None if it does not exist."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Deletes an object if it exists."""
+
+
+class LocalObjectStore(ObjectStore):
+    """Object store backed by a local directory, for tests and benchmarks."""
+    def __init__(self, root: str, **kwargs):
+        super().__init__(**kwargs)
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def _copy_part(self, local_path: str, tmp_path: str, offset: int, length: int):
+        with open(local_path, 'rb') as src, open(tmp_path, 'r+b') as dst:
+            src.seek(offset)
+            dst.seek(offset)
+            remaining = length
+            while remaining > 0:
+                block = src.read(min(COPY_BUFFER_BYTES, remaining))
+                if not block:
+                    break
+                dst.write(block)
+                remaining -= len(block)
+
+    def put_file(self, local_path: str, key: str) -> dict:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.part-{threading.get_ident()}"
+        size = os.path.getsize(local_path)
+        if size >= self.multipart_threshold:
+            with open(tmp_path, 'wb') as f:
+                f.truncate(size)
+            offsets = range(0, size, self.part_size)
+            with ThreadPoolExecutor(max_workers=self.upload_workers) as executor:
+                list(executor.map(lambda o: self._copy_part(local_path, tmp_path, o, min(self.part_size, size - o)), offsets))
+        else:
+            shutil.copyfile(local_path, tmp_path)
+        # Publish atomically so readers never see a partially written object.
+        os.replace(tmp_path, path)
+        return {"key": key, "bytes": size, "md5": file_md5(path)}
+
+    def get_file(self, key: str, local_path: str) -> dict:
+        shutil.copyfile(self._path(key), local_path)
+        return {"key": key, "bytes": os.path.getsize(local_path)}
+
+    def list_objects(self, prefix: str = "") -> list:
+        objects = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if key.startswith(prefix) and '.part-' not in filename:
+                    objects.append({"key": key, "bytes": os.path.getsize(path)})
+        return sorted(objects, key=lambda o: o["key"])
+
+    def stat(self, key: str):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        return {"key": key, "bytes": os.path.getsize(path), "md5": file_md5(path)}
+
+    def delete(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class GCSObjectStore(ObjectStore):
+    """Object store backed by a Google Cloud Storage bucket."""
+    def __init__(self, bucket_name: str, **kwargs):
+        super().__init__(**kwargs)
+        from google.cloud import storage
+        self.client = storage.Client()
+        self.bucket = self.client.bucket(bucket_name)
+
+    @staticmethod
+    def _md5_hex(blob):
+        if not blob.md5_hash:
+            # Objects assembled from multipart uploads carry no MD5, only a CRC32C.
+            return None
+        return base64.b64decode(blob.md5_hash).hex()
+
+    def put_file(self, local_path: str, key: str) -> dict:
+        blob = self.bucket.blob(key)
+        size = os.path.getsize(local_path)
+        if size >= self.multipart_threshold:
+            from google.cloud.storage import transfer_manager
+            transfer_manager.upload_chunks_concurrently(
+                local_path, blob, chunk_size=self.part_size, max_workers=self.upload_workers)
+        else:
+            blob.upload_from_filename(local_path)
+        blob.reload()
+        return {"key": key, "bytes": blob.size, "md5": self._md5_hex(blob), "crc32c": blob.crc32c}
+
+    def get_file(self, key: str, local_path: str) -> dict:
+        blob = self.bucket.blob(key)
+        blob.download_to_filename(local_path)
+        return {"key": key, "bytes": os.path.getsize(local_path)}
+
+    def list_objects(self, prefix: str = "") -> list:
+        return sorted(({"key": b.name, "bytes": b.size} for b in self.client.list_blobs(self.bucket, prefix=prefix)),
+                      key=lambda o: o["key"])
+
+    def stat(self, key: str):
+        blob = self.bucket.get_blob(key)
+        if blob is None:
+            return None
+        return {"key": key, "bytes": blob.size, "md5": self._md5_hex(blob), "crc32c": blob.crc32c}
+
+    def delete(self, key: str):
+        blob = self.bucket.get_blob(key)
+        if blob is not None:
+            blob.delete()
+
+
+class RateLimitedObjectStore(ObjectStore):
+    """
+    Wraps another object store so every upload first draws its size from a byte-rate limiter
+    (anything with consume(n), e.g. a ByteRateLimiter shared by several migrations).
+    """
+    def __init__(self, store: ObjectStore, limiter):
+        super().__init__(store.part_size, store.multipart_threshold, store.upload_workers)
+        self.store = store
+        self.limiter = limiter
+
+    def put_file(self, local_path: str, key: str) -> dict:
+        self.limiter.consume(os.path.getsize(local_path))
+        return self.store.put_file(local_path, key)
+
+    def get_file(self, key: str, local_path: str) -> dict:
+        return self.store.get_file(key, local_path)
+
+    def list_objects(self, prefix: str = "") -> list:
+        return self.store.list_objects(prefix)
+
+    def stat(self, key: str):
+        return self.store.stat(key)
+
+    def delete(self, key: str):
+        self.store.delete(key)
+
+
+def create_object_store(store_config: dict, bucket_name: str = None) -> ObjectStore:
+    """Builds the object store described by the mcp_server.object_store section of config.yaml."""
+    store_config = dict(store_config or {})
+    backend = store_config.pop('backend', 'gcs')
+    options = {
+        'part_size': int(store_config.get('part_size_mb', 64)) * 1024 * 1024,
+        'multipart_threshold': int(store_config.get('multipart_threshold_mb', 128)) * 1024 * 1024,
+        'upload_workers': int(store_config.get('upload_workers', 8)),
+    }
+    if backend == 'local':
+        root = os.path.join(store_config.get('local_root', '/tmp/migration_object_store'), bucket_name or '')
+        return LocalObjectStore(root, **options)
+    if backend == 'gcs':
+        if not bucket_name:
+            raise ValueError("A bucket name is required for the GCS object store.")
+        return GCSObjectStore(bucket_name, **options)
+    logging.error(f"Unknown object store backend: {backend}")
+    raise ValueError(f"Unknown object store backend: {backend}")
@@ -0,0 +1,349 @@
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from deferred_indexes import DeferredIndexBuilder, split_create_table
+from table_chunks import binary_columns, get_column_types, quote_identifier
+
+SCHEMA_RE = re.compile(r"^(?P<db>[^.]+)\.(?P<table>[^.]+)-schema\.sql(\.gz)?$")
+POST_SCHEMA_RE = re.compile(r"^(?P<db>[^.]+)\.(?P<table>[^.]+)-schema-(view|triggers|post)\.sql(\.gz)?$")
+DATA_RE = re.compile(r"^(?P<db>[^.]+)\.(?P<table>[^.]+)(?P<parts>(\.\d+)*)\.(?P<format>sql|tsv)(\.gz)?$")
+LOAD_DATA_OPTIONS = "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n'"
+
+
+def sql_statements(path: str):
+    """
+    Yields the statements of a (optionally gzip-compressed) dump file. Statements end with ';' at the
+    end of a line; escaped string literals never contain a raw newline, so this never splits a value.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        statement = []
+        for line in f:
+            statement.append(line)
+            if line.endswith(";\n"):
+                yield "".join(statement)
+                statement = []
+        if "".join(statement).strip():
+            yield "".join(statement)
+
+
+def classify_dump_files(objects: list) -> dict:
+    """
+    Sorts mydumper-style dump objects into table schemas, data chunks and post-data schema objects.
+    A chunk's "chunk" is the tuple of the numbers in its name, e.g. (1, 2) for db.t.00001.00002.sql.gz;
+    it orders a table's files, while the object key identifies a file.
+    """
+    plan = {"schemas": [], "chunks": [], "post": [], "skipped": []}
+    for obj in objects:
+        name = os.path.basename(obj["key"])
+        for kind, pattern in (("schemas", SCHEMA_RE), ("post", POST_SCHEMA_RE), ("chunks", DATA_RE)):
+            match = pattern.match(name)
+            if match and not match.group("db").endswith("-schema-create"):
+                entry = dict(obj, table=match.group("table"))
+                if kind == "chunks":
+                    parts = match.group("parts")
+                    entry["chunk"] = tuple(int(n) for n in parts.split(".")[1:])
+                    entry["format"] = match.group("format")
+                plan[kind].append(entry)
+                break
+        else:
+            plan["skipped"].append(obj)
+    return plan
+
+
+class PipelinedLoader:
+    """
+    Loads a dump from the object store while it is still being downloaded. Chunk files are downloaded
+    on download_workers threads as long as the files on local disk stay within disk_budget_bytes, and
+    each one is loaded as soon as it arrives and deleted right after, so transfer and load overlap and
+    the spool never needs room for the whole dump. Loads run on load_workers connections, with at
+    most table_concurrency[table] (or default_table_concurrency) loads of one table at a time.
+    With defer_indexes, tables are created with only their primary key and their secondary indexes
+    and foreign keys are added by a DeferredIndexBuilder after all data is loaded.
+    Tab-separated (.tsv.gz) chunks are loaded with LOAD DATA LOCAL INFILE; they are decompressed
+    next to their download first, which briefly needs their uncompressed size beyond the budget.
+    Their text is UTF-8 and converted to each column's character set by the server; binary
+    columns arrive hex-encoded and are decoded with UNHEX. The target tools must be created with
+    local_infile=True.
+    """
+    def __init__(self, target_tools, store, download_workers: int = 4, load_workers: int = 8,
+                 disk_budget_bytes: int = 10 * 1024 ** 3, table_concurrency: dict = None,
+                 default_table_concurrency: int = 4, spool_dir: str = None, overwrite_tables: bool = True,
+                 defer_indexes: bool = False, index_workers: int = 4, metrics=None):
+        self.target_tools = target_tools
+        self.store = store
+        self.download_workers = download_workers
+        self.load_workers = load_workers
+        self.disk_budget_bytes = disk_budget_bytes
+        self.table_concurrency = table_concurrency or {}
+        self.default_table_concurrency = default_table_concurrency
+        self.spool_dir = spool_dir
+        self.overwrite_tables = overwrite_tables
+        self.defer_indexes = defer_indexes
+        self.index_workers = index_workers
+        self.metrics = metrics
+
+    def _table_limit(self, table: str) -> int:
+        return max(1, int(self.table_concurrency.get(table, self.default_table_concurrency)))
+
+    def _download(self, obj: dict, spool_dir: str) -> tuple:
+        started = time.monotonic()
+        local_path = os.path.join(spool_dir, os.path.basename(obj["key"]))
+        self.store.get_file(obj["key"], local_path)
+        return local_path, time.monotonic() - started
+
+    def _execute_file(self, path: str, table: str = None, drop_first: bool = False, rewrite=None) -> int:
+        """
+        Runs every statement of a dump file in one transaction, passing each through `rewrite` if
+        given. Returns the statement count.
+        """
+        statements = 0
+        with self.target_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0;")
+                try:
+                    connection.begin()
+                    if drop_first and table:
+                        cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)};")
+                    for statement in sql_statements(path):
+                        cursor.execute(rewrite(statement) if rewrite else statement)
+                        statements += 1
+                    connection.commit()
+                finally:
+                    # Dump files may change session settings; leave the pooled connection as it was.
+                    cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1;")
+                    cursor.execute("SET NAMES utf8mb4;")
+        return statements
+
+    def _load_delimited_file(self, path: str, table: str) -> int:
+        """
+        Loads a tab-separated chunk (see StreamingTableExporter output_format="tsv") with
+        LOAD DATA LOCAL INFILE, using its header line as the column list; binary columns of the
+        target table are read into variables and decoded with UNHEX. Returns 1.
+        """
+        plain_path = path
+        if path.endswith(".gz"):
+            # LOAD DATA cannot read gzip, so the chunk is decompressed next to the download.
+            plain_path = path[:-3]
+            with gzip.open(path, 'rb') as src, open(plain_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        try:
+            with open(plain_path, 'rb') as f:
+                header = f.readline().rstrip(b"\n").decode("utf-8").split("\t")
+            with self.target_tools.connection() as connection:
+                hex_columns = binary_columns(get_column_types(connection, table))
+                targets = [f"@hex{i}" if c in hex_columns else quote_identifier(c) for i, c in enumerate(header)]
+                decode = ", ".join(f"{quote_identifier(c)} = UNHEX(@hex{i})" for i, c in enumerate(header)
+                                   if c in hex_columns)
+                with connection.cursor() as cursor:
+                    cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0;")
+                    try:
+                        connection.begin()
+                        cursor.execute(f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote_identifier(table)} "
+                                       f"{LOAD_DATA_OPTIONS} IGNORE 1 LINES ({', '.join(targets)})"
+                                       f"{' SET ' + decode if decode else ''};", (plain_path,))
+                        connection.commit()
+                    finally:
+                        cursor.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1;")
+        finally:
+            if plain_path != path:
+                os.remove(plain_path)
+        return 1
+
+    def _load_chunk(self, obj: dict, local_path: str) -> dict:
+        started = time.monotonic()
+        try:
+            if obj.get("format") == "tsv":
+                statements = self._load_delimited_file(local_path, obj["table"])
+            else:
+                statements = self._execute_file(local_path)
+        finally:
+            os.remove(local_path)
+        seconds = time.monotonic() - started
+        if self.metrics:
+            self.metrics.record_stage(obj["table"], "load", seconds, size_bytes=obj["bytes"], started_at=started)
+        return {"key": obj["key"], "table": obj["table"], "chunk": obj["chunk"], "bytes": obj["bytes"],
+                "statements": statements, "seconds": round(seconds, 3)}
+
+    def _run_schema_files(self, objects: list, spool_dir: str, drop_first: bool, deferred: dict = None,
+                          execute: bool = True):
+        """
+        Runs schema files. With `deferred`, CREATE TABLE statements lose their secondary indexes and
+        foreign keys, which are collected into deferred[table]; without execute they are only collected.
+        """
+        def defer(table, statement):
+            statement, indexes, foreign_keys = split_create_table(statement)
+            if indexes or foreign_keys:
+                deferred[table] = {"indexes": indexes, "foreign_keys": foreign_keys}
+            return statement
+
+        def run(obj):
+            local_path, _ = self._download(obj, spool_dir)
+            rewrite = (lambda statement: defer(obj["table"], statement)) if deferred is not None else None
+            try:
+                if execute:
+                    self._execute_file(local_path, obj["table"], drop_first=drop_first, rewrite=rewrite)
+                else:
+                    for statement in sql_statements(local_path):
+                        rewrite(statement)
+            finally:
+                os.remove(local_path)
+        with ThreadPoolExecutor(max_workers=self.load_workers) as executor:
+            list(executor.map(run, objects))
+
+    def load(self, prefix: str, tables: list = None, completed_keys: set = None, on_file=None) -> dict:
+        """
+        Loads every schema and chunk file under `prefix` into the target database.
+        Args:
+            prefix: Object key prefix of the dump.
+            tables: Only load these tables; defaults to every table in the dump.
+            completed_keys: Keys of chunk files loaded by an earlier run; they are skipped and their
+                tables are not recreated.
+            on_file: Optional callback receiving each loaded chunk's result, for checkpointing.
+        """
+        started = time.monotonic()
+        completed_keys = completed_keys or set()
+        plan = classify_dump_files(self.store.list_objects(prefix))
+        if tables is not None:
+            plan = {kind: [o for o in objs if kind == "skipped" or o["table"] in tables] for kind, objs in plan.items()}
+        unknown = [o["key"] for o in plan["skipped"]
+                   if not o["key"].endswith(("metadata", "-schema-create.sql", "-schema-create.sql.gz"))]
+        if unknown:
+            logging.warning(f"Ignoring {len(unknown)} files that are not plain or gzip SQL dump files, e.g. {unknown[0]}")
+        resumed_tables = {o["table"] for o in plan["chunks"] if o["key"] in completed_keys}
+        chunks = [o for o in plan["chunks"] if o["key"] not in completed_keys]
+
+        # Largest tables first; their chunks interleaved so every table starts loading early.
+        table_bytes = {}
+        for obj in chunks:
+            table_bytes[obj["table"]] = table_bytes.get(obj["table"], 0) + obj["bytes"]
+        by_table = {}
+        for obj in sorted(chunks, key=lambda o: (-table_bytes[o["table"]], o["table"], o["chunk"])):
+            by_table.setdefault(obj["table"], deque()).append(obj)
+        order = deque()
+        while by_table:
+            for table in list(by_table):
+                order.append(by_table[table].popleft())
+                if not by_table[table]:
+                    del by_table[table]
+
+        spool_dir = tempfile.mkdtemp(prefix="pipelined-load-", dir=self.spool_dir)
+        logging.info(f"Loading {len(chunks)} chunk files of {len(table_bytes)} tables from {prefix} with "
+                     f"{self.download_workers} download and {self.load_workers} load workers, "
+                     f"disk budget {self.disk_budget_bytes} bytes.")
+        deferred = {} if self.defer_indexes else None
+        index_build = None
+        try:
+            self._run_schema_files([o for o in plan["schemas"] if o["table"] not in resumed_tables], spool_dir,
+                                   drop_first=self.overwrite_tables, deferred=deferred)
+            if deferred is not None:
+                # Resumed tables were created by an earlier attempt; only collect what they still need.
+                self._run_schema_files([o for o in plan["schemas"] if o["table"] in resumed_tables], spool_dir,
+                                       drop_first=False, deferred=deferred, execute=False)
+            data_started = time.monotonic()
+            results, errors, stats = self._pipeline(order, spool_dir, on_file)
+            data_seconds = time.monotonic() - data_started
+            if not errors:
+                if deferred:
+                    dump_bytes = {}
+                    for obj in plan["chunks"]:
+                        dump_bytes[obj["table"]] = dump_bytes.get(obj["table"], 0) + obj["bytes"]
+                    builder = DeferredIndexBuilder(self.target_tools, workers=self.index_workers, metrics=self.metrics)
+                    index_build = builder.build(deferred, dump_bytes)
+                # Views and triggers go in after the data, so triggers do not fire during the load.
+                self._run_schema_files(plan["post"], spool_dir, drop_first=False)
+        finally:
+            for name in os.listdir(spool_dir):
+                os.remove(os.path.join(spool_dir, name))
+            os.rmdir(spool_dir)
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(chunks)} chunk files failed to load: {errors[0]}")
+
+        wall = time.monotonic() - started
+        total_bytes = sum(r["bytes"] for r in results)
+        result = {
+            "prefix": prefix,
+            "tables": len(table_bytes),
+            "files_loaded": len(results),
+            "files_skipped": len(plan["chunks"]) - len(chunks),
+            "bytes": total_bytes,
+            "wall_seconds": round(wall, 3),
+            "download_seconds": round(stats["download_seconds"], 3),
+            "load_seconds": round(stats["load_seconds"], 3),
+            "peak_disk_bytes": stats["peak_disk_bytes"],
+            "bytes_per_second": round(total_bytes / wall, 1) if wall > 0 else None,
+            "data_load_seconds": round(data_seconds, 3),
+        }
+        if deferred is not None:
+            result["index_build"] = index_build or {"tables": {}}
+        return result
+
+    def _pipeline(self, order: deque, spool_dir: str, on_file) -> tuple:
+        """Runs downloads and loads concurrently; all scheduling happens on this thread."""
+        events = queue.Queue()
+        ready = {}  # table -> deque of (obj, local_path)
+        active = {}  # table -> running loads
+        disk_bytes = 0
+        downloading = loading = 0
+        results, errors = [], []
+        stats = {"download_seconds": 0.0, "load_seconds": 0.0, "peak_disk_bytes": 0}
+
+        with ThreadPoolExecutor(max_workers=self.download_workers) as downloads, \
+                ThreadPoolExecutor(max_workers=self.load_workers) as loads:
+            while order or downloading or loading or any(ready.values()):
+                # A file larger than the whole budget is still admitted once the spool is empty.
+                while order and downloading < self.download_workers and \
+                        (disk_bytes + order[0]["bytes"] <= self.disk_budget_bytes or disk_bytes == 0):
+                    obj = order.popleft()
+                    disk_bytes += obj["bytes"]
+                    stats["peak_disk_bytes"] = max(stats["peak_disk_bytes"], disk_bytes)
+                    downloading += 1
+                    future = downloads.submit(self._download, obj, spool_dir)
+                    future.add_done_callback(lambda f, o=obj: events.put(("downloaded", o, f)))
+
+                for table, waiting in ready.items():
+                    while waiting and loading < self.load_workers and active.get(table, 0) < self._table_limit(table):
+                        obj, local_path = waiting.popleft()
+                        active[table] = active.get(table, 0) + 1
+                        loading += 1
+                        future = loads.submit(self._load_chunk, obj, local_path)
+                        future.add_done_callback(lambda f, o=obj: events.put(("loaded", o, f)))
+
+                if not (downloading or loading):
+                    continue
+                kind, obj, future = events.get()
+                if kind == "downloaded":
+                    downloading -= 1
+                    try:
+                        local_path, seconds = future.result()
+                        stats["download_seconds"] += seconds
+                        ready.setdefault(obj["table"], deque()).append((obj, local_path))
+                    except Exception as e:
+                        logging.error(f"Download of {obj['key']} failed: {e}")
+                        errors.append(f"{obj['key']}: {e}")
+                        disk_bytes -= obj["bytes"]
+                else:
+                    loading -= 1
+                    active[obj["table"]] -= 1
+                    disk_bytes -= obj["bytes"]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"Load of {obj['key']} failed: {e}")
+                        errors.append(f"{obj['key']}: {e}")
+                        if self.metrics:
+                            self.metrics.record_error(obj["table"], "load")
+                        continue
+                    stats["load_seconds"] += result["seconds"]
+                    results.append(result)
+                    if on_file:
+                        on_file(result)
+        return results, errors, stats
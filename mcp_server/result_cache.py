@@ -0,0 +1,73 @@
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class ToolResultCache:
+    """
+    A thread-safe TTL + LRU cache for tool results, keyed by tool name and arguments.
+    Cached values are deep-copied on the way in and out so callers cannot mutate them.
+    """
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 256, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0, "invalidations": 0}
+        self._per_tool = {}
+
+    @staticmethod
+    def _key(tool_name: str, kwargs: dict) -> tuple:
+        return tool_name, json.dumps(kwargs, sort_keys=True, default=str)
+
+    def _count(self, tool_name: str, outcome: str):
+        self._stats[outcome] += 1
+        counters = self._per_tool.setdefault(tool_name, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get_or_compute(self, tool_name: str, compute, **kwargs):
+        """Returns the cached result for tool_name(**kwargs), calling compute(**kwargs) on a miss."""
+        key = self._key(tool_name, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._count(tool_name, "hits")
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self._stats["expirations"] += 1
+            self._count(tool_name, "misses")
+
+        value = compute(**kwargs)
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return value
+
+    def invalidate(self, tool_name: str = None) -> int:
+        """Drops all entries, or only those of one tool. Returns the number of entries removed."""
+        with self._lock:
+            if tool_name is None:
+                keys = list(self._entries)
+            else:
+                keys = [k for k in self._entries if k[0] == tool_name]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += 1
+        logging.info(f"Invalidated {len(keys)} cached tool results for {tool_name or 'all tools'}.")
+        return len(keys)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters overall and per tool."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), per_tool=copy.deepcopy(self._per_tool))
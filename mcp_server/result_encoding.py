@@ -0,0 +1,78 @@
+import copy
+import json
+import logging
+import threading
+from collections import deque
+
+# Without the model's tokenizer, ~4 characters per token is the usual estimate for JSON and English.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of model tokens in a text."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def compact_tables(value, min_rows: int = 3):
+    """
+    Rewrites every list of at least min_rows dicts with the same keys (e.g. DictCursor rows) as
+    {"columns": [...], "rows": [[...], ...]}, so each key is written once instead of once per row.
+    Nested values are rewritten too; everything else is returned unchanged.
+    """
+    if isinstance(value, dict):
+        return {k: compact_tables(v, min_rows) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) >= min_rows and all(isinstance(v, dict) for v in value):
+            columns = list(value[0])
+            keys = set(columns)
+            if all(len(v) == len(columns) and keys.issuperset(v) for v in value):
+                return {"columns": columns,
+                        "rows": [[compact_tables(v[c], min_rows) for c in columns] for v in value]}
+        return [compact_tables(v, min_rows) for v in value]
+    return value
+
+
+class ResultEncoder:
+    """
+    Encodes tool results before they are returned to the agents, and counts the tokens each call
+    puts into the model's context. Results whose JSON is at least min_chars long are rewritten with
+    compact_tables() and serialized without whitespace; smaller ones are returned as they are.
+    """
+    def __init__(self, enabled: bool = True, min_chars: int = 2000, min_rows: int = 3, recent_calls: int = 50):
+        self.enabled = enabled
+        self.min_chars = min_chars
+        self.min_rows = min_rows
+        self._lock = threading.Lock()
+        self._totals = {"calls": 0, "encoded_calls": 0, "raw_tokens": 0, "tokens": 0}
+        self._per_tool = {}
+        self._recent = deque(maxlen=recent_calls)
+
+    def encode(self, tool_name: str, value):
+        """Returns the value to send for one call of tool_name, recording its token counts."""
+        raw = json.dumps(value, default=str)
+        encoded, text = value, raw
+        if self.enabled and len(raw) >= self.min_chars:
+            compact = compact_tables(value, self.min_rows)
+            compact_text = json.dumps(compact, default=str, separators=(",", ":"))
+            if len(compact_text) < len(raw):
+                # Round-trip through JSON so the result serializes the same way wherever it goes next.
+                encoded, text = json.loads(compact_text), compact_text
+        raw_tokens, tokens = estimate_tokens(raw), estimate_tokens(text)
+        call = {"tool": tool_name, "raw_tokens": raw_tokens, "tokens": tokens, "encoded": encoded is not value}
+        with self._lock:
+            tool = self._per_tool.setdefault(tool_name, {"calls": 0, "encoded_calls": 0, "raw_tokens": 0, "tokens": 0})
+            for counters in (self._totals, tool):
+                counters["calls"] += 1
+                counters["encoded_calls"] += int(call["encoded"])
+                counters["raw_tokens"] += raw_tokens
+                counters["tokens"] += tokens
+            self._recent.append(call)
+        if call["encoded"]:
+            logging.info(f"Encoded {tool_name} result compactly: ~{tokens} tokens instead of ~{raw_tokens}")
+        return encoded
+
+    def stats(self) -> dict:
+        """Token counts overall, per tool and for the most recent calls."""
+        with self._lock:
+            return dict(self._totals, saved_tokens=self._totals["raw_tokens"] - self._totals["tokens"],
+                        per_tool=copy.deepcopy(self._per_tool), recent=list(self._recent))
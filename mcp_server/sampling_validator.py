@@ -0,0 +1,284 @@
+import hashlib
+import logging
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from statistics import NormalDist
+
+from table_chunks import find_key_at_offset, quote_identifier, range_predicate
+
+NUMERIC_TYPES = {"tinyint", "smallint", "mediumint", "int", "bigint", "decimal", "float", "double"}
+MATCH = "MATCH"
+MISMATCH = "MISMATCH"
+INCONCLUSIVE = "INCONCLUSIVE"
+
+
+def wilson_interval(failures: int, trials: int, confidence: float = 0.95) -> tuple:
+    """Wilson score interval for a failure rate; with no failures the upper bound is about z^2/n (cf. the rule of three)."""
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = failures / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _row_hash(row: tuple) -> bytes:
+    return hashlib.blake2b(repr(row).encode(), digest_size=8).digest()
+
+
+def _column_aggregates(rows: list, columns: list, aggregates: dict) -> dict:
+    """Adds to each column's NULL count and sum of the values (numbers) or of their lengths (everything else)."""
+    for i, column in enumerate(columns):
+        nulls, total = aggregates[column]["nulls"], aggregates[column]["sum"]
+        for row in rows:
+            value = row[i]
+            if value is None:
+                nulls += 1
+            elif isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+                total += value
+            else:
+                total += len(value) if isinstance(value, (str, bytes)) else len(str(value))
+        aggregates[column] = {"nulls": nulls, "sum": total}
+    return aggregates
+
+
+class SamplingValidator:
+    """
+    Estimates how many rows differ between source and target from a reproducible random sample
+    of primary-key ranges, instead of reading the whole table.
+
+    Ranges start at keys drawn from a generator seeded with (seed, table). When the first primary
+    key column is numeric, a range covers [v, v + width) of that column, with the width chosen from
+    the key density to hold about range_rows rows, and both sides are fetched concurrently; v is
+    drawn from [lowest - width + 1, highest] so the lowest keys are covered as often as the rest.
+    Otherwise a range starts at the key found at a random row offset and the target is fetched over
+    the key range the source returned. Finding that key reads the primary key index up to the
+    offset, so each sample costs on average half an index scan of the table: offset mode is only
+    cheap on tables of up to a few million rows, and key ranges should be preferred when possible.
+
+    Each range's rows are compared by hash, per primary key, and per-column aggregates (NULL
+    counts and sums) are compared over the whole sample. Rows of a range are neighbours, and
+    differences cluster (a failed chunk, a lost batch), so the rows are not independent trials:
+    the range is the sampling unit, and ranges that hold no rows are not counted. The Wilson
+    interval is computed over ranges_with_mismatches out of ranges_sampled, and bounds the share of
+    non-empty ranges that contain a difference. With offset ranges every row starts a range with
+    the same probability, so that bound also bounds the row mismatch rate. Key ranges are spread
+    over key values rather than rows: where keys are unevenly dense, rows in dense stretches are
+    sampled less often than rows in sparse ones, and the bound says nothing about the row rate.
+    A table is MATCH when no row differs and the upper bound is within max_mismatch_rate, MISMATCH
+    when any row differs and INCONCLUSIVE when too few ranges were sampled (about
+    3 / max_mismatch_rate non-empty ranges are needed for a MATCH).
+    Sampling stops at max_rows rows or after max_seconds. With a full_validator (e.g. a
+    ChunkedChecksumValidator), tables that are not MATCH can be escalated to a full check.
+    """
+    def __init__(self, source_tools, target_tools, workers: int = 8, range_rows: int = 100, seed: int = 0,
+                 confidence: float = 0.95, max_mismatch_rate: float = 0.01, full_validator=None, metrics=None,
+                 clock=time.monotonic):
+        self.source_tools = source_tools
+        self.target_tools = target_tools
+        self.workers = workers
+        self.range_rows = range_rows
+        self.seed = seed
+        self.confidence = confidence
+        self.max_mismatch_rate = max_mismatch_rate
+        self.full_validator = full_validator
+        self.metrics = metrics
+        self._clock = clock
+
+    def _layout(self, table_name: str) -> tuple:
+        """Returns (pk_columns, columns, numeric_key) from information_schema."""
+        with self.source_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COLUMN_NAME AS name, DATA_TYPE AS data_type, COLUMN_KEY AS `key`
+                    FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                    ORDER BY ORDINAL_POSITION;
+                """, (table_name,))
+                columns = cursor.fetchall()
+                cursor.execute("""
+                    SELECT COLUMN_NAME AS column_name FROM information_schema.KEY_COLUMN_USAGE
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+                    ORDER BY ORDINAL_POSITION;
+                """, (table_name,))
+                pk_columns = [row['column_name'] for row in cursor.fetchall()]
+        types = {c['name']: c['data_type'].lower() for c in columns}
+        return pk_columns, [c['name'] for c in columns], bool(pk_columns) and types[pk_columns[0]] in NUMERIC_TYPES
+
+    def _key_stats(self, table_name: str, pk_columns: list) -> tuple:
+        """Returns (lowest, highest) value of the first key column and the estimated row count."""
+        first = quote_identifier(pk_columns[0])
+        with self.source_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT MIN({first}) AS low, MAX({first}) AS high FROM {quote_identifier(table_name)};")
+                bounds = cursor.fetchone()
+                cursor.execute("SELECT TABLE_ROWS AS row_estimate FROM information_schema.TABLES "
+                               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s;", (table_name,))
+                estimate = cursor.fetchone()
+        return bounds['low'], bounds['high'], int((estimate or {}).get('row_estimate') or 0)
+
+    def _key_at_offset(self, table_name: str, pk_columns: list, offset: int):
+        with self.source_tools.connection() as connection:
+            return find_key_at_offset(connection, table_name, pk_columns, None, None, offset)
+
+    def _fetch(self, tools, table_name: str, pk_columns: list, columns: list, sample: dict, limit: int) -> list:
+        """Returns the rows of a sample range as tuples in key order, at most `limit` of them."""
+        key_list = ", ".join(quote_identifier(c) for c in pk_columns)
+        if "low" in sample:
+            first = quote_identifier(pk_columns[0])
+            where, params = f"WHERE {first} >= %s AND {first} < %s", [sample["low"], sample["high"]]
+        else:
+            where, params = range_predicate(pk_columns, sample["from"], None)
+            if sample.get("through") is not None:
+                key = key_list if len(pk_columns) == 1 else f"({key_list})"
+                placeholders = "%s" if len(pk_columns) == 1 else "(" + ", ".join(["%s"] * len(pk_columns)) + ")"
+                where += f" AND {key} <= {placeholders}"
+                params = params + list(sample["through"])
+        column_list = ", ".join(quote_identifier(c) for c in columns)
+        query = (f"SELECT {column_list} FROM {quote_identifier(table_name)} {where} "
+                 f"ORDER BY {key_list} LIMIT %s;")
+        with tools.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params + [limit])
+                return [tuple(row[c] for c in columns) for row in cursor.fetchall()]
+
+    def _samples(self, table_name: str, pk_columns: list, numeric_key: bool):
+        """Yields sample ranges forever, reproducibly for a given seed and table."""
+        rng = random.Random(f"{self.seed}:{table_name}")
+        if numeric_key:
+            low, high, estimate = self._key_stats(table_name, pk_columns)
+            if low is None:
+                return
+            integral = isinstance(low, int) and isinstance(high, int)
+            width = (high - low + 1) * self.range_rows / max(estimate, self.range_rows)
+            width = max(1, math.ceil(width)) if integral else max(float(width), 1e-9)
+            while True:
+                start = (rng.randint(low - width + 1, high) if integral
+                         else type(low)(str(rng.uniform(float(low) - width, float(high)))))
+                yield {"low": start, "high": start + (width if integral else type(low)(str(width)))}
+        else:
+            estimate = self._key_stats(table_name, pk_columns)[2]
+            while True:
+                key = self._key_at_offset(table_name, pk_columns, rng.randrange(max(estimate, 1)))
+                if key is None:
+                    # The estimate overshot the table; start at its first row instead, if it has one.
+                    key = self._key_at_offset(table_name, pk_columns, 0)
+                    if key is None:
+                        return
+                yield {"from": key}
+
+    def _compare_sample(self, side_executor, table_name, pk_columns, columns, sample) -> dict:
+        key_positions = [columns.index(c) for c in pk_columns]
+        key_of = lambda row: tuple(row[i] for i in key_positions)
+        cap = self.range_rows * 4
+        if "low" in sample:
+            target_future = side_executor.submit(self._fetch, self.target_tools, table_name, pk_columns, columns,
+                                                 sample, cap + 1)
+            source = self._fetch(self.source_tools, table_name, pk_columns, columns, sample, cap + 1)
+            target = target_future.result()
+            if len(source) > cap or len(target) > cap:
+                # A side was cut off; compare only the first-column values both sides returned whole.
+                bound = min(rows[-1][key_positions[0]] for rows in (source, target) if len(rows) > cap)
+                source = [r for r in source if r[key_positions[0]] < bound]
+                target = [r for r in target if r[key_positions[0]] < bound]
+        else:
+            source = self._fetch(self.source_tools, table_name, pk_columns, columns, sample, self.range_rows)
+            if not source:
+                return {"rows": 0, "mismatched_keys": [], "source": [], "target": []}
+            through = dict(sample, through=key_of(source[-1]))
+            target = self._fetch(self.target_tools, table_name, pk_columns, columns, through, cap)
+        source_hashes = {key_of(r): _row_hash(r) for r in source}
+        target_hashes = {key_of(r): _row_hash(r) for r in target}
+        mismatched = [k for k in source_hashes.keys() | target_hashes.keys()
+                      if source_hashes.get(k) != target_hashes.get(k)]
+        return {"rows": len(source_hashes.keys() | target_hashes.keys()), "mismatched_keys": mismatched,
+                "source": source, "target": target}
+
+    def validate_table(self, table_name: str, max_rows: int = 100000, max_seconds: float = None,
+                       escalate: bool = False) -> dict:
+        """
+        Samples a table until max_rows rows are compared or max_seconds pass, whichever is first.
+        Args:
+            table_name: The table to compare.
+            max_rows: Sample budget in compared rows.
+            max_seconds: Sample budget in wall time; None for no time limit.
+            escalate: Run the full validator on a table whose sample is not MATCH.
+        """
+        if not table_name.replace('_', '').isalnum():
+            raise ValueError("Invalid table name")
+        started = self._clock()
+        pk_columns, columns, numeric_key = self._layout(table_name)
+        if not columns:
+            raise ValueError(f"Table {table_name} not found on source")
+        if not pk_columns:
+            raise ValueError(f"Table {table_name} has no primary key; use run_chunked_validation instead.")
+        logging.info(f"Sampling {table_name} ({'key' if numeric_key else 'offset'} ranges of ~{self.range_rows} "
+                     f"rows, seed {self.seed}) up to {max_rows} rows" + (f" or {max_seconds}s." if max_seconds else "."))
+        if not numeric_key:
+            logging.warning(f"{table_name} has no numeric leading key column; every sampled range costs an index "
+                            f"scan up to a random offset.")
+
+        samples = self._samples(table_name, pk_columns, numeric_key)
+        rows = ranges = drawn = 0
+        mismatched_keys = []
+        ranges_with_mismatches = 0
+        source_aggregates = {c: {"nulls": 0, "sum": 0} for c in columns}
+        target_aggregates = {c: {"nulls": 0, "sum": 0} for c in columns}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                ThreadPoolExecutor(max_workers=self.workers) as side_executor:
+            # Whole waves of `workers` ranges, so a row budget always samples the same ranges for a seed.
+            while rows < max_rows and (max_seconds is None or self._clock() - started < max_seconds):
+                wave = [s for _, s in zip(range(self.workers), samples)]
+                if not wave:
+                    break
+                for result in executor.map(lambda s: self._compare_sample(side_executor, table_name, pk_columns,
+                                                                          columns, s), wave):
+                    drawn += 1
+                    if not result["rows"]:
+                        continue  # An empty range says nothing about any row.
+                    ranges += 1
+                    rows += result["rows"]
+                    ranges_with_mismatches += bool(result["mismatched_keys"])
+                    mismatched_keys.extend(result["mismatched_keys"])
+                    _column_aggregates(result["source"], columns, source_aggregates)
+                    _column_aggregates(result["target"], columns, target_aggregates)
+                if rows == 0 and drawn >= self.workers * 10:
+                    break  # The table is empty, or the sampled key space is.
+
+        # A range with a difference has at least one and at most all of its rows differing.
+        low, high = wilson_interval(ranges_with_mismatches, ranges, self.confidence)
+        low = low * ranges / rows if rows else low
+        status = MISMATCH if mismatched_keys else MATCH if high <= self.max_mismatch_rate else INCONCLUSIVE
+        elapsed = self._clock() - started
+        if self.metrics:
+            self.metrics.record_stage(table_name, "validate", elapsed, rows=rows, started_at=started)
+        report = {
+            "table": table_name,
+            "status": status,
+            "seed": self.seed,
+            "mode": "key_ranges" if numeric_key else "offset_ranges",
+            "ranges_sampled": ranges,
+            "empty_ranges": drawn - ranges,
+            "rows_sampled": rows,
+            "rows_mismatched": len(mismatched_keys),
+            "ranges_with_mismatches": ranges_with_mismatches,
+            "mismatch_rate": round(len(mismatched_keys) / rows, 8) if rows else None,
+            "confidence": self.confidence,
+            "mismatch_rate_interval": [round(low, 8), round(high, 8)],
+            "max_mismatch_rate": self.max_mismatch_rate,
+            "mismatched_columns": {c: {"source": source_aggregates[c], "target": target_aggregates[c]}
+                                   for c in columns if source_aggregates[c] != target_aggregates[c]},
+            "mismatched_key_examples": [list(k) for k in sorted(mismatched_keys, key=repr)[:20]],
+            "elapsed_seconds": round(elapsed, 3),
+        }
+        logging.info(f"Sampled {rows} rows of {table_name}: {status}, {len(mismatched_keys)} differing, mismatch "
+                     f"rate <= {high:.2e} at {self.confidence:.0%} confidence.")
+        if escalate and status != MATCH and self.full_validator is not None:
+            logging.warning(f"Escalating {table_name} to a full chunked validation ({status} sample).")
+            report["full_validation"] = self.full_validator.validate_table(table_name)
+        return report
@@ -1,73 +1,573 @@
 import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import mcp.server.stdio as stdio
 from mcp.server.fast_mcp import FastMCPServer
 from mcp.server.models import InitializationOptions
 import mcp.common.types as types
-from mcp_tools import MySQLTools
-import yaml
+from mcp_tools import MySQLTools, connection_pool_config
+from chunk_validator import ChunkedChecksumValidator
+from sampling_validator import SamplingValidator
+from result_cache import ToolResultCache
+from result_encoding import ResultEncoder
+from object_store import create_object_store
+from table_exporter import StreamingTableExporter
+from dump_scheduler import ParallelDumpScheduler
+from migration_manifest import DONE, MigrationManifest
+from checkpointed_migration import CheckpointedMigration
+from migration_planner import MigrationPlanner
+from job_manager import JobManager
+from migration_metrics import MigrationMetrics
+from binlog_cdc import BinlogChangeApplier
+from pipelined_loader import PipelinedLoader
+from dump_uploader import DumpDirectoryUploader
+from adaptive_throttle import AdaptiveConcurrencyController, SourceHealthSampler
+from table_fingerprints import TableFingerprinter, summarize_plan
+from log_analyzer import AnalyzerLogHandler, LogAnomalyAnalyzer, LogTailer
+from fleet_migration import FleetBudget, FleetMigration
+from app_config import load_config
 
 # Load configuration
-with open('../config.yaml', 'r') as f:
-    config = yaml.safe_load(f)
+config = load_config()
 
 PROJECT_ID = config['gcp_project_id']
 
 # Initialize the server and tools
 server = FastMCPServer("mysql-migration-mcp-server", "1.0.0")
-mysql_tools = MySQLTools(project_id=PROJECT_ID)
+mcp_config = config.get('mcp_server', {})
+metrics = MigrationMetrics()
+pool_config = connection_pool_config(mcp_config)
+mysql_tools = MySQLTools(project_id=PROJECT_ID, pool_config=pool_config, metrics=metrics)
+target_tools = MySQLTools(project_id=PROJECT_ID, pool_config=pool_config, secret_prefix="target-db",
+                          metrics=metrics, local_infile=True)
+# Metadata tools have a small source pool of their own, so they never queue behind export chunks.
+metadata_tools = MySQLTools(project_id=PROJECT_ID, pool_config=mcp_config.get('metadata_pool') or {"max_size": 4},
+                            metrics=metrics)
+# Connection-wait time shows up in every metrics snapshot through the pool counters.
+metrics.add_collector("source_connection_pool", mysql_tools.get_pool_stats)
+metrics.add_collector("source_metadata_connection_pool", metadata_tools.get_pool_stats)
+metrics.add_collector("target_connection_pool", target_tools.get_pool_stats)
+result_cache = ToolResultCache(**mcp_config.get('cache', {}))
+# Large results (catalogs, DESCRIBE rows) are sent as column/row tables to keep the agents' context small.
+result_encoder = ResultEncoder(**mcp_config.get('result_encoding', {}))
+metrics.add_collector("tool_result_tokens", lambda: {k: v for k, v in result_encoder.stats().items()
+                                                      if k not in ("per_tool", "recent")})
+manifest = MigrationManifest(mcp_config.get('manifest_path', 'migration_manifest.db'))
+# Tool handlers run their blocking database/subprocess work here so the event loop keeps serving
+# other calls; long operations can instead be started as background jobs.
+tool_executor = ThreadPoolExecutor(max_workers=mcp_config.get('tool_workers', 16), thread_name_prefix="mcp-tool")
+jobs = JobManager(max_workers=mcp_config.get('job_workers', 4))
+# Streaming exports encode and compress their chunks on these processes, so one table uses several
+# cores. They are forked: a spawned child would import this module and start a second server.
+encode_processes = mcp_config.get('encode_processes')
+encoder_pool = None if encode_processes == 0 else ProcessPoolExecutor(
+    max_workers=encode_processes or os.cpu_count(), mp_context=multiprocessing.get_context("fork"))
+# Every log line of this server, and of the log files the migration scripts write, is analysed as it
+# is produced, so the anomaly agent reads a digest instead of the complete logs.
+log_config = mcp_config.get('log_analyzer', {})
+log_analyzer = LogAnomalyAnalyzer(**{k: v for k, v in log_config.items() if k not in ('paths', 'poll_seconds')})
+log_tailer = LogTailer(log_analyzer, log_config.get('paths', []), poll_seconds=log_config.get('poll_seconds', 5))
+log_tailer.start()
+logging.getLogger().addHandler(AnalyzerLogHandler(log_analyzer))
+metrics.add_collector("log_anomalies", lambda: {c: v["total"] for c, v in log_analyzer.digest(0)["counters"].items()})
+
+def _tool_result(tool_name: str, value) -> types.ToolResult:
+    """Wraps a tool's return value, compactly encoded when it is large."""
+    return types.ToolResult.model(result_encoder.encode(tool_name, value))
+
+async def _offload(fn, *args, **kwargs):
+    """Runs a blocking function on the tool executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tool_executor, functools.partial(fn, *args, **kwargs))
+
+# --- Blocking operations, run on the tool executor or as background jobs ---
+def _plan_migration() -> dict:
+    metadata = result_cache.get_or_compute("db_metadata", metadata_tools.get_db_metadata)
+    estimates = result_cache.get_or_compute("get_table_size_estimates", metadata_tools.get_table_size_estimates,
+                                            exact_count_tables=None)
+    planner = MigrationPlanner(config.get('migration_planner'))
+    return planner.plan(metadata, estimates["tables"])
+
+def _run_chunked_validation(table_name: str, chunk_rows: int = 10000, workers: int = 8) -> dict:
+    validator = ChunkedChecksumValidator(mysql_tools, target_tools, workers=workers, chunk_rows=chunk_rows,
+                                         metrics=metrics)
+    return validator.validate_table(table_name)
+
+def _run_sampling_validation(table_name: str, max_rows: int = 100000, max_seconds: float = None, seed: int = 0,
+                             range_rows: int = 100, confidence: float = 0.95, max_mismatch_rate: float = 0.01,
+                             escalate: bool = False, workers: int = 8) -> dict:
+    full_validator = ChunkedChecksumValidator(mysql_tools, target_tools, workers=workers, metrics=metrics)
+    validator = SamplingValidator(mysql_tools, target_tools, workers=workers, range_rows=range_rows, seed=seed,
+                                  confidence=confidence, max_mismatch_rate=max_mismatch_rate,
+                                  full_validator=full_validator, metrics=metrics)
+    return validator.validate_table(table_name, max_rows=max_rows, max_seconds=max_seconds, escalate=escalate)
+
+def _throttle_controller(apply, initial_workers: int, initial_rate: float = 0) -> AdaptiveConcurrencyController:
+    """
+    Builds an adaptive concurrency controller from the mcp_server.throttle section of config.yaml.
+    It starts at initial_rate bytes/s per worker, capped at max_per_worker_mb_per_sec; 0 (unlimited)
+    starts at that cap, since the controller always applies a rate.
+    """
+    throttle_config = mcp_config.get('throttle', {})
+    return AdaptiveConcurrencyController(
+        SourceHealthSampler(mysql_tools, probe_query=throttle_config.get('probe_query', "SELECT 1")),
+        apply,
+        limits=throttle_config.get('limits', {}),
+        min_workers=throttle_config.get('min_workers', 1),
+        max_workers=throttle_config.get('max_workers', 16),
+        initial_workers=initial_workers,
+        min_rate=throttle_config.get('min_per_worker_mb_per_sec', 2) * 1024 * 1024,
+        max_rate=throttle_config.get('max_per_worker_mb_per_sec', 64) * 1024 * 1024,
+        initial_rate=initial_rate,
+        headroom=throttle_config.get('headroom', 0.7),
+        decrease_factor=throttle_config.get('decrease_factor', 0.5),
+        interval_seconds=throttle_config.get('interval_seconds', 10),
+        metrics=metrics,
+    )
+
+def _run_parallel_gcs_dump(gcs_bucket: str, gcs_path: str, tables: list = None, workers: int = 4,
+                           per_worker_mb_per_sec: float = 0, global_mb_per_sec: float = 0,
+                           max_retries: int = 3, run_id: str = None, adaptive: bool = False,
+                           cancel_event=None) -> dict:
+    if run_id and tables is None:
+        # Calling again with the run_id resumes the tables it started with.
+        tables = (manifest.get_run(run_id) or {}).get("tables")
+    estimates = mysql_tools.get_table_size_estimates()
+    sizes = estimates["tables"]
+    unknown = [t for t in tables or [] if t not in sizes]
+    if unknown:
+        raise ValueError(f"Unknown tables: {unknown}")
+    table_list = [
+        {"table": name, "bytes": sizes[name]["data_length"] + sizes[name]["index_length"]}
+        for name in (tables or sizes)
+    ]
+    dump_fn = lambda table, limiter: mysql_tools.dump_table_to_gcs(estimates["db_name"], table, gcs_bucket, gcs_path, limiter)
+    if run_id:
+        manifest.start_run(run_id, {"tables": [t["table"] for t in table_list], "prefix": gcs_path,
+                                    "gcs_bucket": gcs_bucket, "strategy": "gcs_dump"})
+        dump_fn = CheckpointedMigration(manifest, run_id).wrap_table_dump(dump_fn)
+    scheduler = ParallelDumpScheduler(
+        dump_fn,
+        workers=workers,
+        per_worker_bytes_per_sec=per_worker_mb_per_sec * 1024 * 1024,
+        global_bytes_per_sec=global_mb_per_sec * 1024 * 1024,
+        max_retries=max_retries,
+        metrics=metrics,
+        max_workers=mcp_config.get('throttle', {}).get('max_workers', 16) if adaptive else None,
+    )
+    if not adaptive:
+        return scheduler.run(table_list, cancel_event=cancel_event)
+    controller = _throttle_controller(
+        lambda w, rate: (scheduler.set_workers(w), scheduler.set_per_worker_rate(rate)), workers,
+        initial_rate=per_worker_mb_per_sec * 1024 * 1024)
+    controller.start()
+    try:
+        result = scheduler.run(table_list, cancel_event=cancel_event)
+    finally:
+        throttle = controller.stop()
+    return dict(result, throttle=throttle)
+
+def _run_streaming_export(table_name: str, gcs_bucket: str, gcs_path: str, workers: int = 4,
+                          chunk_rows: int = 100000) -> dict:
+    store = create_object_store(mcp_config.get('object_store'), gcs_bucket)
+    exporter = StreamingTableExporter(mysql_tools, store, workers=workers, chunk_rows=chunk_rows, metrics=metrics,
+                                      encoder_pool=encoder_pool)
+    return exporter.export_table(table_name, gcs_path)
+
+def _export_tables(exporter: StreamingTableExporter, gcs_path: str, tables: list = None, cancel_event=None) -> dict:
+    """Exports tables one after another with a chunked exporter, stopping between tables when cancelled."""
+    if tables is None:
+        tables = list(mysql_tools.get_table_size_estimates()["tables"])
+    started = time.monotonic()
+    results = []
+    for table in tables:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        results.append(exporter.export_table(table, gcs_path))
+    wall = time.monotonic() - started
+    total_bytes = sum(r["bytes"] for r in results)
+    return {"format": exporter.output_format, "prefix": gcs_path, "tables": results,
+            "rows": sum(r["rows"] for r in results), "bytes": total_bytes,
+            "not_started_tables": tables[len(results):], "wall_seconds": round(wall, 3),
+            "bytes_per_second": round(total_bytes / wall, 1) if wall > 0 else None}
+
+def _run_delimited_export(gcs_bucket: str, gcs_path: str, tables: list = None, workers: int = 4,
+                          chunk_rows: int = 100000, cancel_event=None) -> dict:
+    store = create_object_store(mcp_config.get('object_store'), gcs_bucket)
+    exporter = StreamingTableExporter(mysql_tools, store, workers=workers, chunk_rows=chunk_rows, metrics=metrics,
+                                      output_format="tsv", encoder_pool=encoder_pool)
+    return _export_tables(exporter, gcs_path, tables, cancel_event)
+
+def _run_parquet_export(gcs_bucket: str, gcs_path: str, tables: list = None, workers: int = 4,
+                        chunk_rows: int = 100000, row_group_rows: int = None, cancel_event=None) -> dict:
+    parquet_config = mcp_config.get('parquet', {})
+    store = create_object_store(mcp_config.get('object_store'), gcs_bucket)
+    exporter = StreamingTableExporter(
+        mysql_tools, store, workers=workers, chunk_rows=chunk_rows, metrics=metrics, output_format="parquet",
+        fetch_rows=parquet_config.get('fetch_rows', 10000),
+        row_group_rows=row_group_rows or parquet_config.get('row_group_rows', 100000),
+        parquet_compression=parquet_config.get('compression', "zstd"),
+        parquet_compression_level=parquet_config.get('compression_level'),
+    )
+    return _export_tables(exporter, gcs_path, tables, cancel_event)
+
+def _checkpointed_migration(run_id: str, params: dict) -> CheckpointedMigration:
+    store = create_object_store(mcp_config.get('object_store'), params["gcs_bucket"])
+    exporter = StreamingTableExporter(mysql_tools, store, workers=params["workers"], chunk_rows=params["chunk_rows"],
+                                      metrics=metrics, encoder_pool=encoder_pool)
+    validator = ChunkedChecksumValidator(mysql_tools, target_tools, workers=params["workers"],
+                                         chunk_rows=params["chunk_rows"], metrics=metrics)
+    fingerprinter = TableFingerprinter(mysql_tools, validator) if params.get("incremental") is not None else None
+    return CheckpointedMigration(manifest, run_id, exporter=exporter, validator=validator, fingerprinter=fingerprinter)
+
+def _plan_incremental(baseline_run_id: str = None, tables: list = None, workers: int = 8,
+                      chunk_rows: int = 100000) -> dict:
+    """Plans every table against the fingerprints of a baseline run; with no baseline every table is new."""
+    baseline = manifest.get_fingerprints(baseline_run_id) if baseline_run_id else {}
+    if baseline_run_id and not baseline:
+        raise ValueError(f"Run {baseline_run_id} recorded no table fingerprints.")
+    validator = ChunkedChecksumValidator(mysql_tools, target_tools, workers=workers, chunk_rows=chunk_rows,
+                                         metrics=metrics)
+    return TableFingerprinter(mysql_tools, validator).plan(baseline, tables)
+
+def _plan_incremental_migration(baseline_run_id: str, tables: list = None, workers: int = 8) -> dict:
+    plan = _plan_incremental(baseline_run_id, tables, workers)
+    baseline = manifest.get_fingerprints(baseline_run_id)
+    return dict(summarize_plan(plan), baseline_run_id=baseline_run_id,
+                dropped_tables=sorted(t for t in baseline if t not in plan) if tables is None else [])
+
+def _run_checkpointed_export(run_id: str, gcs_bucket: str, gcs_path: str, tables: list = None, workers: int = 4,
+                             chunk_rows: int = 100000, validate: bool = False, baseline_run_id: str = None,
+                             fingerprint: bool = True, cancel_event=None) -> dict:
+    existing = manifest.get_run(run_id) or {}
+    if tables is None:
+        tables = existing.get("tables") or list(mysql_tools.get_table_size_estimates()["tables"])
+    incremental = existing.get("incremental")
+    if (fingerprint or baseline_run_id) and not existing:
+        # Planned once per run; calling again with the same run_id keeps the plan it started with.
+        incremental = _plan_incremental(baseline_run_id, tables, workers, chunk_rows)
+    params = manifest.start_run(run_id, {"tables": tables, "prefix": gcs_path, "gcs_bucket": gcs_bucket,
+                                         "workers": workers, "chunk_rows": chunk_rows, "validate": validate,
+                                         "strategy": "streaming_export", "baseline_run_id": baseline_run_id,
+                                         "incremental": incremental})
+    migration = _checkpointed_migration(run_id, params)
+    result = migration.run(params["tables"], params["prefix"], validate=params["validate"], cancel_event=cancel_event,
+                           incremental=params.get("incremental"))
+    if params.get("incremental") is not None:
+        result["incremental"] = {k: v for k, v in summarize_plan(params["incremental"]).items() if k != "tables"}
+    return result
+
+def _resume_migration(run_id: str, cancel_event=None) -> dict:
+    params = manifest.get_run(run_id)
+    if params is None:
+        raise ValueError(f"Unknown run: {run_id}")
+    if params.get("strategy") != "streaming_export":
+        raise ValueError(f"Run {run_id} used {params.get('strategy')}; rerun that tool with the same run_id to resume it.")
+    return _checkpointed_migration(run_id, params).resume(cancel_event=cancel_event)
+
+def _run_mydumper_export(database_name: str, output_path: str, threads: int = 4, chunk_size_mb: int = 64,
+                         gcs_bucket: str = None, gcs_path: str = None, upload_workers: int = None,
+                         delete_local: bool = None, adaptive: bool = False, tables: list = None, run_id: str = None,
+                         cancel_event=None) -> str:
+    if adaptive:
+        # mydumper's thread count is fixed once it starts, so the source's current load picks it.
+        threads = _throttle_controller(lambda w, rate: None, threads).recommend_workers()
+        logging.info(f"Adaptive throttle chose {threads} mydumper threads.")
+    store = create_object_store(mcp_config.get('object_store'), gcs_bucket) if gcs_bucket else None
+    upload_config = mcp_config.get('mydumper_upload', {})
+
+    def export(table_list):
+        uploader = None
+        if store is not None:
+            uploader = DumpDirectoryUploader(
+                store, output_path, gcs_path or "",
+                workers=upload_workers or upload_config.get('workers', 8),
+                delete_local=upload_config.get('delete_local', False) if delete_local is None else delete_local,
+                metrics=metrics,
+            )
+        return mysql_tools.run_mydumper_export(database_name, output_path, threads, chunk_size_mb,
+                                               cancel_event=cancel_event, uploader=uploader, tables=table_list)
+
+    if not run_id:
+        result = export(tables)
+    else:
+        run_tables = tables if tables is not None else (manifest.get_run(run_id) or {}).get("tables")
+        if run_tables is None:
+            estimates = mysql_tools.get_table_size_estimates()
+            if estimates["db_name"] != database_name:
+                raise ValueError(f"run_id needs the tables of {database_name}; pass them as tables.")
+            run_tables = list(estimates["tables"])
+        params = manifest.start_run(run_id, {"database": database_name, "tables": run_tables, "prefix": gcs_path,
+                                             "gcs_bucket": gcs_bucket, "strategy": "mydumper_export"})
+        migration = CheckpointedMigration(manifest, run_id)
+        result = migration.checkpointed_mydumper_export(export, database_name, output_path,
+                                                        params["tables"] if tables is None else tables,
+                                                        store=store, prefix=gcs_path or "")
+        metadata = mysql_tools.get_binlog_position(os.path.join(output_path, "metadata"))
+        if "error" not in metadata and manifest.get_cdc_position(run_id) is None:
+            # The first dump of the run is the earliest, so binlog CDC for the run misses nothing from there.
+            manifest.save_cdc_position(run_id, metadata["log_file"], int(metadata["log_position"]))
+    result_cache.invalidate()
+    return result
+
+def _run_pipelined_load(gcs_bucket: str, gcs_path: str, tables: list = None, download_workers: int = None,
+                        load_workers: int = None, disk_budget_mb: int = None, table_concurrency: dict = None,
+                        run_id: str = None, defer_indexes: bool = None) -> dict:
+    loader_config = mcp_config.get('loader', {})
+    store = create_object_store(mcp_config.get('object_store'), gcs_bucket)
+    loader = PipelinedLoader(
+        target_tools, store,
+        download_workers=download_workers or loader_config.get('download_workers', 4),
+        load_workers=load_workers or loader_config.get('load_workers', 8),
+        disk_budget_bytes=(disk_budget_mb or loader_config.get('disk_budget_mb', 10240)) * 1024 * 1024,
+        table_concurrency=dict(loader_config.get('table_concurrency') or {}, **(table_concurrency or {})),
+        default_table_concurrency=loader_config.get('default_table_concurrency', 4),
+        spool_dir=loader_config.get('spool_dir'),
+        defer_indexes=loader_config.get('defer_indexes', False) if defer_indexes is None else defer_indexes,
+        index_workers=loader_config.get('index_workers', 4),
+        metrics=metrics,
+    )
+    completed_keys, on_file = set(), None
+    if run_id:
+        manifest.start_run(run_id, {"prefix": gcs_path, "gcs_bucket": gcs_bucket, "strategy": "pipelined_load"})
+        # Keyed by object key: mydumper's file names share trailing numbers across a table's files.
+        completed_keys = manifest.completed_files(run_id, "load")
+        on_file = lambda result: manifest.mark_file(run_id, result["key"], result["table"], "load", DONE,
+                                                    size_bytes=result["bytes"])
+    result = loader.load(gcs_path, tables=tables, completed_keys=completed_keys, on_file=on_file)
+    result_cache.invalidate()
+    return result
+
+# Binlog CDC appliers by run id, so their lag can be reported while they run as background jobs.
+cdc_appliers = {}
+
+def _run_binlog_cdc(run_id: str, metadata_file_path: str = None, log_file: str = None, log_pos: int = None,
+                    workers: int = 4, tables: list = None, until_caught_up: bool = False, cancel_event=None) -> dict:
+    position = manifest.get_cdc_position(run_id)
+    if position:
+        logging.info(f"Resuming binlog CDC for run {run_id} at {position[0]}:{position[1]}")
+    elif log_file and log_pos:
+        position = (log_file, int(log_pos))
+    elif metadata_file_path:
+        parsed = mysql_tools.get_binlog_position(metadata_file_path)
+        if "error" in parsed:
+            raise ValueError(parsed["error"])
+        position = (parsed["log_file"], int(parsed["log_position"]))
+    else:
+        raise ValueError("Provide metadata_file_path or log_file and log_pos to start binlog CDC.")
+    applier = BinlogChangeApplier(
+        mysql_tools, target_tools, workers=workers, tables=tables,
+        on_checkpoint=lambda f, p: manifest.save_cdc_position(run_id, f, p),
+        metrics=metrics, progress_source=f"cdc:{run_id}",
+    )
+    cdc_appliers[run_id] = applier
+    return applier.run(*position, stop_event=cancel_event, until_caught_up=until_caught_up)
+
+# Fleet migrations by fleet id, so their progress can be read while they run as background jobs.
+fleet_migrations = {}
+
+def _fleet_migration(gcs_bucket: str, gcs_path: str, export_threads: int = None, upload_mb_per_sec: float = None,
+                     import_slots: int = None, database_concurrency: int = None) -> FleetMigration:
+    """Builds a fleet migration from the mcp_server.fleet section of config.yaml, with per-call overrides."""
+    fleet_config = mcp_config.get('fleet', {})
+    loader_config = mcp_config.get('loader', {})
+    database_concurrency = database_concurrency or fleet_config.get('database_concurrency', 4)
+    upload_mb_per_sec = fleet_config.get('upload_mb_per_sec', 0) if upload_mb_per_sec is None else upload_mb_per_sec
+    budget = FleetBudget(export_threads=export_threads or fleet_config.get('export_threads', 16),
+                         upload_bytes_per_sec=upload_mb_per_sec * 1024 * 1024,
+                         import_slots=import_slots or fleet_config.get('import_slots', 8))
+    tools_factory = lambda prefix: lambda database: MySQLTools(
+        project_id=PROJECT_ID, pool_config=pool_config, secret_prefix=prefix,
+        metrics=metrics, database=database, local_infile=prefix == "target-db")
+    return FleetMigration(
+        tools_factory("source-db"), tools_factory("target-db"),
+        create_object_store(mcp_config.get('object_store'), gcs_bucket), budget, gcs_path,
+        database_concurrency=database_concurrency,
+        table_workers=fleet_config.get('table_workers', 4),
+        chunk_rows=fleet_config.get('chunk_rows', 100000),
+        # Each running database has its own spool, so they share the loader's disk budget.
+        loader_options={
+            "download_workers": loader_config.get('download_workers', 4),
+            "disk_budget_bytes": loader_config.get('disk_budget_mb', 10240) * 1024 * 1024 // database_concurrency,
+            "default_table_concurrency": loader_config.get('default_table_concurrency', 4),
+            "spool_dir": loader_config.get('spool_dir'),
+        },
+        encoder_pool=encoder_pool,
+        metrics=metrics,
+    )
+
+def _run_fleet_migration(fleet_id: str, databases: list, gcs_bucket: str, gcs_path: str,
+                         export_threads: int = None, upload_mb_per_sec: float = None, import_slots: int = None,
+                         database_concurrency: int = None, cancel_event=None) -> dict:
+    if not databases:
+        raise ValueError("Provide at least one source database.")
+    invalid = [d for d in databases if not d.replace('_', '').isalnum()]
+    if invalid:
+        raise ValueError(f"Invalid database names: {invalid}")
+    fleet = _fleet_migration(gcs_bucket, gcs_path, export_threads, upload_mb_per_sec, import_slots,
+                             database_concurrency)
+    fleet_migrations[fleet_id] = fleet
+    result = fleet.run(databases, cancel_event=cancel_event)
+    result_cache.invalidate()
+    return dict(result, fleet_id=fleet_id)
+
+# Long operations that may be started with start_background_job.
+BACKGROUND_OPERATIONS = {
+    "run_mydumper_export": _run_mydumper_export,
+    "run_parallel_gcs_dump": _run_parallel_gcs_dump,
+    "run_streaming_export": _run_streaming_export,
+    "run_checkpointed_export": _run_checkpointed_export,
+    "resume_migration": _resume_migration,
+    "run_chunked_validation": _run_chunked_validation,
+    "run_sampling_validation": _run_sampling_validation,
+    "run_binlog_cdc": _run_binlog_cdc,
+    "run_fleet_migration": _run_fleet_migration,
+    "run_pipelined_load": _run_pipelined_load,
+    "run_delimited_export": _run_delimited_export,
+    "run_parquet_export": _run_parquet_export,
+}
 
 # --- Define MCP Resources ---
 @server.resource("db_metadata")
-def get_db_metadata() -> types.ToolResult:
+async def get_db_metadata() -> types.ToolResult:
     """Gets metadata of the source database including size, tables, and version."""
     try:
-        metadata = mysql_tools.get_db_metadata()
-        return types.ToolResult.model(metadata)
+        metadata = await _offload(result_cache.get_or_compute, "db_metadata", metadata_tools.get_db_metadata)
+        return _tool_result("get_db_metadata", metadata)
     except Exception as e:
         return types.ToolResult.error(str(e))
 
 # --- Define MCP Tools ---
 @server.tool()
-def get_table_schema(table_name: str) -> types.ToolResult:
+async def get_table_schema(table_name: str) -> types.ToolResult:
     """
     Retrieves the schema for a given table name.
     Args:
         table_name: The name of the table to describe.
     """
     try:
-        schema = mysql_tools.get_table_schema(table_name)
-        return types.ToolResult.model(schema)
+        schema = await _offload(result_cache.get_or_compute, "get_table_schema", metadata_tools.get_table_schema,
+                                table_name=table_name)
+        return _tool_result("get_table_schema", schema)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_schema_catalog(exact_count_tables: list[str] = None) -> types.ToolResult:
+    """
+    Retrieves columns, indexes, engines, collations, partitioning and row/size
+    estimates for every table in the source database in a single call.
+    Args:
+        exact_count_tables: Optional list of tables to also run an exact COUNT(*) on.
+    """
+    try:
+        catalog = await _offload(result_cache.get_or_compute, "get_schema_catalog", metadata_tools.get_schema_catalog,
+                                 exact_count_tables=exact_count_tables)
+        return _tool_result("get_schema_catalog", catalog)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_table_size_estimates(exact_count_tables: list[str] = None) -> types.ToolResult:
+    """
+    Gets TABLE_ROWS/DATA_LENGTH estimates for every table in the source database in a single call.
+    Args:
+        exact_count_tables: Optional list of tables to also run an exact COUNT(*) on.
+    """
+    try:
+        estimates = await _offload(result_cache.get_or_compute, "get_table_size_estimates",
+                                   metadata_tools.get_table_size_estimates, exact_count_tables=exact_count_tables)
+        return _tool_result("get_table_size_estimates", estimates)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def plan_migration() -> types.ToolResult:
+    """
+    Builds a deterministic migration plan from the source catalog and the configured throughput
+    model: strategy, thread count, chunk size and table order, with estimated durations.
+    """
+    try:
+        return _tool_result("plan_migration", await _offload(_plan_migration))
     except Exception as e:
         return types.ToolResult.error(str(e))
 
 @server.tool()
-def get_table_row_count(table_name: str) -> types.ToolResult:
+async def get_table_row_count(table_name: str) -> types.ToolResult:
     """
     Gets the total row count for a given table name.
     Args:
         table_name: The name of the table.
     """
     try:
-        count = mysql_tools.get_table_row_count(table_name)
-        return types.ToolResult.model({"table": table_name, "row_count": count})
+        count = await _offload(mysql_tools.get_table_row_count, table_name)
+        return _tool_result("get_table_row_count", {"table": table_name, "row_count": count})
     except Exception as e:
         return types.ToolResult.error(str(e))
 
 @server.tool()
-def run_checksum(table_name: str) -> types.ToolResult:
+async def run_checksum(table_name: str) -> types.ToolResult:
     """
     Runs a checksum operation on a given table.
     Args:
         table_name: The name of the table.
     """
     try:
-        checksum = mysql_tools.run_checksum(table_name)
-        return types.ToolResult.model({"table": table_name, "checksum": checksum})
+        checksum = await _offload(mysql_tools.run_checksum, table_name)
+        return _tool_result("run_checksum", {"table": table_name, "checksum": checksum})
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_chunked_validation(table_name: str, chunk_rows: int = 10000, workers: int = 8) -> types.ToolResult:
+    """
+    Compares a table between source and target in parallel primary-key chunks
+    and reports only the mismatching chunks, bisected down to row ranges.
+    Args:
+        table_name: The name of the table.
+        chunk_rows: Approximate number of rows per chunk.
+        workers: Number of chunks compared concurrently.
+    """
+    try:
+        return _tool_result("run_chunked_validation", await _offload(_run_chunked_validation, table_name, chunk_rows, workers))
     except Exception as e:
         return types.ToolResult.error(str(e))
 
 @server.tool()
-def run_gcs_dump(database_name: str, table_name: str, gcs_bucket: str, gcs_path: str) -> types.ToolResult:
+async def run_sampling_validation(table_name: str, max_rows: int = 100000, max_seconds: float = None, seed: int = 0,
+                                  range_rows: int = 100, confidence: float = 0.95, max_mismatch_rate: float = 0.01,
+                                  escalate: bool = False, workers: int = 8) -> types.ToolResult:
+    """
+    Compares a reproducible random sample of primary-key ranges between source and target and
+    reports the share of sampled ranges that differ with a confidence interval. Much cheaper than
+    a full check on very large tables; the same seed samples the same ranges. The interval bounds
+    the row mismatch rate only for offset ranges (tables without a numeric leading key column).
+    Args:
+        table_name: The name of the table.
+        max_rows: Stop after sampling this many rows.
+        max_seconds: Stop after this many seconds, if set.
+        seed: Seed for choosing the ranges.
+        range_rows: Approximate number of rows per sampled range.
+        confidence: Confidence level of the reported interval.
+        max_mismatch_rate: Largest mismatch rate the interval may allow for the table to be a MATCH; needs
+            about 3 / max_mismatch_rate non-empty sampled ranges, since the range is the sampling unit.
+        escalate: Run a full chunked validation when the sample is not a MATCH.
+        workers: Number of ranges compared concurrently.
+    """
+    try:
+        return _tool_result("run_sampling_validation", await _offload(
+            _run_sampling_validation, table_name, max_rows=max_rows, max_seconds=max_seconds, seed=seed,
+            range_rows=range_rows, confidence=confidence, max_mismatch_rate=max_mismatch_rate,
+            escalate=escalate, workers=workers))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_gcs_dump(database_name: str, table_name: str, gcs_bucket: str, gcs_path: str) -> types.ToolResult:
     """
     Dumps a specific table to a Google Cloud Storage bucket.
     Args:
@@ -77,40 +577,437 @@ def run_gcs_dump(database_name: str, table_name: str, gcs_bucket: str, gcs_path:
         gcs_path: The path within the bucket.
     """
     try:
-        result = mysql_tools.run_gcs_dump(database_name, table_name, gcs_bucket, gcs_path)
+        result = await _offload(mysql_tools.run_gcs_dump, database_name, table_name, gcs_bucket, gcs_path)
         return types.ToolResult.text(result)
     except Exception as e:
         return types.ToolResult.error(str(e))
 
 @server.tool()
-def run_mydumper_export(database_name: str, output_path: str, threads: int = 4, chunk_size_mb: int = 64) -> types.ToolResult:
+async def run_delimited_export(gcs_bucket: str, gcs_path: str, tables: list[str] = None, workers: int = 4,
+                               chunk_rows: int = 100000) -> types.ToolResult:
+    """
+    Exports tables as gzip-compressed tab-separated chunk files plus a CREATE TABLE file per table,
+    ready for LOAD DATA. Load them with run_pipelined_load, which is much faster than replaying
+    the INSERT statements of run_gcs_dump with gcloud sql import sql.
+    Args:
+        gcs_bucket: The GCS bucket to upload to.
+        gcs_path: The path within the bucket.
+        tables: Tables to export; defaults to every table in the source database.
+        workers: Number of chunks exported concurrently per table.
+        chunk_rows: Approximate number of rows per chunk file.
+    """
+    try:
+        result = await _offload(_run_delimited_export, gcs_bucket, gcs_path, tables, workers, chunk_rows)
+        return _tool_result("run_delimited_export", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_parquet_export(gcs_bucket: str, gcs_path: str, tables: list[str] = None, workers: int = 4,
+                             chunk_rows: int = 100000, row_group_rows: int = None) -> types.ToolResult:
+    """
+    Exports tables as compressed Parquet files, one per primary-key chunk, for the analytics copy
+    of the data. Columns keep typed values (DECIMAL, DATETIME, JSON, BLOB, ...), so nothing has to
+    parse SQL dumps again. This is not a format the loaders can import into MySQL.
+    Args:
+        gcs_bucket: The GCS bucket to upload to.
+        gcs_path: The path within the bucket.
+        tables: Tables to export; defaults to every table in the source database.
+        workers: Number of chunks exported concurrently per table.
+        chunk_rows: Approximate number of rows per Parquet file.
+        row_group_rows: Rows per Parquet row group; defaults to mcp_server.parquet.row_group_rows.
+    """
+    try:
+        result = await _offload(_run_parquet_export, gcs_bucket, gcs_path, tables, workers, chunk_rows,
+                                row_group_rows)
+        return _tool_result("run_parquet_export", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_parallel_gcs_dump(gcs_bucket: str, gcs_path: str, tables: list[str] = None, workers: int = 4,
+                                per_worker_mb_per_sec: float = 0, global_mb_per_sec: float = 0,
+                                max_retries: int = 3, run_id: str = None, adaptive: bool = False) -> types.ToolResult:
+    """
+    Dumps many tables to GCS in parallel, largest first, with byte-rate limits and retries.
+    Use this instead of calling run_gcs_dump once per table.
+    Args:
+        gcs_bucket: The GCS bucket to upload to.
+        gcs_path: The path within the bucket.
+        tables: Tables to dump; defaults to every table in the source database.
+        workers: Number of concurrent dumps.
+        per_worker_mb_per_sec: Byte-rate limit per worker in MB/s (0 for unlimited).
+        global_mb_per_sec: Byte-rate limit across all workers in MB/s (0 for unlimited).
+        max_retries: Retries per table, with exponential backoff.
+        run_id: Optional migration run id; tables already dumped in this run are skipped.
+        adaptive: Grow and shrink the worker count and per-worker rate with the source's load
+            (Threads_running, replica lag, probe latency), within the mcp_server.throttle bounds,
+            starting from workers and per_worker_mb_per_sec (0 starts at the configured maximum).
+    """
+    try:
+        result = await _offload(_run_parallel_gcs_dump, gcs_bucket, gcs_path, tables, workers,
+                                per_worker_mb_per_sec, global_mb_per_sec, max_retries, run_id, adaptive)
+        return _tool_result("run_parallel_gcs_dump", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_streaming_export(table_name: str, gcs_bucket: str, gcs_path: str, workers: int = 4, chunk_rows: int = 100000) -> types.ToolResult:
+    """
+    Exports a table to the object store in compressed primary-key chunks using
+    parallel server-side cursors, without mysqldump.
+    Args:
+        table_name: The name of the table to export.
+        gcs_bucket: The GCS bucket to upload to.
+        gcs_path: The path within the bucket.
+        workers: Number of chunks exported concurrently.
+        chunk_rows: Approximate number of rows per chunk file.
+    """
+    try:
+        result = await _offload(_run_streaming_export, table_name, gcs_bucket, gcs_path, workers, chunk_rows)
+        return _tool_result("run_streaming_export", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_checkpointed_export(run_id: str, gcs_bucket: str, gcs_path: str, tables: list[str] = None,
+                                  workers: int = 4, chunk_rows: int = 100000, validate: bool = False,
+                                  baseline_run_id: str = None, fingerprint: bool = True) -> types.ToolResult:
+    """
+    Exports tables chunk by chunk while recording every chunk's state in the migration manifest,
+    so a failed run can be continued with resume_migration instead of starting over.
+    With baseline_run_id, only what changed on the source since that run is migrated: unchanged
+    tables are skipped and changed chunks are exported as files that replace their key ranges on
+    a target still holding the baseline's data.
+    Args:
+        run_id: A unique id for this migration run.
+        gcs_bucket: The GCS bucket to upload to.
+        gcs_path: The path within the bucket.
+        tables: Tables to export; defaults to every table in the source database.
+        workers: Number of chunks processed concurrently.
+        chunk_rows: Approximate number of rows per chunk file.
+        validate: Also run chunked validation against the target after each table is exported.
+        baseline_run_id: An earlier run whose recorded table fingerprints this run is compared with.
+        fingerprint: Record table fingerprints (UPDATE_TIME, schema hash, chunk checksums) for later runs.
+    """
+    try:
+        result = await _offload(_run_checkpointed_export, run_id, gcs_bucket, gcs_path, tables, workers,
+                                chunk_rows, validate, baseline_run_id, fingerprint)
+        return _tool_result("run_checkpointed_export", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def plan_incremental_migration(baseline_run_id: str, tables: list[str] = None, workers: int = 8) -> types.ToolResult:
+    """
+    Compares the source with the table fingerprints of an earlier run and reports which tables
+    can be skipped, which need only some chunks re-migrated and which must be migrated in full.
+    Args:
+        baseline_run_id: The earlier run to compare with.
+        tables: Tables to plan; defaults to every table in the source database.
+        workers: Number of chunks checksummed concurrently for tables whose UPDATE_TIME is unknown or changed.
+    """
+    try:
+        return _tool_result("plan_incremental_migration", await _offload(_plan_incremental_migration, baseline_run_id, tables, workers))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def resume_migration(run_id: str) -> types.ToolResult:
+    """
+    Resumes a checkpointed export run, skipping completed chunks and redoing failed or in-flight ones.
+    Args:
+        run_id: The id the run was started with.
+    """
+    try:
+        return _tool_result("resume_migration", await _offload(_resume_migration, run_id))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_migration_manifest(run_id: str) -> types.ToolResult:
+    """
+    Summarises the recorded export, upload, load and validation state of every table in a run.
+    Args:
+        run_id: The id of the migration run.
+    """
+    try:
+        return _tool_result("get_migration_manifest", await _offload(manifest.summary, run_id))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def run_mydumper_export(database_name: str, output_path: str, threads: int = 4, chunk_size_mb: int = 64,
+                              gcs_bucket: str = None, gcs_path: str = None, upload_workers: int = None,
+                              delete_local: bool = None, adaptive: bool = False, tables: list[str] = None,
+                              run_id: str = None) -> types.ToolResult:
     """
     Exports the entire database using mydumper for parallel processing.
+    With gcs_bucket, each chunk file is uploaded and verified as soon as mydumper finishes it,
+    so export and upload overlap. For large databases prefer start_background_job so the export
+    does not block the session.
     Args:
         database_name: The name of the database to export.
         output_path: The local directory path to save the dump files.
         threads: Number of threads for mydumper to use.
         chunk_size_mb: Size of file chunks in MB.
+        gcs_bucket: Optional bucket to upload the dump to while it is written.
+        gcs_path: The path within the bucket.
+        upload_workers: Concurrent file uploads; defaults to mcp_server.mydumper_upload.workers.
+        delete_local: Delete each local chunk file once its upload is verified.
+        adaptive: Choose the thread count (threads is the starting point) from the source's
+            current load within the mcp_server.throttle bounds.
+        tables: Only export these tables.
+        run_id: Optional migration run id. Tables dumped by an earlier call with the same run_id are
+            skipped, and the dump's binlog position becomes the run's CDC starting point; a failed
+            call re-dumps only its unfinished tables, so very large databases can be dumped in
+            several calls, each given some of the tables.
     """
     try:
-        result = mysql_tools.run_mydumper_export(database_name, output_path, threads, chunk_size_mb)
+        result = await _offload(_run_mydumper_export, database_name, output_path, threads, chunk_size_mb,
+                                gcs_bucket, gcs_path, upload_workers, delete_local, adaptive, tables, run_id)
         return types.ToolResult.text(result)
     except Exception as e:
         return types.ToolResult.error(str(e))
 
 @server.tool()
-def get_binlog_position(metadata_file_path: str) -> types.ToolResult:
+async def run_pipelined_load(gcs_bucket: str, gcs_path: str, tables: list[str] = None, download_workers: int = None,
+                             load_workers: int = None, disk_budget_mb: int = None, table_concurrency: dict = None,
+                             run_id: str = None, defer_indexes: bool = None) -> types.ToolResult:
+    """
+    Loads a mydumper-style dump from the object store into the target, loading each chunk file as
+    soon as it is downloaded instead of downloading the whole dump first. Local disk use stays within
+    disk_budget_mb. Defaults come from the mcp_server.loader section of config.yaml.
+    Args:
+        gcs_bucket: The bucket holding the dump.
+        gcs_path: The path of the dump within the bucket.
+        tables: Tables to load; defaults to every table in the dump.
+        download_workers: Concurrent downloads.
+        load_workers: Concurrent load connections.
+        disk_budget_mb: Maximum size of downloaded files waiting on local disk.
+        table_concurrency: Per-table limit of concurrent loads, e.g. {"salaries": 8}.
+        run_id: Optional run id; files loaded by an earlier attempt of this run are skipped.
+        defer_indexes: Create tables with only their primary key and add secondary indexes and
+            foreign keys after the data is loaded; the result reports the time spent on each.
+    """
+    try:
+        result = await _offload(_run_pipelined_load, gcs_bucket, gcs_path, tables, download_workers, load_workers,
+                                disk_budget_mb, table_concurrency, run_id, defer_indexes)
+        return _tool_result("run_pipelined_load", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def start_background_job(tool: str, arguments: dict = None) -> types.ToolResult:
+    """
+    Starts a long-running tool as a background job and returns its job id immediately.
+    Poll it with get_job_status and stop it with cancel_job.
+    Args:
+        tool: One of run_mydumper_export, run_parallel_gcs_dump, run_streaming_export,
+            run_checkpointed_export, resume_migration, run_chunked_validation, run_sampling_validation,
+            run_pipelined_load, run_delimited_export, run_parquet_export, run_fleet_migration or run_binlog_cdc.
+            run_binlog_cdc(run_id, metadata_file_path | log_file + log_pos, workers, tables, until_caught_up)
+            replicates source changes to the target from the export's binlog position until cancelled.
+        arguments: The arguments the tool would normally be called with.
+    """
+    try:
+        if tool not in BACKGROUND_OPERATIONS:
+            return types.ToolResult.error(f"Unsupported background tool: {tool}. Use one of {sorted(BACKGROUND_OPERATIONS)}.")
+        job_id = jobs.submit(tool, BACKGROUND_OPERATIONS[tool], **(arguments or {}))
+        return _tool_result("start_background_job", jobs.status(job_id))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_job_status(job_id: str) -> types.ToolResult:
+    """
+    Returns the state (queued, running, succeeded, failed, cancelled), timings and result of a background job.
+    Args:
+        job_id: The id returned by start_background_job.
+    """
+    try:
+        return _tool_result("get_job_status", jobs.status(job_id))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def cancel_job(job_id: str) -> types.ToolResult:
+    """
+    Cancels a background job. Running jobs stop at their next checkpoint; checkpointed runs can be resumed later.
+    Args:
+        job_id: The id returned by start_background_job.
+    """
+    try:
+        return _tool_result("cancel_job", jobs.cancel(job_id))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def list_jobs() -> types.ToolResult:
+    """
+    Lists all background jobs and their states.
+    """
+    try:
+        return _tool_result("list_jobs", {"jobs": jobs.list_jobs()})
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_binlog_position(metadata_file_path: str) -> types.ToolResult:
     """
     Parses the mydumper metadata file to get the binary log position.
     Args:
         metadata_file_path: The path to the mydumper metadata file.
     """
     try:
-        position = mysql_tools.get_binlog_position(metadata_file_path)
-        return types.ToolResult.model(position)
+        position = await _offload(mysql_tools.get_binlog_position, metadata_file_path)
+        return _tool_result("get_binlog_position", position)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_replication_lag(run_id: str) -> types.ToolResult:
+    """
+    Reports the binlog position applied to the target, rows applied and replication lag of a CDC run
+    started with start_background_job('run_binlog_cdc'). Cut over once the lag stays near zero.
+    Args:
+        run_id: The run id the CDC job was started with.
+    """
+    try:
+        applier = cdc_appliers.get(run_id)
+        if applier is not None:
+            return _tool_result("get_replication_lag", dict(applier.status(), run_id=run_id))
+        position = await _offload(manifest.get_cdc_position, run_id)
+        if position is None:
+            return types.ToolResult.error(f"No binlog CDC recorded for run {run_id}")
+        return _tool_result("get_replication_lag", {"run_id": run_id, "log_file": position[0], "log_pos": position[1],
+                                       "lag_seconds": None, "active": False})
     except Exception as e:
         return types.ToolResult.error(str(e))
 
+@server.tool()
+async def run_fleet_migration(fleet_id: str, databases: list[str], gcs_bucket: str, gcs_path: str,
+                              export_threads: int = None, upload_mb_per_sec: float = None, import_slots: int = None,
+                              database_concurrency: int = None) -> types.ToolResult:
+    """
+    Migrates several source databases to the target at once, smallest first, under one shared
+    budget of export threads, upload bandwidth and target import slots. Each database is exported
+    as tab-separated chunks under gcs_path/<database> and loaded into the database of the same
+    name on the target. Start it with start_background_job for large fleets and follow it with
+    get_fleet_progress.
+    Args:
+        fleet_id: A name for this fleet run, used by get_fleet_progress.
+        databases: The source databases to migrate.
+        gcs_bucket: The GCS bucket to stage chunks in.
+        gcs_path: The path within the bucket.
+        export_threads: Source connections exporting at once across all databases.
+        upload_mb_per_sec: Upload bandwidth across all databases in MB/s (0 for unlimited).
+        import_slots: Target connections loading at once across all databases.
+        database_concurrency: Databases migrated at once.
+    """
+    try:
+        result = await _offload(_run_fleet_migration, fleet_id, databases, gcs_bucket, gcs_path, export_threads,
+                                upload_mb_per_sec, import_slots, database_concurrency)
+        return _tool_result("run_fleet_migration", result)
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_fleet_progress(fleet_id: str) -> types.ToolResult:
+    """
+    Returns the progress of a fleet migration: each database's status, tables and bytes exported,
+    the fleet totals, and how much of the shared budget is in use.
+    Args:
+        fleet_id: The fleet_id given to run_fleet_migration.
+    """
+    try:
+        fleet = fleet_migrations.get(fleet_id)
+        if fleet is None:
+            return types.ToolResult.error(f"No fleet migration {fleet_id} in this server session.")
+        return _tool_result("get_fleet_progress", dict(fleet.progress(), fleet_id=fleet_id))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_connection_pool_stats() -> types.ToolResult:
+    """
+    Returns connection pool metrics (checkouts, waits, creates, evictions) for the source database,
+    with those of the separate pool serving metadata tools under "metadata".
+    """
+    try:
+        return _tool_result("get_connection_pool_stats", dict(mysql_tools.get_pool_stats(),
+                                                              metadata=metadata_tools.get_pool_stats()))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def notify_stage_change(stage: str) -> types.ToolResult:
+    """
+    Signals that a migration stage changed state, invalidating all cached catalog results.
+    Args:
+        stage: The stage that started or finished (e.g. 'schema_conversion', 'migration').
+    """
+    try:
+        removed = result_cache.invalidate()
+        return _tool_result("notify_stage_change", {"stage": stage, "invalidated_entries": removed})
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_log_anomaly_digest(max_excerpts: int = 20) -> types.ToolResult:
+    """
+    Returns a compact digest of the migration logs: connection error, retry and failure counters
+    (in total and over the recent window), duration percentiles, the tables failing most, and the
+    anomalies flagged so far with short log excerpts.
+    Args:
+        max_excerpts: Number of most recent anomalies to include with their excerpts.
+    """
+    try:
+        def collect():
+            log_tailer.poll()
+            return log_analyzer.digest(max_excerpts)
+        return _tool_result("get_log_anomaly_digest", await _offload(collect))
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_migration_metrics(format: str = "json") -> types.ToolResult:
+    """
+    Returns per-table rows/s and bytes/s, time per stage (export, upload, load, validate), retries,
+    connection-wait counters and live mydumper progress. Call it while a background job runs to
+    find the bottleneck stage.
+    Args:
+        format: 'json' for a structured snapshot or 'prometheus' for the Prometheus text format.
+    """
+    try:
+        if format == "prometheus":
+            return types.ToolResult.text(metrics.to_prometheus())
+        if format != "json":
+            return types.ToolResult.error(f"Unsupported format: {format}")
+        return _tool_result("get_migration_metrics", metrics.snapshot())
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_cache_stats() -> types.ToolResult:
+    """
+    Returns hit/miss counters of the tool result cache.
+    """
+    try:
+        return _tool_result("get_cache_stats", result_cache.stats())
+    except Exception as e:
+        return types.ToolResult.error(str(e))
+
+@server.tool()
+async def get_tool_result_stats() -> types.ToolResult:
+    """
+    Returns the estimated tokens each tool's results put into the agents' context, before and after
+    compact encoding, overall, per tool and for the most recent calls.
+    """
+    try:
+        return _tool_result("get_tool_result_stats", result_encoder.stats())
+    except Exception as e:
+        return types.ToolResult.error(str(e))
 
 async def main():
     """Main function to run the MCP server."""
@@ -119,8 +1016,12 @@ async def main():
         server_version="1.0.0",
         capabilities=server.capabilities(),
     )
-    async with stdio.stdio_server() as (reader, writer):
-        await server.run(reader, writer, options)
+    try:
+        async with stdio.stdio_server() as (reader, writer):
+            await server.run(reader, writer, options)
+    finally:
+        jobs.shutdown()
+        tool_executor.shutdown(wait=False)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
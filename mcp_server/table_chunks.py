@@ -0,0 +1,111 @@
+"""Helpers for splitting a table into primary-key ranges."""
+
+# Column types whose values are bytes rather than text; tab-separated chunks carry them hex-encoded.
+BINARY_DATA_TYPES = {"binary", "varbinary", "tinyblob", "blob", "mediumblob", "longblob", "bit", "geometry", "point",
+                     "linestring", "polygon", "multipoint", "multilinestring", "multipolygon", "geometrycollection",
+                     "geomcollection"}
+
+
+def quote_identifier(name: str) -> str:
+    """Quotes a MySQL identifier with backticks."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def get_primary_key_columns(connection, table_name: str) -> list:
+    """Returns the primary key columns of a table in the connection's default database, in key order."""
+    query = """
+        SELECT COLUMN_NAME AS column_name
+        FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+        ORDER BY ORDINAL_POSITION;
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, (table_name,))
+        return [row['column_name'] for row in cursor.fetchall()]
+
+
+def get_column_names(connection, table_name: str) -> list:
+    """Returns the column names of a table in the connection's default database, in table order."""
+    query = """
+        SELECT COLUMN_NAME AS column_name
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION;
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, (table_name,))
+        return [row['column_name'] for row in cursor.fetchall()]
+
+
+def get_column_types(connection, table_name: str) -> list:
+    """Returns the columns of a table with their types, in table order, as information_schema reports them."""
+    query = """
+        SELECT COLUMN_NAME AS name, DATA_TYPE AS data_type, COLUMN_TYPE AS column_type,
+               NUMERIC_PRECISION AS `precision`, NUMERIC_SCALE AS scale, IS_NULLABLE AS nullable
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION;
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, (table_name,))
+        return [dict(row, nullable=row['nullable'] == 'YES') for row in cursor.fetchall()]
+
+
+def binary_columns(column_types: list) -> set:
+    """Names of the get_column_types() columns that hold bytes rather than text."""
+    return {c['name'] for c in column_types if c['data_type'].lower() in BINARY_DATA_TYPES}
+
+
+def range_predicate(pk_columns: list, lower: tuple = None, upper: tuple = None) -> tuple:
+    """
+    Builds a WHERE clause selecting lower <= pk < upper.
+    A bound of None leaves that side of the range open. Returns (sql, params).
+    """
+    columns = [quote_identifier(c) for c in pk_columns]
+    if len(columns) == 1:
+        key = columns[0]
+        placeholders = "%s"
+    else:
+        key = "(" + ", ".join(columns) + ")"
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+
+    clauses, params = [], []
+    if lower is not None:
+        clauses.append(f"{key} >= {placeholders}")
+        params.extend(lower)
+    if upper is not None:
+        clauses.append(f"{key} < {placeholders}")
+        params.extend(upper)
+    if not clauses:
+        return "", []
+    return "WHERE " + " AND ".join(clauses), params
+
+
+def find_key_at_offset(connection, table_name: str, pk_columns: list, lower: tuple, upper: tuple, offset: int):
+    """Returns the primary key of the row `offset` rows into [lower, upper), or None if the range is shorter."""
+    where, params = range_predicate(pk_columns, lower, upper)
+    key_list = ", ".join(quote_identifier(c) for c in pk_columns)
+    query = f"SELECT {key_list} FROM {quote_identifier(table_name)} {where} ORDER BY {key_list} LIMIT 1 OFFSET %s;"
+    with connection.cursor() as cursor:
+        cursor.execute(query, params + [offset])
+        row = cursor.fetchone()
+    if not row:
+        return None
+    return tuple(row[c] for c in pk_columns)
+
+
+def compute_chunk_boundaries(connection, table_name: str, pk_columns: list, chunk_rows: int) -> list:
+    """
+    Walks the primary key index and returns [(lower, upper), ...] ranges of about chunk_rows rows each.
+    The first lower and last upper bounds are None. Tables without a primary key form a single chunk.
+    """
+    if not pk_columns:
+        return [(None, None)]
+    boundaries = []
+    lower = None
+    while True:
+        upper = find_key_at_offset(connection, table_name, pk_columns, lower, None, chunk_rows)
+        boundaries.append((lower, upper))
+        if upper is None:
+            return boundaries
+        lower = upper
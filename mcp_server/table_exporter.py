@@ -0,0 +1,533 @@
+import datetime
+import decimal
+import gzip
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager, nullcontext
+
+import pymysql
+from pymysql import converters
+from pymysql.constants.SERVER_STATUS import SERVER_STATUS_NO_BACKSLASH_ESCAPES
+
+from columnar_export import ArrowBatchConverter, ParquetRowGroupWriter
+from table_chunks import (
+    binary_columns,
+    compute_chunk_boundaries,
+    get_column_names,
+    get_column_types,
+    get_primary_key_columns,
+    quote_identifier,
+    range_predicate,
+)
+
+
+def chunk_key(prefix: str, database_name: str, table_name: str, index: int, extension: str = "sql.gz") -> str:
+    """Object key of one data chunk, following mydumper's <db>.<table>.<n>.sql.gz naming."""
+    return f"{prefix.strip('/')}/{database_name}.{table_name}.{index:05d}.{extension}"
+
+
+# LOAD DATA's default FIELDS ESCAPED BY '\\': these bytes would otherwise end a field or line.
+# The backslash goes first so the escapes added after it are not escaped again.
+TSV_ESCAPES = ((b"\\", b"\\\\"), (b"\t", b"\\t"), (b"\n", b"\\n"), (b"\r", b"\\r"), (b"\x00", b"\\0"))
+TSV_NULL = b"\\N"
+OUTPUT_FORMATS = {"sql": "sql.gz", "tsv": "tsv.gz", "parquet": "parquet"}
+
+
+def tsv_field(value) -> bytes:
+    """Encodes one value for a tab-separated LOAD DATA file; strings are written as UTF-8."""
+    if value is None:
+        return TSV_NULL
+    if isinstance(value, (bytes, bytearray)):
+        data = bytes(value)
+    elif isinstance(value, bool):
+        data = b"1" if value else b"0"
+    elif isinstance(value, datetime.timedelta):
+        # TIME columns; str(timedelta) would give '1 day, 2:00:00'.
+        seconds = abs(value.total_seconds())
+        text = f"{'-' if value.total_seconds() < 0 else ''}{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:" \
+               f"{int(seconds % 60):02d}"
+        if value.microseconds:
+            text += f".{round(seconds % 1 * 1e6):06d}"
+        data = text.encode()
+    elif isinstance(value, (datetime.date, datetime.datetime, decimal.Decimal, int, float)):
+        data = str(value).encode()
+    elif isinstance(value, (set, frozenset)):
+        data = ",".join(sorted(value)).encode("utf-8")
+    else:
+        data = str(value).encode("utf-8")
+    for raw, escaped in TSV_ESCAPES:
+        if raw in data:
+            data = data.replace(raw, escaped)
+    return data
+
+
+def tsv_hex_field(value) -> bytes:
+    """Encodes a binary column's value as hex, which the loader decodes with UNHEX()."""
+    return TSV_NULL if value is None else bytes(value).hex().encode()
+
+
+def sql_literal(value, no_backslash_escapes: bool = False) -> str:
+    """A value as a MySQL literal, escaped as pymysql's connection.escape() does."""
+    if isinstance(value, str):
+        return "'" + (value.replace("'", "''") if no_backslash_escapes else converters.escape_string(value)) + "'"
+    # Hex literals keep binary data independent of the client character set.
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + value.hex() if value else "''"
+    return converters.escape_item(value, "utf8mb4")
+
+
+def encode_sql_rows(rows: list, insert_prefix: str, statement_rows: int, no_backslash_escapes: bool = False) -> bytes:
+    """Rows as multi-row INSERT statements of at most statement_rows rows each, in UTF-8."""
+    statements = []
+    for start in range(0, len(rows), statement_rows):
+        values = ",\n".join("(" + ",".join(sql_literal(v, no_backslash_escapes) for v in row) + ")"
+                            for row in rows[start:start + statement_rows])
+        statements.append(f"{insert_prefix}{values};\n")
+    return "".join(statements).encode("utf-8")
+
+
+def encode_tsv_rows(rows: list, hex_flags: tuple) -> bytes:
+    """Rows as tab-separated lines; columns flagged in hex_flags are written hex-encoded."""
+    encoders = [tsv_hex_field if hexed else tsv_field for hexed in hex_flags]
+    return b"".join(b"\t".join(encode(v) for encode, v in zip(encoders, row)) + b"\n" for row in rows)
+
+
+def gzip_member(encode, args: tuple, compression_level: int) -> bytes:
+    """
+    encode(*args) compressed as one gzip member. Members written one after another form a valid
+    gzip file, so batches can be compressed independently, in other processes.
+    """
+    return gzip.compress(encode(*args), compresslevel=compression_level, mtime=0)
+
+
+def schema_key(prefix: str, database_name: str, table_name: str) -> str:
+    """Object key of a table's CREATE TABLE statement, following mydumper's naming."""
+    return f"{prefix.strip('/')}/{database_name}.{table_name}-schema.sql.gz"
+
+
+class StreamingTableExporter:
+    """
+    Exports tables without mysqldump. Each table is split into primary-key ranges; a pool of
+    workers streams each range with a server-side cursor, writes it as gzip-compressed INSERT
+    statements to a local temporary file and uploads it through an ObjectStore. Memory use is
+    bounded by fetch_rows per worker regardless of table size.
+    With output_format="tsv", chunks are instead written as tab-separated files for LOAD DATA
+    (a header line of column names, then one row per line with MySQL's default escaping). Text is
+    written as UTF-8 and binary columns as hex.
+    With output_format="parquet", fetched batches are converted column-wise into Arrow record
+    batches and chunks are written as Parquet files in row groups of row_group_rows rows, for
+    analytics copies rather than for loading into MySQL; this needs pyarrow.
+
+    With consistent_snapshot (the default), every chunk of a table is read in one point-in-time
+    view, as mydumper does: a coordinator connection holds LOCK TABLES ... READ on the table
+    while each worker connection runs START TRANSACTION WITH CONSISTENT SNAPSHOT, then reads the
+    binlog position and unlocks. The workers keep their connections until the table's last chunk
+    is read, and the position is returned as binlog_position, where CDC can start. Chunks skipped
+    because an earlier run exported them were read in that run's snapshot, not this one.
+
+    With an encoder_pool (a process pool, e.g. ProcessPoolExecutor with the fork start method),
+    each fetched batch of SQL or TSV rows is encoded and compressed in another process while the
+    worker fetches the next one, so a single table's export uses several cores; fetching and
+    pymysql's decoding of rows stay on the worker threads. Without one, workers encode in-thread.
+    """
+    def __init__(self, source_tools, store, workers: int = 4, chunk_rows: int = 100000, fetch_rows: int = 1000,
+                 statement_rows: int = 500, compression_level: int = 6, spool_dir: str = None, metrics=None,
+                 output_format: str = "sql", row_group_rows: int = 100000, parquet_compression: str = "zstd",
+                 parquet_compression_level: int = None, consistent_snapshot: bool = True, encoder_pool=None,
+                 encode_ahead: int = 2):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}. Use one of {sorted(OUTPUT_FORMATS)}.")
+        self.source_tools = source_tools
+        self.store = store
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.fetch_rows = fetch_rows
+        self.statement_rows = statement_rows
+        self.compression_level = compression_level
+        self.spool_dir = spool_dir
+        self.metrics = metrics
+        self.output_format = output_format
+        self.row_group_rows = row_group_rows
+        self.parquet_compression = parquet_compression
+        self.parquet_compression_level = parquet_compression_level
+        self.consistent_snapshot = consistent_snapshot
+        self.encoder_pool = encoder_pool
+        self.encode_ahead = encode_ahead
+
+    @staticmethod
+    def _range_query(table_name: str, columns: list, pk_columns: list, lower: tuple, upper: tuple) -> tuple:
+        """SELECT of one key range in key order, and its parameters."""
+        where, params = range_predicate(pk_columns, lower, upper)
+        column_list = ", ".join(quote_identifier(c) for c in columns)
+        order_by = "ORDER BY " + ", ".join(quote_identifier(c) for c in pk_columns) if pk_columns else ""
+        return f"SELECT {column_list} FROM {quote_identifier(table_name)} {where} {order_by};", params
+
+    def _compressed(self, encode, *args) -> Future:
+        """One gzip member of encode(*args), compressed on the encoder pool if there is one."""
+        if self.encoder_pool is not None:
+            return self.encoder_pool.submit(gzip_member, encode, args, self.compression_level)
+        future = Future()
+        future.set_result(gzip_member(encode, args, self.compression_level))
+        return future
+
+    def _stream_rows(self, connection, out, query: str, params: list, encode, *args) -> int:
+        """
+        Fetches the rows of `query` in batches and writes each, as encode(batch, *args) compressed
+        into a gzip member, to the binary stream `out` in order. Returns the row count.
+        """
+        rows = 0
+        in_flight = deque()
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(self.fetch_rows)
+                if not batch:
+                    break
+                in_flight.append(self._compressed(encode, list(batch), *args))
+                rows += len(batch)
+                # At most encode_ahead batches per worker are held in memory while the next is fetched.
+                while len(in_flight) > self.encode_ahead:
+                    out.write(in_flight.popleft().result())
+            while in_flight:
+                out.write(in_flight.popleft().result())
+        finally:
+            for future in in_flight:
+                future.cancel()
+            cursor.close()
+        return rows
+
+    def _write_chunk(self, connection, out, table_name: str, columns: list, pk_columns: list,
+                     lower: tuple, upper: tuple, delete_range: bool = False) -> int:
+        """
+        Streams one key range into the binary stream `out` as gzip-compressed INSERT statements and
+        returns the row count. With delete_range, the file first deletes the range, so loading it
+        replaces the range's rows.
+        """
+        query, params = self._range_query(table_name, columns, pk_columns, lower, upper)
+        column_list = ", ".join(quote_identifier(c) for c in columns)
+        insert_prefix = f"INSERT INTO {quote_identifier(table_name)} ({column_list}) VALUES\n"
+        # The rows are escaped away from the connection, which decides how quotes are escaped.
+        no_backslash_escapes = bool(connection.server_status & SERVER_STATUS_NO_BACKSLASH_ESCAPES)
+
+        header = "/*!40101 SET NAMES utf8mb4*/;\n"
+        if delete_range:
+            where, _ = range_predicate(pk_columns, lower, upper)
+            parts = where.split("%s")
+            literal_where = parts[0] + "".join(sql_literal(p, no_backslash_escapes) + part
+                                               for p, part in zip(params, parts[1:]))
+            header += f"DELETE FROM {quote_identifier(table_name)} {literal_where};\n"
+        out.write(gzip.compress(header.encode("utf-8"), compresslevel=self.compression_level, mtime=0))
+        return self._stream_rows(connection, out, query, params, encode_sql_rows, insert_prefix,
+                                 self.statement_rows, no_backslash_escapes)
+
+    def _write_delimited_chunk(self, connection, out, table_name: str, columns: list, pk_columns: list,
+                               lower: tuple, upper: tuple, hex_columns: set = frozenset()) -> int:
+        """
+        Streams one key range into the binary stream `out` as gzip-compressed tab-separated rows and
+        returns the row count. Values of hex_columns are written hex-encoded.
+        """
+        query, params = self._range_query(table_name, columns, pk_columns, lower, upper)
+        header = b"\t".join(tsv_field(c) for c in columns) + b"\n"
+        out.write(gzip.compress(header, compresslevel=self.compression_level, mtime=0))
+        return self._stream_rows(connection, out, query, params, encode_tsv_rows,
+                                 tuple(c in hex_columns for c in columns))
+
+    def _write_parquet_chunk(self, connection, path: str, table_name: str, column_types: list, pk_columns: list,
+                             lower: tuple, upper: tuple) -> int:
+        """Streams one key range into a Parquet file at `path` and returns the row count."""
+        converter = ArrowBatchConverter(column_types)
+        query, params = self._range_query(table_name, [c["name"] for c in column_types], pk_columns, lower, upper)
+        writer = ParquetRowGroupWriter(path, converter.schema, row_group_rows=self.row_group_rows,
+                                       compression=self.parquet_compression,
+                                       compression_level=self.parquet_compression_level)
+        rows = 0
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(self.fetch_rows)
+                if not batch:
+                    break
+                writer.write(converter.convert(batch))
+                rows += len(batch)
+        finally:
+            cursor.close()
+            writer.close()
+        return rows
+
+    @staticmethod
+    def _binlog_position(cursor):
+        """The source's current binlog position, or None without binary logging or the privilege to read it."""
+        # SHOW MASTER STATUS was renamed SHOW BINARY LOG STATUS in MySQL 8.2 and removed in 8.4.
+        for statement in ("SHOW MASTER STATUS;", "SHOW BINARY LOG STATUS;"):
+            try:
+                cursor.execute(statement)
+            except pymysql.err.MySQLError:
+                continue
+            row = cursor.fetchone()
+            return {"log_file": row["File"], "log_position": row["Position"]} if row else None
+        return None
+
+    def _start_snapshot(self, connections: list, table_name: str):
+        """
+        Starts one consistent snapshot on every connection but the first, which read-locks the table
+        until all have started, and returns the binlog position they share.
+        """
+        with connections[0].cursor() as cursor:
+            cursor.execute(f"LOCK TABLES {quote_identifier(table_name)} READ;")
+            try:
+                for connection in connections[1:]:
+                    with connection.cursor() as worker_cursor:
+                        # WITH CONSISTENT SNAPSHOT is ignored at READ COMMITTED.
+                        worker_cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+                        worker_cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT;")
+                position = self._binlog_position(cursor)
+            finally:
+                cursor.execute("UNLOCK TABLES;")
+        if position is None:
+            logging.warning(f"Could not read the binlog position of the {table_name} snapshot; "
+                            f"it cannot be used as a CDC starting point.")
+        return position
+
+    @contextmanager
+    def _snapshot(self, table_name: str, workers: int):
+        """
+        Yields a queue of `workers` connections sharing one snapshot of the table and its binlog
+        position, or (None, None) without consistent_snapshot.
+        """
+        if not self.consistent_snapshot or workers == 0:
+            yield None, None
+            return
+        # The worker connections and the coordinator are checked out together.
+        with self.source_tools.connections(workers + 1) as connections:
+            try:
+                position = self._start_snapshot(connections, table_name)
+                # The coordinator stays idle from here on; a shared slot budget (fleet_migration's
+                # SlotConnections) takes its slot back for other exports now.
+                release = getattr(connections, "release", None)
+                if release:
+                    release()
+                snapshot = queue.Queue()
+                for connection in connections[1:]:
+                    snapshot.put(connection)
+                logging.info(f"Snapshot of {table_name} taken at binlog position {position}.")
+                yield snapshot, position
+            finally:
+                # Pooled connections must not go back to the pool holding an old read view.
+                for connection in connections[1:]:
+                    try:
+                        connection.rollback()
+                    except Exception:
+                        pass  # A dead connection fails the pool's health check.
+
+    def _source_connection(self, connection):
+        """The snapshot connection a chunk was given, or a pooled one of its own."""
+        return nullcontext(connection) if connection is not None else self.source_tools.connection()
+
+    def _spool_chunk(self, table_name, columns, pk_columns, index, lower, upper, delete_range: bool = False,
+                     column_types: list = None, connection=None) -> tuple:
+        """Reads one chunk into a local temporary file and returns (path, rows)."""
+        started = time.monotonic()
+        extension = OUTPUT_FORMATS[self.output_format]
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{table_name}.{index:05d}.", suffix=f".{extension}", dir=self.spool_dir)
+        os.close(fd)
+        try:
+            if self.output_format == "parquet":
+                with self._source_connection(connection) as source:
+                    rows = self._write_parquet_chunk(source, tmp_path, table_name, column_types, pk_columns,
+                                                     lower, upper)
+            else:
+                with open(tmp_path, 'wb') as out, self._source_connection(connection) as source:
+                    if self.output_format == "tsv":
+                        rows = self._write_delimited_chunk(source, out, table_name, columns, pk_columns,
+                                                           lower, upper, binary_columns(column_types))
+                    else:
+                        rows = self._write_chunk(source, out, table_name, columns, pk_columns, lower, upper,
+                                                 delete_range=delete_range)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        if self.metrics:
+            self.metrics.record_stage(table_name, "export", time.monotonic() - started, rows=rows,
+                                      size_bytes=os.path.getsize(tmp_path), started_at=started)
+        return tmp_path, rows
+
+    def _upload_chunk(self, tmp_path, database_name, table_name, prefix, index, rows, started) -> dict:
+        """Uploads a spooled chunk and removes the local file."""
+        uploading = time.monotonic()
+        try:
+            uploaded = self.store.put_file(tmp_path, chunk_key(prefix, database_name, table_name, index,
+                                                               OUTPUT_FORMATS[self.output_format]))
+        finally:
+            os.remove(tmp_path)
+        if self.metrics:
+            self.metrics.record_stage(table_name, "upload", time.monotonic() - uploading,
+                                      size_bytes=uploaded["bytes"], started_at=uploading)
+        return {
+            "chunk": index,
+            "key": uploaded["key"],
+            "rows": rows,
+            "bytes": uploaded["bytes"],
+            "md5": uploaded.get("md5"),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    def _export_schema(self, database_name, table_name, prefix):
+        with self.source_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SHOW CREATE TABLE {quote_identifier(table_name)};")
+                create_statement = cursor.fetchone()['Create Table']
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{table_name}-schema.", suffix=".sql.gz", dir=self.spool_dir)
+        os.close(fd)
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as out:
+                out.write("/*!40101 SET NAMES utf8mb4*/;\n")
+                out.write(create_statement + ";\n")
+            self.store.put_file(tmp_path, schema_key(prefix, database_name, table_name))
+        finally:
+            os.remove(tmp_path)
+
+    def plan_table(self, table_name: str, boundaries: list = None) -> dict:
+        """Reads a table's layout and splits it into primary-key ranges, unless boundaries are given."""
+        if not table_name.replace('_', '').isalnum():
+            raise ValueError("Invalid table name")
+        with self.source_tools.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT DATABASE() AS db;")
+                database_name = cursor.fetchone()['db']
+            pk_columns = get_primary_key_columns(connection, table_name)
+            columns = get_column_names(connection, table_name)
+            if not columns:
+                raise ValueError(f"Table {table_name} not found on source")
+            if boundaries is None:
+                boundaries = compute_chunk_boundaries(connection, table_name, pk_columns, self.chunk_rows)
+            column_types = get_column_types(connection, table_name) if self.output_format != "sql" else None
+        if not pk_columns:
+            logging.warning(f"Table {table_name} has no primary key; exporting it as a single chunk.")
+        plan = {"table": table_name, "database": database_name, "pk_columns": pk_columns,
+                "columns": columns, "boundaries": boundaries}
+        if column_types is not None:
+            plan["column_types"] = column_types
+        return plan
+
+    def export_table(self, table_name: str, prefix: str, completed_chunks: set = None, on_chunk=None,
+                     plan: dict = None, on_chunk_start=None, on_chunk_error=None, include_schema: bool = True,
+                     replace_ranges: bool = False) -> dict:
+        """
+        Exports one table to the object store under `prefix`.
+        Args:
+            table_name: The table to export.
+            prefix: Object key prefix for the chunk files.
+            completed_chunks: Chunk indexes already exported by an earlier run; they are skipped.
+            on_chunk: Optional callback receiving each chunk result as it finishes, for checkpointing.
+            plan: A plan from plan_table(), e.g. saved by an earlier run; computed when omitted.
+            on_chunk_start: Optional callback receiving the index of each chunk as it starts.
+            on_chunk_error: Optional callback receiving (index, exception) for each failed chunk.
+            include_schema: Also export the CREATE TABLE file, which makes loaders recreate the table.
+            replace_ranges: Start every chunk file by deleting its key range, so chunks can be
+                reloaded into a table that already holds older rows (SQL format only).
+        The result's binlog_position is where the snapshot was taken, None without a snapshot.
+        """
+        if replace_ranges and self.output_format != "sql":
+            raise ValueError("replace_ranges requires the sql output format.")
+        started = time.monotonic()
+        completed_chunks = completed_chunks or set()
+        plan = plan or self.plan_table(table_name)
+        database_name, boundaries = plan["database"], plan["boundaries"]
+        column_types = plan.get("column_types")
+        if self.output_format != "sql" and column_types is None:
+            with self.source_tools.connection() as connection:
+                column_types = get_column_types(connection, table_name)
+
+        if include_schema:
+            self._export_schema(database_name, table_name, prefix)
+        logging.info(f"Exporting {table_name} in {len(boundaries)} chunks with {self.workers} workers...")
+
+        pending = [(i, lower, upper) for i, (lower, upper) in enumerate(boundaries) if i not in completed_chunks]
+
+        # Chunks are read on the snapshot's connections and uploaded on threads of their own, so a
+        # connection does not wait on the store (or a shared upload limiter) and the snapshot ends,
+        # giving its connections back, as soon as the last chunk is read. At most twice `workers`
+        # chunks are spooled at once.
+        spooled = threading.BoundedSemaphore(2 * self.workers)
+
+        def read_chunk(index, lower, upper):
+            if on_chunk_start:
+                on_chunk_start(index)
+            spooled.acquire()
+            started = time.monotonic()
+            connection = snapshot.get() if snapshot else None
+            try:
+                return self._spool_chunk(table_name, plan["columns"], plan["pk_columns"], index, lower, upper,
+                                         delete_range=replace_ranges, column_types=column_types,
+                                         connection=connection) + (started,)
+            except BaseException:
+                spooled.release()
+                raise
+            finally:
+                if snapshot:
+                    snapshot.put(connection)
+
+        def upload_chunk(index, tmp_path, rows, started):
+            try:
+                return self._upload_chunk(tmp_path, database_name, table_name, prefix, index, rows, started)
+            finally:
+                spooled.release()
+
+        chunks = []
+        errors = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload") as uploader, \
+                ExitStack() as reading:
+            snapshot, position = reading.enter_context(self._snapshot(table_name, min(self.workers, len(pending))))
+            reader = reading.enter_context(ThreadPoolExecutor(max_workers=self.workers))
+            reads = {reader.submit(read_chunk, i, lower, upper): i for i, lower, upper in pending}
+            uploads = {}
+            while reads or uploads:
+                done, _ = wait(list(reads) + list(uploads), return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = reads.pop(future) if future in reads else uploads.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"Export of chunk {index} of {table_name} failed: {e}")
+                        errors[index] = e
+                        if self.metrics:
+                            self.metrics.record_error(table_name, "export")
+                        if on_chunk_error:
+                            on_chunk_error(index, e)
+                        continue
+                    if isinstance(result, tuple):
+                        uploads[uploader.submit(upload_chunk, index, *result)] = index
+                        continue
+                    if on_chunk:
+                        on_chunk(result)
+                    chunks.append(result)
+                if not reads:
+                    reading.close()
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(pending)} chunks of {table_name} failed to export: "
+                               f"{next(iter(errors.values()))}")
+
+        elapsed = time.monotonic() - started
+        rows = sum(c["rows"] for c in chunks)
+        total_bytes = sum(c["bytes"] for c in chunks)
+        logging.info(f"Exported {rows} rows of {table_name} ({total_bytes} compressed bytes) in {elapsed:.1f}s")
+        return {
+            "table": table_name,
+            "database": database_name,
+            "chunks": len(boundaries),
+            "chunks_exported": len(chunks),
+            "rows": rows,
+            "bytes": total_bytes,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+            "files": sorted(c["key"] for c in chunks),
+            "binlog_position": position,
+        }
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+
+SKIP = "skip"
+CHUNKS = "chunks"
+FULL = "full"
+
+
+def schema_hash(table: dict) -> str:
+    """Hashes the structure of a get_schema_catalog() table entry: columns, indexes, engine and partitioning."""
+    partitioning = table.get("partitioning")
+    structure = {
+        "columns": table.get("columns", []),
+        "indexes": table.get("indexes", []),
+        "engine": table.get("engine"),
+        "collation": table.get("collation"),
+        "partitioning": partitioning and {"method": partitioning["method"], "expression": partitioning["expression"],
+                                          "partitions": [p["name"] for p in partitioning["partitions"]]},
+    }
+    return hashlib.sha256(json.dumps(structure, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def restore_bounds(boundaries: list) -> list:
+    """Restores [(lower, upper), ...] tuples from their JSON form."""
+    to_bound = lambda value: tuple(value) if value is not None else None
+    return [(to_bound(lower), to_bound(upper)) for lower, upper in boundaries]
+
+
+class TableFingerprinter:
+    """
+    Describes what a table looked like on the source when it was migrated, and compares that with
+    the source today so a rerun only migrates what changed. A fingerprint holds the row estimate,
+    UPDATE_TIME, a hash of the schema and the (row count, CRC) of every primary-key chunk.
+
+    plan() decides per table, cheapest check first:
+      - no earlier fingerprint, or a different schema: migrate the whole table;
+      - the same UPDATE_TIME as before (and not NULL): skip it without reading any rows;
+      - otherwise checksum the table's chunks over the same key ranges as before and migrate
+        only the chunks whose row count or CRC differs.
+    InnoDB keeps UPDATE_TIME in memory only, so after a source restart the chunk checksums decide.
+    The catalog must be read with MySQL 8's statistics cache off (get_schema_catalog does this), or
+    a recently changed table still reports its old UPDATE_TIME and is skipped.
+    """
+    def __init__(self, source_tools, validator):
+        self.source_tools = source_tools
+        self.validator = validator
+
+    @staticmethod
+    def describe(entry: dict) -> dict:
+        """The catalog part of a fingerprint, from a get_schema_catalog() table entry."""
+        update_time = entry.get("update_time")
+        return {"row_estimate": entry.get("row_estimate"),
+                "update_time": str(update_time) if update_time is not None else None,
+                "schema_hash": schema_hash(entry)}
+
+    def fingerprint(self, table_name: str, entry: dict, boundaries: list = None) -> dict:
+        """Returns a full fingerprint, checksumming the table over `boundaries` (or fresh chunk ranges)."""
+        return self.with_checksums(table_name, self.describe(entry), boundaries)
+
+    def with_checksums(self, table_name: str, fingerprint: dict, boundaries: list) -> dict:
+        """Adds the chunk checksums over `boundaries` to a catalog-only fingerprint from describe()."""
+        checksums = self.validator.checksum_chunks(table_name, boundaries=boundaries)
+        return dict(fingerprint, boundaries=checksums["boundaries"], chunks=checksums["chunks"])
+
+    def plan(self, baseline: dict, tables: list = None, catalog: dict = None) -> dict:
+        """
+        Compares the source with the fingerprints of an earlier run.
+        Args:
+            baseline: {table: fingerprint} from MigrationManifest.get_fingerprints of the earlier run.
+            tables: Tables to plan; defaults to every table on the source.
+            catalog: get_schema_catalog() tables, fetched when omitted.
+        """
+        catalog = catalog if catalog is not None else self.source_tools.get_schema_catalog()["tables"]
+        unknown = [t for t in tables or [] if t not in catalog]
+        if unknown:
+            raise ValueError(f"Unknown tables: {unknown}")
+        plan = {}
+        for table_name in tables or sorted(catalog):
+            entry = catalog[table_name]
+            current = self.describe(entry)
+            previous = baseline.get(table_name)
+            if previous is None:
+                plan[table_name] = {"action": FULL, "reasons": ["not in baseline"], "fingerprint": current}
+            elif previous.get("schema_hash") != current["schema_hash"]:
+                plan[table_name] = {"action": FULL, "reasons": ["schema changed"], "fingerprint": current}
+            elif current["update_time"] is not None and current["update_time"] == previous.get("update_time"):
+                plan[table_name] = {"action": SKIP, "reasons": ["UPDATE_TIME unchanged"],
+                                    "fingerprint": dict(previous, row_estimate=current["row_estimate"])}
+            else:
+                plan[table_name] = self._compare_chunks(table_name, current, previous)
+            plan[table_name]["row_estimate_delta"] = (current["row_estimate"] or 0) - (
+                (previous or {}).get("row_estimate") or 0)
+            logging.info(f"Incremental plan for {table_name}: {plan[table_name]['action']} "
+                         f"({', '.join(plan[table_name]['reasons'])})")
+        return plan
+
+    def _compare_chunks(self, table_name: str, current: dict, previous: dict) -> dict:
+        boundaries = restore_bounds(previous.get("boundaries") or [])
+        if not boundaries or not previous.get("chunks"):
+            return {"action": FULL, "reasons": ["no chunk checksums in baseline"], "fingerprint": current}
+        checksums = self.validator.checksum_chunks(table_name, boundaries=boundaries)
+        changed = [i for i, (old, new) in enumerate(zip(previous["chunks"], checksums["chunks"]))
+                   if list(old) != list(new)]
+        fingerprint = dict(current, boundaries=boundaries, chunks=checksums["chunks"])
+        if not changed:
+            return {"action": SKIP, "reasons": ["chunk checksums unchanged"], "fingerprint": fingerprint}
+        return {"action": CHUNKS, "reasons": [f"{len(changed)} of {len(boundaries)} chunks changed"],
+                "chunks": changed, "boundaries": boundaries, "fingerprint": fingerprint}
+
+
+def summarize_plan(plan: dict) -> dict:
+    """Counts a plan's actions and drops the fingerprints, for reporting."""
+    tables = {t: {k: v for k, v in entry.items() if k not in ("fingerprint", "boundaries")}
+              for t, entry in plan.items()}
+    return {
+        "tables": tables,
+        "skip": sorted(t for t, e in plan.items() if e["action"] == SKIP),
+        "chunks": sorted(t for t, e in plan.items() if e["action"] == CHUNKS),
+        "full": sorted(t for t, e in plan.items() if e["action"] == FULL),
+        "changed_chunks": sum(len(e.get("chunks", [])) for e in plan.values()),
+    }
@@ -1,5 +1,6 @@
 #!/bin/bash
 set -e
+set -o pipefail
 
 GCS_BUCKET=$1
 GCS_PATH=$2
@@ -9,24 +10,66 @@ TARGET_DB_PASSWORD_SECRET=$5 # Secret name in Secret Manager
 PROJECT_ID=$6
 
 LOCAL_DUMP_DIR="/tmp/mydumper_data"
-mkdir -p "${LOCAL_DUMP_DIR}"
+# myloader's output is appended here for the MCP server's log analyzer (mcp_server.log_analyzer.paths).
+MIGRATION_LOG="${MIGRATION_LOG:-/var/log/migration/myloader.log}"
+mkdir -p "${LOCAL_DUMP_DIR}" "$(dirname "${MIGRATION_LOG}")"
 
 echo "Downloading dump files from GCS..."
-gsutil -m cp -r "gs://${GCS_BUCKET}/${GCS_PATH}/*" "${LOCAL_DUMP_DIR}/"
+# rsync only fetches files missing locally, so a rerun after a failed load does not download the dump again;
+# -d removes local files the dump no longer has, e.g. those of an earlier export to the same path.
+gsutil -m rsync -d -r "gs://${GCS_BUCKET}/${GCS_PATH}" "${LOCAL_DUMP_DIR}/"
+
+# One marker file per table loaded completely, kept outside the dump directory so a rerun after a
+# failure skips those tables. The directory is named after the dump's metadata file, which records
+# when and from which binlog position it was taken, so a new export to the same path starts afresh.
+DUMP_ID=$(sha256sum "${LOCAL_DUMP_DIR}/metadata" | cut -c1-16)
+STATE_DIR="${MYLOADER_STATE_DIR:-/var/lib/migration/myloader}/${DUMP_ID}"
+mkdir -p "${STATE_DIR}"
 
 echo "Fetching target DB password from Secret Manager..."
 TARGET_DB_PASS=$(gcloud secrets versions access latest --secret="${TARGET_DB_PASSWORD_SECRET}" --project="${PROJECT_ID}")
 
+# Tables are <db>.<table>-schema.sql[.gz]; views, triggers and the database's own schema are not.
+TABLES=$(find "${LOCAL_DUMP_DIR}" -maxdepth 1 -name '*-schema.sql*' -printf '%f\n' \
+    | grep -v -e '-schema-view\.' -e '-schema-triggers\.' -e '-schema-create\.' -e '-schema-post\.' \
+    | sed -E 's/-schema\.sql(\.gz)?$//' | sort)
+VIEWS=$(find "${LOCAL_DUMP_DIR}" -maxdepth 1 -name '*-schema-view.sql*' -printf '%f\n' \
+    | sed -E 's/-schema-view\.sql(\.gz)?$//' | sort)
+
+pending() {
+    for TABLE in "$@"; do
+        [ -f "${STATE_DIR}/${TABLE}.done" ] || echo "${TABLE}"
+    done
+}
+
+load() {
+    # All pending tables go to one myloader, so its threads work across tables. --overwrite-tables
+    # only drops what this call loads: a table without a marker holds no rows, or the partial rows
+    # of a failed load. A failed call therefore reloads every table it was given.
+    [ $# -gt 0 ] || return 0
+    local LIST
+    LIST=$(IFS=,; echo "$*")
+    echo "Loading $# tables: ${LIST}"
+    myloader \
+        --host="${TARGET_DB_HOST}" \
+        --user="${TARGET_DB_USER}" \
+        --password="${TARGET_DB_PASS}" \
+        --directory="${LOCAL_DUMP_DIR}" \
+        --tables-list="${LIST}" \
+        --threads=16 \
+        --compress-protocol \
+        --overwrite-tables \
+        --verbose=3 2>&1 | tee -a "${MIGRATION_LOG}"
+    for TABLE in "$@"; do
+        touch "${STATE_DIR}/${TABLE}.done"
+    done
+}
+
 echo "Starting myloader import..."
-myloader \
-    --host="${TARGET_DB_HOST}" \
-    --user="${TARGET_DB_USER}" \
-    --password="${TARGET_DB_PASS}" \
-    --directory="${LOCAL_DUMP_DIR}" \
-    --threads=16 \
-    --compress-protocol \
-    --overwrite-tables \
-    --verbose=3
+# Views go in after every table they may select from.
+load $(pending ${TABLES})
+load $(pending ${VIEWS})
 
 echo "Myloader import finished."
-rm -rf "${LOCAL_DUMP_DIR}"
\ No newline at end of file
+# Only reached once every table is loaded; a repeated call loads the dump again.
+rm -rf "${STATE_DIR}" "${LOCAL_DUMP_DIR}"
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The MCP server modules import each other by bare module name, exactly as they
+# do when server.py is started from inside mcp_server/.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp_server"))
+
+
+class FakeClock:
+    """Stands in for time.monotonic (and time.sleep) in components taking clock=; tests set `now`."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,136 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from mcp_server.adaptive_throttle import DECREASE, HOLD, INCREASE, AdaptiveConcurrencyController, SourceHealthSampler
+from mcp_server.dump_scheduler import ParallelDumpScheduler
+
+MB = 1024 * 1024
+LIMITS = {"max_threads_running": 20, "max_replica_lag_seconds": 10, "max_probe_latency_ms": 50}
+
+
+class ScriptedSampler:
+    def __init__(self, samples):
+        self.samples = list(samples)
+
+    def sample(self):
+        sample = self.samples.pop(0)
+        if isinstance(sample, Exception):
+            raise sample
+        return sample
+
+
+def healthy(**overrides):
+    return dict({"threads_running": 2, "replica_lag_seconds": 0, "probe_latency_ms": 1}, **overrides)
+
+
+def make_controller(samples, **kwargs):
+    applied = []
+    options = dict(min_workers=1, max_workers=8, initial_workers=4, min_rate=1 * MB, max_rate=10 * MB,
+                   initial_rate=4 * MB, rate_step=1 * MB)
+    options.update(kwargs)
+    controller = AdaptiveConcurrencyController(ScriptedSampler(samples), lambda w, r: applied.append((w, r)),
+                                               LIMITS, **options)
+    return controller, applied
+
+
+def test_additive_increase_and_multiplicative_decrease():
+    """Test AIMD: one worker and one rate step up while healthy, halved when any bound is exceeded."""
+    controller, applied = make_controller([healthy(), healthy(), healthy(replica_lag_seconds=25), healthy()])
+    assert [controller.step()["action"] for _ in range(3)] == [INCREASE, INCREASE, DECREASE]
+    assert applied == [(5, 5 * MB), (6, 6 * MB), (3, 3 * MB)]
+    assert controller.decisions[-1]["breached"] == ["max_replica_lag_seconds"]
+    controller.step()
+    assert controller.workers == 4
+
+
+def test_bounds_hold_band_and_failed_samples():
+    """Test the worker/rate bounds, the hold band between headroom and the bound, and sampling errors."""
+    controller, applied = make_controller(
+        [healthy(threads_running=100), healthy(threads_running=100), healthy(threads_running=100),
+         healthy(threads_running=16), RuntimeError("Lost connection")], initial_workers=2)
+    for _ in range(3):
+        controller.step()
+    assert (controller.workers, controller.rate) == (1, 1 * MB)
+    assert applied == [(1, 2 * MB), (1, 1 * MB)]  # The third decrease changed nothing.
+    assert controller.step()["action"] == HOLD  # 16/20 is above the 0.7 headroom but within the bound.
+    assert controller.step()["error"] == "Lost connection"
+    assert controller.summary()["decreases"] == 3
+
+def test_initial_rate_is_capped_and_unlimited_starts_at_the_maximum():
+    """Test that the starting per-worker rate is the caller's, within max_rate, and max_rate for 0 (unlimited)."""
+    assert make_controller([], initial_rate=3 * MB)[0].rate == 3 * MB
+    assert make_controller([], initial_rate=50 * MB)[0].rate == 10 * MB
+    assert make_controller([], initial_rate=0)[0].rate == 10 * MB
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyController(ScriptedSampler([]), lambda w, r: None, LIMITS, min_workers=4, max_workers=2)
+
+
+def test_sampler_reads_status_lag_and_probe():
+    """Test that the sampler falls back to SHOW SLAVE STATUS and reports every signal."""
+    executed = []
+
+    class Cursor:
+        def __enter__(self): return self
+        def __exit__(self, *a): return False
+        def execute(self, sql):
+            if sql.startswith("SHOW REPLICA"):
+                raise RuntimeError("syntax error")
+            executed.append(sql)
+        def fetchall(self): return [{"1": 1}]
+        def fetchone(self):
+            last = executed[-1]
+            if "Threads_running" in last:
+                return {"Variable_name": "Threads_running", "Value": "7"}
+            return {"Seconds_Behind_Master": 3}
+
+    class Tools:
+        @contextmanager
+        def connection(self):
+            class Connection:
+                def cursor(self): return Cursor()
+            yield Connection()
+
+    sample = SourceHealthSampler(Tools()).sample()
+    assert sample["threads_running"] == 7
+    assert sample["replica_lag_seconds"] == 3.0
+    assert sample["probe_latency_ms"] >= 0
+
+
+def test_scheduler_worker_limit_can_change_mid_run():
+    """Test that lowering the worker limit during a run caps the concurrency of later tables."""
+    lock = threading.Lock()
+    active, peaks = [0], []
+
+    def dump(table, limiter):
+        with lock:
+            active[0] += 1
+            peaks.append((table, active[0]))
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return {"bytes": 1}
+
+    scheduler = ParallelDumpScheduler(dump, workers=4, max_workers=8)
+    scheduler.set_workers(1)
+    result = scheduler.run([{"table": f"t{i}", "bytes": 10 - i} for i in range(6)])
+    assert result["status"] == "SUCCESS"
+    assert max(p for _, p in peaks) == 1
+    assert [t for t, _ in peaks] == [f"t{i}" for i in range(6)]
+    scheduler.set_workers(100)
+    assert scheduler.workers == 8
+
+
+def test_scheduler_per_worker_rate_reaches_running_limiters():
+    """Test that set_per_worker_rate updates the limiters handed to running dumps."""
+    seen = []
+    scheduler = ParallelDumpScheduler(lambda table, limiter: seen.append(limiter) or {"bytes": 1}, workers=1,
+                                      per_worker_bytes_per_sec=1000)
+    scheduler.run([{"table": "a", "bytes": 1}])
+    scheduler.set_per_worker_rate(5000)
+    assert seen[0].limiters[0].bytes_per_second == 5000
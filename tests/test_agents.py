@@ -40,7 +40,7 @@ def test_create_data_validation_agent(mock_model_client, mock_code_executor):
 def test_create_anomaly_detection_agent(mock_model_client):
     agent = create_anomaly_detection_agent(mock_model_client)
     assert agent.name == "Anomaly_Detection_Agent"
-    assert "parse these logs and identify any anomalies" in agent.system_message
+    assert "Call the `get_log_anomaly_digest` tool" in agent.system_message
 
 def test_create_performance_optimization_agent(mock_model_client, mock_code_executor):
     agent = create_performance_optimization_agent(mock_model_client, mock_code_executor)
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from mcp_server.app_config import SecretCache, clear_config_cache, load_config, validate_config
+
+VALID = """
+gcp_project_id: "test-project"
+llm_config:
+  model: "gemini-1.5-flash-latest"
+  api_key_secret_name: "gemini-api-key"
+migration_strategies:
+  gcs_import_threshold_gb: 100
+  dms_threshold_gb: 500
+mcp_server:
+  tool_workers: 16
+"""
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    clear_config_cache()
+    path = tmp_path / "config.yaml"
+    path.write_text(VALID)
+    yield path
+    clear_config_cache()
+
+
+def _secret_client(*values):
+    client = MagicMock()
+    client.access_secret_version.side_effect = [
+        MagicMock(payload=MagicMock(data=v.encode("UTF-8"))) for v in values
+    ]
+    return client
+
+
+def test_load_config_parses_once(config_file):
+    """Test that the file is parsed on the first load only and every caller gets the same config."""
+    with patch("mcp_server.app_config.yaml.safe_load", wraps=__import__("yaml").safe_load) as safe_load:
+        first = load_config(str(config_file))
+        assert load_config(str(config_file)) is first
+    assert safe_load.call_count == 1
+    assert first["mcp_server"]["tool_workers"] == 16
+
+
+def test_load_config_from_environment(config_file, monkeypatch):
+    """Test that MIGRATION_CONFIG selects the file when no path is given."""
+    monkeypatch.setenv("MIGRATION_CONFIG", str(config_file))
+    assert load_config()["gcp_project_id"] == "test-project"
+
+
+def test_repository_config_is_valid():
+    """Test that the shipped config.yaml passes the schema."""
+    clear_config_cache()
+    assert load_config()["llm_config"]["api_key_secret_name"]
+
+
+def test_validate_config_lists_every_problem():
+    """Test that missing required keys and wrong types are all reported at once."""
+    config = {
+        "gcp_project_id": "test-project",
+        "llm_config": {"model": 3},
+        "migration_strategies": {"gcs_import_threshold_gb": 100, "dms_threshold_gb": "500"},
+        "mcp_server": {"tool_workers": True, "fleet": {}},
+    }
+    with pytest.raises(ValueError) as error:
+        validate_config(config)
+    message = str(error.value)
+    assert "llm_config.model must be a str, not int" in message
+    assert "llm_config.api_key_secret_name is required" in message
+    assert "migration_strategies.dms_threshold_gb must be a number, not str" in message
+    assert "mcp_server.tool_workers must be a int, not bool" in message
+    with pytest.raises(ValueError):
+        validate_config(["not", "a", "mapping"])
+
+
+def test_secret_cache_reuses_values_until_expiry(clock):
+    """Test that a secret is fetched once per TTL with a single client, and refetched after it expires."""
+    client = _secret_client("first", "rotated")
+    secrets = SecretCache("test-project", ttl_seconds=60, client=client, clock=clock)
+
+    assert secrets.get("gemini-api-key") == "first"
+    clock.now = 59
+    assert secrets.get("gemini-api-key") == "first"
+    assert secrets.fetches == 1
+    client.access_secret_version.assert_called_once_with(
+        request={"name": "projects/test-project/secrets/gemini-api-key/versions/latest"})
+
+    clock.now = 61
+    assert secrets.get("gemini-api-key") == "rotated"
+    assert secrets.fetches == 2
+
+
+def test_secret_cache_invalidate(clock):
+    """Test that an invalidated secret is fetched again before its TTL is over."""
+    client = _secret_client("first", "second")
+    secrets = SecretCache("test-project", ttl_seconds=60, client=client, clock=clock)
+    assert secrets.get("db-password") == "first"
+    secrets.invalidate("db-password")
+    assert secrets.get("db-password") == "second"
@@ -0,0 +1,70 @@
+import pytest
+
+from benchmarks.dataset_generator import SHAPES, generate_tables
+from benchmarks.run_benchmarks import compare_reports
+from benchmarks.startup_time import compare_reports as compare_startup_reports, parse_import_times
+
+
+def materialize(shape, scale):
+    return {t["name"]: (t["ddl"], list(t["rows"])) for t in generate_tables(shape, scale, seed=7)}
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_generator_is_deterministic(shape):
+    """Test that every shape produces identical rows for the same seed and rows matching its columns."""
+    first = materialize(shape, 0.02)
+    assert first == materialize(shape, 0.02)
+    for table in generate_tables(shape, 0.02, seed=7):
+        rows = list(table["rows"])
+        assert rows
+        assert all(len(row) == len(table["columns"]) for row in rows)
+
+
+def test_shapes_have_their_characteristics():
+    """Test the properties each shape is meant to stress."""
+    wide = materialize("wide_rows", 0.02)["wide_events"][1]
+    assert len(wide[0]) == 61
+    assert any(v is None for row in wide for v in row)
+
+    documents = materialize("blobs", 0.1)["documents"][1]
+    assert all(b"\x00\n';" in row[2] for row in documents)
+
+    events = [row[0] for row in materialize("skewed_pk", 0.1)["events"][1]]
+    assert events == sorted(set(events))
+    assert events[-1] > 100 * len(events)
+
+    assert len(materialize("many_small_tables", 0.5)) == 100
+    with pytest.raises(ValueError):
+        generate_tables("tiny")
+
+
+def test_compare_reports_flags_slow_stages():
+    """Test that only stages slower than the tolerance are reported as regressions."""
+    case = lambda export, load: {"shape": "employees", "threads": 4, "chunk_rows": 10000,
+                                 "stages": {"export": {"wall_seconds": export}, "load": {"wall_seconds": load}}}
+    baseline = {"cases": [case(10.0, 20.0)]}
+    report = {"cases": [case(11.0, 30.0)]}
+    regressions = compare_reports(report, baseline, tolerance=0.2)
+    assert [r["stage"] for r in regressions] == ["load"]
+    assert regressions[0]["slowdown"] == 0.5
+
+
+def test_parse_import_times():
+    """Test that -X importtime lines are parsed and the header and other output are skipped."""
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   yaml.error\n"
+              "import time:      2400 |      29100 | yaml\n"
+              "Traceback (most recent call last):\n")
+    assert parse_import_times(stderr) == [
+        {"module": "yaml.error", "self_us": 120, "cumulative_us": 120},
+        {"module": "yaml", "self_us": 2400, "cumulative_us": 29100},
+    ]
+
+
+def test_compare_startup_reports_flags_slow_commands():
+    """Test that only commands whose median grew beyond the tolerance are regressions."""
+    baseline = {"commands": {"help": {"median_seconds": 0.1}, "plan_only": {"median_seconds": 0.2}}}
+    report = {"commands": {"help": {"median_seconds": 0.11}, "plan_only": {"median_seconds": 0.5}}}
+    regressions = compare_startup_reports(report, baseline, tolerance=0.2)
+    assert [r["command"] for r in regressions] == ["plan_only"]
+    assert regressions[0]["slowdown"] == 1.5
@@ -0,0 +1,219 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pymysql
+import pytest
+
+from mcp_server.binlog_cdc import DELETE, UPSERT, BinlogChangeApplier
+from mcp_server.mcp_tools import MySQLTools
+
+
+class WriteRowsEvent(SimpleNamespace):
+    pass
+
+
+class UpdateRowsEvent(SimpleNamespace):
+    pass
+
+
+class DeleteRowsEvent(SimpleNamespace):
+    pass
+
+
+class XidEvent(SimpleNamespace):
+    pass
+
+
+class RotateEvent(SimpleNamespace):
+    pass
+
+
+def xid(pos, timestamp=None):
+    return XidEvent(packet=SimpleNamespace(log_pos=pos), timestamp=timestamp or time.time())
+
+
+class InMemoryApplier(BinlogChangeApplier):
+    """Applies changes to dicts instead of a target database."""
+    def __init__(self, events, pk=("id",), **kwargs):
+        self.target = {}
+        self.applied = []
+        self.opened_at = []
+        self.lock = threading.Lock()
+        def stream(log_file, log_pos):
+            self.opened_at.append((log_file, log_pos))
+            return iter(events)
+        super().__init__(source_tools=None, target_tools=None, stream_factory=stream, **kwargs)
+        self._pk = list(pk)
+
+    def _primary_key(self, table_name):
+        return self._pk
+
+    def _apply_transaction(self, changes):
+        with self.lock:
+            for table, key, op, row in changes:
+                self.applied.append((table, key, op))
+                if not self._pk:
+                    # Without a primary key, a delete removes one row with the same image, as on MySQL.
+                    rows = self.target.setdefault(table, [])
+                    if op == DELETE:
+                        if row in rows:
+                            rows.remove(row)
+                    else:
+                        rows.append(dict(row))
+                    continue
+                rows = self.target.setdefault(table, {})
+                if op == DELETE:
+                    rows.pop(key, None)
+                else:
+                    rows[key] = dict(row)
+
+
+def test_changes_are_coalesced_and_checkpointed_at_commits():
+    """Test that only the last state of each row is applied and positions come from commit events."""
+    events = [
+        WriteRowsEvent(table="employees", rows=[{"values": {"id": 1, "name": "a"}}, {"values": {"id": 2, "name": "b"}}]),
+        UpdateRowsEvent(table="employees", rows=[{"before_values": {"id": 1, "name": "a"}, "after_values": {"id": 1, "name": "a2"}}]),
+        xid(400),
+        DeleteRowsEvent(table="employees", rows=[{"values": {"id": 2, "name": "b"}}]),
+        UpdateRowsEvent(table="employees", rows=[{"before_values": {"id": 1, "name": "a2"}, "after_values": {"id": 1, "name": "a3"}}]),
+        xid(800),
+        # An unfinished transaction is not applied; it is re-read from the last commit next time.
+        WriteRowsEvent(table="employees", rows=[{"values": {"id": 9, "name": "partial"}}]),
+    ]
+    checkpoints = []
+    applier = InMemoryApplier(events, workers=3, batch_rows=100, batch_seconds=60,
+                              on_checkpoint=lambda f, p: checkpoints.append((f, p)))
+    result = applier.run("mysql-bin.000003", 154, until_caught_up=True)
+
+    assert applier.target == {"employees": {(1,): {"id": 1, "name": "a3"}}}
+    assert result["rows_read"] == 6
+    assert result["rows_applied"] == 2
+    assert result["rows_coalesced"] == 3
+    assert (result["log_file"], result["log_pos"]) == ("mysql-bin.000003", 800)
+    assert checkpoints[-1] == ("mysql-bin.000003", 800)
+    assert result["caught_up"] and result["lag_seconds"] == 0.0
+
+
+def test_primary_key_change_and_rotation():
+    """Test that a PK update deletes the old key and that rotate events switch the binlog file."""
+    events = [
+        WriteRowsEvent(table="t", rows=[{"values": {"id": 1, "v": "x"}}]),
+        xid(200),
+        RotateEvent(next_binlog="mysql-bin.000004"),
+        UpdateRowsEvent(table="t", rows=[{"before_values": {"id": 1, "v": "x"}, "after_values": {"id": 5, "v": "x"}}]),
+        xid(300),
+    ]
+    applier = InMemoryApplier(events, batch_rows=1)
+    result = applier.run("mysql-bin.000003", 4, until_caught_up=True)
+    assert applier.target == {"t": {(5,): {"id": 5, "v": "x"}}}
+    assert (result["log_file"], result["log_pos"]) == ("mysql-bin.000004", 300)
+    assert result["batches"] == 2
+
+
+def test_same_row_always_goes_to_same_worker():
+    """Test the shard function keeps per-row order by routing a key to one worker."""
+    applier = InMemoryApplier([], workers=8)
+    shards = {applier._shard("salaries", (i,)) for i in range(200)}
+    assert len(shards) == 8
+    assert applier._shard("salaries", (42,)) == applier._shard("salaries", (42,))
+    # Changes to tables without a primary key are never split across workers.
+    assert applier._shard("log", ("#", 1, 0, DELETE)) == applier._shard("log", ("#", 7, 3, UPSERT))
+
+
+def test_update_on_table_without_primary_key_replaces_the_row():
+    """Test that an update of a keyless row deletes its before-image and inserts its after-image."""
+    events = [
+        WriteRowsEvent(table="log", rows=[{"values": {"msg": "a", "n": 1}}, {"values": {"msg": "b", "n": 1}}]),
+        xid(200),
+        UpdateRowsEvent(table="log", rows=[{"before_values": {"msg": "a", "n": 1}, "after_values": {"msg": "a", "n": 2}}]),
+        xid(300),
+    ]
+    applier = InMemoryApplier(events, pk=(), workers=4, batch_rows=100, batch_seconds=60)
+    applier.run("mysql-bin.000001", 4, until_caught_up=True)
+    assert applier.target == {"log": [{"msg": "b", "n": 1}, {"msg": "a", "n": 2}]}
+    assert [op for _, _, op in applier.applied[-2:]] == [DELETE, UPSERT]
+
+
+def test_insert_then_delete_without_primary_key_keeps_binlog_order():
+    """Test that a keyless row inserted and deleted within one batch does not survive."""
+    events = [
+        WriteRowsEvent(table="log", rows=[{"values": {"msg": "a"}}]),
+        xid(200),
+        DeleteRowsEvent(table="log", rows=[{"values": {"msg": "a"}}]),
+        WriteRowsEvent(table="log", rows=[{"values": {"msg": "b"}}]),
+        xid(300),
+    ]
+    applier = InMemoryApplier(events, pk=(), workers=4, batch_rows=100, batch_seconds=60)
+    result = applier.run("mysql-bin.000001", 4, until_caught_up=True)
+    assert result["batches"] == 1
+    assert applier.target == {"log": [{"msg": "b"}]}
+    assert [op for _, _, op in applier.applied] == [UPSERT, DELETE, UPSERT]
+
+
+def test_constraint_error_replays_only_the_failed_workers():
+    """Test that only the changes of a worker whose transaction failed are replayed, in binlog order."""
+    applier = InMemoryApplier([], pk=(), workers=2)
+    calls = []
+    original = applier._apply_transaction
+    def flaky(changes):
+        calls.append([c[3] for c in changes])
+        if len(calls) == 1:
+            raise pymysql.err.IntegrityError(1062, "Duplicate entry")
+        original(changes)
+    applier._apply_transaction = flaky
+    changes = [("log", ("#", 1, 0, UPSERT), UPSERT, {"msg": "a"}),
+               ("events", ("#", 2, 0, UPSERT), UPSERT, {"msg": "b"})]
+    assert applier._shard("log", changes[0][1]) != applier._shard("events", changes[1][1])
+    applier.apply_batch(changes)
+    assert applier.status()["serial_replays"] == 1
+    assert len(calls) == 3 and calls[2] == calls[0]
+    # Each keyless row is inserted exactly once.
+    assert applier.target == {"log": [{"msg": "a"}], "events": [{"msg": "b"}]}
+
+
+def test_stop_event_stops_polling():
+    """Test that a running applier returns once its stop event is set."""
+    stop = threading.Event()
+    applier = InMemoryApplier([], poll_seconds=0.01)
+    thread = threading.Thread(target=applier.run, args=("mysql-bin.000001", 4), kwargs={"stop_event": stop})
+    thread.start()
+    time.sleep(0.05)
+    stop.set()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert len(applier.opened_at) >= 1
+
+
+def test_apply_changes_sql():
+    """Test the statements generated for upserts and deletes."""
+    executed = []
+    class Cursor:
+        def __enter__(self): return self
+        def __exit__(self, *a): return False
+        def execute(self, sql, params=None): executed.append((sql, params))
+    connection = SimpleNamespace(cursor=Cursor)
+    applier = InMemoryApplier([], pk=("emp_no", "from_date"))
+    applier._apply_changes(connection, [
+        ("salaries", (1, "2000-01-01"), DELETE, {"emp_no": 1, "from_date": "2000-01-01", "salary": 5}),
+        ("salaries", (1, "2001-01-01"), UPSERT, {"emp_no": 1, "from_date": "2001-01-01", "salary": 6}),
+    ])
+    assert executed[0] == ("DELETE FROM `salaries` WHERE `emp_no` <=> %s AND `from_date` <=> %s LIMIT 1;",
+                           [1, "2000-01-01"])
+    # Upserts replace the row with the same primary key, never a row sharing a secondary unique key.
+    assert executed[1] == ("DELETE FROM `salaries` WHERE `emp_no` = %s AND `from_date` = %s;", [1, "2001-01-01"])
+    assert executed[2] == ("INSERT INTO `salaries` (`emp_no`, `from_date`, `salary`) VALUES (%s, %s, %s);",
+                           [1, "2001-01-01", 6])
+
+
+@pytest.mark.parametrize("content", [
+    "Started dump at: 2024-01-01 10:00:00\nSHOW MASTER STATUS:\n\tLog: mysql-bin.000003\n\tPos: 154\n\tGTID:\n\n"
+    "SHOW SLAVE STATUS:\n\tHost: upstream\n\tLog: upstream-bin.000009\n\tPos: 999\n",
+    "[config]\nquote-character = BACKTICK\n\n[source]\nFile = mysql-bin.000003\nPosition = 154\nExecuted_Gtid_Set = \n",
+])
+def test_get_binlog_position_parses_metadata(tmp_path, content):
+    """Test that both mydumper metadata formats yield the source's own binlog position."""
+    path = tmp_path / "metadata"
+    path.write_text(content)
+    assert MySQLTools("test-project").get_binlog_position(str(path)) == {
+        "log_file": "mysql-bin.000003", "log_position": "154"}
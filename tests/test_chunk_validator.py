@@ -0,0 +1,107 @@
+import zlib
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+from mcp_server.chunk_validator import ChunkedChecksumValidator
+from mcp_server.table_chunks import range_predicate
+
+
+class InMemoryValidator(ChunkedChecksumValidator):
+    """Validator whose source and target are dicts of {pk: row} instead of MySQL tables."""
+    def _in_range(self, rows, lower, upper):
+        return sorted(k for k in rows if (lower is None or (k,) >= lower) and (upper is None or (k,) < upper))
+
+    def _chunk_checksum(self, tools, table_name, pk_columns, columns, lower, upper):
+        keys = self._in_range(tools, lower, upper)
+        crc = 0
+        for k in keys:
+            crc ^= zlib.crc32(repr((k, tools[k])).encode())
+        return len(keys), crc
+
+    def _midpoint(self, tools, table_name, pk_columns, lower, upper, offset):
+        keys = self._in_range(tools, lower, upper)
+        return (keys[offset],) if offset < len(keys) else None
+
+    def _chunk_boundaries(self, table_name, pk_columns):
+        keys = sorted(self.source_tools)
+        starts = [(k,) for k in keys[self.chunk_rows::self.chunk_rows]]
+        return list(zip([None] + starts, starts + [None]))
+
+    def _table_layout(self, table_name):
+        return ["id"], ["id", "name"]
+
+
+def test_range_predicate_composite_key():
+    """Test that composite keys compare as row constructors."""
+    where, params = range_predicate(["a", "b"], (1, 2), (3, 4))
+    assert where == "WHERE (`a`, `b`) >= (%s, %s) AND (`a`, `b`) < (%s, %s)"
+    assert params == [1, 2, 3, 4]
+
+class RecordingTools:
+    """MySQLTools stand-in whose connections record each executed query and return one checksum row."""
+    def __init__(self, row):
+        self.row = row
+        self.executed = []
+
+    @contextmanager
+    def connection(self):
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda query, params=None: self.executed.append((query, params))
+        cursor.fetchone.return_value = self.row
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+        yield connection
+
+
+def test_chunk_checksum_query_on_a_key_range():
+    """Test the real checksum SQL: range predicate, NULL-aware row image, CRC32 aggregation and its params."""
+    tools = RecordingTools({"row_count": 3, "crc": 12345})
+    validator = ChunkedChecksumValidator(tools, tools)
+    checksum = validator._chunk_checksum(tools, "orders", ["shop", "id"], ["shop", "id", "note"], (1, 10), (2, 0))
+    assert checksum == (3, 12345)
+    assert tools.executed == [(
+        "SELECT COUNT(*) AS row_count, COALESCE(BIT_XOR(CRC32(CONCAT_WS('#', `shop`, `id`, `note`, "
+        "CONCAT(ISNULL(`shop`), ISNULL(`id`), ISNULL(`note`))))), 0) AS crc "
+        "FROM `orders` WHERE (`shop`, `id`) >= (%s, %s) AND (`shop`, `id`) < (%s, %s);",
+        [1, 10, 2, 0])]
+
+def test_chunk_checksum_query_on_open_ranges():
+    """Test that the first and last chunks are bounded on one side only and a keyless table is one range."""
+    tools = RecordingTools({"row_count": 0, "crc": 0})
+    validator = ChunkedChecksumValidator(tools, tools)
+    validator._chunk_checksum(tools, "t", ["id"], ["id"], None, (5,))
+    validator._chunk_checksum(tools, "t", ["id"], ["id"], (5,), None)
+    validator._chunk_checksum(tools, "t", [], ["id"], None, None)
+    wheres = [(query.split("FROM `t`")[1], params) for query, params in tools.executed]
+    assert wheres == [(" WHERE `id` < %s;", [5]), (" WHERE `id` >= %s;", [5]), (" ;", [])]
+
+def test_matching_tables_validate():
+    """Test that identical tables report no mismatching chunks."""
+    rows = {i: f"name{i}" for i in range(1000)}
+    validator = InMemoryValidator(rows, dict(rows), workers=4, chunk_rows=100)
+    report = validator.validate_table("employees")
+    assert report["status"] == "VALIDATED"
+    assert report["chunks"] == 10
+    assert report["mismatched_chunks"] == []
+
+def test_mismatch_is_bisected_to_row_range():
+    """Test that a single changed row is narrowed down to a small key range."""
+    source = {i: f"name{i}" for i in range(1000)}
+    target = dict(source)
+    target[537] = "changed"
+    validator = InMemoryValidator(source, target, workers=4, chunk_rows=100, bisect_min_rows=4)
+    report = validator.validate_table("employees")
+    assert report["status"] == "MISMATCH"
+    assert [c["chunk"] for c in report["mismatched_chunks"]] == [5]
+    ranges = report["mismatched_chunks"][0]["mismatched_ranges"]
+    assert len(ranges) == 1
+    assert ranges[0]["lower"][0] <= 537 < ranges[0]["upper"][0]
+    assert ranges[0]["source_rows"] <= 4
+
+def test_completed_chunks_are_skipped():
+    """Test that a resumed run only checks chunks not completed before."""
+    rows = {i: f"name{i}" for i in range(500)}
+    seen = []
+    validator = InMemoryValidator(rows, dict(rows), workers=2, chunk_rows=100)
+    report = validator.validate_table("employees", completed_chunks={0, 1, 2}, on_chunk=lambda r: seen.append(r["chunk"]))
+    assert sorted(seen) == [3, 4]
+    assert report["chunks_skipped"] == 3
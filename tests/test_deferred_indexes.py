@@ -0,0 +1,126 @@
+import gzip
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from mcp_server.deferred_indexes import DeferredIndexBuilder, split_create_table
+from mcp_server.object_store import LocalObjectStore
+from mcp_server.pipelined_loader import PipelinedLoader
+
+SALARIES = """CREATE TABLE `salaries` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `emp_no` int NOT NULL,
+  `salary` int NOT NULL,
+  `note` text,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uniq_emp_salary` (`emp_no`,`salary`),
+  KEY `idx_salary` (`salary`),
+  FULLTEXT KEY `ft_note` (`note`),
+  CONSTRAINT `fk_emp` FOREIGN KEY (`emp_no`) REFERENCES `employees` (`emp_no`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+
+class FakeTarget:
+    """Records executed statements; existing index names are returned for information_schema queries."""
+    def __init__(self, existing=()):
+        self.statements = []
+        self.existing = set(existing)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        target = self
+        class Cursor:
+            def __enter__(self): return self
+            def __exit__(self, *a): return False
+            def execute(self, sql, params=None):
+                with target.lock:
+                    target.statements.append(sql)
+            def fetchall(self):
+                return [{"name": n} for n in target.existing]
+        class Connection:
+            def cursor(self): return Cursor()
+            def begin(self): pass
+            def commit(self): pass
+        yield Connection()
+
+
+def test_split_create_table_defers_secondary_indexes_and_foreign_keys():
+    """Test that only the columns and the primary key stay in the CREATE TABLE."""
+    create, indexes, foreign_keys = split_create_table(SALARIES)
+    assert create == """CREATE TABLE `salaries` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `emp_no` int NOT NULL,
+  `salary` int NOT NULL,
+  `note` text,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+    assert indexes == ["UNIQUE KEY `uniq_emp_salary` (`emp_no`,`salary`)", "KEY `idx_salary` (`salary`)",
+                       "FULLTEXT KEY `ft_note` (`note`)"]
+    assert foreign_keys == ["CONSTRAINT `fk_emp` FOREIGN KEY (`emp_no`) REFERENCES `employees` (`emp_no`) "
+                            "ON DELETE CASCADE"]
+
+
+def test_split_create_table_keeps_auto_increment_key_and_other_statements():
+    """Test that the key an AUTO_INCREMENT column depends on stays, and non-CREATE statements pass through."""
+    ddl = ("CREATE TABLE `t` (\n  `tenant` int NOT NULL,\n  `id` int NOT NULL AUTO_INCREMENT,\n"
+           "  PRIMARY KEY (`tenant`,`id`),\n  KEY `idx_id` (`id`),\n  KEY `idx_x` (`tenant`)\n) ENGINE=InnoDB;\n")
+    create, indexes, _ = split_create_table(ddl)
+    assert "KEY `idx_id` (`id`)\n) ENGINE" in create
+    assert indexes == ["KEY `idx_x` (`tenant`)"]
+    statement = "/*!40101 SET NAMES utf8mb4*/;\n"
+    assert split_create_table(statement) == (statement, [], [])
+
+
+def test_builder_adds_one_alter_per_table_largest_first_then_foreign_keys():
+    """Test the statement grouping and ordering, and that existing indexes are skipped."""
+    target = FakeTarget(existing={"PRIMARY", "idx_small"})
+    _, indexes, foreign_keys = split_create_table(SALARIES)
+    deferred = {
+        "small": {"indexes": ["KEY `idx_small` (`a`)", "KEY `idx_small_b` (`b`)"], "foreign_keys": []},
+        "salaries": {"indexes": indexes, "foreign_keys": foreign_keys},
+    }
+    report = DeferredIndexBuilder(target, workers=1).build(deferred, {"salaries": 100, "small": 1})
+    alters = [s for s in target.statements if s.startswith("ALTER")]
+    assert alters == [
+        "ALTER TABLE `salaries` ADD UNIQUE KEY `uniq_emp_salary` (`emp_no`,`salary`), ADD KEY `idx_salary` (`salary`);",
+        "ALTER TABLE `salaries` ADD FULLTEXT KEY `ft_note` (`note`);",
+        "ALTER TABLE `small` ADD KEY `idx_small_b` (`b`);",
+        "ALTER TABLE `salaries` ADD CONSTRAINT `fk_emp` FOREIGN KEY (`emp_no`) REFERENCES `employees` (`emp_no`) "
+        "ON DELETE CASCADE;",
+    ]
+    assert report["tables"]["small"]["indexes"] == {"added": 1, "skipped": 1,
+                                                    "seconds": report["tables"]["small"]["indexes"]["seconds"]}
+    assert "indexes_seconds" in report and "foreign_keys_seconds" in report
+
+
+def test_builder_reports_failures():
+    """Test that a failing ALTER fails the build with the table named."""
+    class FailingTarget(FakeTarget):
+        @contextmanager
+        def connection(self):
+            raise RuntimeError("Duplicate entry")
+            yield
+    with pytest.raises(RuntimeError, match="small: Duplicate entry"):
+        DeferredIndexBuilder(FailingTarget()).build({"small": {"indexes": ["KEY `k` (`a`)"]}})
+
+
+def test_loader_defers_indexes_until_after_the_data(tmp_path):
+    """Test that the table is created without indexes and they are added after every chunk is loaded."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    files = {"db.salaries-schema.sql.gz": SALARIES,
+             "db.salaries.00000.sql.gz": "INSERT INTO `salaries` VALUES\n(1,1,1,'a');\n"}
+    for name, text in files.items():
+        with gzip.open(tmp_path / name, "wt", encoding="utf-8") as f:
+            f.write(text)
+        store.put_file(str(tmp_path / name), f"dump/{name}")
+    target = FakeTarget()
+    result = PipelinedLoader(target, store, spool_dir=str(tmp_path), defer_indexes=True).load("dump")
+    user = [s for s in target.statements if not s.startswith(("SET", "SELECT"))]
+    assert user[1].startswith("CREATE TABLE") and "KEY `idx_salary`" not in user[1]
+    assert user[2].startswith("INSERT")
+    assert [s.split(" ADD ")[1].split(" ")[0] for s in user[3:]] == ["UNIQUE", "FULLTEXT", "CONSTRAINT"]
+    assert result["index_build"]["tables"]["salaries"]["indexes"]["added"] == 3
@@ -0,0 +1,49 @@
+import threading
+from mcp_server.dump_scheduler import ByteRateLimiter, ParallelDumpScheduler
+
+
+def test_rate_limiter_enforces_rate(clock):
+    """Test that consuming 3 seconds' worth of bytes takes about 2 seconds after the initial burst."""
+    limiter = ByteRateLimiter(1000, clock=clock, sleep=clock.sleep)
+    for _ in range(30):
+        limiter.consume(100)
+    assert 1.9 <= clock.now <= 2.1
+
+def test_unlimited_rate_never_sleeps():
+    """Test that a zero rate disables limiting."""
+    limiter = ByteRateLimiter(0, sleep=lambda s: (_ for _ in ()).throw(AssertionError("slept")))
+    limiter.consume(10 ** 9)
+
+def test_largest_tables_start_first():
+    """Test that tables are dispatched in descending size order."""
+    started = []
+    lock = threading.Lock()
+    def dump(table, limiter):
+        with lock:
+            started.append(table)
+        return {"bytes": 1}
+    scheduler = ParallelDumpScheduler(dump, workers=1)
+    result = scheduler.run([{"table": "small", "bytes": 1}, {"table": "big", "bytes": 100}, {"table": "mid", "bytes": 10}])
+    assert started == ["big", "mid", "small"]
+    assert result["status"] == "SUCCESS"
+    assert result["succeeded"] == 3
+
+def test_failed_dumps_are_retried_with_backoff():
+    """Test retry with exponential backoff and a structured failure report."""
+    delays = []
+    attempts = {"flaky": 0}
+    def dump(table, limiter):
+        if table == "broken":
+            raise RuntimeError("mysqldump failed")
+        attempts["flaky"] += 1
+        if attempts["flaky"] < 3:
+            raise RuntimeError("transient")
+        return {"bytes": 5}
+    scheduler = ParallelDumpScheduler(dump, workers=1, max_retries=2, backoff_seconds=1, sleep=delays.append)
+    result = scheduler.run([{"table": "flaky", "bytes": 2}, {"table": "broken", "bytes": 1}])
+    by_table = {r["table"]: r for r in result["tables"]}
+    assert by_table["flaky"]["status"] == "SUCCESS"
+    assert by_table["flaky"]["attempts"] == 3
+    assert by_table["broken"]["status"] == "FAILED"
+    assert result["failed"] == ["broken"]
+    assert delays == [1, 2, 1, 2]
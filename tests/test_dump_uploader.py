@@ -0,0 +1,123 @@
+import gzip
+import os
+
+import pytest
+
+from mcp_server.dump_uploader import DumpDirectoryUploader
+from mcp_server.object_store import LocalObjectStore
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def make_uploader(tmp_path, clock, store=None, **kwargs):
+    dump_dir = tmp_path / "dump"
+    dump_dir.mkdir(exist_ok=True)
+    store = store or LocalObjectStore(str(tmp_path / "store"))
+    # A long poll interval keeps the watcher thread idle so scans are driven by the test.
+    uploader = DumpDirectoryUploader(store, str(dump_dir), "dumps/run1", workers=2, poll_seconds=3600, clock=clock,
+                                     **kwargs)
+    uploader.start()
+    return uploader, dump_dir, store
+
+
+def close(uploader, dump_dir, name):
+    """Does what mydumper's --exec hook does once it has closed a file."""
+    command = uploader.exec_command.replace("FILENAME", str(dump_dir / name)).split()
+    assert command[:2] == ["/bin/ln", "-f"]
+    os.link(command[2], os.path.join(command[3], name))
+
+
+def test_uploads_only_closed_files_and_metadata_last(tmp_path, clock):
+    """Test that files are uploaded once mydumper reports them closed, and metadata only at the end."""
+    uploader, dump_dir, store = make_uploader(tmp_path, clock)
+    assert uploader.closed_path == str(tmp_path / "dump.closed")
+    write(dump_dir / "db.t.00000.sql.gz", gzip.compress(b"chunk-0"))
+    write(dump_dir / "db.t.00001.sql.gz", b"writing")
+    write(dump_dir / "metadata", b"Started dump")
+    assert uploader.scan() == 0
+    close(uploader, dump_dir, "db.t.00000.sql.gz")
+    assert uploader.scan() == 1
+    uploader._drain()
+    assert uploader.scan() == 0
+    assert [o["key"] for o in store.list_objects("dumps")] == ["dumps/run1/db.t.00000.sql.gz"]
+
+    write(dump_dir / "db.t.00001.sql.gz", gzip.compress(b"chunk-1"))
+    summary = uploader.finish()
+    assert [o["key"] for o in store.list_objects("dumps")] == [
+        "dumps/run1/db.t.00000.sql.gz", "dumps/run1/db.t.00001.sql.gz", "dumps/run1/metadata"]
+    assert summary["files_uploaded"] == 3
+    assert os.path.exists(dump_dir / "db.t.00000.sql.gz")
+    assert not os.path.exists(uploader.closed_path)
+
+
+def test_chunks_written_concurrently_wait_for_their_own_close(tmp_path, clock):
+    """Test that a later chunk of a table does not make an earlier one, still being written, look finished."""
+    uploader, dump_dir, store = make_uploader(tmp_path, clock)
+    write(dump_dir / "db.t.00000.sql.gz", b"still writing")
+    write(dump_dir / "db.t.00001.sql.gz", gzip.compress(b"chunk-1"))
+    close(uploader, dump_dir, "db.t.00001.sql.gz")
+    clock.now = 3600
+    assert uploader.scan() == 1
+    uploader._drain()
+    assert [o["key"] for o in store.list_objects("dumps")] == ["dumps/run1/db.t.00001.sql.gz"]
+    uploader.abort()
+
+
+def test_changed_file_is_uploaded_again(tmp_path, clock):
+    """Test that a file which changed after its upload is re-uploaded with its final content."""
+    uploader, dump_dir, store = make_uploader(tmp_path, clock)
+    path = dump_dir / "db.t.00000.sql"
+    write(path, b"part")
+    close(uploader, dump_dir, "db.t.00000.sql")
+    uploader.scan()
+    uploader._drain()
+    write(path, b"part and the rest")
+    uploader.finish()
+    with open(os.path.join(store.root, "dumps/run1/db.t.00000.sql"), "rb") as f:
+        assert f.read() == b"part and the rest"
+
+
+def test_delete_local_keeps_metadata(tmp_path, clock):
+    """Test that verified files and their links are removed as soon as they are uploaded, but not metadata."""
+    uploader, dump_dir, store = make_uploader(tmp_path, clock, delete_local=True)
+    write(dump_dir / "db.t-schema.sql.gz", gzip.compress(b"schema"))
+    write(dump_dir / "db.t.00000.sql", b"INSERT 0")
+    close(uploader, dump_dir, "db.t.00000.sql")
+    uploader.scan()
+    uploader._drain()
+    assert sorted(os.listdir(dump_dir)) == ["db.t-schema.sql.gz"]
+    assert os.listdir(uploader.closed_path) == []
+    write(dump_dir / "metadata", b"Log: mysql-bin.000003\nPos: 154\n")
+    summary = uploader.finish()
+    assert sorted(os.listdir(dump_dir)) == ["metadata"]
+    assert summary["files_deleted"] == 2
+    assert summary["peak_local_bytes"] > 0
+
+
+def test_links_of_an_earlier_attempt_are_cleared(tmp_path, clock):
+    """Test that start() drops closed-file links left behind by an interrupted dump."""
+    (tmp_path / "dump.closed").mkdir()
+    write(tmp_path / "dump.closed" / "db.t.00000.sql.gz", b"old")
+    uploader, dump_dir, store = make_uploader(tmp_path, clock)
+    assert os.listdir(uploader.closed_path) == []
+    assert uploader.scan() == 0
+    uploader.abort()
+
+
+class CorruptingStore(LocalObjectStore):
+    def put_file(self, local_path, key):
+        return dict(super().put_file(local_path, key), md5="0" * 32)
+
+
+def test_checksum_mismatch_fails_after_retries(tmp_path, clock):
+    """Test that an upload whose checksum never matches is retried, kept locally and reported."""
+    uploader, dump_dir, _ = make_uploader(tmp_path, clock, store=CorruptingStore(str(tmp_path / "store")),
+                                             delete_local=True, max_attempts=2)
+    write(dump_dir / "db.t.00000.sql.gz", gzip.compress(b"chunk"))
+    with pytest.raises(RuntimeError, match="1 dump files failed to upload"):
+        uploader.finish()
+    assert uploader.summary()["verify_failures"] == 2
+    assert os.path.exists(dump_dir / "db.t.00000.sql.gz")
@@ -0,0 +1,164 @@
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+from mcp_server.fleet_migration import DONE, FAILED, FleetBudget, FleetMigration, PrioritySlots, SlotLimitedTools
+from mcp_server.object_store import LocalObjectStore, RateLimitedObjectStore
+from mcp_server.table_exporter import StreamingTableExporter
+from tests.test_table_exporter import SnapshotConnection
+
+
+class FakeTools:
+    """MySQLTools stand-in for one database, tracking how many connections are open at once."""
+    open_connections = 0
+    peak_connections = 0
+    lock = threading.Lock()
+
+    def __init__(self, database, sizes):
+        self.database = database
+        self.sizes = sizes
+
+    def get_table_size_estimates(self):
+        tables = self.sizes[self.database]
+        return {"db_name": self.database,
+                "tables": {t: {"data_length": b, "index_length": 0} for t, b in tables.items()}}
+
+    @contextmanager
+    def connection(self):
+        with FakeTools.lock:
+            FakeTools.open_connections += 1
+            FakeTools.peak_connections = max(FakeTools.peak_connections, FakeTools.open_connections)
+        try:
+            yield MagicMock()
+        finally:
+            with FakeTools.lock:
+                FakeTools.open_connections -= 1
+
+    def create_database_if_missing(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SleepingFleetMigration(FleetMigration):
+    """Exports each table with one source connection held for 1 ms per KB, and loads in one step."""
+    def _export(self, entry, source, prefix, priority):
+        slot_tools = SlotLimitedTools(source, self.budget.export_slots, priority)
+        for count, (table, stats) in enumerate(entry["tables"].items(), start=1):
+            if table == "broken":
+                raise RuntimeError("export failed")
+            with slot_tools.connection():
+                time.sleep(stats["data_length"] / 1024 / 1000)
+            self._update(entry["database"], tables_exported=count)
+        return {"rows": len(entry["tables"]), "bytes": entry["bytes"]}
+
+    def _load(self, target, prefix, priority):
+        with SlotLimitedTools(target, self.budget.import_slots, priority).connection():
+            pass
+        return {"bytes": 0}
+
+
+def _fleet(sizes, export_threads=2, database_concurrency=3):
+    factory = lambda database: FakeTools(database, sizes)
+    return SleepingFleetMigration(factory, factory, MagicMock(), FleetBudget(export_threads=export_threads),
+                                  "fleet", database_concurrency=database_concurrency)
+
+
+def test_priority_slots_serve_lowest_priority_first():
+    """Test that a freed slot goes to the waiting caller with the lowest priority value."""
+    slots = PrioritySlots(1)
+    slots.acquire()
+    order = []
+    def wait(priority):
+        slots.acquire(priority)
+        order.append(priority)
+        slots.release()
+    threads = [threading.Thread(target=wait, args=(p,)) for p in (5, 1, 3)]
+    for thread in threads:
+        thread.start()
+    while slots.stats()["waiting"] < 3:
+        time.sleep(0.001)
+    slots.release()
+    for thread in threads:
+        thread.join()
+    assert order == [1, 3, 5]
+
+def test_priority_slots_grant_several_slots_at_once():
+    """Test that a multi-slot request waits for all its slots and one above the limit for an idle pool."""
+    slots = PrioritySlots(3)
+    slots.acquire()
+    granted = threading.Event()
+    def wait():
+        slots.acquire(0, 4)
+        granted.set()
+    thread = threading.Thread(target=wait)
+    thread.start()
+    time.sleep(0.01)
+    assert not granted.is_set() and slots.stats()["in_use"] == 1
+    slots.release()
+    thread.join()
+    assert slots.stats()["in_use"] == 4
+    slots.release(4)
+    assert slots.stats()["in_use"] == 0
+
+def test_plan_orders_databases_smallest_first():
+    sizes = {"big": {"a": 300}, "small": {"a": 10, "b": 20}, "mid": {"a": 100}}
+    plan = _fleet(sizes).plan(["big", "small", "mid"])
+    assert [d["database"] for d in plan] == ["small", "mid", "big"]
+    assert plan[0]["bytes"] == 30
+
+def test_fleet_runs_databases_concurrently_within_the_budget():
+    """Test that databases overlap, small ones finish first, the export budget holds and failures stay isolated."""
+    FakeTools.peak_connections = 0
+    sizes = {"large": {f"t{i}": 40 * 1024 for i in range(4)}, "small": {"t0": 5 * 1024},
+             "medium": {"t0": 20 * 1024, "t1": 20 * 1024}, "bad": {"broken": 1}}
+    fleet = _fleet(sizes, export_threads=2, database_concurrency=4)
+    result = fleet.run(["large", "small", "medium", "bad"])
+    databases = result["databases"]
+    assert result["status"] == "PARTIAL" and result["failed_databases"] == ["bad"]
+    assert databases["bad"]["status"] == FAILED and databases["bad"]["error"] == "export failed"
+    assert all(databases[d]["status"] == DONE for d in ("large", "small", "medium"))
+    assert databases["small"]["finished"] < databases["medium"]["finished"] < databases["large"]["finished"]
+    assert FakeTools.peak_connections <= 2
+    assert databases["large"]["started"] < databases["small"]["finished"]
+    assert result["tables_exported"] == 7
+    assert result["budget"]["export_threads"]["in_use"] == 0
+
+def test_rate_limited_store_draws_upload_bytes(tmp_path):
+    """Test that every upload consumes its size from the shared limiter."""
+    limiter = MagicMock()
+    store = RateLimitedObjectStore(LocalObjectStore(str(tmp_path / "bucket")), limiter)
+    source = tmp_path / "chunk.bin"
+    source.write_bytes(b"x" * 1234)
+    assert store.put_file(str(source), "fleet/db/chunk.bin")["bytes"] == 1234
+    limiter.consume.assert_called_once_with(1234)
+    assert store.list_objects("fleet/") == [{"key": "fleet/db/chunk.bin", "bytes": 1234}]
+
+def test_snapshot_export_holds_no_slot_while_uploading(tmp_path):
+    """Test that a snapshot's coordinator slot is handed back once it starts and that uploads wait without slots."""
+    slots = PrioritySlots(8)
+    in_use_while_reading = []
+    class CountingConnection(SnapshotConnection):
+        def cursor(self, cursor_class=None):
+            in_use_while_reading.append(slots.stats()["in_use"])
+            return super().cursor(cursor_class)
+    tools = MagicMock()
+    tools.connections.return_value.__enter__.return_value = [CountingConnection(f"c{i}", [], [(1, "a")])
+                                                              for i in range(3)]
+    in_use_while_uploading = []
+    class WaitingStore(LocalObjectStore):
+        def put_file(self, local_path, key):
+            # Uploads that held a slot would wait for the snapshot to end forever (here: 2 s).
+            deadline = time.monotonic() + 2
+            while slots.stats()["in_use"] and time.monotonic() < deadline:
+                time.sleep(0.001)
+            in_use_while_uploading.append(slots.stats()["in_use"])
+            return super().put_file(local_path, key)
+    exporter = StreamingTableExporter(SlotLimitedTools(tools, slots), WaitingStore(str(tmp_path / "bucket")),
+                                      workers=2, spool_dir=str(tmp_path))
+    plan = {"table": "t", "database": "db", "pk_columns": ["id"], "columns": ["id", "name"],
+            "boundaries": [(None, (2,)), ((2,), (4,)), ((4,), None)]}
+    assert exporter.export_table("t", "dumps", plan=plan, include_schema=False)["chunks_exported"] == 3
+    assert max(in_use_while_reading[-3:]) == 2
+    assert in_use_while_uploading == [0, 0, 0]
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from mcp_server.job_manager import CANCELLED, FAILED, SUCCEEDED, JobManager
+
+
+def wait_for(manager, job_id, states=(SUCCEEDED, FAILED, CANCELLED), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["state"] in states:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish: {manager.status(job_id)}")
+
+
+def test_job_runs_in_background_and_reports_result():
+    """Test that a job's result and timings are available once it finishes."""
+    manager = JobManager(max_workers=2)
+    job_id = manager.submit("add", lambda a, b: a + b, 2, 3)
+    status = wait_for(manager, job_id)
+    assert status["state"] == SUCCEEDED
+    assert status["result"] == 5
+    assert status["finished_at"] >= status["started_at"]
+    assert "_cancel_event" not in status
+    manager.shutdown()
+
+
+def test_failed_job_records_error():
+    """Test that an exception marks the job failed with its message."""
+    manager = JobManager()
+    def boom():
+        raise RuntimeError("mydumper exited with 2")
+    status = wait_for(manager, manager.submit("boom", boom))
+    assert status["state"] == FAILED
+    assert "mydumper exited" in status["error"]
+    manager.shutdown()
+
+
+def test_cancel_sets_event_of_running_job():
+    """Test that cancelling a running job sets the cancel_event it was given."""
+    manager = JobManager()
+    started = threading.Event()
+    def long_export(cancel_event=None):
+        started.set()
+        cancel_event.wait(5)
+        return {"status": "CANCELLED"}
+    job_id = manager.submit("export", long_export)
+    assert started.wait(5)
+    manager.cancel(job_id)
+    status = wait_for(manager, job_id)
+    assert status["state"] == CANCELLED
+    assert status["result"] == {"status": "CANCELLED"}
+    manager.shutdown()
+
+
+def test_cancel_queued_job_never_runs():
+    """Test that a job cancelled while queued behind a busy worker never starts."""
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    ran = []
+    blocker = manager.submit("blocker", lambda: release.wait(5))
+    queued = manager.submit("queued", lambda: ran.append(True))
+    assert manager.cancel(queued)["state"] == CANCELLED
+    release.set()
+    wait_for(manager, blocker)
+    manager.shutdown()
+    assert ran == []
+    assert {j["job_id"] for j in manager.list_jobs()} == {blocker, queued}
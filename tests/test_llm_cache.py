@@ -0,0 +1,99 @@
+import asyncio
+import os
+import pytest
+from autogen_core.models import (
+    CreateResult,
+    FunctionExecutionResult,
+    FunctionExecutionResultMessage,
+    RequestUsage,
+    SystemMessage,
+    UserMessage,
+)
+from agents.llm_cache import OFF, RECORD, REPLAY, CachingChatCompletionClient, ResponseCacheStore, request_key
+
+
+class CountingClient:
+    """Model client stub that answers with the number of calls it has received."""
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, messages, **kwargs):
+        self.calls += 1
+        return CreateResult(finish_reason="stop", content=f"answer {self.calls}",
+                            usage=RequestUsage(prompt_tokens=10, completion_tokens=2), cached=False)
+
+    async def create_stream(self, messages, **kwargs):
+        yield "answer"
+        yield await self.create(messages)
+
+
+def _messages(catalog="employees: 300024 rows"):
+    return [SystemMessage(content="You are a Database Schema Analyst."),
+            UserMessage(content="Retrieve the schema.", source="user"),
+            FunctionExecutionResultMessage(content=[FunctionExecutionResult(
+                content=catalog, name="get_schema_catalog", call_id="1", is_error=False)])]
+
+
+def test_request_key_separates_prompt_and_tool_results():
+    """Test that the key changes with the model and tool results, and the tool-result hash only with the latter."""
+    key = request_key("gemini", _messages())
+    assert key == request_key("gemini", _messages())
+    assert request_key("other", _messages())["key"] != key["key"]
+    changed = request_key("gemini", _messages("employees: 5 rows"))
+    assert changed["key"] != key["key"]
+    assert changed["prompt_hash"] == key["prompt_hash"]
+    assert changed["tool_results_hash"] != key["tool_results_hash"]
+
+def test_record_then_replay(tmp_path):
+    """Test that a rerun with the same prompt and tool results is answered from the cache."""
+    inner = CountingClient()
+    client = CachingChatCompletionClient(inner, ResponseCacheStore(str(tmp_path)), "gemini", mode=RECORD)
+    first = asyncio.run(client.create(_messages()))
+    again = asyncio.run(client.create(_messages()))
+    assert inner.calls == 1
+    assert again.content == first.content == "answer 1"
+    assert again.cached and not first.cached
+    asyncio.run(client.create(_messages("employees: 5 rows")))
+    assert inner.calls == 2
+
+    replay = CachingChatCompletionClient(CountingClient(), ResponseCacheStore(str(tmp_path)), "gemini", mode=REPLAY)
+    assert asyncio.run(replay.create(_messages())).content == "answer 1"
+    with pytest.raises(LookupError):
+        asyncio.run(replay.create(_messages("salaries: 1 row")))
+    assert replay.stats()["hits"] == 1 and replay.stats()["misses"] == 1
+
+def test_streamed_responses_are_recorded(tmp_path):
+    """Test that the final result of a stream is stored and replayed as a single result."""
+    inner = CountingClient()
+    client = CachingChatCompletionClient(inner, ResponseCacheStore(str(tmp_path)), "gemini")
+
+    async def collect():
+        return [item async for item in client.create_stream(_messages())]
+    assert [getattr(i, "content", i) for i in asyncio.run(collect())] == ["answer", "answer 1"]
+    replayed = asyncio.run(collect())
+    assert len(replayed) == 1 and replayed[0].cached
+    assert inner.calls == 1
+
+def test_off_mode_always_calls_the_model(tmp_path):
+    inner = CountingClient()
+    client = CachingChatCompletionClient(inner, ResponseCacheStore(str(tmp_path)), "gemini", mode=OFF)
+    asyncio.run(client.create(_messages()))
+    asyncio.run(client.create(_messages()))
+    assert inner.calls == 2
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError):
+        CachingChatCompletionClient(inner, ResponseCacheStore(str(tmp_path)), "gemini", mode="sometimes")
+
+def test_store_evicts_least_recently_used(tmp_path):
+    """Test that the store stays within its byte budget, keeping the entries read most recently."""
+    store = ResponseCacheStore(str(tmp_path), max_bytes=300)
+    for i, key in enumerate(["a", "b", "c"]):
+        store.put(key, {"result": "x" * 80})
+        os.utime(tmp_path / f"{key}.json", (i, i))
+        store._files[key] = (i, store._files[key][1])
+    store.get("a")
+    store.put("d", {"result": "x" * 80})
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("d") is not None
+    assert store.evictions == 1
+    assert ResponseCacheStore(str(tmp_path)).size()["entries"] == 3
@@ -0,0 +1,108 @@
+import logging
+import time
+from mcp_server.log_analyzer import AnalyzerLogHandler, LogAnomalyAnalyzer, LogTailer, RollingStats
+
+
+def test_rolling_stats_percentiles():
+    """Test the streaming mean and nearest-rank percentiles."""
+    stats = RollingStats()
+    for value in range(1, 101):
+        stats.add(value)
+    assert stats.mean == 50.5
+    assert stats.summary()["p50"] == 50
+    assert stats.summary()["p99"] == 99
+    assert stats.max == 100
+
+def test_counters_and_repeated_table_failures():
+    """Test that failures are counted per table and a table failing repeatedly is flagged once."""
+    analyzer = LogAnomalyAnalyzer(failure_threshold=2, clock=lambda: 1000.0)
+    analyzer.feed("INFO Dumping employees to gs://b/p/employees.sql...")
+    analyzer.feed("WARNING Dump of salaries failed (attempt 1), retrying in 2s: (2013, 'Lost connection to MySQL server')")
+    analyzer.feed("ERROR Load of dumps/db.salaries.00003.sql.gz failed: timeout")
+    flagged = analyzer.feed("ERROR Giving up on salaries after 3 attempts: boom")
+    assert [a["kind"] for a in flagged] == ["repeated_table_failure"]
+    assert flagged[0]["excerpt"][-1].startswith("ERROR Giving up on salaries")
+    assert len(flagged[0]["excerpt"]) == 3
+    digest = analyzer.digest()
+    assert digest["counters"]["retry"]["total"] == 1
+    assert digest["counters"]["connection_error"]["total"] == 1
+    assert digest["table_failures"] == {"salaries": 2}
+
+def test_latency_outliers_are_flagged_online():
+    """Test that a chunk far slower than the earlier ones of its kind is flagged as it arrives."""
+    analyzer = LogAnomalyAnalyzer(min_samples=5)
+    for i in range(20):
+        assert analyzer.feed(f"INFO Exported 1000 rows of t{i} (10 compressed bytes) in {1 + (i % 3) * 0.1:.1f}s") == []
+    flagged = analyzer.feed("INFO Exported 1000 rows of huge (10 compressed bytes) in 30.0s")
+    assert flagged[0]["kind"] == "latency_outlier"
+    assert flagged[0]["table"] == "huge"
+    assert analyzer.digest()["latency"]["table_export_seconds"]["max"] == 30.0
+
+def test_mydumper_thread_jobs_are_timed():
+    """Test that the gap between a thread's jobs is recorded as the earlier chunk's duration."""
+    analyzer = LogAnomalyAnalyzer()
+    analyzer.feed("Mydumper: ** Message: Thread 1: dumping data for `db`.`salaries` part 1", timestamp=10.0)
+    analyzer.feed("Mydumper: ** Message: Thread 2: dumping data for `db`.`titles` part 1", timestamp=11.0)
+    analyzer.feed("Mydumper: ** Message: Thread 1: dumping data for `db`.`salaries` part 2", timestamp=14.5)
+    latency = analyzer.digest()["latency"]["chunk_seconds"]
+    assert latency["count"] == 1
+    assert latency["max"] == 4.5
+
+def test_bursts_are_flagged_once_per_window():
+    """Test that a burst of connection errors in the window raises one anomaly."""
+    analyzer = LogAnomalyAnalyzer(window_seconds=60, burst_thresholds={"connection_error": 3}, clock=lambda: 500.0)
+    kinds = []
+    for at in (0, 10, 20, 30, 40):
+        kinds += [a["kind"] for a in analyzer.feed("ERROR Database connection failed: refused", timestamp=at)]
+    assert kinds == ["burst"]
+    kinds = [a["kind"] for a in analyzer.feed("ERROR Database connection failed: refused", timestamp=500)]
+    assert kinds == []
+    assert analyzer.digest()["counters"]["connection_error"] == {"total": 6, "recent": 1}
+
+def test_tailer_reads_only_complete_new_lines(tmp_path):
+    """Test that the tailer resumes where it left off and rereads a truncated file."""
+    path = tmp_path / "myloader.log"
+    path.write_text("** (myloader:42): WARNING **: slow\npartial")
+    analyzer = LogAnomalyAnalyzer()
+    tailer = LogTailer(analyzer, [str(path), str(tmp_path / "missing.log")])
+    assert tailer.poll() == 1
+    with open(path, "a") as f:
+        f.write(" line\nERROR 1045 (28000): Access denied for user\n")
+    assert tailer.poll() == 2
+    assert tailer.poll() == 0
+    path.write_text("** (myloader:42): CRITICAL **: gone\n")
+    assert tailer.poll() == 1
+    digest = analyzer.digest()
+    assert digest["counters"]["tool_warning"]["total"] == 1
+    assert digest["counters"]["tool_error"]["total"] == 2
+    assert digest["anomalies"]["by_kind"] == {"security": 1}
+    assert digest["sources"] == {"myloader.log": 4}
+
+def test_tailer_polls_in_the_background(tmp_path):
+    """Test that a started tailer feeds new lines without anyone calling poll()."""
+    path = tmp_path / "myloader.log"
+    path.write_text("")
+    analyzer = LogAnomalyAnalyzer()
+    tailer = LogTailer(analyzer, [str(path)], poll_seconds=0.01)
+    tailer.start()
+    try:
+        with open(path, "a") as f:
+            f.write("ERROR 1045 (28000): Access denied for user\n")
+        deadline = time.monotonic() + 2
+        while not analyzer.digest()["anomalies"]["by_kind"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        tailer.stop()
+    assert analyzer.digest()["anomalies"]["by_kind"] == {"security": 1}
+
+def test_log_handler_feeds_records():
+    """Test that log records of this process reach the analyzer."""
+    analyzer = LogAnomalyAnalyzer()
+    logger = logging.getLogger("test_log_analyzer")
+    handler = AnalyzerLogHandler(analyzer)
+    logger.addHandler(handler)
+    try:
+        logger.error("Database connection failed: Too many connections")
+    finally:
+        logger.removeHandler(handler)
+    assert analyzer.digest()["counters"]["connection_error"]["total"] == 1
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from mcp_server.mcp_tools import MySQLTools
+from mcp_server.mcp_tools import MySQLTools, ConnectionPool, connection_pool_config
 
 @pytest.fixture
 def mock_mysql_tools():
@@ -9,7 +9,7 @@ def mock_mysql_tools():
         # Mock the connection and cursor
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
-        mock_connect.return_value.__enter__.return_value = mock_conn
+        mock_connect.return_value = mock_conn
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
         
         # Setup mock return values for different queries
@@ -53,4 +53,123 @@ def test_get_table_row_count(mock_mysql_tools):
 def test_invalid_table_name_raises_error(mock_mysql_tools):
     """Test that invalid characters in table name raise a ValueError."""
     with pytest.raises(ValueError):
-        mock_mysql_tools.get_table_schema("employees; DROP TABLE users;")
\ No newline at end of file
+        mock_mysql_tools.get_table_schema("employees; DROP TABLE users;")
+
+def test_tool_calls_reuse_pooled_connection(mock_mysql_tools):
+    """Test that repeated tool calls draw from the pool instead of reconnecting."""
+    mock_mysql_tools.get_table_row_count("employees")
+    mock_mysql_tools.get_table_row_count("salaries")
+    stats = mock_mysql_tools.get_pool_stats()
+    assert stats['creates'] == 1
+    assert stats['checkouts'] == 2
+    assert stats['idle'] == 1
+
+def test_local_infile_only_when_requested():
+    """Test that only tools created for loading chunks allow LOAD DATA LOCAL INFILE."""
+    assert MySQLTools("test-project")._get_db_config()['local_infile'] is False
+    assert MySQLTools("test-project", secret_prefix="target-db", local_infile=True)._get_db_config()['local_infile'] is True
+
+def test_pool_replaces_unhealthy_connection():
+    """Test that a connection failing its ping on checkout is discarded and replaced."""
+    with patch('mcp_server.mcp_tools.pymysql.connect') as mock_connect:
+        stale, fresh = MagicMock(), MagicMock()
+        stale.ping.side_effect = Exception("gone away")
+        mock_connect.side_effect = [stale, fresh]
+        pool = ConnectionPool({}, max_size=1)
+        pool.release(pool.acquire())
+        assert pool.acquire() is fresh
+        assert pool.stats()['health_check_failures'] == 1
+        assert pool.stats()['creates'] == 2
+
+def test_pool_evicts_idle_connections():
+    """Test that connections idle longer than max_idle_seconds are closed."""
+    with patch('mcp_server.mcp_tools.pymysql.connect') as mock_connect:
+        pool = ConnectionPool({}, max_size=2, max_idle_seconds=0)
+        first = pool.acquire()
+        pool.release(first)
+        pool.acquire()
+        first.close.assert_called_once()
+        assert pool.stats()['evictions'] == 1
+        assert mock_connect.call_count == 2  # The evicted connection was replaced by a new one.
+
+def test_pool_is_bounded():
+    """Test that checkout times out once max_size connections are in use."""
+    with patch('mcp_server.mcp_tools.pymysql.connect'):
+        pool = ConnectionPool({}, max_size=1, checkout_timeout=0.05)
+        pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire()
+        assert pool.stats()['waits'] == 1
+
+def test_pool_size_covers_tool_threads_and_job_workers():
+    """Test that an unset max_size leaves room for every tool thread and each job's chunk workers."""
+    mcp_config = {"tool_workers": 16, "job_workers": 4, "throttle": {"max_workers": 8},
+                  "connection_pool": {"max_size": None, "checkout_timeout": 30}}
+    assert connection_pool_config(mcp_config) == {"max_size": 16 + 4 * 9, "checkout_timeout": 30}
+    assert connection_pool_config({"connection_pool": {"max_size": 8}})["max_size"] == 8
+    assert connection_pool_config({})["max_size"] == 16 + 4 * 17
+
+def test_get_schema_catalog_groups_rows_per_table():
+    """Test that the catalog is assembled from one query per information_schema view."""
+    results = {
+        "information_schema.TABLES": [
+            {'table_name': 'employees', 'engine': 'InnoDB', 'collation': 'utf8mb4_0900_ai_ci', 'row_estimate': 299000,
+             'data_length': 15220736, 'index_length': 0, 'auto_increment': None, 'create_options': '', 'update_time': None},
+        ],
+        "information_schema.COLUMNS": [
+            {'table_name': 'employees', 'name': 'emp_no', 'type': 'int', 'nullable': 'NO', 'default': None,
+             'key': 'PRI', 'extra': '', 'charset': None, 'collation': None},
+            {'table_name': 'employees', 'name': 'last_name', 'type': 'varchar(16)', 'nullable': 'NO', 'default': None,
+             'key': 'MUL', 'extra': '', 'charset': 'utf8mb4', 'collation': 'utf8mb4_0900_ai_ci'},
+        ],
+        "information_schema.STATISTICS": [
+            {'table_name': 'employees', 'index_name': 'PRIMARY', 'non_unique': 0, 'index_type': 'BTREE', 'column_name': 'emp_no', 'sub_part': None},
+            {'table_name': 'employees', 'index_name': 'ix_name', 'non_unique': 1, 'index_type': 'BTREE', 'column_name': 'last_name', 'sub_part': 8},
+        ],
+        "information_schema.PARTITIONS": [],
+    }
+    with patch('mcp_server.mcp_tools.pymysql.connect') as mock_connect:
+        mock_cursor = MagicMock()
+        mock_connect.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        queries = []
+        def execute(query, params=None):
+            queries.append(query)
+            for view, rows in results.items():
+                if view in query:
+                    mock_cursor.fetchall.return_value = [dict(r) for r in rows]
+            if "COUNT(*)" in query:
+                mock_cursor.fetchone.return_value = {'count': 300024}
+        mock_cursor.execute.side_effect = execute
+
+        tools = MySQLTools(project_id="test-project")
+        tools.secret_manager.get_secret = MagicMock(return_value="employees")
+        catalog = tools.get_schema_catalog(exact_count_tables=["employees"])
+
+    table = catalog['tables']['employees']
+    assert [c['name'] for c in table['columns']] == ['emp_no', 'last_name']
+    assert table['indexes'][1] == {'name': 'ix_name', 'unique': False, 'type': 'BTREE', 'columns': ['last_name(8)']}
+    assert table['partitioning'] is None
+    assert table['exact_row_count'] == 300024
+    assert len(queries) == 6
+    # UPDATE_TIME decides incremental skips, so it must not come from MySQL 8's statistics cache.
+    assert queries[0] == "SET SESSION information_schema_stats_expiry = 0;"
+
+@pytest.mark.parametrize("rate_limited", [False, True])
+def test_failed_dump_reports_mysqldump_stderr_and_removes_the_object(tmp_path, rate_limited):
+    """Test that a failing mysqldump is reported with its stderr and its truncated upload is deleted."""
+    import subprocess
+    popen = subprocess.Popen
+    stand_ins = {"mysqldump": ["sh", "-c", "printf 'INSERT INTO t'; echo 'Got error: 2013: Lost connection' >&2; exit 2"],
+                 "gsutil": ["sh", "-c", f"cat > {tmp_path}/object"]}
+    limiter = MagicMock()
+    tools = MySQLTools(project_id="test-project")
+    tools.db_config = {"host": "h", "user": "u", "password": "p"}
+    with patch("mcp_server.mcp_tools.subprocess.Popen", side_effect=lambda cmd, **kw: popen(stand_ins[cmd[0]], **kw)), \
+            patch("mcp_server.mcp_tools.subprocess.run") as run:
+        with pytest.raises(RuntimeError) as error:
+            tools.dump_table_to_gcs("db", "t", "bucket", "dumps", limiter if rate_limited else None)
+    assert "mysqldump exited with code 2: Got error: 2013: Lost connection" in str(error.value)
+    assert "gsutil" not in str(error.value)
+    assert (tmp_path / "object").read_bytes() == b"INSERT INTO t"
+    assert run.call_args.args[0] == ["gsutil", "-q", "rm", "gs://bucket/dumps/t.sql"]
+    assert limiter.consume.called == rate_limited
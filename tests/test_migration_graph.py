@@ -0,0 +1,68 @@
+import asyncio
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import TextMessage
+from autogen_agentchat.teams import GraphFlow
+from agents.migration_graph import NodeTimer, build_migration_graph, split_table_groups
+
+
+class SleepingAgent(BaseChatAgent):
+    """Agent that answers after a fixed delay, standing in for an LLM turn."""
+    def __init__(self, name, seconds):
+        super().__init__(name, "Test agent")
+        self.seconds = seconds
+
+    @property
+    def produced_message_types(self):
+        return (TextMessage,)
+
+    async def on_messages(self, messages, cancellation_token):
+        await asyncio.sleep(self.seconds)
+        return Response(chat_message=TextMessage(content="done", source=self.name))
+
+    async def on_reset(self, cancellation_token):
+        pass
+
+
+def test_table_groups_are_balanced_by_size():
+    """Test that tables are spread over the groups so each holds a similar number of bytes."""
+    tables = [{"table": t, "bytes": b} for t, b in [("a", 90), ("b", 50), ("c", 40), ("d", 10), ("e", 5)]]
+    assert split_table_groups(tables, 2) == [["a", "d"], ["b", "c", "e"]]
+    assert split_table_groups(tables[:1], 3) == [["a"]]
+    assert split_table_groups([], 3) == []
+
+def test_node_timer_reports_the_critical_path(clock):
+    """Test that nodes start when their last parent finishes and the longest chain is reported."""
+    timer = NodeTimer({"env": [], "schema": [], "migration": ["env", "schema"], "optimization": ["migration"]}, clock=clock)
+    timer.start()
+    for at, source in [(1, "env"), (3, "schema"), (4, "user"), (5, "migration"), (6, "optimization")]:
+        clock.now = at
+        timer.observe(source)
+    report = timer.report()
+    assert report["critical_path"] == ["schema", "migration", "optimization"]
+    assert report["nodes"]["migration"] == {"started": 3, "finished": 5, "seconds": 2}
+    assert report["wall_seconds"] == 6
+    assert report["node_seconds_total"] == 1 + 3 + 2 + 1
+
+def test_graph_runs_independent_branches_concurrently():
+    """Test that the run takes about as long as the longest branch rather than the sum of all nodes."""
+    graph, participants, parents = build_migration_graph(
+        SleepingAgent("env", 0.2), SleepingAgent("schema", 0.3), SleepingAgent("migration", 0.1),
+        [SleepingAgent("validation_1", 0.3), SleepingAgent("validation_2", 0.3)],
+        SleepingAgent("anomaly", 0.2), SleepingAgent("optimization", 0.1))
+    assert parents["optimization"] == ["validation_1", "validation_2", "anomaly"]
+
+    async def run():
+        timer = NodeTimer(parents)
+        timer.start()
+        async for message in GraphFlow(participants=participants, graph=graph).run_stream(task="migrate"):
+            if getattr(message, "source", None):
+                timer.observe(message.source)
+        return timer.report()
+
+    report = asyncio.run(run())
+    assert report["not_run"] == []
+    assert report["critical_path"][:2] == ["schema", "migration"]
+    assert report["critical_path"][-1] == "optimization"
+    assert report["node_seconds_total"] >= 1.5
+    assert report["wall_seconds"] < 1.3
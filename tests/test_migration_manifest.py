@@ -0,0 +1,115 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from mcp_server.migration_manifest import MigrationManifest, DONE, FAILED, IN_PROGRESS, PENDING, TABLE_LEVEL
+from mcp_server.checkpointed_migration import CheckpointedMigration
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = MigrationManifest(str(tmp_path / "manifest.db"))
+    yield manifest
+    manifest.close()
+
+
+def test_manifest_survives_reopen(tmp_path):
+    """Test that recorded state is durable across manifest instances."""
+    path = str(tmp_path / "manifest.db")
+    first = MigrationManifest(path)
+    first.start_run("run1", {"tables": ["employees"], "prefix": "dumps"})
+    first.save_chunk_plan("run1", "employees", [(None, (100,)), ((100,), None)])
+    first.mark("run1", "employees", 0, "upload", DONE, size_bytes=1234, checksum="abc")
+    first.close()
+
+    second = MigrationManifest(path)
+    assert second.get_run("run1") == {"tables": ["employees"], "prefix": "dumps"}
+    assert second.get_chunk_plan("run1", "employees") == [(None, (100,)), ((100,), None)]
+    assert second.completed_chunks("run1", "employees", "upload") == {0}
+    assert second.get_chunk("run1", "employees", 0, "upload")["bytes"] == 1234
+    second.close()
+
+def test_run_id_cannot_be_reused_with_other_params(manifest):
+    """Test that a run id resumes with its own parameters and rejects different ones."""
+    params = {"tables": ["employees"], "prefix": "dumps", "boundaries": [(None, (100,))]}
+    assert manifest.start_run("run1", params) == params
+    assert manifest.start_run("run1", dict(params))["tables"] == ["employees"]
+    with pytest.raises(ValueError, match="prefix"):
+        manifest.start_run("run1", dict(params, prefix="other"))
+    assert manifest.get_run("run1")["prefix"] == "dumps"
+
+def test_reset_in_flight(manifest):
+    """Test that chunks left in progress by a crash become pending again."""
+    manifest.mark("run1", "employees", 0, "export", IN_PROGRESS)
+    manifest.mark("run1", "employees", 1, "export", DONE)
+    assert manifest.reset_in_flight("run1") == 1
+    assert manifest.get_chunk("run1", "employees", 0, "export")["state"] == PENDING
+
+def test_resume_exports_only_missing_chunks(manifest):
+    """Test that a resumed run reuses the saved chunk plan and skips uploaded chunks."""
+    exporter = MagicMock()
+    exporter.plan_table.side_effect = lambda table, boundaries=None: {"boundaries": boundaries or [(None, (5,)), ((5,), None)]}
+    def export_table(table, prefix, completed_chunks, on_chunk, plan, on_chunk_start, on_chunk_error):
+        for index in range(len(plan["boundaries"])):
+            if index in completed_chunks:
+                continue
+            on_chunk_start(index)
+            if export_table.fail and index == 1:
+                on_chunk_error(index, RuntimeError("connection lost"))
+                raise RuntimeError("1 of 2 chunks failed")
+            on_chunk({"chunk": index, "rows": 5, "bytes": 10, "md5": "x", "key": f"k{index}"})
+        return {"chunks_exported": len(plan["boundaries"]) - len(completed_chunks),
+                "binlog_position": {"log_file": "binlog.000007", "log_position": 100 + len(completed_chunks)}}
+    exporter.export_table.side_effect = export_table
+
+    manifest.start_run("run1", {"tables": ["employees"], "prefix": "dumps"})
+    migration = CheckpointedMigration(manifest, "run1", exporter=exporter)
+    export_table.fail = True
+    assert migration.run(["employees"], "dumps")["failed_tables"] == ["employees"]
+    assert manifest.get_chunk("run1", "employees", 1, "export")["state"] == FAILED
+
+    export_table.fail = False
+    result = migration.resume()
+    assert result["status"] == "SUCCESS"
+    assert result["tables"]["employees"]["export"]["chunks_exported"] == 1
+    assert exporter.plan_table.call_args.kwargs["boundaries"] == [(None, (5,)), ((5,), None)]
+    assert manifest.completed_chunks("run1", "employees", "upload") == {0, 1}
+    assert manifest.get_cdc_position("run1") == ("binlog.000007", 101)
+
+def test_wrapped_table_dump_skips_done_tables(manifest):
+    """Test that whole-table dumps already uploaded in a run are not repeated."""
+    dump = MagicMock(return_value={"bytes": 99, "uri": "gs://b/p/employees.sql"})
+    wrapped = CheckpointedMigration(manifest, "run1").wrap_table_dump(dump)
+    wrapped("employees", None)
+    wrapped("employees", None)
+    assert dump.call_count == 1
+    assert manifest.get_chunk("run1", "employees", TABLE_LEVEL, "upload")["bytes"] == 99
+
+def test_mydumper_rerun_dumps_only_unfinished_tables(manifest, tmp_path):
+    """Test that a failed mydumper export is redone for its unfinished tables only, without stale files."""
+    from mcp_server.object_store import LocalObjectStore
+    output = tmp_path / "dump"
+    output.mkdir()
+    store = LocalObjectStore(str(tmp_path / "bucket"))
+    calls = []
+    def export(tables):
+        calls.append(sorted(os.listdir(output)))
+        return "Mydumper export failed with exit code 2." if len(calls) == 1 else "Mydumper export successful."
+    migration = CheckpointedMigration(manifest, "run1")
+    manifest.mark("run1", "done_table", TABLE_LEVEL, "export", DONE)
+    for name in ("db.orders.00000.sql.gz", "db.orders.00001.sql.gz", "db.orders_archive.00000.sql.gz", "metadata"):
+        (output / name).write_bytes(b"old")
+        store.put_file(str(output / name), f"dumps/{name}")
+
+    assert "failed" in migration.checkpointed_mydumper_export(export, "db", str(output), ["done_table", "orders"],
+                                                              store=store, prefix="dumps")
+    assert calls[0] == ["db.orders_archive.00000.sql.gz"]
+    assert [o["key"] for o in store.list_objects("dumps")] == ["dumps/db.orders_archive.00000.sql.gz", "dumps/metadata"]
+    assert manifest.get_chunk("run1", "orders", TABLE_LEVEL, "export")["state"] == FAILED
+
+    migration.checkpointed_mydumper_export(export, "db", str(output), ["done_table", "orders"], store=store,
+                                           prefix="dumps")
+    assert manifest.completed_chunks("run1", "orders", "export") == {TABLE_LEVEL}
+    assert manifest.completed_chunks("run1", "orders", "upload") == {TABLE_LEVEL}
+    assert migration.checkpointed_mydumper_export(export, "db", str(output), ["done_table", "orders"]).startswith(
+        "Every table")
+    assert len(calls) == 2
@@ -0,0 +1,79 @@
+import pytest
+
+from mcp_server.migration_metrics import MigrationMetrics, MydumperProgressParser
+
+
+def test_stage_rates_use_wall_clock_span(clock):
+    """Test that two overlapping 10s chunks over a 12s span report the wall-clock rate and busy time."""
+    clock.now = 100.0
+    metrics = MigrationMetrics(clock=clock)
+    clock.now = 110.0
+    metrics.record_stage("employees", "export", 10.0, rows=1000, size_bytes=4000, started_at=100.0)
+    clock.now = 112.0
+    metrics.record_stage("employees", "export", 10.0, rows=200, size_bytes=800, started_at=102.0)
+    metrics.record_retry("employees", "export")
+
+    export = metrics.snapshot()["tables"]["employees"]["export"]
+    assert export["operations"] == 2
+    assert export["busy_seconds"] == 20.0
+    assert export["wall_seconds"] == 12.0
+    assert export["rows_per_second"] == 100.0
+    assert export["bytes_per_second"] == 400.0
+    assert export["retries"] == 1
+
+
+def test_time_stage_records_errors_and_bottleneck(clock):
+    """Test that a failing block counts an error and that the busiest stage is reported as the bottleneck."""
+    clock.now = 100.0
+    metrics = MigrationMetrics(clock=clock)
+    with metrics.time_stage("salaries", "upload") as sample:
+        clock.now += 5
+        sample["bytes"] = 500
+    with pytest.raises(RuntimeError):
+        with metrics.time_stage("salaries", "export"):
+            raise RuntimeError("lost connection")
+    metrics.record_stage("titles", "export", 1.0, rows=10)
+
+    snap = metrics.snapshot()
+    assert snap["tables"]["salaries"]["upload"]["bytes"] == 500
+    assert snap["tables"]["salaries"]["export"]["errors"] == 1
+    assert snap["bottleneck_stage"] == "upload"
+    with pytest.raises(ValueError):
+        metrics.record_stage("titles", "transform", 1.0)
+
+
+def test_prometheus_text_format():
+    """Test the exposition format including label escaping and collector values."""
+    metrics = MigrationMetrics()
+    metrics.record_stage('odd"table', "load", 2.0, rows=10)
+    metrics.add_collector("source_connection_pool", lambda: {"waits": 3, "wait_seconds": 1.5})
+    text = metrics.to_prometheus()
+    assert "# TYPE migration_stage_rows_total counter" in text
+    assert 'migration_stage_rows_total{table="odd\\"table",stage="load"} 10' in text
+    assert 'migration_collector_value{collector="source_connection_pool",field="wait_seconds"} 1.5' in text
+    assert text.endswith("\n")
+
+
+def test_mydumper_progress_parser():
+    """Test that verbose=3 lines from old and new mydumper versions update live progress."""
+    metrics = MigrationMetrics()
+    parser = MydumperProgressParser(metrics, source="mydumper:employees")
+    parser.feed("** Message: 10:15:01.100: Thread 1 dumping schema for `employees`.`salaries`")
+    parser.feed("** Message: 10:15:02.123: Thread 1 dumping data for `employees`.`salaries`")
+    parser.feed("** Message: 10:15:03.456: Thread 2: dumping data from `employees`.`titles` WHERE `emp_no` < 10 "
+                "into /dump/employees.titles.00000.sql | Completed: 40% | Remaining tables: 3 / 5")
+    parser.feed("** Message: 10:15:04.000: Thread 3: dumping data from `employees`.`salaries` WHERE x "
+                "into /dump/employees.salaries.00001.sql | Completed: 55% | Remaining tables: 2 / 5")
+    parser.feed("** (mydumper:1234): WARNING **: 10:15:05.000: Broken table detected")
+    state = parser.feed("** Message: 10:16:00.000: Finished dump at: 2024-01-01 10:16:00")
+
+    assert state["data_jobs_started"] == 3
+    assert state["schema_jobs_started"] == 1
+    assert state["tables_seen"] == 2
+    assert state["table_jobs"] == {"salaries": 2, "titles": 1}
+    assert state["tables_done"] == 3 and state["tables_total"] == 5
+    assert state["warnings"] == 1
+    assert state["finished"] == 1 and state["percent_complete"] == 100.0
+    progress = metrics.snapshot()["progress"]["mydumper:employees"]
+    assert progress["threads"] == {"1": "salaries", "2": "titles", "3": "salaries"}
+    assert 'field="table_jobs",key="salaries"} 2' in metrics.to_prometheus()
@@ -1,28 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
 import pytest
 from unittest.mock import MagicMock, patch
+from mcp_server.migration_planner import (
+    GB,
+    GCP_DMS,
+    GCS_IMPORT,
+    MYDUMPER_MYLOADER,
+    MigrationPlanner,
+    select_strategy_by_threshold,
+)
 
-# This test file would ideally test the logic within the DataMigrationAgent.
-# Since the logic is embedded in the prompt, we test a hypothetical Python function
-# that simulates the agent's decision-making process.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-def select_migration_strategy(db_size_gb: float) -> str:
-    """Simulates the decision logic of the DataMigrationAgent."""
-    gcs_threshold = 100
-    dms_threshold = 500
-    
-    if db_size_gb < gcs_threshold:
-        return "GCS_IMPORT"
-    elif gcs_threshold <= db_size_gb < dms_threshold:
-        return "GCP_DMS"
-    else:
-        return "MYDUMPER_MYLOADER"
-
-@pytest.mark.parametrize("db_size, expected_strategy",)
+@pytest.mark.parametrize("db_size, expected_strategy", [
+    (50, GCS_IMPORT),
+    (100, GCP_DMS),
+    (499.9, GCP_DMS),
+    (500, MYDUMPER_MYLOADER),
+])
 def test_select_migration_strategy(db_size, expected_strategy):
-    """Tests the strategy selection logic based on database size."""
-    strategy = select_migration_strategy(db_size)
+    """Tests the threshold fallback used when the planner is unavailable."""
+    strategy = select_strategy_by_threshold(db_size)
     assert strategy == expected_strategy
 
+def _stats(sizes_gb):
+    return {name: {"data_length": int(gb * GB), "index_length": 0, "row_estimate": int(gb * 1_000_000)}
+            for name, gb in sizes_gb.items()}
+
+def test_planner_picks_fastest_strategy_by_size():
+    """Tests that the throughput model favours dump/import for small and mydumper for large databases."""
+    planner = MigrationPlanner()
+    small = planner.plan({"db_name": "employees"}, _stats({"employees": 0.5, "salaries": 0.3}))
+    large = planner.plan({"db_name": "employees"}, _stats({"employees": 400, "salaries": 300}))
+    assert small["strategy"] == GCS_IMPORT
+    assert large["strategy"] == MYDUMPER_MYLOADER
+    assert large["estimated_seconds"][MYDUMPER_MYLOADER] < large["estimated_seconds"][GCS_IMPORT]
+
+def test_plan_is_reproducible_and_ordered_largest_first():
+    """Tests that identical inputs give identical plans with a size-descending table order."""
+    planner = MigrationPlanner({"source_cpu_cores": 2, "max_threads": 8})
+    stats = _stats({"b": 1, "a": 1, "c": 5})
+    first = planner.plan({}, stats)
+    assert first == planner.plan({}, dict(reversed(list(stats.items()))))
+    assert first["table_order"] == ["c", "a", "b"]
+    assert first["threads"] <= 4
+    assert all(t["chunk_rows"] >= 1000 for t in first["tables"])
+
+def test_model_overrides_change_the_decision():
+    """Tests that the plan follows the configured bandwidth model rather than fixed thresholds."""
+    stats = _stats({"employees": 50})
+    assert MigrationPlanner().plan({}, stats)["strategy"] != GCS_IMPORT
+    fast_import = MigrationPlanner({"gcs_import_mb_per_sec": 2000, "export_mb_per_sec_per_thread": 2000,
+                                    "network_mb_per_sec": 2000})
+    assert fast_import.plan({}, stats)["strategy"] == GCS_IMPORT
+
 # To test the agent's execution flow, we would need to run an integration test
 # with a mocked AutoGen environment, which is more complex.
 # The following is a conceptual placeholder for such a test.
@@ -41,12 +76,29 @@ async def test_data_migration_agent_flow_conceptual(mock_create_agent):
     # 3. Simulate the conversation flow
     # The User Proxy initiates the chat.
     # The Migration Agent receives the task.
-    # The Migration Agent calls the 'get_db_metadata' tool.
-    # The mock tool returns the metadata.
-    # The Migration Agent decides on the "GCS_IMPORT" strategy.
-    # The Migration Agent then calls the 'run_gcs_dump' tool.
+    # The Migration Agent calls the 'plan_migration' tool.
+    # The mock tool returns the plan.
+    # The Migration Agent follows the plan's strategy, e.g. "GCS_IMPORT".
+    # The Migration Agent then calls the 'run_parallel_gcs_dump' tool.
     
     # Assert that the correct tools were called in sequence.
     # This requires a more integrated test setup to capture agent interactions.
     # For now, this serves as a conceptual outline.
-    assert True # Placeholder for a real integration test
\ No newline at end of file
+    assert True # Placeholder for a real integration test
+
+def test_build_migration_plan_from_live_source():
+    """Tests main.py's live planning path in a fresh interpreter, where only main.py sets up the imports."""
+    script = textwrap.dedent("""
+        import json
+        from unittest.mock import patch
+        import main
+        stats = {"employees": {"data_length": 3 * 1024 ** 3, "index_length": 0, "row_estimate": 3000000},
+                 "salaries": {"data_length": 1024 ** 3, "index_length": 0, "row_estimate": 1000000}}
+        with patch("mcp_server.mcp_tools.MySQLTools.get_db_metadata", return_value={"db_name": "employees"}), \\
+             patch("mcp_server.mcp_tools.MySQLTools.get_table_size_estimates", return_value={"tables": stats}):
+            print(json.dumps(main.build_migration_plan(main.load_config())))
+    """)
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    plan = json.loads(result.stdout)
+    assert plan["table_order"] == ["employees", "salaries"]
@@ -0,0 +1,237 @@
+import gzip
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from mcp_server.migration_manifest import DONE, MigrationManifest
+from mcp_server.object_store import LocalObjectStore
+from mcp_server.pipelined_loader import PipelinedLoader, classify_dump_files, sql_statements
+
+
+class RecordingTarget:
+    """Target tools whose connections record executed statements; `columns` answers get_column_types."""
+    def __init__(self, columns: dict = None):
+        self.statements = []
+        self.columns = columns or {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        target = self
+        class Cursor:
+            def __enter__(self): return self
+            def __exit__(self, *a): return False
+            def execute(self, sql, params=None):
+                with target.lock:
+                    target.statements.append(sql)
+                self.rows = target.columns.get(params[0], []) if "information_schema.COLUMNS" in sql else []
+            def fetchall(self): return self.rows
+        class Connection:
+            def cursor(self): return Cursor()
+            def begin(self): pass
+            def commit(self): pass
+        yield Connection()
+
+
+def write_dump(store, tmp_path, prefix, files):
+    for name, text in files.items():
+        local = tmp_path / name
+        with gzip.open(local, "wt", encoding="utf-8") as f:
+            f.write(text)
+        store.put_file(str(local), f"{prefix}/{name}")
+        os.remove(local)
+
+
+def insert(table, n):
+    return f"INSERT INTO `{table}` VALUES\n({n}),\n({n + 1});\n"
+
+
+def test_sql_statements_split_on_statement_terminator(tmp_path):
+    """Test that multi-line INSERTs are split only at ';' followed by a newline."""
+    path = tmp_path / "employees.t.00000.sql.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("/*!40101 SET NAMES utf8mb4*/;\nINSERT INTO `t` (`a`) VALUES\n('x;y'),\n('a\\nb');\n")
+    statements = list(sql_statements(str(path)))
+    assert len(statements) == 2
+    assert statements[1].startswith("INSERT") and "('a\\nb');" in statements[1]
+
+
+def test_classify_dump_files():
+    """Test mydumper and streaming-exporter file names."""
+    names = ["employees-schema-create.sql.gz", "metadata", "employees.salaries-schema.sql.gz",
+             "employees.salaries.00003.sql.gz", "employees.titles.sql", "employees.v_emp-schema-view.sql.gz",
+             "employees.t-schema-triggers.sql", "employees.big.00001.00002.sql.gz", "employees.x.00000.sql.zst"]
+    plan = classify_dump_files([{"key": f"dump/{n}", "bytes": 1} for n in names])
+    assert [o["table"] for o in plan["schemas"]] == ["salaries"]
+    assert [(o["table"], o["chunk"]) for o in plan["chunks"]] == [("salaries", (3,)), ("titles", ()), ("big", (1, 2))]
+    assert sorted(o["table"] for o in plan["post"]) == ["t", "v_emp"]
+    assert len(plan["skipped"]) == 3
+
+
+def test_load_runs_schemas_chunks_then_views(tmp_path):
+    """Test the load order and that every chunk statement reaches the target."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    write_dump(store, tmp_path, "dump", {
+        "db.a-schema.sql.gz": "CREATE TABLE `a` (id INT);\n",
+        "db.a.00000.sql.gz": insert("a", 1),
+        "db.a.00001.sql.gz": insert("a", 3),
+        "db.v-schema-view.sql.gz": "CREATE VIEW `v` AS SELECT 1;\n",
+    })
+    target = RecordingTarget()
+    result = PipelinedLoader(target, store, spool_dir=str(tmp_path)).load("dump")
+    user = [s for s in target.statements if not s.startswith("SET")]
+    assert user[0] == "DROP TABLE IF EXISTS `a`;"
+    assert user[1].startswith("CREATE TABLE")
+    assert sorted(user[2:4]) == [insert("a", 1), insert("a", 3)]
+    assert user[4].startswith("CREATE VIEW")
+    assert result["files_loaded"] == 2
+    assert [p for p in os.listdir(tmp_path) if p.startswith("pipelined-load-")] == []
+
+
+class SlowLoader(PipelinedLoader):
+    """Tracks disk usage and per-table concurrency while loads run."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak_active = {}
+        self.peak_spool_bytes = 0
+
+    def _execute_file(self, path, table=None, drop_first=False):
+        spool = os.path.dirname(path)
+        table = table or os.path.basename(path).split(".")[1]
+        with self.lock:
+            used = sum(os.path.getsize(os.path.join(spool, n)) for n in os.listdir(spool))
+            self.peak_spool_bytes = max(self.peak_spool_bytes, used)
+            self.active[table] = self.active.get(table, 0) + 1
+            self.peak_active[table] = max(self.peak_active.get(table, 0), self.active[table])
+        time.sleep(0.02)
+        with self.lock:
+            self.active[table] -= 1
+        return 1
+
+
+def test_disk_budget_and_table_concurrency(tmp_path):
+    """Test that the spool stays within budget and per-table limits are respected while loads overlap."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    files = {f"db.big.{i:05d}.sql.gz": insert("big", i) * 50 for i in range(12)}
+    files.update({f"db.small.{i:05d}.sql.gz": insert("small", i) for i in range(6)})
+    write_dump(store, tmp_path, "dump", files)
+    largest = max(o["bytes"] for o in store.list_objects("dump"))
+    loader = SlowLoader(RecordingTarget(), store, download_workers=4, load_workers=4,
+                        disk_budget_bytes=largest * 3, table_concurrency={"small": 1},
+                        default_table_concurrency=3, spool_dir=str(tmp_path))
+    result = loader.load("dump")
+    assert result["files_loaded"] == 18
+    assert result["peak_disk_bytes"] <= largest * 3
+    assert loader.peak_spool_bytes <= largest * 3
+    assert loader.peak_active["small"] == 1
+    assert loader.peak_active["big"] <= 3
+
+
+def test_completed_files_are_skipped_and_failures_reported(tmp_path):
+    """Test resuming with completed keys and that a failing chunk fails the load."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    write_dump(store, tmp_path, "dump", {
+        "db.a-schema.sql.gz": "CREATE TABLE `a` (id INT);\n",
+        "db.a.00000.sql.gz": insert("a", 1),
+        "db.a.00001.sql.gz": insert("a", 3),
+    })
+    target = RecordingTarget()
+    loaded = []
+    result = PipelinedLoader(target, store, spool_dir=str(tmp_path)).load(
+        "dump", completed_keys={"dump/db.a.00000.sql.gz"}, on_file=loaded.append)
+    assert result["files_skipped"] == 1
+    assert [r["chunk"] for r in loaded] == [(1,)]
+    # A partially loaded table is not recreated on resume.
+    assert not any(s.startswith(("DROP", "CREATE")) for s in target.statements)
+
+    class Failing(PipelinedLoader):
+        def _load_chunk(self, obj, local_path):
+            raise RuntimeError("Lost connection")
+    with pytest.raises(RuntimeError, match="1 of 1 chunk files failed"):
+        Failing(target, store, spool_dir=str(tmp_path)).load("dump", completed_keys={"dump/db.a.00000.sql.gz"})
+
+
+def test_resume_keys_multi_part_files_by_object_key(tmp_path):
+    """Test that mydumper files sharing their last number are checkpointed and resumed separately."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    names = [f"db.big.{i:05d}.00002.sql.gz" for i in range(3)]
+    write_dump(store, tmp_path, "dump", dict({"db.big-schema.sql.gz": "CREATE TABLE `big` (id INT);\n"},
+                                             **{name: insert("big", i * 10) for i, name in enumerate(names)}))
+    manifest = MigrationManifest(str(tmp_path / "manifest.db"))
+    on_file = lambda r: manifest.mark_file("run", r["key"], r["table"], "load", DONE, size_bytes=r["bytes"])
+
+    class FailingAfterFirst(PipelinedLoader):
+        def _load_chunk(self, obj, local_path):
+            if obj["key"] != f"dump/{names[0]}":
+                os.remove(local_path)
+                raise RuntimeError("Lost connection")
+            return super()._load_chunk(obj, local_path)
+    with pytest.raises(RuntimeError, match="2 of 3 chunk files failed"):
+        FailingAfterFirst(RecordingTarget(), store, spool_dir=str(tmp_path)).load("dump", on_file=on_file)
+    assert manifest.completed_files("run", "load") == {f"dump/{names[0]}"}
+
+    target = RecordingTarget()
+    result = PipelinedLoader(target, store, spool_dir=str(tmp_path)).load(
+        "dump", completed_keys=manifest.completed_files("run", "load"), on_file=on_file)
+    assert result["files_skipped"] == 1 and result["files_loaded"] == 2
+    assert sorted(s for s in target.statements if s.startswith("INSERT")) == [insert("big", 10), insert("big", 20)]
+    assert manifest.completed_files("run", "load") == {f"dump/{n}" for n in names}
+    assert manifest.summary("run")["tables"]["big"]["load"][DONE] == 3
+
+
+def test_tsv_chunks_are_loaded_with_load_data(tmp_path):
+    """Test that tab-separated chunks are decompressed and loaded with their header as the column list."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    local = tmp_path / "db.t.00000.tsv.gz"
+    with gzip.open(local, "wb") as f:
+        f.write(b"id\tname\n1\ta\\tb\n")
+    store.put_file(str(local), "dump/db.t.00000.tsv.gz")
+    loaded_files = []
+
+    class Target(RecordingTarget):
+        @contextmanager
+        def connection(self):
+            with super().connection() as connection:
+                original = connection.cursor
+                def cursor():
+                    c = original()
+                    execute = c.execute
+                    def record(sql, params=None):
+                        if sql.startswith("LOAD DATA"):
+                            with open(params[0], "rb") as f:
+                                loaded_files.append(f.read())
+                        execute(sql, params)
+                    c.execute = record
+                    return c
+                connection.cursor = cursor
+                yield connection
+
+    target = Target()
+    result = PipelinedLoader(target, store, spool_dir=str(tmp_path)).load("dump")
+    load = [s for s in target.statements if s.startswith("LOAD DATA")]
+    assert len(load) == 1
+    assert load[0].endswith("IGNORE 1 LINES (`id`, `name`);")
+    assert "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'" in load[0]
+    assert loaded_files == [b"id\tname\n1\ta\\tb\n"]
+    assert result["files_loaded"] == 1
+    assert [p for p in os.listdir(tmp_path) if p.startswith("pipelined-load-")] == []
+
+
+def test_tsv_binary_columns_are_decoded_with_unhex(tmp_path):
+    """Test that binary columns of the target table are loaded through variables and UNHEX()."""
+    store = LocalObjectStore(str(tmp_path / "store"))
+    local = tmp_path / "db.t.00000.tsv.gz"
+    with gzip.open(local, "wb") as f:
+        f.write(b"id\tdoc\traw\n1\t{\"k\": 1}\t00ff\n")
+    store.put_file(str(local), "dump/db.t.00000.tsv.gz")
+    column = lambda name, data_type: {"name": name, "data_type": data_type, "column_type": data_type,
+                                      "precision": None, "scale": None, "nullable": "YES"}
+    target = RecordingTarget({"t": [column("id", "int"), column("doc", "json"), column("raw", "varbinary")]})
+    PipelinedLoader(target, store, spool_dir=str(tmp_path)).load("dump")
+    load = [s for s in target.statements if s.startswith("LOAD DATA")]
+    assert load[0].endswith("IGNORE 1 LINES (`id`, `doc`, @hex2) SET `raw` = UNHEX(@hex2);")
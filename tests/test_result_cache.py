@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+from mcp_server.result_cache import ToolResultCache
+
+
+def test_hit_returns_cached_copy():
+    """Test that a repeated call is served from cache and cannot be mutated by the caller."""
+    cache = ToolResultCache(ttl_seconds=60)
+    compute = MagicMock(return_value={"tables": ["employees"]})
+    first = cache.get_or_compute("db_metadata", compute)
+    first["tables"].append("mutated")
+    second = cache.get_or_compute("db_metadata", compute)
+    assert compute.call_count == 1
+    assert second == {"tables": ["employees"]}
+    assert cache.stats()["per_tool"]["db_metadata"] == {"hits": 1, "misses": 1}
+
+def test_entries_are_keyed_by_arguments():
+    """Test that different arguments are cached separately."""
+    cache = ToolResultCache()
+    compute = MagicMock(side_effect=lambda table_name: [table_name])
+    assert cache.get_or_compute("get_table_schema", compute, table_name="employees") == ["employees"]
+    assert cache.get_or_compute("get_table_schema", compute, table_name="salaries") == ["salaries"]
+    assert compute.call_count == 2
+
+def test_entries_expire_after_ttl(clock):
+    """Test that entries older than the TTL are recomputed."""
+    cache = ToolResultCache(ttl_seconds=10, clock=clock)
+    compute = MagicMock(return_value=1)
+    cache.get_or_compute("db_metadata", compute)
+    clock.now = 11
+    cache.get_or_compute("db_metadata", compute)
+    assert compute.call_count == 2
+    assert cache.stats()["expirations"] == 1
+
+def test_lru_eviction_and_invalidation():
+    """Test the size bound and explicit invalidation."""
+    cache = ToolResultCache(max_entries=2)
+    for table in ("a", "b", "c"):
+        cache.get_or_compute("get_table_schema", lambda table_name: table_name, table_name=table)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    cache.get_or_compute("db_metadata", lambda: {})
+    assert cache.invalidate("get_table_schema") == 1
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,31 @@
+import json
+from mcp_server.result_encoding import ResultEncoder, compact_tables, estimate_tokens
+
+DESCRIBE_ROWS = [{"Field": f"column_{i}", "Type": "varchar(255)", "Null": "YES", "Key": "", "Default": None,
+                  "Extra": ""} for i in range(40)]
+
+
+def test_compact_tables_rewrites_uniform_rows():
+    """Test that lists of same-keyed dicts become column/row tables, at any depth."""
+    compact = compact_tables({"tables": {"employees": {"columns": DESCRIBE_ROWS}}})
+    table = compact["tables"]["employees"]["columns"]
+    assert table["columns"] == ["Field", "Type", "Null", "Key", "Default", "Extra"]
+    assert table["rows"][3] == ["column_3", "varchar(255)", "YES", "", None, ""]
+    mixed = [{"a": 1}, {"a": 2}, {"b": 3}]
+    assert compact_tables(mixed) == mixed
+    assert compact_tables(DESCRIBE_ROWS[:2]) == DESCRIBE_ROWS[:2]
+
+def test_encoder_counts_tokens_per_call():
+    """Test that large results are encoded with fewer tokens and small ones are sent unchanged."""
+    encoder = ResultEncoder(min_chars=500)
+    encoded = encoder.encode("get_table_schema", DESCRIBE_ROWS)
+    assert encoded["rows"][0][0] == "column_0"
+    assert encoder.encode("get_table_row_count", {"table": "t", "row_count": 5}) == {"table": "t", "row_count": 5}
+    stats = encoder.stats()
+    assert stats["calls"] == 2 and stats["encoded_calls"] == 1
+    schema = stats["per_tool"]["get_table_schema"]
+    assert schema["raw_tokens"] == estimate_tokens(json.dumps(DESCRIBE_ROWS))
+    assert schema["tokens"] < schema["raw_tokens"] / 2
+    assert stats["saved_tokens"] == schema["raw_tokens"] - schema["tokens"]
+    assert [c["tool"] for c in stats["recent"]] == ["get_table_schema", "get_table_row_count"]
+    assert ResultEncoder(enabled=False, min_chars=0).encode("t", DESCRIBE_ROWS) == DESCRIBE_ROWS
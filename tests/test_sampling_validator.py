@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import MagicMock
+from mcp_server.sampling_validator import INCONCLUSIVE, MATCH, MISMATCH, SamplingValidator, wilson_interval
+
+
+class InMemorySamplingValidator(SamplingValidator):
+    """Sampling validator whose source and target are dicts of {pk: (pk, name, amount)}."""
+    numeric_key = True
+
+    def _layout(self, table_name):
+        return ["id"], ["id", "name", "amount"], self.numeric_key
+
+    def _key_stats(self, table_name, pk_columns):
+        keys = sorted(self.source_tools)
+        return (keys[0], keys[-1], len(keys)) if keys else (None, None, 0)
+
+    def _key_at_offset(self, table_name, pk_columns, offset):
+        keys = sorted(self.source_tools)
+        return (keys[offset],) if offset < len(keys) else None
+
+    def _fetch(self, tools, table_name, pk_columns, columns, sample, limit):
+        if "low" in sample:
+            keys = [k for k in sorted(tools) if sample["low"] <= k < sample["high"]]
+        else:
+            keys = [k for k in sorted(tools) if (k,) >= sample["from"]
+                    and (sample.get("through") is None or (k,) <= sample["through"])]
+        return [tools[k] for k in keys[:limit]]
+
+
+def _table(rows):
+    return {i: (i, f"name{i}", i * 10) for i in range(0, rows * 3, 3)}
+
+
+def test_wilson_interval():
+    """Test the Wilson bound, which is about the rule of three (3/n) when nothing failed."""
+    low, high = wilson_interval(0, 10000)
+    assert low == 0.0
+    assert 0.0003 < high < 0.0004
+    low, high = wilson_interval(50, 1000)
+    assert low < 0.05 < high
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+def test_identical_tables_match_within_the_bound():
+    """Test that identical tables are MATCH once the sample is large enough."""
+    source = _table(50000)
+    validator = InMemorySamplingValidator(source, dict(source), workers=4, range_rows=10, max_mismatch_rate=0.01)
+    report = validator.validate_table("employees", max_rows=5000)
+    assert report["status"] == MATCH
+    assert report["rows_sampled"] >= 5000
+    assert report["rows_mismatched"] == 0
+    assert report["mismatch_rate_interval"][1] <= 0.01
+    assert report["mismatched_columns"] == {}
+
+def test_ranges_not_rows_are_the_sampling_unit():
+    """Test that a few large ranges do not bound the mismatch rate as tightly as the same rows drawn one by one."""
+    source = _table(50000)
+    validator = InMemorySamplingValidator(source, dict(source), workers=4, range_rows=100, max_mismatch_rate=0.01)
+    report = validator.validate_table("employees", max_rows=5000)
+    assert report["rows_sampled"] >= 5000
+    assert report["mismatch_rate_interval"][1] == pytest.approx(
+        wilson_interval(0, report["ranges_sampled"])[1], abs=1e-8)
+    assert report["mismatch_rate_interval"][1] > wilson_interval(0, report["rows_sampled"])[1] * 10
+    assert report["status"] == INCONCLUSIVE
+
+def test_empty_ranges_are_not_trials_and_low_keys_are_covered():
+    """Test that a differing cluster of keys just above the lowest key is found despite mostly empty ranges."""
+    source = {k: (k, f"name{k}", k) for k in list(range(1, 2001)) + list(range(10 ** 9, 10 ** 9 + 2001))}
+    target = {k: (k, "changed" if k <= 2000 else row[1], row[2]) for k, row in source.items()}
+    validator = InMemorySamplingValidator(source, target, workers=4, range_rows=100, seed=3)
+    report = validator.validate_table("employees", max_rows=4000)
+    assert report["status"] == MISMATCH
+    assert report["empty_ranges"] > report["ranges_sampled"]
+    assert report["mismatch_rate_interval"][1] == pytest.approx(
+        wilson_interval(report["ranges_with_mismatches"], report["ranges_sampled"])[1], abs=1e-8)
+
+def test_small_samples_are_inconclusive():
+    """Test that a sample too small to bound the mismatch rate is not reported as MATCH."""
+    source = _table(50000)
+    validator = InMemorySamplingValidator(source, dict(source), workers=2, range_rows=10, max_mismatch_rate=0.0001)
+    assert validator.validate_table("employees", max_rows=100)["status"] == INCONCLUSIVE
+
+def test_corruption_is_found_and_reproducible():
+    """Test that differing rows are found, the same seed samples the same ranges and suspects are escalated."""
+    source = _table(20000)
+    target = dict(source)
+    for k in list(target)[::50]:
+        target[k] = (k, target[k][1], None)  # A column lost its values on 2% of the rows.
+    del target[list(target)[7]]
+    full = MagicMock()
+    full.validate_table.return_value = {"status": "MISMATCH"}
+    validator = InMemorySamplingValidator(source, target, workers=4, range_rows=50, seed=7, full_validator=full)
+    report = validator.validate_table("employees", max_rows=4000, escalate=True)
+    assert report["status"] == MISMATCH
+    assert 0.005 < report["mismatch_rate"] < 0.05
+    assert report["mismatch_rate_interval"][0] <= report["mismatch_rate"] <= report["mismatch_rate_interval"][1]
+    assert list(report["mismatched_columns"]) == ["amount"]
+    assert report["full_validation"] == {"status": "MISMATCH"}
+    again = InMemorySamplingValidator(source, target, workers=4, range_rows=50, seed=7).validate_table(
+        "employees", max_rows=4000)
+    assert again["rows_sampled"] == report["rows_sampled"]
+    assert again["mismatched_key_examples"] == report["mismatched_key_examples"]
+
+def test_offset_ranges_for_non_numeric_keys():
+    """Test that tables without a numeric leading key are sampled from random row offsets."""
+    source = _table(5000)
+    target = dict(source)
+    target[300] = (300, "changed", 3000)
+    validator = InMemorySamplingValidator(source, target, workers=2, range_rows=500, seed=1)
+    validator.numeric_key = False
+    report = validator.validate_table("employees", max_rows=5000)
+    assert report["mode"] == "offset_ranges"
+    assert report["rows_sampled"] >= 5000
+
+def test_time_budget_and_empty_tables():
+    """Test that sampling stops at the time budget and that an empty table samples nothing."""
+    ticks = iter(range(1000))
+    validator = InMemorySamplingValidator(_table(1000), _table(1000), workers=1, range_rows=10, clock=lambda: next(ticks))
+    assert validator.validate_table("employees", max_rows=10 ** 9, max_seconds=3)["ranges_sampled"] <= 3
+    empty = InMemorySamplingValidator({}, {}, workers=2)
+    assert empty.validate_table("employees")["rows_sampled"] == 0
+    with pytest.raises(ValueError):
+        empty.validate_table("bad;name")
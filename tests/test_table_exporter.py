@@ -0,0 +1,256 @@
+import gzip
+import os
+from unittest.mock import MagicMock
+from mcp_server.object_store import LocalObjectStore, file_md5
+from mcp_server.table_exporter import StreamingTableExporter, chunk_key
+
+
+class FakeStreamingCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+def fake_connection(rows):
+    connection = MagicMock()
+    connection.cursor.return_value = FakeStreamingCursor(rows)
+    connection.server_status = 0
+    return connection
+
+
+def test_chunk_is_written_as_batched_inserts(tmp_path):
+    """Test that rows are streamed into multi-row INSERT statements with escaping."""
+    rows = [(i, f"it's {i}", None, b"\x00\xff") for i in range(5)]
+    exporter = StreamingTableExporter(MagicMock(), MagicMock(), fetch_rows=2, statement_rows=2)
+    out_path = tmp_path / "chunk.sql.gz"
+    with open(out_path, 'wb') as out:
+        count = exporter._write_chunk(fake_connection(rows), out, "employees", ["id", "name", "note", "raw"], ["id"], (0,), (5,))
+    text = gzip.open(out_path, 'rt', encoding='utf-8').read()
+    assert count == 5
+    assert text.count("INSERT INTO `employees`") == 3
+    assert "(1,'it\\'s 1',NULL,0x00ff)" in text
+    assert text.rstrip().endswith(";")
+
+def test_batches_are_encoded_on_the_encoder_pool(tmp_path):
+    """Test that batches encoded and compressed in other processes make the same file as in-thread encoding."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import datetime
+    import decimal
+    rows = [(i, f"it's {i}\n", None, b"\x00\xff", decimal.Decimal("1.50"), datetime.date(2020, 1, i + 1))
+            for i in range(25)]
+    columns = ["id", "name", "note", "raw", "price", "day"]
+    texts = []
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("fork")) as pool:
+        for encoder_pool in (None, pool):
+            exporter = StreamingTableExporter(MagicMock(), MagicMock(), fetch_rows=4, statement_rows=2,
+                                              encoder_pool=encoder_pool)
+            out_path = tmp_path / f"chunk-{len(texts)}.sql.gz"
+            with open(out_path, 'wb') as out:
+                assert exporter._write_chunk(fake_connection(rows), out, "t", columns, ["id"], None, None) == 25
+            texts.append(gzip.open(out_path, 'rt', encoding='utf-8').read())
+    assert texts[0] == texts[1]
+    assert texts[0].count("INSERT INTO `t`") == 13
+    assert "(3,'it\\'s 3\\n',NULL,0x00ff,1.50,'2020-01-04')" in texts[0]
+
+def test_no_backslash_escapes_sql_mode_doubles_quotes(tmp_path):
+    """Test that strings are escaped the way the source connection's sql_mode expects."""
+    from pymysql.constants.SERVER_STATUS import SERVER_STATUS_NO_BACKSLASH_ESCAPES
+    connection = fake_connection([(1, "it's a\\b")])
+    connection.server_status = SERVER_STATUS_NO_BACKSLASH_ESCAPES
+    out_path = tmp_path / "chunk.sql.gz"
+    with open(out_path, 'wb') as out:
+        StreamingTableExporter(MagicMock(), MagicMock())._write_chunk(connection, out, "t", ["id", "s"], ["id"],
+                                                                       None, None)
+    assert "(1,'it''s a\\b')" in gzip.open(out_path, 'rt', encoding='utf-8').read()
+
+def test_local_store_multipart_upload(tmp_path):
+    """Test that large files are assembled from parallel parts byte for byte."""
+    source = tmp_path / "big.bin"
+    source.write_bytes(os.urandom(300_000))
+    store = LocalObjectStore(str(tmp_path / "bucket"), part_size=64_000, multipart_threshold=100_000, upload_workers=4)
+    result = store.put_file(str(source), "dumps/big.bin")
+    assert result["bytes"] == 300_000
+    assert result["md5"] == file_md5(str(source))
+    assert store.list_objects("dumps/") == [{"key": "dumps/big.bin", "bytes": 300_000}]
+
+def test_chunk_key_follows_mydumper_naming():
+    """Test that chunk files use mydumper's naming so existing loaders can read them."""
+    assert chunk_key("dumps/run1/", "employees", "salaries", 7) == "dumps/run1/employees.salaries.00007.sql.gz"
+
+def test_delimited_chunk_escapes_values_for_load_data(tmp_path):
+    """Test the header line, NULL marker and escaping of tabs, newlines, backslashes and NUL bytes."""
+    import datetime
+    import decimal
+    rows = [(1, "tab\there", None, b"\x00\\\n"), (2, "line\r\nend", decimal.Decimal("1.50"),
+                                                  datetime.datetime(2020, 1, 2, 3, 4, 5))]
+    exporter = StreamingTableExporter(MagicMock(), MagicMock(), fetch_rows=1, output_format="tsv")
+    out_path = tmp_path / "chunk.tsv.gz"
+    with open(out_path, 'wb') as out:
+        count = exporter._write_delimited_chunk(fake_connection(rows), out, "t", ["id", "a", "b", "c"], ["id"], None, None)
+    assert count == 2
+    assert gzip.open(out_path, 'rb').read() == (
+        b"id\ta\tb\tc\n"
+        b"1\ttab\\there\t\\N\t\\0\\\\\\n\n"
+        b"2\tline\\r\\nend\t1.50\t2020-01-02 03:04:05\n")
+
+def test_delimited_chunk_writes_binary_columns_as_hex(tmp_path):
+    """Test that binary columns are hex-encoded, so text can be loaded as utf8mb4 without touching bytes."""
+    rows = [(1, "caf\u00e9", b"\x00\t\xff"), (2, None, None), (3, "x", b"")]
+    exporter = StreamingTableExporter(MagicMock(), MagicMock(), output_format="tsv")
+    out_path = tmp_path / "chunk.tsv.gz"
+    with open(out_path, 'wb') as out:
+        exporter._write_delimited_chunk(fake_connection(rows), out, "t", ["id", "name", "raw"], ["id"], None, None,
+                                        hex_columns={"raw"})
+    assert gzip.open(out_path, 'rb').read() == (
+        b"id\tname\traw\n"
+        b"1\tcaf\xc3\xa9\t0009ff\n"
+        b"2\t\\N\t\\N\n"
+        b"3\tx\t\n")
+
+def test_unknown_output_format_is_rejected():
+    import pytest
+    with pytest.raises(ValueError):
+        StreamingTableExporter(MagicMock(), MagicMock(), output_format="csv")
+
+def test_replace_ranges_chunk_deletes_its_key_range_first(tmp_path):
+    """Test that an incremental chunk file deletes its key range before inserting the rows."""
+    exporter = StreamingTableExporter(MagicMock(), MagicMock())
+    out_path = tmp_path / "chunk.sql.gz"
+    with open(out_path, 'wb') as out:
+        exporter._write_chunk(fake_connection([(5, "a")]), out, "employees", ["id", "name"], ["id"], (5,), ("x{y}",),
+                              delete_range=True)
+    lines = gzip.open(out_path, 'rt', encoding='utf-8').read().splitlines()
+    assert lines[1] == "DELETE FROM `employees` WHERE `id` >= 5 AND `id` < 'x{y}';"
+    assert lines[2].startswith("INSERT INTO `employees`")
+
+def _column(name, data_type, column_type=None, precision=None, scale=None):
+    return {"name": name, "data_type": data_type, "column_type": column_type or data_type,
+            "precision": precision, "scale": scale, "nullable": True}
+
+def test_parquet_chunk_maps_mysql_types(tmp_path):
+    """Test DECIMAL, DATETIME, JSON, BLOB and other columns in Parquet row groups, with zero dates as NULL."""
+    import datetime
+    import decimal
+    import pytest
+    pq = pytest.importorskip("pyarrow.parquet")
+    columns = [_column("id", "bigint", "bigint unsigned"), _column("price", "decimal", "decimal(10,2)", 10, 2),
+               _column("created", "datetime"), _column("doc", "json"), _column("raw", "longblob"),
+               _column("flags", "set", "set('a','b')"), _column("bits", "bit", "bit(8)"), _column("spent", "time")]
+    rows = [(2 ** 63 + i, decimal.Decimal(f"{i}.25"), datetime.datetime(2020, 1, 2, 3, 4, 5, i),
+             '{"k": %d}' % i, bytes([i, 0, 255]), {"b", "a"}, bytes([i]), datetime.timedelta(hours=-i))
+            for i in range(5)]
+    rows[3] = (rows[3][0], None, "0000-00-00 00:00:00") + rows[3][3:]
+    exporter = StreamingTableExporter(MagicMock(), MagicMock(), fetch_rows=2, output_format="parquet",
+                                      row_group_rows=3)
+    path = str(tmp_path / "chunk.parquet")
+    assert exporter._write_parquet_chunk(fake_connection(rows), path, "t", columns, ["id"], None, None) == 5
+
+    parquet = pq.ParquetFile(path)
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [3, 2]
+    schema = parquet.schema_arrow
+    assert str(schema.field("id").type) == "uint64"
+    assert str(schema.field("price").type) == "decimal128(10, 2)"
+    assert str(schema.field("created").type) == "timestamp[us]"
+    assert str(schema.field("raw").type) == "large_binary"
+    assert schema.field("doc").metadata == {b"mysql_type": b"json"}
+    table = parquet.read().to_pydict()
+    assert table["id"][4] == 2 ** 63 + 4
+    assert table["price"][:2] == [decimal.Decimal("0.25"), decimal.Decimal("1.25")]
+    assert table["price"][3] is None and table["created"][3] is None
+    assert table["created"][1] == datetime.datetime(2020, 1, 2, 3, 4, 5, 1)
+    assert table["doc"][2] == '{"k": 2}'
+    assert table["raw"][1] == b"\x01\x00\xff"
+    assert table["flags"][0] == "a,b"
+    assert table["bits"][4] == 4
+    assert table["spent"][2] == datetime.timedelta(hours=-2)
+
+def test_parquet_export_uploads_parquet_chunks(tmp_path):
+    """Test that a parquet export writes one .parquet object per chunk through the object store."""
+    import pytest
+    pq = pytest.importorskip("pyarrow.parquet")
+    from mcp_server.object_store import LocalObjectStore
+    source = MagicMock()
+    source.connection.return_value.__enter__.side_effect = lambda: fake_connection([(1, "a"), (2, "b")])
+    store = LocalObjectStore(str(tmp_path / "bucket"))
+    exporter = StreamingTableExporter(source, store, output_format="parquet", spool_dir=str(tmp_path),
+                                      consistent_snapshot=False)
+    plan = {"table": "t", "database": "db", "pk_columns": ["id"], "columns": ["id", "name"],
+            "boundaries": [(None, (2,)), ((2,), None)],
+            "column_types": [_column("id", "int"), _column("name", "varchar", "varchar(10)")]}
+    result = exporter.export_table("t", "analytics", plan=plan, include_schema=False)
+    assert result["files"] == ["analytics/db.t.00000.parquet", "analytics/db.t.00001.parquet"]
+    local = str(tmp_path / "copy.parquet")
+    store.get_file("analytics/db.t.00000.parquet", local)
+    assert pq.read_table(local).to_pydict() == {"id": [1, 2], "name": ["a", "b"]}
+
+class SnapshotConnection:
+    """A connection that logs its statements to a shared list and streams `rows` for chunk queries."""
+    def __init__(self, name, log, rows=()):
+        self.name, self.log, self.rows = name, log, rows
+
+    def cursor(self, cursor_class=None):
+        connection = self
+        class Cursor(FakeStreamingCursor):
+            def execute(self, query, params=None):
+                connection.log.append((connection.name, query.split(" FROM ")[0] if "SELECT" in query else query))
+            def fetchone(self):
+                return {"File": "binlog.000042", "Position": 1234}
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                pass
+        return Cursor(self.rows)
+
+    server_status = 0
+
+    def rollback(self):
+        self.log.append((self.name, "ROLLBACK"))
+
+
+def test_chunks_share_one_snapshot_and_report_its_binlog_position(tmp_path):
+    """Test that workers start their snapshots while the table is locked and read every chunk in them."""
+    log = []
+    connections = [SnapshotConnection("coordinator", log)] + [SnapshotConnection(f"w{i}", log, [(1, "a")])
+                                                               for i in range(2)]
+    source = MagicMock()
+    source.connections.return_value.__enter__.return_value = connections
+    store = LocalObjectStore(str(tmp_path / "bucket"))
+    exporter = StreamingTableExporter(source, store, workers=2, spool_dir=str(tmp_path))
+    plan = {"table": "t", "database": "db", "pk_columns": ["id"], "columns": ["id", "name"],
+            "boundaries": [(None, (2,)), ((2,), (4,)), ((4,), None)]}
+    result = exporter.export_table("t", "dumps", plan=plan, include_schema=False)
+    source.connections.assert_called_once_with(3)
+    source.connection.assert_not_called()
+    assert result["binlog_position"] == {"log_file": "binlog.000042", "log_position": 1234}
+    assert result["chunks_exported"] == 3
+    assert log[:6] == [("coordinator", "LOCK TABLES `t` READ;"),
+                       ("w0", "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;"),
+                       ("w0", "START TRANSACTION WITH CONSISTENT SNAPSHOT;"),
+                       ("w1", "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;"),
+                       ("w1", "START TRANSACTION WITH CONSISTENT SNAPSHOT;"),
+                       ("coordinator", "SHOW MASTER STATUS;")]
+    assert log[6] == ("coordinator", "UNLOCK TABLES;")
+    reads = [name for name, statement in log[7:] if statement.startswith("SELECT")]
+    assert len(reads) == 3 and set(reads) <= {"w0", "w1"}
+    assert log[-2:] == [("w0", "ROLLBACK"), ("w1", "ROLLBACK")]
+
+def test_object_store_interface_is_abstract():
+    """Test that a store missing part of the interface cannot be created."""
+    import pytest
+    from mcp_server.object_store import ObjectStore
+    class UploadOnlyStore(ObjectStore):
+        def put_file(self, local_path, key):
+            return {"key": key}
+    with pytest.raises(TypeError):
+        UploadOnlyStore()
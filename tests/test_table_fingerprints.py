@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import MagicMock
+from mcp_server.checkpointed_migration import CheckpointedMigration
+from mcp_server.migration_manifest import MigrationManifest
+from mcp_server.table_fingerprints import CHUNKS, FULL, SKIP, TableFingerprinter, schema_hash, summarize_plan
+from tests.test_chunk_validator import InMemoryValidator
+
+
+def _entry(update_time=None, columns=("id", "name")):
+    return {"row_estimate": 1000, "update_time": update_time, "engine": "InnoDB", "collation": "utf8mb4_0900_ai_ci",
+            "columns": [{"name": c, "type": "int"} for c in columns], "indexes": [], "partitioning": None}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = MigrationManifest(str(tmp_path / "manifest.db"))
+    yield manifest
+    manifest.close()
+
+
+def test_schema_hash_ignores_statistics():
+    """Test that the schema hash changes with the columns but not with row estimates."""
+    assert schema_hash(_entry()) == schema_hash(dict(_entry(), row_estimate=5))
+    assert schema_hash(_entry()) != schema_hash(_entry(columns=("id", "name", "email")))
+
+def test_plan_skips_tables_with_unchanged_update_time():
+    """Test that an unchanged UPDATE_TIME skips a table without checksumming it."""
+    validator = MagicMock()
+    fingerprinter = TableFingerprinter(None, validator)
+    baseline = {"employees": dict(TableFingerprinter.describe(_entry("2024-01-01 00:00:00")), chunks=[[1, 2]])}
+    catalog = {"employees": _entry("2024-01-01 00:00:00"), "salaries": _entry()}
+    plan = fingerprinter.plan(baseline, catalog=catalog)
+    assert plan["employees"]["action"] == SKIP
+    assert plan["employees"]["fingerprint"]["chunks"] == [[1, 2]]
+    assert plan["salaries"]["action"] == FULL
+    validator.checksum_chunks.assert_not_called()
+
+def test_plan_finds_changed_chunks():
+    """Test that without UPDATE_TIME only the chunks whose checksums differ are planned."""
+    rows = {i: f"name{i}" for i in range(1000)}
+    validator = InMemoryValidator(rows, {}, workers=4, chunk_rows=100)
+    fingerprinter = TableFingerprinter(None, validator)
+    catalog = {"employees": _entry()}
+    baseline = {"employees": fingerprinter.fingerprint("employees", catalog["employees"])}
+
+    assert fingerprinter.plan(baseline, catalog=catalog)["employees"]["action"] == SKIP
+    rows[537] = "changed"
+    plan = fingerprinter.plan(baseline, catalog=catalog)
+    assert plan["employees"]["action"] == CHUNKS
+    assert plan["employees"]["chunks"] == [5]
+    assert summarize_plan(plan)["changed_chunks"] == 1
+
+    changed_schema = {"employees": _entry(columns=("id", "name", "email"))}
+    assert fingerprinter.plan(baseline, catalog=changed_schema)["employees"]["reasons"] == ["schema changed"]
+
+def test_plan_rejects_unknown_tables():
+    """Test that planning a table missing from the source raises ValueError."""
+    with pytest.raises(ValueError):
+        TableFingerprinter(None, MagicMock()).plan({}, tables=["missing"], catalog={})
+
+def test_fingerprints_round_trip(manifest):
+    """Test that fingerprints are stored per run."""
+    manifest.save_fingerprint("run1", "employees", {"schema_hash": "abc", "chunks": [[1, 2]]})
+    assert manifest.get_fingerprints("run1") == {"employees": {"schema_hash": "abc", "chunks": [[1, 2]]}}
+    assert manifest.get_fingerprints("run2") == {}
+
+def test_incremental_run_exports_only_changed_chunks(manifest):
+    """Test that a run against a baseline skips unchanged chunks and replaces the changed key ranges."""
+    rows = {i: f"name{i}" for i in range(500)}
+    validator = InMemoryValidator(rows, {}, workers=2, chunk_rows=100)
+    fingerprinter = TableFingerprinter(None, validator)
+    exported = []
+    exporter = MagicMock()
+    exporter.plan_table.side_effect = lambda table, boundaries=None: {
+        "boundaries": boundaries or validator._chunk_boundaries(table, ["id"])}
+    def export_table(table, prefix, completed_chunks, on_chunk, plan, on_chunk_start, on_chunk_error, **kwargs):
+        for index in range(len(plan["boundaries"])):
+            if index not in completed_chunks:
+                on_chunk({"chunk": index, "rows": 100, "bytes": 10, "md5": "x", "key": f"k{index}"})
+                exported.append((index, kwargs))
+        return {}
+    exporter.export_table.side_effect = export_table
+    catalog = {"employees": _entry()}
+
+    first = CheckpointedMigration(manifest, "run1", exporter=exporter, validator=validator, fingerprinter=fingerprinter)
+    first.run(["employees"], "dumps", incremental=fingerprinter.plan({}, catalog=catalog))
+    assert len(exported) == 5
+    assert len(manifest.get_fingerprints("run1")["employees"]["chunks"]) == 5
+
+    rows[250] = "changed"
+    exported.clear()
+    plan = fingerprinter.plan(manifest.get_fingerprints("run1"), catalog=catalog)
+    second = CheckpointedMigration(manifest, "run2", exporter=exporter, validator=validator, fingerprinter=fingerprinter)
+    result = second.run(["employees"], "dumps", incremental=plan)
+    assert result["status"] == "SUCCESS"
+    assert exported == [(2, {"include_schema": False, "replace_ranges": True})]
+    assert fingerprinter.plan(manifest.get_fingerprints("run2"), catalog=catalog)["employees"]["action"] == SKIP
+
+    third = CheckpointedMigration(manifest, "run3", exporter=exporter, validator=validator, fingerprinter=fingerprinter)
+    result = third.run(["employees"], "dumps", incremental=fingerprinter.plan(manifest.get_fingerprints("run2"),
+                                                                             catalog=catalog))
+    assert result["skipped_tables"] == ["employees"]
+    assert "employees" in manifest.get_fingerprints("run3")